@@ -0,0 +1,378 @@
+"""
+Event-sourced incremental aggregates
+
+Summary counters are kept in memory and moved by each ingested event instead
+of being recomputed from table scans:
+
+- documents by docType and status (completion rates)
+- active bottlenecks by code and by category (BottleneckCodes.category)
+- approvals by status
+- shipments total and by riskLevel (changed only by reconciliation)
+
+An event costs O(1):
+
+- entityType DOCUMENT: the shipment's document in fromStatus moves to
+  toStatus. Events carry no docType, so the document is the shipment's only
+  one in fromStatus (or any status, if fromStatus is omitted and the shipment
+  has one document); ambiguous events are counted as unresolved and left to
+  reconciliation
+- entityType APPROVAL: one approval moves fromStatus -> toStatus (an
+  event whose fromStatus count is already zero is counted as unresolved and
+  moves nothing)
+- any event with a bottleneckCode sets the shipment's current bottleneck
+  ("NONE" clears it); shipments created since the last reconciliation are
+  left to the next one. Categories are resolved before the counter lock is
+  taken, so a reference-data reload never blocks readers
+
+A periodic full reconciliation rebuilds the counters from Airtable and
+replays the events applied while it was loading, correcting any drift
+(missed events, manual edits, ambiguous document events). The load may
+already include those events, so only the idempotent parts are replayed
+(document and bottleneck states); approval moves are left to the next
+reconciliation.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Counters are rebuilt from Airtable once older than this
+RECONCILE_SECONDS = 15 * 60
+
+DOC_TYPES = ("BOE", "DO", "COO", "HBL", "CIPL")
+COMPLETED_DOC_STATUSES = ("ISSUED", "RELEASED", "APPROVED")
+RISK_LEVELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+NO_BOTTLENECK = "NONE"
+UNKNOWN_CATEGORY = "UNKNOWN"
+
+# Reconciliation source rows
+ShipmentRow = Tuple[str, Optional[str], Optional[str]]  # shptNo, bottleneck code, riskLevel
+DocumentRow = Tuple[str, Optional[str], Optional[str]]  # shptNo, docType, status
+
+
+def _bump(counter: Dict[str, int], key: str, delta: int) -> bool:
+    """Add delta to counter[key]; refuses to go below zero"""
+    value = counter.get(key, 0) + delta
+    if value < 0:
+        return False
+    if value:
+        counter[key] = value
+    else:
+        counter.pop(key, None)
+    return True
+
+
+def _no_category(code: str) -> Optional[str]:
+    return None
+
+
+def _resolve_category(category_of: Callable[[str], Optional[str]], code: str) -> str:
+    """Category of a bottleneck code (UNKNOWN if missing or the lookup fails)"""
+    try:
+        return category_of(code) or UNKNOWN_CATEGORY
+    except Exception:
+        return UNKNOWN_CATEGORY
+
+
+class _Aggregates:
+    """Counter state for one reconciliation"""
+
+    def __init__(
+        self,
+        shipments: Iterable[ShipmentRow],
+        documents: Iterable[DocumentRow],
+        approval_statuses: Iterable[Optional[str]],
+        loaded_at: float,
+        category_of: Callable[[str], Optional[str]] = _no_category,
+    ):
+        self.loaded_at = loaded_at
+        self.total_shipments = 0
+        self.risk: Dict[str, int] = {level: 0 for level in RISK_LEVELS}
+        self.bottleneck_of: Dict[str, str] = {}
+        self.bottlenecks: Dict[str, int] = {}
+        self.categories: Dict[str, int] = {}
+        # Category each counted bottleneck code was filed under
+        self.code_categories: Dict[str, str] = {}
+        self.docs_of: Dict[str, Dict[str, str]] = {}
+        self.documents: Dict[str, Dict[str, int]] = {}
+        self.approvals: Dict[str, int] = {}
+        self.stats = {"applied": 0, "unresolved": 0}
+
+        for shpt_no, code, risk in shipments:
+            self.total_shipments += 1
+            risk = risk or "LOW"
+            self.risk[risk] = self.risk.get(risk, 0) + 1
+            code = code or NO_BOTTLENECK
+            if code != NO_BOTTLENECK and code not in self.code_categories:
+                self.code_categories[code] = _resolve_category(category_of, code)
+            self._bump_bottleneck(code, 1)
+            if shpt_no:
+                self.bottleneck_of[shpt_no] = code
+
+        for shpt_no, doc_type, status in documents:
+            if not doc_type:
+                continue
+            status = status or "UNKNOWN"
+            _bump(self.documents.setdefault(doc_type, {}), status, 1)
+            if shpt_no:
+                self.docs_of.setdefault(shpt_no, {})[doc_type] = status
+
+        for status in approval_statuses:
+            _bump(self.approvals, status or "UNKNOWN", 1)
+
+    # ==================== Deltas ====================
+    def apply(
+        self, event: Dict[str, Any], category: Optional[str] = None, replay: bool = False
+    ) -> None:
+        """
+        Move the counters by one event
+
+        Args:
+            event: Committed event fields
+            category: Category of the event's bottleneckCode, resolved by the
+                      caller (UNKNOWN if the code is new and this is None)
+            replay: The counters were loaded while the event was committed;
+                    skip the non-idempotent approval move
+        """
+        entity = (event.get("entityType") or "").upper()
+        shpt_no = event.get("shptNo")
+        from_status = event.get("fromStatus") or None
+        to_status = event.get("toStatus") or None
+        resolved = True
+
+        if entity == "DOCUMENT" and to_status:
+            resolved = self._apply_document(shpt_no, from_status, to_status)
+        elif entity == "APPROVAL" and to_status and not replay:
+            if from_status and not _bump(self.approvals, from_status, -1):
+                # No approval in fromStatus to move; reconciliation settles it
+                resolved = False
+            else:
+                _bump(self.approvals, to_status, 1)
+
+        code = event.get("bottleneckCode")
+        if code and shpt_no:
+            previous = self.bottleneck_of.get(shpt_no)
+            if previous is None:
+                # Shipment created after the last reconciliation
+                resolved = False
+            elif previous != code:
+                if code != NO_BOTTLENECK and code not in self.code_categories:
+                    self.code_categories[code] = category or UNKNOWN_CATEGORY
+                self._bump_bottleneck(previous, -1)
+                self._bump_bottleneck(code, 1)
+                self.bottleneck_of[shpt_no] = code
+
+        self.stats["applied"] += 1
+        if not resolved:
+            self.stats["unresolved"] += 1
+
+    def _bump_bottleneck(self, code: str, delta: int) -> None:
+        _bump(self.bottlenecks, code, delta)
+        if code == NO_BOTTLENECK:
+            return
+        _bump(self.categories, self.code_categories.get(code, UNKNOWN_CATEGORY), delta)
+
+    def _apply_document(
+        self, shpt_no: Optional[str], from_status: Optional[str], to_status: str
+    ) -> bool:
+        docs = self.docs_of.get(shpt_no) if shpt_no else None
+        if not docs:
+            return False
+        if from_status:
+            candidates = [doc_type for doc_type, status in docs.items() if status == from_status]
+        else:
+            candidates = list(docs)
+        if len(candidates) != 1:
+            return False
+
+        doc_type = candidates[0]
+        by_status = self.documents.setdefault(doc_type, {})
+        _bump(by_status, docs[doc_type], -1)
+        _bump(by_status, to_status, 1)
+        docs[doc_type] = to_status
+        return True
+
+    # ==================== Views ====================
+    def completion_rates(self) -> Dict[str, float]:
+        rates = {}
+        for doc_type in DOC_TYPES:
+            by_status = self.documents.get(doc_type, {})
+            total = sum(by_status.values())
+            completed = sum(by_status.get(status, 0) for status in COMPLETED_DOC_STATUSES)
+            rates[f"{doc_type.lower()}Rate"] = round(completed / total, 2) if total else 0.0
+        return rates
+
+    def top_bottlenecks(self, limit: int = 5) -> List[Dict[str, Any]]:
+        top = sorted(self.bottlenecks.items(), key=lambda item: item[1], reverse=True)
+        return [{"code": code, "count": count} for code, count in top[:limit]]
+
+    def counters(self) -> Dict[str, Dict[str, int]]:
+        """Flat view used to measure drift between reconciliations"""
+        flat = {
+            "risk": dict(self.risk),
+            "bottlenecks": dict(self.bottlenecks),
+            "categories": dict(self.categories),
+            "approvals": dict(self.approvals),
+        }
+        for doc_type, by_status in self.documents.items():
+            flat[f"documents.{doc_type}"] = dict(by_status)
+        return flat
+
+
+def _drift(old: Dict[str, Dict[str, int]], new: Dict[str, Dict[str, int]]) -> int:
+    """Sum of absolute counter differences"""
+    total = 0
+    for group in set(old) | set(new):
+        a, b = old.get(group, {}), new.get(group, {})
+        total += sum(abs(a.get(key, 0) - b.get(key, 0)) for key in set(a) | set(b))
+    return total
+
+
+class IncrementalAggregates:
+    """
+    Summary counters updated per ingested event, reconciled periodically
+
+    Args:
+        client_getter: Returns the current AirtableClient (or None)
+        loader: loader(client) -> (shipment rows, document rows, approval statuses)
+        reconcile_seconds: Age after which counters are rebuilt from Airtable
+        background_reconcile: Rebuild stale counters on a worker thread
+        category_of: Returns a bottleneck code's category (None if unknown)
+    """
+
+    def __init__(
+        self,
+        client_getter: Callable[[], Any],
+        loader: Callable[[Any], Tuple[List[ShipmentRow], List[DocumentRow], List[Optional[str]]]],
+        *,
+        reconcile_seconds: float = RECONCILE_SECONDS,
+        background_reconcile: bool = True,
+        category_of: Callable[[str], Optional[str]] = _no_category,
+        clock=time.time,
+    ):
+        self._client_getter = client_getter
+        self._loader = loader
+        self._category_of = category_of
+        self.reconcile_seconds = reconcile_seconds
+        self.background_reconcile = background_reconcile
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._reconcile_lock = threading.Lock()
+        self._owner: Any = None
+        self._state: Optional[_Aggregates] = None
+        # (event, category) applied while a reconciliation is loading (replayed after)
+        self._replay: Optional[List[Tuple[Dict[str, Any], Optional[str]]]] = None
+        self._reconciling = False
+        self.last_drift: Optional[int] = None
+
+    def apply(self, events: Iterable[Dict[str, Any]]) -> int:
+        """
+        Apply committed events to the counters
+
+        Returns:
+            Number of events applied (0 before the first reconciliation)
+        """
+        # Category lookups may load reference data; never under the lock
+        events = list(events)
+        categories: Dict[str, str] = {}
+        for event in events:
+            code = event.get("bottleneckCode")
+            if code and code != NO_BOTTLENECK and code not in categories:
+                categories[code] = _resolve_category(self._category_of, code)
+
+        applied = 0
+        with self._lock:
+            if self._state is None:
+                return 0
+            for event in events:
+                category = categories.get(event.get("bottleneckCode"))
+                self._state.apply(event, category)
+                if self._replay is not None:
+                    self._replay.append((event, category))
+                applied += 1
+        return applied
+
+    def reconcile(self) -> Optional[_Aggregates]:
+        """Rebuild the counters from Airtable (single flight)"""
+        with self._reconcile_lock:
+            client = self._client_getter()
+            if client is None:
+                return None
+            with self._lock:
+                self._replay = []
+            try:
+                shipments, documents, approvals = self._loader(client)
+                state = _Aggregates(
+                    shipments, documents, approvals, self._clock(), self._category_of
+                )
+            except Exception:
+                with self._lock:
+                    self._replay = None
+                raise
+            with self._lock:
+                for event, category in self._replay:
+                    state.apply(event, category, replay=True)
+                self._replay = None
+                if self._state is not None and self._owner is client:
+                    self.last_drift = _drift(self._state.counters(), state.counters())
+                self._owner = client
+                self._state = state
+            return state
+
+    def invalidate(self) -> None:
+        """Drop the counters; the next read reconciles inline"""
+        with self._lock:
+            self._state = None
+
+    def _reconcile_quietly(self) -> None:
+        try:
+            self.reconcile()
+        except Exception as e:
+            print(f"⚠️ Aggregate reconciliation failed: {e}")
+        finally:
+            with self._lock:
+                self._reconciling = False
+
+    def state(self) -> Optional[_Aggregates]:
+        """Current counters, reconciling first if missing (None without a client)"""
+        client = self._client_getter()
+        with self._lock:
+            state = self._state if client is self._owner else None
+            stale = state is not None and self._clock() - state.loaded_at >= self.reconcile_seconds
+            schedule = stale and self.background_reconcile and not self._reconciling
+            if schedule:
+                self._reconciling = True
+
+        if state is None or (stale and not self.background_reconcile):
+            return self.reconcile()
+        if schedule:
+            threading.Thread(target=self._reconcile_quietly, daemon=True).start()
+        return state
+
+    def status_summary(self) -> Optional[Dict[str, Any]]:
+        """GET /status/summary body from the counters"""
+        state = self.state()
+        if state is None:
+            return None
+        with self._lock:
+            return {
+                "totalShipments": state.total_shipments,
+                **state.completion_rates(),
+                "riskSummary": dict(state.risk),
+                "topBottlenecks": state.top_bottlenecks(),
+                "bottlenecksByCategory": dict(state.categories),
+                "approvalsByStatus": dict(state.approvals),
+                "reconciledAt": state.loaded_at,
+            }
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._state
+            return {
+                "loaded": state is not None,
+                "ageSeconds": round(self._clock() - state.loaded_at, 1) if state else None,
+                "applied": state.stats["applied"] if state else 0,
+                "unresolved": state.stats["unresolved"] if state else 0,
+                "lastDrift": self.last_drift,
+            }
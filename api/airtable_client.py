@@ -17,6 +17,24 @@ from urllib.parse import quote
 
 import requests
 
+# Statuses worth retrying later (rate limit, server errors)
+TRANSIENT_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class AirtableAPIError(RuntimeError):
+    """Airtable answered with an error status"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def is_transient_error(error: Exception) -> bool:
+    """True for rate limits, server errors and network failures"""
+    if isinstance(error, AirtableAPIError):
+        return error.status_code in TRANSIENT_STATUS_CODES
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
 
 class AirtableClient:
     """Production-ready Airtable Web API client"""
@@ -90,14 +108,16 @@ class AirtableClient:
 
             # Other errors: raise immediately
             if not resp.ok:
-                raise RuntimeError(
-                    f"Airtable API error {resp.status_code}: {resp.text}"
+                raise AirtableAPIError(
+                    f"Airtable API error {resp.status_code}: {resp.text}",
+                    resp.status_code,
                 )
 
             return resp.json()
 
-        raise RuntimeError(
-            f"Airtable API failed after {max_tries} retries: {method} {url}"
+        raise AirtableAPIError(
+            f"Airtable API failed after {max_tries} retries: {method} {url}",
+            resp.status_code,
         )
 
     # ==================== READ: List records (paged) ====================
@@ -109,6 +129,9 @@ class AirtableClient:
         view: Optional[str] = None,
         fields: Optional[List[str]] = None,
         page_size: int = 100,
+        return_fields_by_field_id: bool = False,
+        sort: Optional[List[Dict[str, str]]] = None,
+        max_records: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
         """
         List records with automatic offset paging
@@ -119,9 +142,13 @@ class AirtableClient:
             view: View name or ID
             fields: List of field names to return
             page_size: Records per page (max 100)
+            return_fields_by_field_id: Key response fields by field ID
+                (fld...) instead of name (rename-safe parsing)
+            sort: Server-side sort, e.g. [{"field": "timestamp", "direction": "desc"}]
+            max_records: Stop paging once this many records are returned
 
         Returns:
-            List of all records (auto-paged)
+            List of all records (auto-paged, capped at max_records)
         """
         url = self._url(table_id_or_name)
         params: Dict[str, Any] = {"pageSize": min(page_size, 100)}
@@ -133,6 +160,15 @@ class AirtableClient:
         if fields:
             # fields[] repeated params
             params["fields[]"] = fields
+        if return_fields_by_field_id:
+            params["returnFieldsByFieldId"] = "true"
+        if sort:
+            for i, spec in enumerate(sort):
+                params[f"sort[{i}][field]"] = spec["field"]
+                params[f"sort[{i}][direction]"] = spec.get("direction", "asc")
+        if max_records:
+            params["maxRecords"] = max_records
+            params["pageSize"] = min(params["pageSize"], max_records)
 
         records: List[Dict[str, Any]] = []
         offset: Optional[str] = None
@@ -144,12 +180,39 @@ class AirtableClient:
             data = self._request("GET", url, params=params)
             records.extend(data.get("records", []))
 
+            if max_records and len(records) >= max_records:
+                return records[:max_records]
+
             offset = data.get("offset")
             if not offset:
                 break
 
         return records
 
+    # ==================== READ: Webhook payloads ====================
+    def list_webhook_payloads(
+        self, webhook_id: str, *, cursor: Optional[int] = None, limit: int = 50
+    ) -> Dict[str, Any]:
+        """
+        Fetch one page of change payloads for a webhook
+
+        Args:
+            webhook_id: Webhook ID (ach...)
+            cursor: Next payload cursor (omit to start from the oldest retained)
+            limit: Payloads per page (max 50)
+
+        Returns:
+            {"payloads": [...], "cursor": next_cursor, "mightHaveMore": bool}
+        """
+        url = (
+            f"https://api.airtable.com/v0/bases/{self.base_id}"
+            f"/webhooks/{quote(webhook_id, safe='')}/payloads"
+        )
+        params: Dict[str, Any] = {"limit": min(limit, 50)}
+        if cursor is not None:
+            params["cursor"] = cursor
+        return self._request("GET", url, params=params)
+
     # ==================== WRITE: Create/Update/Upsert ====================
     @staticmethod
     def _chunks(
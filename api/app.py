@@ -1,8 +1,10 @@
+import base64
+import json
 import os
-from flask import Flask, jsonify, request, abort, send_from_directory
+from flask import Flask, jsonify, request, abort, send_from_directory, Response, stream_with_context
 from flask_cors import CORS
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from enum import Enum
 
 try:
@@ -15,13 +17,37 @@ except (ImportError, Exception):
 # Import production-ready Airtable client and locked configuration (Phase 2.3)
 from api.airtable_client import AirtableClient
 from api.schema_validator import SchemaValidator
+from api.ingest_dedup import RecentKeyCache, dedupe_events
+from api.ingest_journal import IngestJournal
+from api.ingest_queue import IngestQueue
+from api.shipment_oracle import ShipmentExistenceOracle
+from api.approval_index import APPROVAL_INDEX_TTL_SECONDS, ApprovalDeadlineIndex
+from api.aggregates import IncrementalAggregates
+from api.bottleneck_engine import BOTTLENECK_TTL_SECONDS, BottleneckEngine
+from api.shipment_query import SHIPMENT_QUERY_TTL_SECONDS, ShipmentQueryIndex
+from api.record_store import field_types_from_lock
+from api.replica import AirtableReplica, REPLICA_MAX_AGE_SECONDS
+from api.reference_data import ReferenceData, REFERENCE_TABLES, default_loaders
+from api.kpi_timeseries import KpiTimeSeries, AGGREGATES as KPI_AGGREGATES
+from api.webhook_sync import (
+    INVALIDATED_TTL_SECONDS,
+    InvalidationRegistry,
+    WebhookReceiver,
+    WebhookState,
+    verify_signature,
+)
 from api.utils import (
-    parse_iso_any,
-    iso_dubai,
+    parse_iso_epoch,
+    parse_iso_epoch_batch,
+    iso_dubai_epoch,
+    epoch_to_dubai,
+    now_epoch,
     now_dubai as now_dubai_utils,
-    days_until,
+    days_until_epoch,
     classify_priority,
-    extract_field_by_id,
+    formula_any_equal,
+    parse_duration_seconds,
+    FieldExtractor,
     DUBAI_TZ as DUBAI_TZ_UTILS,
 )
 from api.monitoring import (
@@ -114,6 +140,47 @@ except FileNotFoundError as e:
     print(f"⚠️ Schema validator not available: {e}")
     print(f"⚠️ Field validation will be skipped")
 
+
+def _on_schema_reload(validator: SchemaValidator) -> None:
+    """Flag drift between a hot-reloaded lock and the generated locked config"""
+    if validator.get_schema_version() != SCHEMA_VERSION:
+        logger.warning(
+            f"Schema lock {validator.get_schema_version()} is newer than locked config "
+            f"{SCHEMA_VERSION}; field validation uses the new lock, table/field IDs "
+            f"come from airtable_locked_config.py until it is regenerated"
+        )
+
+
+if schema_validator:
+    schema_validator.on_reload(_on_schema_reload)
+
+
+@app.before_request
+def refresh_schema_lock() -> None:
+    """Pick up a replaced schema lock without a redeploy (throttled stat)"""
+    if schema_validator:
+        schema_validator.maybe_reload()
+
+
+# ==================== Webhook settings ====================
+# Base64 MAC secret of the Airtable webhook (POST /webhooks/airtable)
+AIRTABLE_WEBHOOK_SECRET = (os.getenv("AIRTABLE_WEBHOOK_SECRET") or "").strip() or None
+
+# SQLite file shared by the workers: webhook cursors and table change
+# generations, so a notification handled by one worker reaches every worker
+WEBHOOK_STATE_PATH = os.getenv("WEBHOOK_STATE_PATH")
+webhook_state = WebhookState(WEBHOOK_STATE_PATH) if WEBHOOK_STATE_PATH else None
+
+# Snapshot caches keep long TTLs only while every worker is invalidated by
+# webhooks; otherwise the TTL is what bounds staleness
+WEBHOOK_INVALIDATION = bool(AIRTABLE_WEBHOOK_SECRET and webhook_state)
+
+
+def snapshot_ttl(default: float) -> float:
+    """TTL of a webhook-invalidated snapshot cache"""
+    return INVALIDATED_TTL_SECONDS if WEBHOOK_INVALIDATION else default
+
+
 # Use locked TABLES configuration (Phase 2.3)
 # Table IDs are immutable and safe for table renames
 print(f"✅ Using locked table configuration ({len(TABLES)} tables)")
@@ -139,6 +206,303 @@ airtable_client = None
 if AIRTABLE_API_TOKEN:
     airtable_client = AirtableClient(AIRTABLE_API_TOKEN, AIRTABLE_BASE_ID)
 
+# Optional local SQLite read replica (kept fresh by scripts/sync_replica.py)
+REPLICA_PATH = os.getenv("REPLICA_PATH")
+replica = None
+if REPLICA_PATH and schema_validator:
+    replica = AirtableReplica(REPLICA_PATH, schema_validator.lock)
+
+TABLE_NAMES_BY_ID = {table_id: name for name, table_id in TABLES.items()}
+
+
+def replica_records(
+    table_id: str, where: Optional[Dict] = None, limit: Optional[int] = None
+) -> Optional[List[Dict]]:
+    """
+    Records from the read replica if it holds a fresh copy of the table
+
+    Returns:
+        Records keyed by field name, or None when Airtable must be read
+    """
+    name = TABLE_NAMES_BY_ID.get(table_id)
+    if replica is None or name not in replica.tables:
+        return None
+    if not replica.is_fresh(name, REPLICA_MAX_AGE_SECONDS):
+        return None
+    try:
+        return replica.records(name, where, limit=limit)
+    except Exception as e:
+        print(f"⚠️ Replica read failed ({name}): {e}")
+        return None
+
+
+def read_table(client, table: str, **list_kwargs) -> List[Dict]:
+    """Whole-table read for snapshot loaders: the replica when fresh, else Airtable"""
+    records = replica_records(TABLES[table])
+    if records is not None:
+        return records
+    return client.list_records(TABLES[table], **list_kwargs)
+
+# Events natural composite key (Phase 2.2); eventId is autoNumber
+EVENT_MERGE_FIELDS = ["timestamp", "shptNo"]
+
+# Optional write-ahead journal for ingest (local disk or tmpfs path)
+INGEST_JOURNAL_PATH = os.getenv("INGEST_JOURNAL_PATH")
+ingest_journal = IngestJournal(INGEST_JOURNAL_PATH) if INGEST_JOURNAL_PATH else None
+
+# Events committed recently (drops identical resends without an upstream call)
+recent_event_keys = RecentKeyCache()
+
+# 202 Accepted ingest needs the queue's background worker, i.e. a long-lived
+# process: opt in with INGEST_ASYNC_WORKER=1 (never on Vercel, where
+# threads are frozen between requests). Otherwise ingest is synchronous.
+INGEST_ASYNC_WORKER = (
+    os.getenv("INGEST_ASYNC_WORKER", "").strip().lower() in ("1", "true", "yes")
+    and not os.getenv("VERCEL")
+)
+
+# Async ingest queue (202 Accepted mode of POST /ingest/events)
+ingest_queue = IngestQueue(
+    lambda: airtable_client,
+    TABLES_LOWER["events"],
+    EVENT_MERGE_FIELDS,
+    autostart=INGEST_ASYNC_WORKER,
+    journal=ingest_journal,
+    recent_keys=recent_event_keys,
+    on_committed=lambda events: status_aggregates.apply(events),
+)
+
+# Resend events a previous process accepted but never wrote (inline when
+# there is no worker to hand them to)
+if ingest_journal is not None and ingest_queue.recover() and not INGEST_ASYNC_WORKER:
+    ingest_queue.drain()
+
+# Cached shptNo set (404 checks for per-shipment endpoints)
+shipment_oracle = ShipmentExistenceOracle(lambda: airtable_client, TABLES["Shipments"])
+
+
+# ==================== Field Extractors (rename-safe) ====================
+# Compiled once; responses are requested with returnFieldsByFieldId=true and
+# parsed by field ID, falling back to field names.
+APPROVAL_FIELDS = [
+    "approvalKey", "shptNo", "approvalType", "status",
+    "dueAt", "submittedAt", "approvedAt", "owner", "remarks",
+]
+EVENT_FIELDS = [
+    "eventId", "timestamp", "entityType",
+    "fromStatus", "toStatus", "actor", "bottleneckCode",
+]
+BOTTLENECK_SHIPMENT_FIELDS = [
+    "shptNo", "currentBottleneckCode", "bottleneckSince", "riskLevel",
+]
+
+approval_extractor = FieldExtractor(FIELD_IDS["Approvals"], APPROVAL_FIELDS)
+event_extractor = FieldExtractor(FIELD_IDS["Events"], EVENT_FIELDS)
+bottleneck_shipment_extractor = FieldExtractor(
+    FIELD_IDS["Shipments"], BOTTLENECK_SHIPMENT_FIELDS
+)
+
+
+def load_approval_rows(client) -> List[Dict]:
+    """All Approvals as deadline-index rows (fieldId-based, dueAt as epoch)"""
+    approvals_raw = read_table(
+        client,
+        "Approvals",
+        fields=APPROVAL_FIELDS,
+        page_size=100,
+        return_fields_by_field_id=True,
+    )
+    extract = approval_extractor.bind(approvals_raw)
+    rows = []
+    for record in approvals_raw:
+        (
+            approval_key, shpt_no, approval_type, status, due_at_str, _, _, owner, _,
+        ) = extract(record.get("fields", {}))
+        rows.append({
+            "approvalKey": approval_key,
+            "shptNo": shpt_no,
+            "approvalType": approval_type,
+            "status": status,
+            "dueAt": parse_iso_epoch(due_at_str),
+            "owner": owner,
+        })
+    return rows
+
+
+# PENDING approvals sorted by dueAt (/approval/summary, /approval/urgent)
+approval_index = ApprovalDeadlineIndex(
+    lambda: airtable_client,
+    load_approval_rows,
+    ttl_seconds=snapshot_ttl(APPROVAL_INDEX_TTL_SECONDS),
+)
+
+
+def load_bottleneck_rows(client) -> List[Tuple[str, Optional[float]]]:
+    """Active bottlenecks as (code, bottleneckSince epoch) rows"""
+    shipments = read_table(
+        client,
+        "Shipments",
+        filter_by_formula="NOT({currentBottleneckCode}='')",
+        fields=BOTTLENECK_SHIPMENT_FIELDS,
+        page_size=100,
+        return_fields_by_field_id=True,
+    )
+    extract_shipment = bottleneck_shipment_extractor.bind(shipments)
+    rows = []
+    for record in shipments:
+        _, code, since_str, _ = extract_shipment(record.get("fields", {}))
+        if code:
+            rows.append((code, parse_iso_epoch(since_str)))
+    return rows
+
+
+# Whole-table caches of BottleneckCodes / Owners / Vendors / Sites
+reference_data = ReferenceData(lambda: airtable_client, default_loaders())
+if airtable_client:
+    reference_data.warm(background=True)
+
+# Active bottlenecks sorted by bottleneckSince (/bottleneck/summary)
+bottleneck_engine = BottleneckEngine(
+    lambda: airtable_client,
+    load_bottleneck_rows,
+    ttl_seconds=snapshot_ttl(BOTTLENECK_TTL_SECONDS),
+)
+
+
+SHIPMENT_QUERY_FIELDS = list(FIELD_IDS["Shipments"])
+shipment_query_extractor = FieldExtractor(FIELD_IDS["Shipments"], SHIPMENT_QUERY_FIELDS)
+
+
+def load_shipment_query_records(client) -> List[Dict]:
+    """All Shipments with fields keyed by name (shipment query index)"""
+    shipments = read_table(
+        client,
+        "Shipments",
+        page_size=100,
+        return_fields_by_field_id=True,
+    )
+    extract = shipment_query_extractor.bind(shipments)
+    records = []
+    for record in shipments:
+        values = extract(record.get("fields", {}))
+        records.append({
+            "id": record.get("id"),
+            "fields": {
+                field: value
+                for field, value in zip(SHIPMENT_QUERY_FIELDS, values)
+                if value is not None
+            },
+        })
+    return records
+
+
+# Indexed Shipments snapshot (/shipments/query)
+shipment_query = ShipmentQueryIndex(
+    lambda: airtable_client,
+    load_shipment_query_records,
+    field_types=(
+        field_types_from_lock(schema_validator.lock).get("Shipments")
+        if schema_validator
+        else None
+    ),
+    ttl_seconds=snapshot_ttl(SHIPMENT_QUERY_TTL_SECONDS),
+)
+
+
+AGGREGATE_SHIPMENT_FIELDS = ["shptNo", "currentBottleneckCode", "riskLevel"]
+AGGREGATE_DOCUMENT_FIELDS = ["shptNo", "docType", "status"]
+
+aggregate_shipment_extractor = FieldExtractor(
+    FIELD_IDS["Shipments"], AGGREGATE_SHIPMENT_FIELDS
+)
+aggregate_document_extractor = FieldExtractor(
+    FIELD_IDS["Documents"], AGGREGATE_DOCUMENT_FIELDS
+)
+aggregate_approval_extractor = FieldExtractor(FIELD_IDS["Approvals"], ["status"])
+
+
+def load_aggregate_rows(client):
+    """Shipments / Documents / Approvals rows for aggregate reconciliation"""
+    shipments = read_table(
+        client,
+        "Shipments",
+        fields=AGGREGATE_SHIPMENT_FIELDS,
+        page_size=100,
+        return_fields_by_field_id=True,
+    )
+    documents = read_table(
+        client,
+        "Documents",
+        fields=AGGREGATE_DOCUMENT_FIELDS,
+        page_size=100,
+        return_fields_by_field_id=True,
+    )
+    approvals = read_table(
+        client,
+        "Approvals",
+        fields=["status"],
+        page_size=100,
+        return_fields_by_field_id=True,
+    )
+    extract_shipment = aggregate_shipment_extractor.bind(shipments)
+    extract_document = aggregate_document_extractor.bind(documents)
+    extract_approval = aggregate_approval_extractor.bind(approvals)
+    return (
+        [tuple(extract_shipment(rec.get("fields", {}))) for rec in shipments],
+        [tuple(extract_document(rec.get("fields", {}))) for rec in documents],
+        [extract_approval(rec.get("fields", {}))[0] for rec in approvals],
+    )
+
+
+# Summary counters moved by ingested events (/status/summary)
+status_aggregates = IncrementalAggregates(
+    lambda: airtable_client,
+    load_aggregate_rows,
+    category_of=lambda code: (reference_data.bottleneck_code(code) or {}).get("category"),
+)
+
+
+# ==================== Cache invalidation (Airtable webhooks) ====================
+BOTTLENECK_FIELD_IDS = {
+    FIELD_IDS["Shipments"][field] for field in ("currentBottleneckCode", "bottleneckSince")
+}
+
+
+def on_shipments_changed(changes: Dict[str, Optional[Dict]]) -> None:
+    """Patch the shptNo set; drop the bottleneck and query snapshots"""
+    shipment_query.invalidate()
+    shpt_no_field = FIELD_IDS["Shipments"]["shptNo"]
+    bottlenecks_changed = False
+    for values in changes.values():
+        if values is None:
+            # Destroyed: the shptNo is no longer known
+            shipment_oracle.invalidate()
+            bottlenecks_changed = True
+            continue
+        if values.get(shpt_no_field):
+            shipment_oracle.mark_exists(str(values[shpt_no_field]).strip())
+        if BOTTLENECK_FIELD_IDS.intersection(values):
+            bottlenecks_changed = True
+    if bottlenecks_changed:
+        bottleneck_engine.invalidate()
+
+
+cache_registry = InvalidationRegistry(webhook_state)
+cache_registry.register(TABLES["Shipments"], on_shipments_changed)
+cache_registry.register(TABLES["Approvals"], lambda changes: approval_index.invalidate())
+for _name, (_table, _, _) in REFERENCE_TABLES.items():
+    cache_registry.register(
+        TABLES[_table], lambda changes, name=_name: reference_data.invalidate(name)
+    )
+
+webhook_receiver = WebhookReceiver(lambda: airtable_client, cache_registry, state=webhook_state)
+
+
+@app.before_request
+def sync_cache_invalidations() -> None:
+    """Drop caches of tables another worker was notified about (throttled)"""
+    cache_registry.sync()
+
 
 # ==================== Enums (SpecPack v1.0) ====================
 class DocStatus(str, Enum):
@@ -165,14 +529,8 @@ class RiskLevel(str, Enum):
 # ==================== Timezone Utilities ====================
 def normalize_datetime(dt_string: Optional[str]) -> Optional[str]:
     """Convert datetime to Asia/Dubai timezone (ISO 8601)"""
-    if not dt_string:
-        return None
-    try:
-        dt = datetime.fromisoformat(dt_string.replace("Z", "+00:00"))
-        dt_dubai = dt.astimezone(DUBAI_TZ)
-        return dt_dubai.isoformat()
-    except:
-        return None
+    dt_dubai = epoch_to_dubai(parse_iso_epoch(dt_string))
+    return dt_dubai.isoformat() if dt_dubai else None
 
 
 def now_dubai() -> str:
@@ -182,7 +540,10 @@ def now_dubai() -> str:
 
 # ==================== Airtable API (Production-ready) ====================
 def fetch_table_records(
-    table_name: str, filter_formula: str = None, max_records: int = 100
+    table_name: str,
+    filter_formula: str = None,
+    max_records: int = 100,
+    where: Optional[Dict] = None,
 ) -> List[Dict]:
     """
     Fetch records from Airtable table using production-ready client
@@ -197,6 +558,8 @@ def fetch_table_records(
         table_name: Key in TABLES_LOWER dict (lowercase)
         filter_formula: Airtable filterByFormula (uses field names from PROTECTED_FIELDS)
         max_records: Max records to fetch
+        where: Equality filters equivalent to filter_formula; lets the read
+            replica serve the query while it is fresh
 
     Returns:
         List of records (auto-paged)
@@ -208,6 +571,11 @@ def fetch_table_records(
     if not table_id:
         return []
 
+    if filter_formula is None or where is not None:
+        records = replica_records(table_id, where)
+        if records is not None:
+            return records
+
     try:
         return airtable_client.list_records(
             table_id, filter_by_formula=filter_formula, page_size=min(max_records, 100)
@@ -220,39 +588,47 @@ def fetch_table_records(
 def get_shipment_by_shpt_no(shpt_no: str) -> Optional[Dict]:
     """Fetch shipment record by shptNo"""
     filter_formula = f"{{shptNo}}='{shpt_no}'"
-    records = fetch_table_records("shipments", filter_formula, max_records=1)
+    records = fetch_table_records(
+        "shipments", filter_formula, max_records=1, where={"shptNo": shpt_no}
+    )
     return records[0] if records else None
 
 
 def get_documents_by_shpt_no(shpt_no: str) -> List[Dict]:
     """Fetch all documents for a shipment"""
     filter_formula = f"{{shptNo}}='{shpt_no}'"
-    return fetch_table_records("documents", filter_formula, max_records=20)
+    return fetch_table_records(
+        "documents", filter_formula, max_records=20, where={"shptNo": shpt_no}
+    )
 
 
 def get_approvals_by_shpt_no(shpt_no: str) -> List[Dict]:
     """Fetch all approvals for a shipment"""
     filter_formula = f"{{shptNo}}='{shpt_no}'"
-    return fetch_table_records("approvals", filter_formula, max_records=20)
+    return fetch_table_records(
+        "approvals", filter_formula, max_records=20, where={"shptNo": shpt_no}
+    )
 
 
 def get_actions_by_shpt_no(shpt_no: str) -> List[Dict]:
     """Fetch all actions for a shipment"""
     filter_formula = f"{{shptNo}}='{shpt_no}'"
-    return fetch_table_records("actions", filter_formula, max_records=20)
+    return fetch_table_records(
+        "actions", filter_formula, max_records=20, where={"shptNo": shpt_no}
+    )
 
 
 def get_events_by_shpt_no(shpt_no: str) -> List[Dict]:
     """Fetch all events for a shipment"""
     filter_formula = f"{{shptNo}}='{shpt_no}'"
-    return fetch_table_records("events", filter_formula, max_records=100)
+    return fetch_table_records(
+        "events", filter_formula, max_records=100, where={"shptNo": shpt_no}
+    )
 
 
 def get_bottleneck_code(code: str) -> Optional[Dict]:
-    """Fetch bottleneck code definition"""
-    filter_formula = f"{{code}}='{code}'"
-    records = fetch_table_records("bottleneckCodes", filter_formula, max_records=1)
-    return records[0] if records else None
+    """Bottleneck code definition from the reference-data cache"""
+    return reference_data.bottleneck_code(code)
 
 
 # ==================== Business Logic ====================
@@ -282,7 +658,7 @@ def build_document_status(documents: List[Dict]) -> Dict[str, str]:
 
 
 def build_bottleneck_info(
-    shipment_fields: Dict, bottleneck_code_record: Optional[Dict]
+    shipment_fields: Dict, bottleneck_code_info: Optional[Dict]
 ) -> Dict:
     """
     Build bottleneck info
@@ -295,21 +671,41 @@ def build_bottleneck_info(
     risk = shipment_fields.get("riskLevel", "LOW")
 
     # Fallback to bottleneck code default risk
-    if bottleneck_code_record and not risk:
-        risk = bottleneck_code_record["fields"].get("riskDefault", "LOW")
+    if bottleneck_code_info and not risk:
+        risk = bottleneck_code_info.get("riskDefault") or "LOW"
 
     return {"code": code, "since": since, "riskLevel": risk}
 
 
+def build_owner_contact(owner: Optional[str]) -> Optional[Dict]:
+    """Owners row (team / email / chatHandle) for an action owner, if known"""
+    row = reference_data.owner(owner)
+    if not row:
+        return None
+    return {
+        "team": row.get("team"),
+        "email": row.get("email"),
+        "chatHandle": row.get("chatHandle"),
+    }
+
+
 def build_action_info(
-    shipment_fields: Dict, actions: List[Dict], bottleneck_code_record: Optional[Dict]
+    shipment_fields: Dict, actions: List[Dict], bottleneck_code_info: Optional[Dict]
 ) -> Dict:
     """
     Build action info with priority: Actions > Shipment > BottleneckCode template
 
     Returns:
-        {"nextAction": "...", "owner": "...", "dueAt": "..."}
+        {"nextAction": "...", "owner": "...", "dueAt": "...", "ownerContact": {...} | None}
     """
+    action = _select_action(shipment_fields, actions, bottleneck_code_info)
+    action["ownerContact"] = build_owner_contact(action["owner"])
+    return action
+
+
+def _select_action(
+    shipment_fields: Dict, actions: List[Dict], bottleneck_code_info: Optional[Dict]
+) -> Dict:
     # Priority 1: First OPEN action
     open_actions = [
         a
@@ -341,10 +737,9 @@ def build_action_info(
         }
 
     # Priority 3: BottleneckCode template
-    if bottleneck_code_record:
-        bc_fields = bottleneck_code_record["fields"]
-        template = bc_fields.get("nextActionTemplate", "Normal progress")
-        sla_hours = bc_fields.get("slaHours", 24)
+    if bottleneck_code_info:
+        template = bottleneck_code_info.get("nextActionTemplate") or "Normal progress"
+        sla_hours = bottleneck_code_info.get("slaHours") or 24
         due_at = datetime.now(DUBAI_TZ) + timedelta(hours=sla_hours)
 
         return {"nextAction": template, "owner": "PMT", "dueAt": due_at.isoformat()}
@@ -362,23 +757,18 @@ def calculate_data_lag_minutes(events: List[Dict]) -> int:
     if not events:
         return 0
 
-    timestamps = [
-        e["fields"].get("timestamp")
-        for e in events
-        if e.get("fields", {}).get("timestamp")
+    epochs = [
+        epoch
+        for epoch in parse_iso_epoch_batch(
+            e.get("fields", {}).get("timestamp") for e in events
+        )
+        if epoch is not None
     ]
 
-    if not timestamps:
+    if not epochs:
         return 0
 
-    latest_event = max(timestamps)
-    try:
-        latest_dt = datetime.fromisoformat(latest_event.replace("Z", "+00:00"))
-        now = datetime.now(DUBAI_TZ)
-        lag = (now - latest_dt).total_seconds() / 60
-        return int(lag)
-    except:
-        return 0
+    return int((now_epoch() - max(epochs)) / 60)
 
 
 # ==================== API Endpoints ====================
@@ -423,6 +813,7 @@ def index():
                 "status_summary": "/status/summary",
                 "bottleneck_summary": "/bottleneck/summary",
                 "ingest_events": "POST /ingest/events",
+                "ingest_batch_status": "/ingest/batches/{batchHandle}",
             },
         }
     )
@@ -619,7 +1010,14 @@ def health_check():
                 "tables_validated": (
                     len(schema_validator.get_all_tables()) if schema_validator else 0
                 ),
+                "lockHash": schema_validator.lock_hash if schema_validator else None,
+                "lock": schema_validator.lock_info() if schema_validator else None,
             },
+            "shipmentOracle": shipment_oracle.info(),
+            "referenceData": reference_data.info(),
+            "aggregates": status_aggregates.info(),
+            "replica": replica.info() if replica is not None else None,
+            "shipmentQuery": shipment_query.info(),
         }
     )
 
@@ -678,8 +1076,7 @@ def shipments_verify():
             400,
         )
 
-    or_parts = ",".join([f"{{shptNo}}='{s.replace(chr(39), chr(92) + chr(39))}'" for s in wanted])
-    formula = f"OR({or_parts})"
+    formula = formula_any_equal("shptNo", wanted)
 
     try:
         records = airtable_client.list_records(
@@ -746,6 +1143,130 @@ def shipments_verify():
     )
 
 
+# Query param -> indexed Shipments field (comma-separated values are ORed)
+SHIPMENT_QUERY_FILTERS = {
+    "site": "site",
+    "riskLevel": "riskLevel",
+    "bottleneck": "currentBottleneckCode",
+    "mode": "mode",
+    "vendor": "vendor",
+    "forwarder": "forwarder",
+    "actionOwner": "actionOwner",
+    "stopFlag": "stopFlag",
+}
+SHIPMENT_QUERY_DEFAULT_FIELDS = [
+    "shptNo", "site", "eta", "riskLevel", "currentBottleneckCode",
+    "nextAction", "actionOwner", "dueAt",
+]
+SHIPMENT_QUERY_DEFAULT_LIMIT = 50
+SHIPMENT_QUERY_MAX_LIMIT = 500
+
+
+@app.route("/shipments/query", methods=["GET"])
+def shipments_query():
+    """
+    GET /shipments/query?site=DAS&riskLevel=HIGH,CRITICAL&bottleneck=FANR_PENDING
+                        &etaBefore=2026-02-01T00:00:00+04:00&fields=shptNo,eta&limit=50
+
+    Filters the cached Shipments snapshot with per-column value bitmaps and
+    an eta-sorted index; no Airtable call while the snapshot is fresh.
+
+    Query params:
+    - site, riskLevel, bottleneck, mode, vendor, forwarder, actionOwner,
+      stopFlag: comma-separated values (case-insensitive; bottleneck=NONE
+      matches shipments without a bottleneck)
+    - etaAfter / etaBefore: ISO datetimes (etaAfter <= eta < etaBefore)
+    - fields: comma-separated Shipments fields to return
+    - limit: Shipments to return (1-500, default 50); total counts all matches
+
+    Authentication: Optional (enforced if API_KEY env var is set)
+    """
+    require_api_key()
+
+    if not airtable_client:
+        return jsonify({
+            "error": "Airtable connection not available",
+            "status": "service_unavailable",
+            "timestamp": now_dubai(),
+            "schemaVersion": SCHEMA_VERSION,
+        }), 503
+
+    def bad_request(message: str):
+        return jsonify({
+            "error": message,
+            "status": "bad_request",
+            "timestamp": now_dubai(),
+            "schemaVersion": SCHEMA_VERSION,
+        }), 400
+
+    filters: Dict[str, List[Optional[str]]] = {}
+    for param, field in SHIPMENT_QUERY_FILTERS.items():
+        raw = request.args.get(param)
+        if raw is None:
+            continue
+        values = [v.strip() for v in raw.split(",") if v.strip()]
+        if not values:
+            return bad_request(f"{param} is empty")
+        if param == "bottleneck":
+            values = [None if v.upper() == "NONE" else v for v in values]
+        filters[field] = values
+
+    eta_bounds = {}
+    for param in ("etaAfter", "etaBefore"):
+        raw = request.args.get(param)
+        eta_bounds[param] = parse_iso_epoch(raw) if raw else None
+        if raw and eta_bounds[param] is None:
+            return bad_request(f"{param} must be an ISO 8601 datetime")
+
+    fields_param = request.args.get("fields")
+    fields = (
+        [f.strip() for f in fields_param.split(",") if f.strip()]
+        if fields_param
+        else SHIPMENT_QUERY_DEFAULT_FIELDS
+    )
+    unknown = [f for f in fields if f not in FIELD_IDS["Shipments"]]
+    if unknown or not fields:
+        return bad_request(
+            f"Unknown field(s): {', '.join(unknown)}" if unknown else "fields is empty"
+        )
+
+    limit_param = request.args.get("limit")
+    try:
+        limit = int(limit_param) if limit_param else SHIPMENT_QUERY_DEFAULT_LIMIT
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= SHIPMENT_QUERY_MAX_LIMIT:
+        return bad_request(
+            f"limit must be an integer between 1 and {SHIPMENT_QUERY_MAX_LIMIT}"
+        )
+
+    try:
+        snapshot = shipment_query.snapshot()
+        matches = snapshot.match(filters, eta_bounds["etaAfter"], eta_bounds["etaBefore"])
+        items = snapshot.project(matches, fields, limit)
+
+        return jsonify({
+            "items": items,
+            "meta": {
+                "count": len(items),
+                "total": matches.bit_count(),
+                "limit": limit,
+                "indexedAt": iso_dubai_epoch(snapshot.loaded_at),
+                "timestamp": now_dubai(),
+                "schemaVersion": SCHEMA_VERSION,
+            },
+        }), 200
+
+    except Exception as e:
+        print(f"❌ Error in shipments_query: {str(e)}")
+        return jsonify({
+            "error": "Internal server error",
+            "details": str(e),
+            "status": "internal_error",
+            "timestamp": now_dubai()
+        }), 500
+
+
 @app.route("/document/status/<shpt_no>", methods=["GET"])
 def get_document_status(shpt_no: str):
     """
@@ -763,16 +1284,13 @@ def get_document_status(shpt_no: str):
     actions = get_actions_by_shpt_no(shpt_no)
     events = get_events_by_shpt_no(shpt_no)
 
-    # Get bottleneck code definition
-    bottleneck_code = shipment_fields.get("currentBottleneckCode")
-    bottleneck_code_record = None
-    if bottleneck_code:
-        bottleneck_code_record = get_bottleneck_code(bottleneck_code)
+    # Bottleneck code definition (reference-data cache, no network on a warm cache)
+    bottleneck_code_info = get_bottleneck_code(shipment_fields.get("currentBottleneckCode"))
 
     # Build response packet
     doc_status = build_document_status(documents)
-    bottleneck = build_bottleneck_info(shipment_fields, bottleneck_code_record)
-    action = build_action_info(shipment_fields, actions, bottleneck_code_record)
+    bottleneck = build_bottleneck_info(shipment_fields, bottleneck_code_info)
+    action = build_action_info(shipment_fields, actions, bottleneck_code_info)
     data_lag = calculate_data_lag_minutes(events)
 
     # Evidence (simplified - IDs only)
@@ -798,11 +1316,17 @@ def get_document_status(shpt_no: str):
 def get_status_summary():
     """
     Get overall KPI summary
+
+    Served from incremental aggregates: ingested events move the counters
+    immediately; a full reconciliation runs every RECONCILE_SECONDS
     """
-    shipments = fetch_table_records("shipments", max_records=200)
-    documents = fetch_table_records("documents", max_records=500)
+    try:
+        summary = status_aggregates.status_summary()
+    except Exception as e:
+        print(f"❌ Airtable API Error (status aggregates): {e}")
+        summary = None
 
-    if not shipments:
+    if not summary or not summary["totalShipments"]:
         # Fallback to sample data
         return jsonify(
             {
@@ -817,59 +1341,102 @@ def get_status_summary():
             }
         )
 
-    # Calculate KPIs
-    total_shipments = len(shipments)
+    reconciled_at = summary.pop("reconciledAt")
+    return jsonify(
+        {
+            "dataSource": "Airtable (incremental aggregates)",
+            **summary,
+            "reconciledAt": iso_dubai_epoch(reconciled_at),
+            "lastUpdated": now_dubai(),
+        }
+    )
 
-    # Document completion rates
-    doc_types = ["BOE", "DO", "COO", "HBL", "CIPL"]
-    completion_rates = {}
 
-    for doc_type in doc_types:
-        completed = sum(
-            1
-            for doc in documents
-            if doc.get("fields", {}).get("docType") == doc_type
-            and doc.get("fields", {}).get("status")
-            in ["ISSUED", "RELEASED", "APPROVED"]
-        )
-        total = sum(
-            1 for doc in documents if doc.get("fields", {}).get("docType") == doc_type
-        )
-        rate = completed / total if total > 0 else 0.0
-        completion_rates[f"{doc_type.lower()}Rate"] = round(rate, 2)
+# ==================== Approval Endpoints (Phase 4.1) ====================
+# ==================== Approval SLA helpers ====================
+def new_approval_summary() -> Dict[str, int]:
+    """Empty per-status / per-priority approval counters"""
+    return {
+        "total": 0,
+        "pending": 0,
+        "approved": 0,
+        "rejected": 0,
+        "expired": 0,
+        "critical": 0,
+        "overdue": 0
+    }
 
-    # Bottleneck analysis
-    bottleneck_counts = {}
-    risk_summary = {"LOW": 0, "MEDIUM": 0, "HIGH": 0, "CRITICAL": 0}
 
-    for shipment in shipments:
-        fields = shipment.get("fields", {})
-        bn_code = fields.get("currentBottleneckCode", "NONE")
-        risk = fields.get("riskLevel", "LOW")
+def parse_approvals(approvals_raw: List[Dict], now: float) -> List[Tuple[Optional[str], Dict]]:
+    """
+    Parse Approvals records (fieldId-based) with D-5/D-15 classification
 
-        bottleneck_counts[bn_code] = bottleneck_counts.get(bn_code, 0) + 1
-        risk_summary[risk] = risk_summary.get(risk, 0) + 1
+    Returns:
+        (shptNo, approval object) pairs in record order
+    """
+    parsed = []
+    extract = approval_extractor.bind(approvals_raw)
+
+    for record in approvals_raw:
+        # Extract using fieldId (from FIELD_IDS in airtable_locked_config.py)
+        # Fallback to field name for backward compatibility
+        (
+            approval_key,
+            shpt_no,
+            approval_type,
+            status,
+            due_at_str,
+            submitted_at_str,
+            approved_at_str,
+            owner,
+            remarks,
+        ) = extract(record.get("fields", {}))
+
+        # Parse datetimes once to epoch seconds (handles Z/UTC)
+        due_at = parse_iso_epoch(due_at_str)
+        submitted_at = parse_iso_epoch(submitted_at_str)
+        approved_at = parse_iso_epoch(approved_at_str)
+
+        # Calculate days until due (2 decimals)
+        days_until_due = days_until_epoch(due_at, now)
+
+        parsed.append((shpt_no, {
+            "approvalKey": approval_key,
+            "approvalType": approval_type,
+            "status": status,
+            "dueAt": iso_dubai_epoch(due_at),
+            "submittedAt": iso_dubai_epoch(submitted_at),
+            "approvedAt": iso_dubai_epoch(approved_at),
+            "owner": owner,
+            "remarks": remarks,
+            "daysUntilDue": days_until_due,
+            # Classify priority (D-5/D-15/Overdue)
+            "priority": classify_priority(days_until_due)
+        }))
 
-    # Top bottlenecks
-    top_bottlenecks = sorted(
-        bottleneck_counts.items(), key=lambda x: x[1], reverse=True
-    )[:5]
+    return parsed
 
-    return jsonify(
-        {
-            "dataSource": "Airtable (Real-time)",
-            "totalShipments": total_shipments,
-            **completion_rates,
-            "riskSummary": risk_summary,
-            "topBottlenecks": [
-                {"code": code, "count": count} for code, count in top_bottlenecks
-            ],
-            "lastUpdated": now_dubai(),
-        }
-    )
+
+def count_approval(summary: Dict[str, int], approval: Dict) -> None:
+    """Add one parsed approval to summary counters"""
+    summary["total"] += 1
+
+    status_upper = (approval["status"] or "").upper()
+    if status_upper == "PENDING":
+        summary["pending"] += 1
+    elif status_upper == "APPROVED":
+        summary["approved"] += 1
+    elif status_upper == "REJECTED":
+        summary["rejected"] += 1
+    elif status_upper == "EXPIRED":
+        summary["expired"] += 1
+
+    if approval["priority"] == "CRITICAL":
+        summary["critical"] += 1
+    elif approval["priority"] == "OVERDUE":
+        summary["overdue"] += 1
 
 
-# ==================== Approval Endpoints (Phase 4.1) ====================
 @app.route("/approval/status/<shptNo>", methods=["GET"])
 def get_approval_status(shptNo: str):
     """
@@ -896,16 +1463,21 @@ def get_approval_status(shptNo: str):
         }), 503
 
     try:
-        # Step 1: Verify shipment exists (404 if not found)
-        shipment_filter = f"{{shptNo}}='{shptNo}'"
+        # Step 1+2: Fetch approvals (may be empty array → 200 OK); existence
+        # comes from the shipment oracle, or a concurrent check on a cache miss
+        approval_filter = f"{{shptNo}}='{shptNo}'"
 
-        shipments = airtable_client.list_records(
-            TABLES["Shipments"],
-            filter_by_formula=shipment_filter,
-            fields=["shptNo"]
+        exists, approvals_raw = shipment_oracle.fetch_if_exists(
+            shptNo,
+            lambda: airtable_client.list_records(
+                TABLES["Approvals"],
+                filter_by_formula=approval_filter,
+                fields=APPROVAL_FIELDS,
+                return_fields_by_field_id=True,
+            ),
         )
 
-        if not shipments:
+        if not exists:
             return jsonify({
                 "error": "Shipment not found",
                 "shptNo": shptNo,
@@ -913,118 +1485,12 @@ def get_approval_status(shptNo: str):
                 "schemaVersion": SCHEMA_VERSION
             }), 404
 
-        # Step 2: Fetch approvals (may be empty array → 200 OK)
-        approval_filter = f"{{shptNo}}='{shptNo}'"
-
-        approvals_raw = airtable_client.list_records(
-            TABLES["Approvals"],
-            filter_by_formula=approval_filter,
-            fields=[
-                "approvalKey", "shptNo", "approvalType", "status",
-                "dueAt", "submittedAt", "approvedAt", "owner", "remarks"
-            ]
-        )
-
         # Step 3: Parse and calculate (fieldId-based for rename safety)
-        now = datetime.now(DUBAI_TZ)
+        summary = new_approval_summary()
         approvals = []
-        summary = {
-            "total": len(approvals_raw),
-            "pending": 0,
-            "approved": 0,
-            "rejected": 0,
-            "expired": 0,
-            "critical": 0,
-            "overdue": 0
-        }
-
-        for record in approvals_raw:
-            fields = record.get("fields", {})
-
-            # Extract using fieldId (from FIELD_IDS in airtable_locked_config.py)
-            # Fallback to field name for backward compatibility
-            approval_key = extract_field_by_id(
-                fields,
-                FIELD_IDS["Approvals"]["approvalKey"],
-                "approvalKey"
-            )
-            approval_type = extract_field_by_id(
-                fields,
-                FIELD_IDS["Approvals"]["approvalType"],
-                "approvalType"
-            )
-            status = extract_field_by_id(
-                fields,
-                FIELD_IDS["Approvals"]["status"],
-                "status"
-            )
-            due_at_str = extract_field_by_id(
-                fields,
-                FIELD_IDS["Approvals"]["dueAt"],
-                "dueAt"
-            )
-            submitted_at_str = extract_field_by_id(
-                fields,
-                FIELD_IDS["Approvals"]["submittedAt"],
-                "submittedAt"
-            )
-            approved_at_str = extract_field_by_id(
-                fields,
-                FIELD_IDS["Approvals"]["approvedAt"],
-                "approvedAt"
-            )
-            owner = extract_field_by_id(
-                fields,
-                FIELD_IDS["Approvals"]["owner"],
-                "owner"
-            )
-            remarks = extract_field_by_id(
-                fields,
-                FIELD_IDS["Approvals"]["remarks"],
-                "remarks"
-            )
-
-            # Parse datetimes (handles Z/UTC)
-            due_at = parse_iso_any(due_at_str)
-            submitted_at = parse_iso_any(submitted_at_str)
-            approved_at = parse_iso_any(approved_at_str)
-
-            # Calculate days until due (2 decimals)
-            days_until_due = days_until(due_at, now)
-
-            # Classify priority (D-5/D-15/Overdue)
-            priority = classify_priority(days_until_due)
-
-            # Build approval object
-            approval = {
-                "approvalKey": approval_key,
-                "approvalType": approval_type,
-                "status": status,
-                "dueAt": iso_dubai(due_at),
-                "submittedAt": iso_dubai(submitted_at),
-                "approvedAt": iso_dubai(approved_at),
-                "owner": owner,
-                "remarks": remarks,
-                "daysUntilDue": days_until_due,
-                "priority": priority
-            }
+        for _, approval in parse_approvals(approvals_raw, now_epoch()):
             approvals.append(approval)
-
-            # Update summary
-            status_upper = (status or "").upper()
-            if status_upper == "PENDING":
-                summary["pending"] += 1
-            elif status_upper == "APPROVED":
-                summary["approved"] += 1
-            elif status_upper == "REJECTED":
-                summary["rejected"] += 1
-            elif status_upper == "EXPIRED":
-                summary["expired"] += 1
-
-            if priority == "CRITICAL":
-                summary["critical"] += 1
-            elif priority == "OVERDUE":
-                summary["overdue"] += 1
+            count_approval(summary, approval)
 
         # Step 4: Return response
         return jsonify({
@@ -1045,13 +1511,53 @@ def get_approval_status(shptNo: str):
         }), 500
 
 
-@app.route("/approval/summary", methods=["GET"])
-def get_approval_summary():
+# Bulk approval status limits
+APPROVAL_BATCH_MAX_SHIPMENTS = 500
+APPROVAL_BATCH_CHUNK = 50  # shptNos per OR formula (keeps the query URL short)
+
+
+def iter_approval_chunks(
+    shpt_nos: List[str], now: float
+) -> Iterator[Tuple[List[str], Dict[str, List[Dict]]]]:
     """
-    GET /approval/summary
+    Fetch Approvals for shipments, one OR-formula query per chunk
+
+    Yields:
+        (chunk shptNos, {shptNo: [approval, ...]}) as each chunk completes
+    """
+    for start in range(0, len(shpt_nos), APPROVAL_BATCH_CHUNK):
+        chunk = shpt_nos[start:start + APPROVAL_BATCH_CHUNK]
+        approvals_raw = airtable_client.list_records(
+            TABLES["Approvals"],
+            filter_by_formula=formula_any_equal("shptNo", chunk),
+            fields=APPROVAL_FIELDS,
+            return_fields_by_field_id=True,
+        )
+        grouped: Dict[str, List[Dict]] = {shpt_no: [] for shpt_no in chunk}
+        for shpt_no, approval in parse_approvals(approvals_raw, now):
+            if shpt_no in grouped:
+                grouped[shpt_no].append(approval)
+        yield chunk, grouped
+
+
+@app.route("/approval/status/batch", methods=["POST"])
+def get_approval_status_batch():
+    """
+    POST /approval/status/batch
+
+    Body: {"shptNos": ["SCT-0143", ...]} (max APPROVAL_BATCH_MAX_SHIPMENTS)
 
-    Returns global approval statistics with pagination support
+    Same D-5/D-15 classification as GET /approval/status/{shptNo}, for many
+    shipments in ceil(n / APPROVAL_BATCH_CHUNK) Approvals queries. Unknown
+    shipments are listed in notFound (existence from the shipment oracle).
+
+    With ?format=ndjson (or Accept: application/x-ndjson) one line per
+    shipment is streamed as each chunk completes, followed by a summary line.
+
+    Authentication: Optional (enforced if API_KEY env var is set)
     """
+    require_api_key()
+
     if not airtable_client:
         return jsonify({
             "error": "Airtable connection not available",
@@ -1059,112 +1565,98 @@ def get_approval_summary():
             "timestamp": now_dubai()
         }), 503
 
-    try:
-        # Fetch ALL approvals (with pagination)
-        approvals_raw = airtable_client.list_records(
-            TABLES["Approvals"],
-            fields=["approvalType", "status", "dueAt"],
-            page_size=100
-        )
-
-        now = datetime.now(DUBAI_TZ)
+    payload = request.get_json(silent=True) or {}
+    raw_ids = payload.get("shptNos") if isinstance(payload, dict) else None
+    if not isinstance(raw_ids, list) or not all(isinstance(s, str) for s in raw_ids):
+        return jsonify({
+            "error": "shptNos must be an array of strings",
+            "status": "bad_request",
+            "timestamp": now_dubai(),
+            "schemaVersion": SCHEMA_VERSION
+        }), 400
 
-        # Initialize aggregations
-        summary = {
-            "total": len(approvals_raw),
-            "pending": 0,
-            "approved": 0,
-            "rejected": 0,
-            "expired": 0
-        }
+    shpt_nos = list(dict.fromkeys(s.strip() for s in raw_ids if s.strip()))
+    if not 1 <= len(shpt_nos) <= APPROVAL_BATCH_MAX_SHIPMENTS:
+        return jsonify({
+            "error": f"shptNos must contain 1-{APPROVAL_BATCH_MAX_SHIPMENTS} values",
+            "status": "bad_request",
+            "timestamp": now_dubai(),
+            "schemaVersion": SCHEMA_VERSION
+        }), 400
 
-        by_type = {}
+    stream = (
+        request.args.get("format") == "ndjson"
+        or request.accept_mimetypes.best == "application/x-ndjson"
+    )
 
-        critical = {
-            "overdue": 0,
-            "d5": 0,    # D-5 이내 (1-5 days)
-            "d15": 0    # D-15 이내 (6-15 days)
-        }
+    try:
+        existing = shipment_oracle.check_many(shpt_nos)
+    except Exception as e:
+        print(f"❌ Error in get_approval_status_batch: {str(e)}")
+        return jsonify({
+            "error": "Internal server error",
+            "details": str(e),
+            "status": "internal_error",
+            "timestamp": now_dubai()
+        }), 500
 
-        # Process each approval
-        for record in approvals_raw:
-            fields = record.get("fields", {})
-
-            # Extract fields (fieldId-based)
-            approval_type = extract_field_by_id(
-                fields,
-                FIELD_IDS["Approvals"]["approvalType"],
-                "approvalType"
-            ) or "UNKNOWN"
-
-            status = extract_field_by_id(
-                fields,
-                FIELD_IDS["Approvals"]["status"],
-                "status"
-            ) or "UNKNOWN"
-
-            due_at_str = extract_field_by_id(
-                fields,
-                FIELD_IDS["Approvals"]["dueAt"],
-                "dueAt"
-            )
+    found = [s for s in shpt_nos if s in existing]
+    not_found = [s for s in shpt_nos if s not in existing]
+    now = now_epoch()
+
+    def iter_results() -> Iterator[Dict]:
+        for chunk, grouped in iter_approval_chunks(found, now):
+            for shpt_no in chunk:
+                summary = new_approval_summary()
+                for approval in grouped[shpt_no]:
+                    count_approval(summary, approval)
+                yield {"shptNo": shpt_no, "approvals": grouped[shpt_no], "summary": summary}
+
+    def add_summary(total: Dict[str, int], result: Dict) -> None:
+        for key, value in result["summary"].items():
+            total[key] += value
+
+    if stream:
+        def generate():
+            total = new_approval_summary()
+            try:
+                for result in iter_results():
+                    add_summary(total, result)
+                    yield json.dumps({"type": "shipment", **result}) + "\n"
+            except Exception as e:
+                print(f"❌ Error in get_approval_status_batch: {str(e)}")
+                yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+                return
+            yield json.dumps({
+                "type": "summary",
+                "requested": len(shpt_nos),
+                "found": len(found),
+                "notFound": not_found,
+                "summary": total,
+                "timestamp": now_dubai(),
+                "schemaVersion": SCHEMA_VERSION
+            }) + "\n"
 
-            status_upper = status.upper()
-
-            # Summary by status
-            if status_upper == "PENDING":
-                summary["pending"] += 1
-            elif status_upper == "APPROVED":
-                summary["approved"] += 1
-            elif status_upper == "REJECTED":
-                summary["rejected"] += 1
-            elif status_upper == "EXPIRED":
-                summary["expired"] += 1
-
-            # Group by type
-            if approval_type not in by_type:
-                by_type[approval_type] = {
-                    "total": 0,
-                    "pending": 0,
-                    "approved": 0,
-                    "rejected": 0,
-                    "expired": 0
-                }
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
-            by_type[approval_type]["total"] += 1
-            if status_upper == "PENDING":
-                by_type[approval_type]["pending"] += 1
-            elif status_upper == "APPROVED":
-                by_type[approval_type]["approved"] += 1
-            elif status_upper == "REJECTED":
-                by_type[approval_type]["rejected"] += 1
-            elif status_upper == "EXPIRED":
-                by_type[approval_type]["expired"] += 1
-
-            # Critical analysis (only for PENDING)
-            if status_upper == "PENDING" and due_at_str:
-                due_at = parse_iso_any(due_at_str)
-                if due_at:
-                    days = days_until(due_at, now)
-                    if days is not None:
-                        if days < 0:
-                            critical["overdue"] += 1
-                        elif days <= 5:
-                            critical["d5"] += 1
-                        elif days <= 15:
-                            critical["d15"] += 1
+    try:
+        total = new_approval_summary()
+        results = []
+        for result in iter_results():
+            add_summary(total, result)
+            results.append(result)
 
-        # Return response
         return jsonify({
-            "summary": summary,
-            "byType": by_type,
-            "critical": critical,
+            "results": results,
+            "notFound": not_found,
+            "requested": len(shpt_nos),
+            "summary": total,
             "timestamp": now_dubai(),
             "schemaVersion": SCHEMA_VERSION
         }), 200
 
     except Exception as e:
-        print(f"❌ Error in get_approval_summary: {str(e)}")
+        print(f"❌ Error in get_approval_status_batch: {str(e)}")
         return jsonify({
             "error": "Internal server error",
             "details": str(e),
@@ -1173,13 +1665,13 @@ def get_approval_summary():
         }), 500
 
 
-# ==================== Bottleneck Endpoints (Phase 4.1) ====================
-@app.route("/bottleneck/summary", methods=["GET"])
-def get_bottleneck_summary():
-    """
-    GET /bottleneck/summary
+@app.route("/approval/summary", methods=["GET"])
+def get_approval_summary():
+    """
+    GET /approval/summary
 
-    Returns bottleneck analysis with aging distribution
+    Returns global approval statistics from the approval deadline index
+    (reloaded every APPROVAL_INDEX_TTL_SECONDS; indexedAt is the load time)
     """
     if not airtable_client:
         return jsonify({
@@ -1189,148 +1681,131 @@ def get_bottleneck_summary():
         }), 503
 
     try:
-        # Fetch active bottlenecks
-        filter_formula = "NOT({currentBottleneckCode}='')"
-
-        shipments = airtable_client.list_records(
-            TABLES["Shipments"],
-            filter_by_formula=filter_formula,
-            fields=["shptNo", "currentBottleneckCode", "bottleneckSince", "riskLevel"],
-            page_size=100
-        )
+        # Served from the in-memory deadline index (refreshed periodically)
+        snapshot = approval_index.snapshot()
 
-        # Fetch bottleneck code definitions
-        bottleneck_codes = airtable_client.list_records(
-            TABLES["BottleneckCodes"],
-            fields=["code", "category", "description", "riskDefault", "slaHours"]
-        )
+        # Critical analysis (only for PENDING): bisections against now
+        critical = snapshot.pending.buckets(now_epoch())
 
-        # Build code lookup (fieldId-based)
-        code_map = {}
-        for rec in bottleneck_codes:
-            fields = rec.get("fields", {})
-            code = extract_field_by_id(
-                fields,
-                FIELD_IDS["BottleneckCodes"]["code"],
-                "code"
-            )
-            if code:
-                code_map[code] = {
-                    "category": extract_field_by_id(
-                        fields,
-                        FIELD_IDS["BottleneckCodes"]["category"],
-                        "category"
-                    ),
-                    "description": extract_field_by_id(
-                        fields,
-                        FIELD_IDS["BottleneckCodes"]["description"],
-                        "description"
-                    ),
-                    "riskDefault": extract_field_by_id(
-                        fields,
-                        FIELD_IDS["BottleneckCodes"]["riskDefault"],
-                        "riskDefault"
-                    ),
-                    "slaHours": extract_field_by_id(
-                        fields,
-                        FIELD_IDS["BottleneckCodes"]["slaHours"],
-                        "slaHours"
-                    )
-                }
+        # Return response
+        return jsonify({
+            "summary": snapshot.summary,
+            "byType": snapshot.by_type,
+            "critical": critical,
+            "indexedAt": iso_dubai_epoch(snapshot.loaded_at),
+            "timestamp": now_dubai(),
+            "schemaVersion": SCHEMA_VERSION
+        }), 200
 
-        now = datetime.now(DUBAI_TZ)
+    except Exception as e:
+        print(f"❌ Error in get_approval_summary: {str(e)}")
+        return jsonify({
+            "error": "Internal server error",
+            "details": str(e),
+            "status": "internal_error",
+            "timestamp": now_dubai()
+        }), 500
 
-        # Initialize aggregations
-        by_category = {}
-        by_code = {}
-        aging = {
-            "under24h": 0,
-            "under48h": 0,
-            "under72h": 0,
-            "over72h": 0
-        }
 
-        # Process shipments
-        for record in shipments:
-            fields = record.get("fields", {})
+URGENT_DEFAULT_LIMIT = 20
+URGENT_MAX_LIMIT = 100
 
-            code = extract_field_by_id(
-                fields,
-                FIELD_IDS["Shipments"]["currentBottleneckCode"],
-                "currentBottleneckCode"
-            )
 
-            since_str = extract_field_by_id(
-                fields,
-                FIELD_IDS["Shipments"]["bottleneckSince"],
-                "bottleneckSince"
-            )
+@app.route("/approval/urgent", methods=["GET"])
+def get_urgent_approvals():
+    """
+    GET /approval/urgent?limit=20&type=FANR
 
-            if not code:
-                continue
+    Returns the PENDING approvals with the earliest dueAt (most overdue
+    first), read from the front of the deadline index without a scan.
 
-            # Initialize code stats
-            if code not in by_code:
-                by_code[code] = {
-                    "count": 0,
-                    "riskLevel": code_map.get(code, {}).get("riskDefault", "MEDIUM"),
-                    "description": code_map.get(code, {}).get("description", ""),
-                    "slaHours": code_map.get(code, {}).get("slaHours"),
-                    "totalAgingHours": 0.0
-                }
+    Query params:
+    - limit: Approvals to return (1-100, default 20)
+    - type: Only this approvalType
+    """
+    if not airtable_client:
+        return jsonify({
+            "error": "Airtable connection not available",
+            "status": "service_unavailable",
+            "timestamp": now_dubai()
+        }), 503
 
-            by_code[code]["count"] += 1
-
-            # Calculate aging
-            if since_str:
-                since = parse_iso_any(since_str)
-                if since:
-                    aging_hours = (now - since).total_seconds() / 3600.0
-                    aging_hours = round(aging_hours, 2)
-
-                    by_code[code]["totalAgingHours"] += aging_hours
-
-                    # Aging distribution
-                    if aging_hours < 24:
-                        aging["under24h"] += 1
-                    elif aging_hours < 48:
-                        aging["under48h"] += 1
-                    elif aging_hours < 72:
-                        aging["under72h"] += 1
-                    else:
-                        aging["over72h"] += 1
-
-            # By category
-            category = code_map.get(code, {}).get("category", "UNKNOWN")
-            if category not in by_category:
-                by_category[category] = 0
-            by_category[category] += 1
-
-        # Calculate averages
-        for code, stats in by_code.items():
-            if stats["count"] > 0:
-                stats["avgAgingHours"] = round(
-                    stats["totalAgingHours"] / stats["count"],
-                    2
-                )
-            else:
-                stats["avgAgingHours"] = 0.0
-            del stats["totalAgingHours"]  # Remove temp field
+    limit_param = request.args.get("limit")
+    try:
+        limit = int(limit_param) if limit_param else URGENT_DEFAULT_LIMIT
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= URGENT_MAX_LIMIT:
+        return jsonify({
+            "error": f"limit must be an integer between 1 and {URGENT_MAX_LIMIT}",
+            "status": "bad_request",
+            "timestamp": now_dubai(),
+            "schemaVersion": SCHEMA_VERSION
+        }), 400
+
+    approval_type = request.args.get("type") or None
+
+    try:
+        now = now_epoch()
+        approvals = []
+        for row in approval_index.urgent(limit, approval_type):
+            days_until_due = days_until_epoch(row["dueAt"], now)
+            approvals.append({
+                "approvalKey": row["approvalKey"],
+                "shptNo": row["shptNo"],
+                "approvalType": row["approvalType"],
+                "status": row["status"],
+                "dueAt": iso_dubai_epoch(row["dueAt"]),
+                "owner": row["owner"],
+                "daysUntilDue": days_until_due,
+                "priority": classify_priority(days_until_due)
+            })
+
+        return jsonify({
+            "approvals": approvals,
+            "total": len(approvals),
+            "limit": limit,
+            "type": approval_type,
+            "critical": approval_index.buckets(approval_type, now),
+            "timestamp": now_dubai(),
+            "schemaVersion": SCHEMA_VERSION
+        }), 200
+
+    except Exception as e:
+        print(f"❌ Error in get_urgent_approvals: {str(e)}")
+        return jsonify({
+            "error": "Internal server error",
+            "details": str(e),
+            "status": "internal_error",
+            "timestamp": now_dubai()
+        }), 500
+
+
+# ==================== Bottleneck Endpoints (Phase 4.1) ====================
+@app.route("/bottleneck/summary", methods=["GET"])
+def get_bottleneck_summary():
+    """
+    GET /bottleneck/summary
 
-        # Top bottlenecks (sorted by count)
-        top_bottlenecks = sorted(
-            [{"code": k, **v} for k, v in by_code.items()],
-            key=lambda x: x["count"],
-            reverse=True
-        )[:10]
+    Returns bottleneck analysis with aging distribution, served from the
+    bottleneck engine snapshot (reloaded every BOTTLENECK_TTL_SECONDS)
+    """
+    if not airtable_client:
+        return jsonify({
+            "error": "Airtable connection not available",
+            "status": "service_unavailable",
+            "timestamp": now_dubai()
+        }), 503
+
+    try:
+        # Aging via bisection on the engine snapshot; codes joined in memory
+        snapshot = bottleneck_engine.snapshot()
+        summary = snapshot.summary(now_epoch(), reference_data.bottleneck_code)
 
         # Return response
         return jsonify({
-            "byCategory": by_category,
-            "byCode": by_code,
-            "aging": aging,
-            "topBottlenecks": top_bottlenecks,
-            "totalActive": len(shipments),
+            **summary,
+            "indexedAt": iso_dubai_epoch(snapshot.loaded_at),
             "timestamp": now_dubai(),
             "schemaVersion": SCHEMA_VERSION
         }), 200
@@ -1345,13 +1820,176 @@ def get_bottleneck_summary():
         }), 500
 
 
+# ==================== KPI Time Series ====================
+# SQLite file for sampled KPIs (time series disabled when unset)
+KPI_TIMESERIES_PATH = os.getenv("KPI_TIMESERIES_PATH")
+kpi_timeseries = KpiTimeSeries(KPI_TIMESERIES_PATH) if KPI_TIMESERIES_PATH else None
+
+KPI_RISK_LEVELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+KPI_METRICS = (
+    "totalShipments", "boeRate", "doRate", "cooRate", "hblRate", "ciplRate",
+    *(f"risk{level.title()}" for level in KPI_RISK_LEVELS),
+    "approvalsTotal", "approvalsPending", "approvalsApproved",
+    "approvalsRejected", "approvalsExpired",
+    "approvalsOverdue", "approvalsD5", "approvalsD15",
+    "bottlenecksActive", "bottlenecksOver72h",
+)
+KPI_DEFAULT_RANGE_SECONDS = 30 * 86400
+KPI_DEFAULT_STEP = "1d"
+
+
+def collect_kpi_metrics() -> Dict[str, Optional[float]]:
+    """
+    Current values of KPI_METRICS (status, approval and bottleneck summaries)
+
+    Metrics whose source is unavailable are None, so the sample records them
+    as unmeasured instead of carrying the previous value forward.
+    """
+    now = now_epoch()
+    metrics: Dict[str, Optional[float]] = dict.fromkeys(KPI_METRICS)
+
+    status = status_aggregates.status_summary()
+    if status is not None:
+        for key in ("totalShipments", "boeRate", "doRate", "cooRate", "hblRate", "ciplRate"):
+            metrics[key] = status[key]
+        for level in KPI_RISK_LEVELS:
+            metrics[f"risk{level.title()}"] = status["riskSummary"].get(level, 0)
+
+    approvals = approval_index.snapshot()
+    if approvals is not None:
+        for key in ("total", "pending", "approved", "rejected", "expired"):
+            metrics[f"approvals{key.title()}"] = approvals.summary[key]
+        buckets = approvals.pending.buckets(now)
+        metrics["approvalsOverdue"] = buckets["overdue"]
+        metrics["approvalsD5"] = buckets["d5"]
+        metrics["approvalsD15"] = buckets["d15"]
+
+    bottlenecks = bottleneck_engine.snapshot()
+    if bottlenecks is not None:
+        metrics["bottlenecksActive"] = bottlenecks.total_active
+        metrics["bottlenecksOver72h"] = bottlenecks.aging(now)["over72h"]
+
+    return metrics
+
+
+if kpi_timeseries is not None and airtable_client:
+    kpi_timeseries.start_sampler(collect_kpi_metrics)
+
+
+@app.route("/kpi/timeseries", methods=["GET"])
+def get_kpi_timeseries():
+    """
+    GET /kpi/timeseries?metric=boeRate&from=&to=&step=1d&agg=last
+
+    Sampled KPI history, downsampled to `step` (e.g. 1h, 1d). from/to are
+    ISO datetimes (default: the last 30 days).
+    """
+    if kpi_timeseries is None:
+        return jsonify({
+            "error": "KPI time series not configured",
+            "status": "service_unavailable",
+            "timestamp": now_dubai(),
+            "schemaVersion": SCHEMA_VERSION,
+        }), 503
+
+    def bad_request(message: str):
+        return jsonify({
+            "error": message,
+            "status": "error",
+            "timestamp": now_dubai(),
+            "schemaVersion": SCHEMA_VERSION,
+        }), 400
+
+    metric = (request.args.get("metric") or "").strip()
+    if metric not in KPI_METRICS:
+        return bad_request(f"metric must be one of: {', '.join(KPI_METRICS)}")
+
+    end = parse_iso_epoch(request.args.get("to")) if request.args.get("to") else now_epoch()
+    start = (
+        parse_iso_epoch(request.args.get("from"))
+        if request.args.get("from")
+        else (end - KPI_DEFAULT_RANGE_SECONDS if end is not None else None)
+    )
+    if start is None or end is None:
+        return bad_request("from/to must be ISO 8601 datetimes")
+    if start >= end:
+        return bad_request("from must be before to")
+
+    step = parse_duration_seconds(request.args.get("step") or KPI_DEFAULT_STEP)
+    if step is None:
+        return bad_request("step must be a duration such as 300, 15m, 1h or 1d")
+
+    agg = (request.args.get("agg") or "last").lower()
+    if agg not in KPI_AGGREGATES:
+        return bad_request(f"agg must be one of: {', '.join(KPI_AGGREGATES)}")
+
+    try:
+        points = kpi_timeseries.series(metric, start, end, step, agg)
+    except ValueError as e:
+        return bad_request(str(e))
+
+    return jsonify({
+        "metric": metric,
+        "from": iso_dubai_epoch(start),
+        "to": iso_dubai_epoch(end),
+        "stepSeconds": kpi_timeseries.step_for(step),
+        "agg": agg,
+        "points": [
+            {"t": iso_dubai_epoch(point["t"]), "v": point["v"], "samples": point["n"]}
+            for point in points
+        ],
+        "timestamp": now_dubai(),
+        "schemaVersion": SCHEMA_VERSION,
+    }), 200
+
+
 # ==================== Document Events Endpoint (Phase 4.1) ====================
+EVENTS_DEFAULT_LIMIT = 50
+EVENTS_MAX_LIMIT = 100
+
+
+def encode_events_cursor(before: str) -> str:
+    """Encode an opaque events cursor (keyset on Airtable timestamp)"""
+    raw = json.dumps({"before": before}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_events_cursor(cursor: str) -> Optional[str]:
+    """Decode an events cursor; returns the UTC timestamp bound or None if invalid"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        before = data.get("before")
+    except (ValueError, TypeError, AttributeError):
+        return None
+    if parse_iso_epoch(before) is None:
+        return None
+    return before
+
+
+def airtable_utc(epoch: float) -> str:
+    """Format epoch seconds for Airtable formulas (UTC, millisecond Z)"""
+    dt = datetime.fromtimestamp(epoch, timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
 @app.route("/document/events/<shptNo>", methods=["GET"])
 def get_document_events(shptNo: str):
     """
-    GET /document/events/{shptNo}
+    GET /document/events/{shptNo}?limit=50&cursor=...&since=...
+
+    Returns chronological event history (latest first), one page at a time.
 
-    Returns chronological event history (latest first)
+    Query params:
+    - limit: Events per page (1-100, default 50)
+    - cursor: Opaque cursor from a previous response's nextCursor
+    - since: Only events at or after this ISO datetime
+
+    Sorting (timestamp desc) and the page limit are pushed to Airtable, so
+    cost is proportional to the page size, not the shipment's history.
+    Paging is keyset-based on timestamp, which is unique per shipment
+    (timestamp + shptNo is the Events upsert key). Events without a
+    timestamp sort last; a page ending in one has hasMore=false.
     """
     if not airtable_client:
         return jsonify({
@@ -1360,17 +1998,71 @@ def get_document_events(shptNo: str):
             "timestamp": now_dubai()
         }), 503
 
+    # Validate paging params
+    limit_param = request.args.get("limit")
     try:
-        # Step 1: Verify shipment exists
-        shipment_filter = f"{{shptNo}}='{shptNo}'"
+        limit = int(limit_param) if limit_param else EVENTS_DEFAULT_LIMIT
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= EVENTS_MAX_LIMIT:
+        return jsonify({
+            "error": f"limit must be an integer between 1 and {EVENTS_MAX_LIMIT}",
+            "status": "bad_request",
+            "timestamp": now_dubai(),
+            "schemaVersion": SCHEMA_VERSION
+        }), 400
 
-        shipments = airtable_client.list_records(
-            TABLES["Shipments"],
-            filter_by_formula=shipment_filter,
-            fields=["shptNo"]
+    before = None
+    cursor = request.args.get("cursor")
+    if cursor:
+        before = decode_events_cursor(cursor)
+        if before is None:
+            return jsonify({
+                "error": "Invalid cursor",
+                "status": "bad_request",
+                "timestamp": now_dubai(),
+                "schemaVersion": SCHEMA_VERSION
+            }), 400
+
+    since = None
+    since_param = request.args.get("since")
+    if since_param:
+        since_epoch = parse_iso_epoch(since_param)
+        if since_epoch is None:
+            return jsonify({
+                "error": "since must be an ISO 8601 datetime",
+                "status": "bad_request",
+                "timestamp": now_dubai(),
+                "schemaVersion": SCHEMA_VERSION
+            }), 400
+        since = airtable_utc(since_epoch)
+
+    try:
+        # Step 1+2: Fetch one page of events (may be empty → 200 OK); existence
+        # comes from the shipment oracle, or a concurrent check on a cache miss
+        conditions = [f"{{shptNo}}='{shptNo}'"]
+        if before:
+            conditions.append(f"IS_BEFORE({{timestamp}}, '{before}')")
+        if since:
+            conditions.append(f"NOT(IS_BEFORE({{timestamp}}, '{since}'))")
+        event_filter = (
+            conditions[0] if len(conditions) == 1 else f"AND({', '.join(conditions)})"
         )
 
-        if not shipments:
+        # Fetch one extra record to know whether another page exists
+        exists, events_raw = shipment_oracle.fetch_if_exists(
+            shptNo,
+            lambda: airtable_client.list_records(
+                TABLES["Events"],
+                filter_by_formula=event_filter,
+                fields=EVENT_FIELDS,
+                return_fields_by_field_id=True,
+                sort=[{"field": "timestamp", "direction": "desc"}],
+                max_records=limit + 1,
+            ),
+        )
+
+        if not exists:
             return jsonify({
                 "error": "Shipment not found",
                 "shptNo": shptNo,
@@ -1378,73 +2070,29 @@ def get_document_events(shptNo: str):
                 "schemaVersion": SCHEMA_VERSION
             }), 404
 
-        # Step 2: Fetch events (may be empty → 200 OK)
-        event_filter = f"{{shptNo}}='{shptNo}'"
-
-        events_raw = airtable_client.list_records(
-            TABLES["Events"],
-            filter_by_formula=event_filter,
-            fields=[
-                "eventId", "timestamp", "entityType",
-                "fromStatus", "toStatus", "actor", "bottleneckCode"
-            ]
-        )
-
-        # Step 3: Parse and sort (fieldId-based)
+        # Step 3: Parse (fieldId-based)
         events = []
 
-        for record in events_raw:
-            fields = record.get("fields", {})
-
-            event_id = extract_field_by_id(
-                fields,
-                FIELD_IDS["Events"]["eventId"],
-                "eventId"
-            )
-
-            timestamp_str = extract_field_by_id(
-                fields,
-                FIELD_IDS["Events"]["timestamp"],
-                "timestamp"
-            )
-
-            entity_type = extract_field_by_id(
-                fields,
-                FIELD_IDS["Events"]["entityType"],
-                "entityType"
-            )
-
-            from_status = extract_field_by_id(
-                fields,
-                FIELD_IDS["Events"]["fromStatus"],
-                "fromStatus"
-            )
-
-            to_status = extract_field_by_id(
-                fields,
-                FIELD_IDS["Events"]["toStatus"],
-                "toStatus"
-            )
-
-            actor = extract_field_by_id(
-                fields,
-                FIELD_IDS["Events"]["actor"],
-                "actor"
-            )
-
-            bottleneck_code = extract_field_by_id(
-                fields,
-                FIELD_IDS["Events"]["bottleneckCode"],
-                "bottleneckCode"
-            )
+        extract = event_extractor.bind(events_raw)
 
-            # Parse timestamp
-            timestamp = parse_iso_any(timestamp_str)
+        for record in events_raw:
+            (
+                event_id,
+                timestamp_str,
+                entity_type,
+                from_status,
+                to_status,
+                actor,
+                bottleneck_code,
+            ) = extract(record.get("fields", {}))
+
+            # Parse timestamp once to epoch seconds
+            timestamp = parse_iso_epoch(timestamp_str)
 
             event = {
                 "eventId": event_id,
-                "timestamp": iso_dubai(timestamp),
-                "timestampSort": timestamp,  # For sorting
+                "timestamp": iso_dubai_epoch(timestamp),
+                "timestampSort": timestamp,  # For sorting / cursor
                 "entityType": entity_type,
                 "fromStatus": from_status,
                 "toStatus": to_status,
@@ -1453,8 +2101,22 @@ def get_document_events(shptNo: str):
             }
             events.append(event)
 
-        # Sort by timestamp (descending = latest first)
-        events.sort(key=lambda e: e.get("timestampSort") or datetime.min.replace(tzinfo=DUBAI_TZ), reverse=True)
+        # Airtable already sorted the page; stable re-sort of ≤limit+1 items
+        events.sort(
+            key=lambda e: e["timestampSort"] if e["timestampSort"] is not None else float("-inf"),
+            reverse=True,
+        )
+
+        has_more = len(events) > limit
+        events = events[:limit]
+
+        next_cursor = None
+        if has_more and events and events[-1]["timestampSort"] is not None:
+            next_cursor = encode_events_cursor(airtable_utc(events[-1]["timestampSort"]))
+        elif has_more:
+            # Undated events sort last and a timestamp keyset cannot reach
+            # past them, so this is the last page that can be served
+            has_more = False
 
         # Remove sort helper
         for event in events:
@@ -1465,6 +2127,9 @@ def get_document_events(shptNo: str):
             "shptNo": shptNo,
             "events": events,
             "total": len(events),
+            "limit": limit,
+            "hasMore": has_more,
+            "nextCursor": next_cursor,
             "timestamp": now_dubai(),
             "schemaVersion": SCHEMA_VERSION
         }), 200
@@ -1504,9 +2169,18 @@ def ingest_events():
     Features:
     - Field validation against locked schema
     - Idempotent (dedupes by unique fields)
+    - Deduplication: in-batch duplicates of (timestamp, shptNo) are merged
+      last-write-wins; identical events committed recently are dropped
+      without an upstream call (reported as "deduplicated")
     - Batch upsert (≤10 records/req)
     - Rate-limited (5 rps)
     - Protected field names (timestamp, shptNo)
+    - Async mode (?mode=async or "Prefer: respond-async"): validates,
+      enqueues and returns 202 with a batch handle; poll
+      GET /ingest/batches/{batchHandle} for progress
+    - NDJSON mode (Content-Type: application/x-ndjson): one event per line,
+      batchId/sourceSystem from query or X-Batch-Id/X-Source-System headers;
+      parsed and written incrementally (see ingest_events_stream)
 
     Note: eventId is autoNumber in Airtable (cannot be provided)
     """
@@ -1516,6 +2190,9 @@ def ingest_events():
             503,
         )
 
+    if request.mimetype in NDJSON_MIMETYPES:
+        return ingest_events_stream()
+
     try:
         data = request.get_json()
 
@@ -1532,19 +2209,8 @@ def ingest_events():
 
         # Phase 2.3: Validate fields using locked schema
         if schema_validator:
-            validation_errors = []
-            valid_fields = schema_validator.get_valid_fields("Events")
-
-            for i, event in enumerate(events):
-                result = schema_validator.validate_fields("Events", event)
-                if not result["valid"]:
-                    validation_errors.append(
-                        {
-                            "index": i,
-                            "invalid_fields": result["invalid_fields"],
-                            "suggestions": result["suggestions"],
-                        }
-                    )
+            # One pass over the batch: names and value types (typecast rules)
+            validation_errors = schema_validator.validate_batch("Events", events)
 
             if validation_errors:
                 return (
@@ -1553,31 +2219,86 @@ def ingest_events():
                             "error": "Field validation failed",
                             "status": "validation_error",
                             "details": validation_errors,
-                            "valid_fields": valid_fields,
+                            "valid_fields": schema_validator.get_valid_fields("Events"),
                             "protected_fields": PROTECTED_FIELDS.get("Events", []),
-                            "hint": "Check field names against Airtable schema. Note: eventId is autoNumber and cannot be provided.",
+                            "hint": "Check field names and value types against Airtable schema. Note: eventId is autoNumber and cannot be provided.",
                             "timestamp": now_dubai(),
                         }
                     ),
                     400,
                 )
 
+        # Collapse in-batch duplicates, drop identical recently committed events
+        received = len(events)
+        events, dedup_counts = dedupe_events(events, recent_event_keys)
+        deduplicated = dedup_counts["inBatch"] + dedup_counts["recent"]
+
+        # Async mode: enqueue and answer immediately
+        if wants_async_ingest():
+            batch = ingest_queue.submit(batch_id, source_system, events)
+            return (
+                jsonify(
+                    {
+                        "status": "accepted",
+                        "batchId": batch_id,
+                        "batchHandle": batch.handle,
+                        "statusUrl": f"/ingest/batches/{batch.handle}",
+                        "sourceSystem": source_system,
+                        "received": received,
+                        "queued": len(events),
+                        "deduplicated": deduplicated,
+                        "deduplication": dedup_counts,
+                        "validated": schema_validator is not None,
+                        "schemaVersion": SCHEMA_VERSION,
+                        "timestamp": now_dubai(),
+                    }
+                ),
+                202,
+            )
+
+        # Journaled: write chunk by chunk so a crash resends only the rest
+        if ingest_queue.journal is not None:
+            batch = ingest_queue.write_through(batch_id, source_system, events)
+            return jsonify(
+                {
+                    "status": "success",
+                    "batchId": batch_id,
+                    "batchHandle": batch.handle,
+                    "sourceSystem": source_system,
+                    "received": received,
+                    "ingested": batch.committed,
+                    "deduplicated": deduplicated,
+                    "deduplication": dedup_counts,
+                    "batches": -(-len(events) // ingest_queue.chunk_size),
+                    "validated": schema_validator is not None,
+                    "schemaVersion": SCHEMA_VERSION,
+                    "timestamp": now_dubai(),
+                }
+            )
+
         # Upsert events using locked table ID
         # Note: Events table uses timestamp+shptNo as natural key (Phase 2.2)
         # Airtable will auto-generate eventId (autoNumber)
-        results = airtable_client.upsert_records(
-            TABLES_LOWER["events"],
-            events,
-            fields_to_merge_on=["timestamp", "shptNo"],  # Natural composite key
-            typecast=True,
-        )
+        results = []
+        if events:
+            results = airtable_client.upsert_records(
+                TABLES_LOWER["events"],
+                events,
+                fields_to_merge_on=EVENT_MERGE_FIELDS,  # Natural composite key
+                typecast=True,
+            )
+            recent_event_keys.remember(events)
+            status_aggregates.apply(events)
 
         return jsonify(
             {
                 "status": "success",
                 "batchId": batch_id,
                 "sourceSystem": source_system,
+                "received": received,
                 "ingested": len(events),
+                "deduplicated": deduplicated,
+                "deduplication": dedup_counts,
                 "batches": len(results),
                 "validated": schema_validator is not None,
                 "schemaVersion": SCHEMA_VERSION,
@@ -1592,6 +2313,246 @@ def ingest_events():
         )
 
 
+# ==================== NDJSON Streaming Ingest ====================
+NDJSON_MIMETYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+# Longest accepted NDJSON line (one event)
+NDJSON_MAX_LINE_BYTES = 64 * 1024
+
+# Per-line errors echoed back (the rest are only counted)
+NDJSON_MAX_REPORTED_ERRORS = 100
+
+
+def iter_ndjson_lines(stream, max_line_bytes: int = NDJSON_MAX_LINE_BYTES):
+    """
+    Yield (line number, bytes or None) from a binary stream
+
+    Over-long lines are consumed and yielded as None so the caller can
+    report them without buffering them.
+    """
+    line_no = 0
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        line_no += 1
+        if len(line) > max_line_bytes and not line.endswith(b"\n"):
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(max_line_bytes)
+            yield line_no, None
+            continue
+        yield line_no, line
+
+
+def ingest_events_stream():
+    """
+    NDJSON body of POST /ingest/events
+
+    Lines are parsed, validated and deduplicated one buffer (one upsert
+    chunk) at a time, so memory is bounded by the buffer rather than the
+    payload and the first upsert goes out while the upload is still
+    arriving. Invalid lines are skipped and reported; valid lines are
+    written. Async mode enqueues each buffer (blocking while the queue is
+    full) and answers 202 at end of stream.
+    """
+    batch_id = request.args.get("batchId") or request.headers.get("X-Batch-Id") or "unknown"
+    source_system = (
+        request.args.get("sourceSystem") or request.headers.get("X-Source-System") or "API"
+    )
+    async_mode = wants_async_ingest()
+    batch = ingest_queue.open_batch(batch_id, source_system)
+
+    received = 0
+    rejected = 0
+    errors: List[Dict] = []
+    dedup_counts = {"inBatch": 0, "recent": 0}
+    buffer: List[Dict] = []
+    upstream_error: Optional[Exception] = None
+
+    def reject(line_no: int, error: str, **extra) -> None:
+        nonlocal rejected
+        rejected += 1
+        if len(errors) < NDJSON_MAX_REPORTED_ERRORS:
+            errors.append({"line": line_no, "error": error, **extra})
+
+    def flush() -> Optional[Exception]:
+        unique, counts = dedupe_events(buffer, recent_event_keys)
+        dedup_counts["inBatch"] += counts["inBatch"]
+        dedup_counts["recent"] += counts["recent"]
+        buffer.clear()
+        return ingest_queue.append(batch, unique, write=not async_mode)
+
+    try:
+        for line_no, line in iter_ndjson_lines(request.stream):
+            if line is None:
+                reject(line_no, f"Line exceeds {NDJSON_MAX_LINE_BYTES} bytes")
+                continue
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError as e:
+                reject(line_no, f"Invalid JSON: {e}")
+                continue
+            if not isinstance(event, dict):
+                reject(line_no, "Line is not a JSON object")
+                continue
+
+            received += 1
+            if schema_validator:
+                result = schema_validator.validate_fields("Events", event)
+                if not result["valid"]:
+                    reject(
+                        line_no,
+                        "Field validation failed",
+                        invalid_fields=result["invalid_fields"],
+                        type_errors=result["type_errors"],
+                        suggestions=result["suggestions"],
+                    )
+                    continue
+
+            buffer.append(event)
+            if len(buffer) >= ingest_queue.chunk_size:
+                upstream_error = flush()
+                if upstream_error is not None:
+                    break
+
+        if buffer and upstream_error is None:
+            upstream_error = flush()
+    finally:
+        ingest_queue.seal(batch)
+
+    summary = {
+        "batchId": batch_id,
+        "batchHandle": batch.handle,
+        "sourceSystem": source_system,
+        "received": received,
+        "rejected": rejected,
+        "errors": errors,
+        "deduplicated": dedup_counts["inBatch"] + dedup_counts["recent"],
+        "deduplication": dedup_counts,
+        "validated": schema_validator is not None,
+        "schemaVersion": SCHEMA_VERSION,
+        "timestamp": now_dubai(),
+    }
+
+    if upstream_error is not None:
+        return jsonify({
+            **summary,
+            "error": str(upstream_error),
+            "status": "failed",
+            "ingested": batch.committed,
+        }), 500
+
+    if async_mode:
+        return jsonify({
+            **summary,
+            "status": "accepted",
+            "statusUrl": f"/ingest/batches/{batch.handle}",
+            "queued": batch.total,
+        }), 202
+
+    return jsonify({
+        **summary,
+        "status": "success",
+        "ingested": batch.committed,
+    }), 200
+
+
+def wants_async_ingest() -> bool:
+    """True if the client asked for 202 Accepted ingest and a worker runs"""
+    if not INGEST_ASYNC_WORKER:
+        # Nothing would drain the queue after the response: serve synchronously
+        return False
+    if (request.args.get("mode") or "").strip().lower() == "async":
+        return True
+    prefer = (request.headers.get("Prefer") or "").lower()
+    return "respond-async" in prefer
+
+
+@app.route("/ingest/batches/<batch_handle>", methods=["GET"])
+def get_ingest_batch(batch_handle: str):
+    """
+    GET /ingest/batches/{batchHandle}
+
+    Progress and per-event outcomes of an async ingest batch
+    (?events=false omits the per-event list)
+    """
+    batch = ingest_queue.get_batch(batch_handle)
+    if batch is None:
+        return jsonify({
+            "error": "Batch not found",
+            "batchHandle": batch_handle,
+            "status": "not_found",
+            "timestamp": now_dubai()
+        }), 404
+
+    include_events = (request.args.get("events") or "true").lower() != "false"
+    return jsonify({
+        **batch.to_dict(include_events=include_events),
+        "queueDepth": ingest_queue.pending(),
+        "schemaVersion": SCHEMA_VERSION,
+        "timestamp": now_dubai(),
+    }), 200
+
+
+# ==================== Airtable Webhook Receiver ====================
+@app.route("/webhooks/airtable", methods=["POST"])
+def airtable_webhook():
+    """
+    POST /webhooks/airtable
+
+    Airtable change notification. Verifies X-Airtable-Content-MAC, reads the
+    new payloads and invalidates/patches the affected caches by table and
+    record ID.
+    """
+    if not AIRTABLE_WEBHOOK_SECRET:
+        return jsonify({
+            "error": "Webhook receiver not configured",
+            "status": "unavailable",
+            "timestamp": now_dubai(),
+            "schemaVersion": SCHEMA_VERSION,
+        }), 503
+
+    body = request.get_data(cache=True)
+    if not verify_signature(
+        AIRTABLE_WEBHOOK_SECRET, body, request.headers.get("X-Airtable-Content-MAC")
+    ):
+        return jsonify({
+            "error": "Invalid webhook signature",
+            "status": "unauthorized",
+            "timestamp": now_dubai(),
+            "schemaVersion": SCHEMA_VERSION,
+        }), 401
+
+    notification = request.get_json(silent=True) or {}
+    webhook_id = (notification.get("webhook") or {}).get("id")
+    if not webhook_id:
+        return jsonify({
+            "error": "webhook.id is required",
+            "status": "error",
+            "timestamp": now_dubai(),
+            "schemaVersion": SCHEMA_VERSION,
+        }), 400
+
+    if not airtable_client:
+        return jsonify({
+            "error": "Airtable client not configured",
+            "status": "unavailable",
+            "timestamp": now_dubai(),
+            "schemaVersion": SCHEMA_VERSION,
+        }), 503
+
+    result = webhook_receiver.handle(webhook_id)
+    return jsonify({
+        "status": "ok",
+        "webhookId": webhook_id,
+        **result,
+        "timestamp": now_dubai(),
+        "schemaVersion": SCHEMA_VERSION,
+    }), 200
+
+
 # ==================== Main ====================
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0", port=5000)
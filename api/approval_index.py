@@ -0,0 +1,164 @@
+"""
+In-memory deadline index over Approvals
+
+GET /approval/summary used to pull every approval and recompute days-until-due
+per request, and there was no way to ask for "the N most urgent" approvals.
+The index loads Approvals once per refresh window and keeps:
+
+- PENDING approvals with a dueAt, sorted by due epoch (parallel arrays), overall
+  and per approvalType
+- status counts overall and per approvalType (for /approval/summary)
+
+Bucket counts (overdue / D-5 / D-15) are bisections against "now", so they
+stay correct as time passes between refreshes; the top-N most urgent are the
+first N entries of the sorted array.
+
+Bucket boundaries match classify_priority() on days rounded to 2 decimals.
+"""
+
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from api.snapshot_cache import SnapshotCache
+
+# Index is reloaded once older than this
+APPROVAL_INDEX_TTL_SECONDS = 60
+
+_DAY = 86400.0
+
+# days_until_epoch rounds to 2 decimals: days < 0 once (due - now) < -0.005 d,
+# days <= N while (due - now) <= N + 0.005 d
+_ROUNDING = 0.005 * _DAY
+
+STATUS_KEYS = ("pending", "approved", "rejected", "expired")
+
+
+def _empty_counts() -> Dict[str, int]:
+    return {"total": 0, "pending": 0, "approved": 0, "rejected": 0, "expired": 0}
+
+
+class _Deadlines:
+    """PENDING approvals sorted by due epoch"""
+
+    __slots__ = ("due", "rows")
+
+    def __init__(self, pairs: List[Tuple[float, Dict[str, Any]]]):
+        pairs.sort(key=lambda pair: pair[0])
+        self.due = array("d", (due for due, _ in pairs))
+        self.rows = [row for _, row in pairs]
+
+    def buckets(self, now: float) -> Dict[str, int]:
+        """overdue / d5 / d15 counts via bisection"""
+        overdue = bisect_left(self.due, now - _ROUNDING)
+        d5 = bisect_right(self.due, now + 5 * _DAY + _ROUNDING)
+        d15 = bisect_right(self.due, now + 15 * _DAY + _ROUNDING)
+        return {"overdue": overdue, "d5": d5 - overdue, "d15": d15 - d5}
+
+
+class _ApprovalSnapshot:
+    """Immutable index contents for one load"""
+
+    def __init__(self, rows: List[Dict[str, Any]], loaded_at: float):
+        self.loaded_at = loaded_at
+        self.summary = _empty_counts()
+        self.by_type: Dict[str, Dict[str, int]] = {}
+        pending_all: List[Tuple[float, Dict[str, Any]]] = []
+        pending_by_type: Dict[str, List[Tuple[float, Dict[str, Any]]]] = {}
+
+        for row in rows:
+            approval_type = row.get("approvalType") or "UNKNOWN"
+            status_key = (row.get("status") or "UNKNOWN").lower()
+
+            type_counts = self.by_type.setdefault(approval_type, _empty_counts())
+            for counts in (self.summary, type_counts):
+                counts["total"] += 1
+                if status_key in STATUS_KEYS:
+                    counts[status_key] += 1
+
+            due = row.get("dueAt")
+            if status_key == "pending" and due is not None:
+                pending_all.append((due, row))
+                pending_by_type.setdefault(approval_type, []).append((due, row))
+
+        self.pending = _Deadlines(pending_all)
+        self.pending_by_type = {
+            approval_type: _Deadlines(pairs) for approval_type, pairs in pending_by_type.items()
+        }
+
+    def deadlines(self, approval_type: Optional[str] = None) -> Optional[_Deadlines]:
+        if approval_type is None:
+            return self.pending
+        return self.pending_by_type.get(approval_type)
+
+
+class ApprovalDeadlineIndex:
+    """
+    Periodically refreshed deadline index over Approvals
+
+    Args:
+        client_getter: Returns the current AirtableClient (or None)
+        loader: loader(client) -> rows with approvalKey, shptNo, approvalType,
+            status, dueAt (epoch seconds or None), owner
+        ttl_seconds: Age after which the index is reloaded
+        background_refresh: Reload a stale index on a worker thread (the
+            stale snapshot keeps serving meanwhile)
+    """
+
+    def __init__(
+        self,
+        client_getter: Callable[[], Any],
+        loader: Callable[[Any], List[Dict[str, Any]]],
+        *,
+        ttl_seconds: float = APPROVAL_INDEX_TTL_SECONDS,
+        background_refresh: bool = True,
+        clock=time.time,
+    ):
+        self._clock = clock
+        self._cache: SnapshotCache[_ApprovalSnapshot] = SnapshotCache(
+            client_getter,
+            lambda client: _ApprovalSnapshot(loader(client), clock()),
+            ttl_seconds=ttl_seconds,
+            background_refresh=background_refresh,
+            name="Approval index",
+            clock=clock,
+        )
+
+    def snapshot(self) -> Optional[_ApprovalSnapshot]:
+        """Current index, loading it on first use (None without a client)"""
+        return self._cache.get()
+
+    def refresh(self) -> Optional[_ApprovalSnapshot]:
+        return self._cache.refresh()
+
+    def invalidate(self) -> None:
+        """Force a reload on next use"""
+        self._cache.invalidate()
+
+    # ==================== Queries ====================
+    def buckets(self, approval_type: Optional[str] = None, now: Optional[float] = None) -> Dict[str, int]:
+        """PENDING overdue / d5 / d15 counts"""
+        snapshot = self.snapshot()
+        deadlines = snapshot.deadlines(approval_type) if snapshot else None
+        if deadlines is None:
+            return {"overdue": 0, "d5": 0, "d15": 0}
+        return deadlines.buckets(self._clock() if now is None else now)
+
+    def urgent(
+        self, limit: int, approval_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """The `limit` PENDING approvals with the earliest dueAt"""
+        snapshot = self.snapshot()
+        deadlines = snapshot.deadlines(approval_type) if snapshot else None
+        if deadlines is None:
+            return []
+        return deadlines.rows[:limit]
+
+    def info(self) -> Dict[str, Any]:
+        info = self._cache.info()
+        snapshot = self._cache.peek()
+        if snapshot is not None:
+            info["approvals"] = snapshot.summary["total"]
+            info["pendingWithDue"] = len(snapshot.pending.rows)
+        return info
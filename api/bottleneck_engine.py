@@ -0,0 +1,164 @@
+"""
+Bottleneck aging engine for GET /bottleneck/summary
+
+Active bottlenecks (shipments with a currentBottleneckCode) are loaded once
+per refresh window. The snapshot keeps:
+
+- every bottleneckSince epoch in one sorted array, so the aging distribution
+  (under24h / under48h / under72h / over72h) is three bisections against
+  precomputed cut-offs relative to "now"
+- per code: count, dated count and the running sum of bottleneckSince, so
+  the average aging is (dated * now - sum) / count without touching rows
+
+A summary costs O(codes + log n) per request instead of O(n).
+Bucket boundaries match aging hours rounded to 2 decimals.
+"""
+
+import time
+from array import array
+from bisect import bisect_right
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from api.snapshot_cache import SnapshotCache
+
+# Snapshot is reloaded once older than this
+BOTTLENECK_TTL_SECONDS = 60
+
+# Aging bucket upper bounds (hours); the last bucket is open-ended
+AGING_BUCKETS = (("under24h", 24), ("under48h", 48), ("under72h", 72))
+AGING_OVERFLOW = "over72h"
+
+# Aging hours are rounded to 2 decimals before bucketing
+_ROUNDING_SECONDS = 0.005 * 3600
+
+# Rows: (code, bottleneckSince epoch or None)
+BottleneckRow = Tuple[str, Optional[float]]
+
+
+class _CodeStats:
+    __slots__ = ("count", "dated", "since_sum")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.dated = 0
+        self.since_sum = 0.0
+
+
+class _BottleneckSnapshot:
+    """Immutable engine contents for one load"""
+
+    def __init__(self, rows: List[BottleneckRow], loaded_at: float):
+        self.loaded_at = loaded_at
+        self.total_active = len(rows)
+        self.by_code: Dict[str, _CodeStats] = {}
+        since_values: List[float] = []
+
+        for code, since in rows:
+            if not code:
+                continue
+            stats = self.by_code.get(code)
+            if stats is None:
+                stats = self.by_code[code] = _CodeStats()
+            stats.count += 1
+            if since is not None:
+                stats.dated += 1
+                stats.since_sum += since
+                since_values.append(since)
+
+        since_values.sort()
+        self.since = array("d", since_values)
+
+    def aging(self, now: float) -> Dict[str, int]:
+        """Aging distribution via bisection on the sorted since array"""
+        aging: Dict[str, int] = {}
+        below = 0
+        # At least `hours` old (after rounding): since <= now - hours + rounding
+        for name, hours in AGING_BUCKETS:
+            older = bisect_right(self.since, now - hours * 3600 + _ROUNDING_SECONDS)
+            aging[name] = len(self.since) - older - below
+            below += aging[name]
+        aging[AGING_OVERFLOW] = len(self.since) - below
+        return aging
+
+    def summary(
+        self, now: float, code_lookup: Callable[[str], Optional[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """byCategory / byCode / aging / topBottlenecks / totalActive"""
+        by_category: Dict[str, int] = {}
+        by_code: Dict[str, Dict[str, Any]] = {}
+
+        for code, stats in self.by_code.items():
+            info = code_lookup(code) or {}
+            aging_seconds = stats.dated * now - stats.since_sum
+            by_code[code] = {
+                "count": stats.count,
+                "riskLevel": info.get("riskDefault", "MEDIUM"),
+                "description": info.get("description", ""),
+                "slaHours": info.get("slaHours"),
+                "avgAgingHours": round(aging_seconds / 3600.0 / stats.count, 2),
+            }
+            category = info.get("category", "UNKNOWN")
+            by_category[category] = by_category.get(category, 0) + stats.count
+
+        top_bottlenecks = sorted(
+            ({"code": code, **stats} for code, stats in by_code.items()),
+            key=lambda item: item["count"],
+            reverse=True,
+        )[:10]
+
+        return {
+            "byCategory": by_category,
+            "byCode": by_code,
+            "aging": self.aging(now),
+            "topBottlenecks": top_bottlenecks,
+            "totalActive": self.total_active,
+        }
+
+
+class BottleneckEngine:
+    """
+    Periodically refreshed bottleneck aging snapshot
+
+    Args:
+        client_getter: Returns the current AirtableClient (or None)
+        loader: loader(client) -> [(code, bottleneckSince epoch or None), ...]
+        ttl_seconds: Age after which the snapshot is reloaded
+        background_refresh: Reload a stale snapshot on a worker thread
+    """
+
+    def __init__(
+        self,
+        client_getter: Callable[[], Any],
+        loader: Callable[[Any], List[BottleneckRow]],
+        *,
+        ttl_seconds: float = BOTTLENECK_TTL_SECONDS,
+        background_refresh: bool = True,
+        clock=time.time,
+    ):
+        self._clock = clock
+        self._cache: SnapshotCache[_BottleneckSnapshot] = SnapshotCache(
+            client_getter,
+            lambda client: _BottleneckSnapshot(loader(client), clock()),
+            ttl_seconds=ttl_seconds,
+            background_refresh=background_refresh,
+            name="Bottleneck engine",
+            clock=clock,
+        )
+
+    def snapshot(self) -> Optional[_BottleneckSnapshot]:
+        """Current snapshot, loading it on first use (None without a client)"""
+        return self._cache.get()
+
+    def invalidate(self) -> None:
+        """Force a reload on next use"""
+        self._cache.invalidate()
+
+    def summary(
+        self,
+        code_lookup: Callable[[str], Optional[Dict[str, Any]]],
+        now: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        snapshot = self.snapshot()
+        if snapshot is None:
+            return None
+        return snapshot.summary(self._clock() if now is None else now, code_lookup)
@@ -0,0 +1,208 @@
+"""
+Event deduplication for POST /ingest/events
+
+Two stages ahead of the upsert:
+- collapse_batch: duplicates inside one batch (same natural key) are merged
+  last-write-wins, since Airtable rejects an upsert chunk whose merge key
+  matches more than one record
+- RecentKeyCache: events already committed with identical content in the
+  last window are dropped without an upstream call
+
+Neither stage sees other batches that are still in flight; the ingest queue
+collapses merge keys across those when it takes each chunk.
+
+Natural key is (timestamp instant, shptNo); "+04:00" and "Z" forms of the
+same instant are the same key.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from api.utils import parse_iso_epoch
+
+# Recently committed keys are trusted for this long
+RECENT_TTL_SECONDS = 15 * 60
+
+# Exact LRU capacity (~150 bytes per entry)
+RECENT_MAX_ENTRIES = 50_000
+
+# Bloom filter size per generation (bits) and probes per key
+BLOOM_BITS = 1 << 20
+BLOOM_HASHES = 4
+
+
+def natural_key(event: Dict[str, Any]) -> Tuple[Any, Any]:
+    """
+    (timestamp, shptNo) natural key of an event
+
+    The timestamp is normalized to epoch seconds when parseable, so
+    offsets that denote the same instant collapse to one key.
+    """
+    timestamp = event.get("timestamp")
+    epoch = parse_iso_epoch(timestamp) if isinstance(timestamp, str) else None
+    return (epoch if epoch is not None else timestamp, event.get("shptNo"))
+
+
+def fingerprint(event: Dict[str, Any]) -> bytes:
+    """Content digest of an event (key order and timestamp offset ignored)"""
+    canonical = dict(event)
+    canonical["timestamp"] = natural_key(event)[0]
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).digest()
+
+
+def collapse_batch(events: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Merge in-batch duplicates by natural key (last write wins)
+
+    Later events override earlier ones field by field; fields only present
+    on earlier duplicates are kept. The merged event takes the position of
+    the first occurrence, so output order is deterministic.
+
+    Returns:
+        (unique events, number of events collapsed)
+    """
+    merged: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+    for event in events:
+        key = natural_key(event)
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = dict(event)
+        else:
+            existing.update(event)
+    return list(merged.values()), len(events) - len(merged)
+
+
+class _BloomFilter:
+    """Fixed-size Bloom filter over bytes keys"""
+
+    def __init__(self, bits: int, hashes: int):
+        self.bits = bits
+        self.hashes = hashes
+        self._array = bytearray(bits // 8)
+
+    def _positions(self, key: bytes) -> Iterable[int]:
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, key: bytes) -> None:
+        for pos in self._positions(key):
+            self._array[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self._array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RecentKeyCache:
+    """
+    Time-windowed, memory-capped set of recently committed events
+
+    A two-generation Bloom filter answers "never seen" without touching the
+    exact cache; generations rotate every ttl_seconds, so a key lives in the
+    filter for at most two windows. The exact LRU stores each key's content
+    fingerprint and commit time and has the final say, so false positives
+    never drop an event.
+
+    Args:
+        ttl_seconds: How long a committed event suppresses identical resends
+        max_entries: Exact LRU capacity
+        bloom_bits: Bits per Bloom generation
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = RECENT_TTL_SECONDS,
+        max_entries: int = RECENT_MAX_ENTRIES,
+        bloom_bits: int = BLOOM_BITS,
+        clock=time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.bloom_bits = bloom_bits
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, Tuple[bytes, float]]" = OrderedDict()
+        self._current = _BloomFilter(bloom_bits, BLOOM_HASHES)
+        self._previous = _BloomFilter(bloom_bits, BLOOM_HASHES)
+        self._rotated_at = clock()
+
+    @staticmethod
+    def _key_bytes(event: Dict[str, Any]) -> bytes:
+        return repr(natural_key(event)).encode("utf-8")
+
+    def _maybe_rotate(self, now: float) -> None:
+        if now - self._rotated_at >= self.ttl_seconds:
+            self._previous = self._current
+            self._current = _BloomFilter(self.bloom_bits, BLOOM_HASHES)
+            self._rotated_at = now
+
+    def remember(self, events: Iterable[Dict[str, Any]]) -> None:
+        """Record events Airtable acknowledged"""
+        with self._lock:
+            now = self._clock()
+            self._maybe_rotate(now)
+            for event in events:
+                key = self._key_bytes(event)
+                self._current.add(key)
+                self._entries[key] = (fingerprint(event), now)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def is_duplicate(self, event: Dict[str, Any], now: Optional[float] = None) -> bool:
+        """True if an identical event was committed within the window"""
+        key = self._key_bytes(event)
+        with self._lock:
+            if key not in self._current and key not in self._previous:
+                return False
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            digest, committed_at = entry
+            if (self._clock() if now is None else now) - committed_at > self.ttl_seconds:
+                del self._entries[key]
+                return False
+            return digest == fingerprint(event)
+
+    def filter(self, events: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Drop events already committed with identical content
+
+        Returns:
+            (events to write, number dropped)
+        """
+        now = self._clock()
+        kept = [event for event in events if not self.is_duplicate(event, now)]
+        return kept, len(events) - len(kept)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._current = _BloomFilter(self.bloom_bits, BLOOM_HASHES)
+            self._previous = _BloomFilter(self.bloom_bits, BLOOM_HASHES)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def dedupe_events(
+    events: List[Dict[str, Any]], recent: Optional[RecentKeyCache] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Run both dedup stages
+
+    Returns:
+        (events to write, {"inBatch": n, "recent": m})
+    """
+    unique, in_batch = collapse_batch(events)
+    dropped = 0
+    if recent is not None:
+        unique, dropped = recent.filter(unique)
+    return unique, {"inBatch": in_batch, "recent": dropped}
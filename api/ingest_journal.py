@@ -0,0 +1,474 @@
+"""
+Write-ahead journal for async event ingest
+
+Append-only file of length-prefixed, CRC-checked JSON records:
+
+    [4-byte length][4-byte crc32][payload]
+
+Record types:
+- batch: an accepted ingest batch (written + fsynced before 202 is returned);
+         streamed batches are written open ("z": false)
+- more:  events appended to a streamed batch, starting at an offset
+- seal:  a streamed batch is complete (no more records will follow)
+- done:  event indices of a batch resolved by Airtable (committed/failed)
+- claim: another journal took over an orphaned batch
+
+On restart, replay() returns every event that was accepted but never
+resolved, so the queue can resend just those chunks. Records are buffered
+in memory and written by sync() with group commit: while one fsync runs,
+concurrent producers keep appending, and the next sync writes all of
+their records with one write and one fsync.
+
+Several processes (e.g. gunicorn workers) may share one journal file:
+
+- every write, read and compaction holds an flock on "<path>.lock", and a
+  writer reopens the file if another process compacted it (new inode)
+- each journal holds an flock on "<path>.owners/<owner>" while open and
+  tags its batches with its owner, so claim_orphans() only takes over
+  batches whose process is gone
+"""
+
+import json
+import os
+import struct
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+_HEADER = struct.Struct(">II")
+
+# Rewrite the journal once it grows past this size and nothing is pending
+COMPACT_BYTES = 8 * 1024 * 1024
+
+
+class JournalBatch:
+    """A batch recovered from the journal"""
+
+    def __init__(
+        self,
+        handle: str,
+        batch_id: str,
+        source_system: str,
+        events: List[Dict[str, Any]],
+        sealed: bool = True,
+        owner: Optional[str] = None,
+    ):
+        self.handle = handle
+        self.batch_id = batch_id
+        self.source_system = source_system
+        self.events = events
+        self.sealed = sealed
+        self.owner = owner
+        self.resolved: Dict[int, str] = {}
+
+    def unresolved(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """(index, event) pairs with no recorded outcome"""
+        return [
+            (index, event)
+            for index, event in enumerate(self.events)
+            if index not in self.resolved
+        ]
+
+
+class IngestJournal:
+    """
+    Durable append-only journal for ingest batches
+
+    Args:
+        path: Journal file (local disk or tmpfs)
+        fsync: Call os.fsync on sync() (disable only for tests/tmpfs)
+        compact_bytes: Size threshold for compaction when idle
+    """
+
+    def __init__(self, path: str, *, fsync: bool = True, compact_bytes: int = COMPACT_BYTES):
+        self.path = path
+        self.fsync = fsync
+        self.compact_bytes = compact_bytes
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Records appended but not yet written, and group commit state
+        self._cond = threading.Condition()
+        self._pending: List[bytes] = []
+        self._written_seq = 0
+        self._synced_seq = 0
+        self._syncing = False
+
+        # File I/O: one thread of this process, one process at a time
+        self._io_lock = threading.Lock()
+        self._lock_fd = os.open(path + ".lock", os.O_CREAT | os.O_RDWR, 0o644)
+
+        # Held while this journal is open; its absence marks our batches orphaned
+        self.owner = uuid.uuid4().hex[:12]
+        self._owners_dir = path + ".owners"
+        os.makedirs(self._owners_dir, exist_ok=True)
+        self._owner_fd = os.open(self._owner_path(self.owner), os.O_CREAT | os.O_RDWR, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self._owner_fd, fcntl.LOCK_EX)
+
+        with self._exclusive():
+            self._truncate_torn_tail()
+            self._fh = open(path, "ab", buffering=0)
+
+    # ==================== Locking ====================
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Hold the journal for file I/O against other threads and processes"""
+        with self._io_lock:
+            if fcntl is None:
+                yield
+                return
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _reopen_if_replaced(self) -> None:
+        """Follow a compaction by another process (lock held)"""
+        try:
+            current = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            current = None
+        if current != os.fstat(self._fh.fileno()).st_ino:
+            self._fh.close()
+            self._fh = open(self.path, "ab", buffering=0)
+
+    def _write_locked(self, data: bytes) -> None:
+        """Append bytes to the file and make them durable (lock held)"""
+        self._reopen_if_replaced()
+        view = memoryview(data)
+        while view:
+            view = view[self._fh.write(view):]
+        if self.fsync:
+            os.fsync(self._fh.fileno())
+
+    def _owner_path(self, owner: str) -> str:
+        return os.path.join(self._owners_dir, owner)
+
+    def _owner_is_gone(self, owner: Optional[str]) -> bool:
+        """True if the journal that owns a batch is no longer open"""
+        if owner is None:
+            # Journaled before batches carried an owner
+            return True
+        if owner == self.owner:
+            return False
+        if fcntl is None:
+            return True
+        try:
+            fd = os.open(self._owner_path(owner), os.O_RDWR)
+        except FileNotFoundError:
+            return True
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        finally:
+            os.close(fd)
+        return True
+
+    # ==================== Encoding ====================
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> bytes:
+        payload = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+    def _read_records(self) -> Tuple[List[Dict[str, Any]], int]:
+        """Read all intact records; returns (records, offset of last good byte)"""
+        records: List[Dict[str, Any]] = []
+        good = 0
+        if not os.path.exists(self.path):
+            return records, good
+
+        with open(self.path, "rb") as fh:
+            data = fh.read()
+
+        offset = 0
+        while offset + _HEADER.size <= len(data):
+            length, crc = _HEADER.unpack_from(data, offset)
+            start = offset + _HEADER.size
+            end = start + length
+            if end > len(data):
+                break
+            payload = data[start:end]
+            if zlib.crc32(payload) != crc:
+                break
+            try:
+                records.append(json.loads(payload.decode("utf-8")))
+            except ValueError:
+                break
+            offset = end
+            good = end
+
+        return records, good
+
+    def _truncate_torn_tail(self) -> None:
+        """Drop a partially written record left by a crash (lock held)"""
+        if not os.path.exists(self.path):
+            return
+        _, good = self._read_records()
+        if good < os.path.getsize(self.path):
+            with open(self.path, "r+b") as fh:
+                fh.truncate(good)
+
+    # ==================== Writing ====================
+    def append(self, record: Dict[str, Any]) -> int:
+        """
+        Append a record (buffered in memory, not yet durable)
+
+        Returns:
+            Sequence number to pass to sync()
+        """
+        data = self._encode(record)
+        with self._cond:
+            self._pending.append(data)
+            self._written_seq += 1
+            return self._written_seq
+
+    def sync(self, seq: Optional[int] = None) -> None:
+        """
+        Make records up to seq durable (group commit)
+
+        One caller at a time writes every pending record and fsyncs; callers
+        arriving meanwhile wait, and the first of them writes the records
+        appended during that fsync in one go. Returns without I/O if
+        another caller's fsync already covered seq.
+        """
+        with self._cond:
+            target = self._written_seq if seq is None else seq
+            while self._syncing and self._synced_seq < target:
+                self._cond.wait()
+            if self._synced_seq >= target:
+                return
+            self._syncing = True
+            data = b"".join(self._pending)
+            self._pending.clear()
+            covered = self._written_seq
+
+        try:
+            with self._exclusive():
+                self._write_locked(data)
+        except BaseException:
+            with self._cond:
+                self._pending.insert(0, data)
+                self._syncing = False
+                self._cond.notify_all()
+            raise
+        with self._cond:
+            self._synced_seq = covered
+            self._syncing = False
+            self._cond.notify_all()
+
+    def append_batch(
+        self,
+        handle: str,
+        batch_id: str,
+        source_system: str,
+        events: List[Dict[str, Any]],
+        *,
+        sealed: bool = True,
+    ) -> None:
+        """Durably record an accepted batch (call before acknowledging)"""
+        record = {
+            "t": "batch", "h": handle, "b": batch_id, "s": source_system,
+            "e": events, "p": self.owner,
+        }
+        if not sealed:
+            record["z"] = False
+        seq = self.append(record)
+        self.sync(seq)
+
+    def append_events(self, handle: str, offset: int, events: List[Dict[str, Any]]) -> None:
+        """Durably record events added to a streamed batch"""
+        seq = self.append({"t": "more", "h": handle, "o": offset, "e": events})
+        self.sync(seq)
+
+    def append_seal(self, handle: str) -> None:
+        """Record that a streamed batch will get no more events"""
+        seq = self.append({"t": "seal", "h": handle})
+        self.sync(seq)
+
+    def append_outcomes(self, resolved: Dict[str, List[Tuple[int, str]]]) -> None:
+        """
+        Durably mark events resolved
+
+        Args:
+            resolved: {batch handle: [(event index, "committed"|"failed"), ...]}
+        """
+        seq = 0
+        for handle, items in resolved.items():
+            seq = self.append(
+                {
+                    "t": "done",
+                    "h": handle,
+                    "i": [index for index, _ in items],
+                    "ok": [status == "committed" for _, status in items],
+                }
+            )
+        if seq:
+            self.sync(seq)
+
+    # ==================== Recovery ====================
+    def replay(self) -> List[JournalBatch]:
+        """
+        Batches in journal order, with outcomes applied
+
+        Returns:
+            Every journaled batch; use JournalBatch.unresolved() for the
+            events that still need to be written
+        """
+        self.sync()
+        with self._exclusive():
+            return self._replay()
+
+    def claim_orphans(self) -> List[JournalBatch]:
+        """
+        Take over the batches of journals that are no longer open
+
+        Claimed batches with pending events (or still open, which are
+        sealed: their stream died with its process) are re-owned by this
+        journal, so no other process recovers them again.
+
+        Returns:
+            Claimed batches; use JournalBatch.unresolved() to resend
+        """
+        self.sync()
+        with self._exclusive():
+            claimed = []
+            gone: Dict[Optional[str], bool] = {}
+            records = []
+            for batch in self._replay():
+                if batch.sealed and not batch.unresolved():
+                    continue
+                if batch.owner not in gone:
+                    gone[batch.owner] = self._owner_is_gone(batch.owner)
+                if not gone[batch.owner]:
+                    continue
+                if not batch.sealed:
+                    records.append({"t": "seal", "h": batch.handle})
+                    batch.sealed = True
+                records.append({"t": "claim", "h": batch.handle, "p": self.owner})
+                batch.owner = self.owner
+                claimed.append(batch)
+            if records:
+                self._write_locked(b"".join(self._encode(r) for r in records))
+
+            # Lock files of exited processes
+            for owner in os.listdir(self._owners_dir):
+                if gone.get(owner, True) and self._owner_is_gone(owner):
+                    try:
+                        os.remove(self._owner_path(owner))
+                    except FileNotFoundError:
+                        pass
+        return claimed
+
+    def _replay(self) -> List[JournalBatch]:
+        """replay() body (lock held)"""
+        records, _ = self._read_records()
+        batches: Dict[str, JournalBatch] = {}
+
+        for record in records:
+            kind = record.get("t")
+            if kind == "batch":
+                batches[record["h"]] = JournalBatch(
+                    record["h"],
+                    record.get("b", "unknown"),
+                    record.get("s", "API"),
+                    record.get("e", []),
+                    sealed=record.get("z", True),
+                    owner=record.get("p"),
+                )
+            elif kind == "more":
+                batch = batches.get(record.get("h"))
+                if batch is None:
+                    continue
+                offset = record.get("o", len(batch.events))
+                del batch.events[offset:]
+                batch.events.extend(record.get("e", []))
+            elif kind == "seal":
+                batch = batches.get(record.get("h"))
+                if batch is not None:
+                    batch.sealed = True
+            elif kind == "claim":
+                batch = batches.get(record.get("h"))
+                if batch is not None:
+                    batch.owner = record.get("p")
+            elif kind == "done":
+                batch = batches.get(record.get("h"))
+                if batch is None:
+                    continue
+                for index, ok in zip(record.get("i", []), record.get("ok", [])):
+                    batch.resolved[index] = "committed" if ok else "failed"
+
+        return list(batches.values())
+
+    def size(self) -> int:
+        """Bytes written to the journal file (excluding unsynced records)"""
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def compact(self) -> None:
+        """
+        Rewrite the journal keeping batches with unresolved events and open
+        streamed batches (whose later "more" records need the batch record)
+
+        Written to a temp file, fsynced and atomically renamed over the
+        journal, so a crash mid-compaction leaves the old file intact.
+        Other processes reopen the new file before their next write.
+        """
+        self.sync()
+        with self._exclusive():
+            live = [b for b in self._replay() if b.unresolved() or not b.sealed]
+
+            tmp_path = self.path + ".compact"
+            with open(tmp_path, "wb") as out:
+                for batch in live:
+                    record = {
+                        "t": "batch", "h": batch.handle, "b": batch.batch_id,
+                        "s": batch.source_system, "e": batch.events, "p": batch.owner,
+                    }
+                    if not batch.sealed:
+                        record["z"] = False
+                    out.write(self._encode(record))
+                    if batch.resolved:
+                        indices = sorted(batch.resolved)
+                        out.write(self._encode({
+                            "t": "done", "h": batch.handle, "i": indices,
+                            "ok": [batch.resolved[i] == "committed" for i in indices],
+                        }))
+                out.flush()
+                if self.fsync:
+                    os.fsync(out.fileno())
+
+            self._fh.close()
+            os.replace(tmp_path, self.path)
+            self._fh = open(self.path, "ab", buffering=0)
+
+    def maybe_compact(self) -> bool:
+        """Compact when the journal exceeds compact_bytes"""
+        if self.size() < self.compact_bytes:
+            return False
+        self.compact()
+        return True
+
+    def close(self) -> None:
+        """Write pending records and release the journal (its batches become orphans)"""
+        self.sync()
+        with self._exclusive():
+            self._fh.close()
+        os.close(self._lock_fd)
+        try:
+            os.remove(self._owner_path(self.owner))
+        except FileNotFoundError:
+            pass
+        os.close(self._owner_fd)
@@ -0,0 +1,611 @@
+"""
+Asynchronous ingest queue for POST /ingest/events
+
+Accepted batches are validated by the endpoint, enqueued here, and answered
+with 202 immediately. A background worker drains the queue at the Airtable
+rate limit via AirtableClient.upsert_records, coalescing events from
+concurrent batches into full 10-record upsert requests, and records
+per-event outcomes for GET /ingest/batches/{batchId}.
+
+Airtable rejects an upsert whose merge key matches more than one record, so
+merge keys are collapsed when a chunk is taken, across all in-flight
+batches: an identical resend shares the record of the event already in the
+chunk; a different event with the same key is deferred to a following
+chunk, and so is every later event with that key, even one identical to
+the first (A, B, A' is written as A, B, A', so the last one still wins).
+
+A chunk that fails transiently (429, 5xx, network) is retried with
+backoff before its events are marked failed.
+
+With an IngestJournal attached, each batch is journaled before it is
+acknowledged and each chunk is marked as Airtable answers, so recover()
+can resend only the events a crashed worker never wrote.
+
+The worker is a daemon thread, so it needs a long-lived process; on
+serverless hosts the app serves ingest synchronously and drains recovered
+events with drain() instead.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from api.airtable_client import is_transient_error
+from api.ingest_dedup import fingerprint
+from api.utils import parse_iso_epoch
+
+# Airtable batch limit (≤10 records/req)
+CHUNK_SIZE = 10
+
+# How long the worker waits for more events before sending a partial chunk
+LINGER_SECONDS = 0.05
+
+# Finished batches kept for status polling
+MAX_RETAINED_BATCHES = 1000
+
+# Streamed producers block while this many events wait to be written
+MAX_PENDING_EVENTS = 1000
+
+# Transient chunk failures are retried this many times, backing off from
+# RETRY_DELAY_SECONDS (doubling; the first wait is one rate-limit slot)
+CHUNK_RETRIES = 3
+RETRY_DELAY_SECONDS = 0.22
+
+
+class IngestBatch:
+    """
+    Progress and per-event outcomes of one accepted ingest batch
+
+    Streamed batches are opened empty, grow as lines arrive and are sealed
+    at end of stream; they keep only failed outcomes (track_events=False)
+    so memory does not grow with the payload.
+    """
+
+    def __init__(
+        self,
+        handle: str,
+        batch_id: str,
+        source_system: str,
+        total: int,
+        *,
+        sealed: bool = True,
+        track_events: bool = True,
+    ):
+        self.handle = handle
+        self.batch_id = batch_id
+        self.source_system = source_system
+        self.total = 0
+        self.sealed = sealed
+        self.track_events = track_events
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.committed = 0
+        self.failed = 0
+        self.outcomes: List[Dict[str, Any]] = []
+        self.failures: Dict[int, Dict[str, Any]] = {}
+        self._resolved = bytearray()
+        self.grow(total)
+
+    def grow(self, count: int) -> int:
+        """Reserve count more events; returns the first new index"""
+        first = self.total
+        self.total += count
+        self._resolved.extend(bytes(count))
+        if self.track_events:
+            self.outcomes.extend(
+                {"index": i, "status": "queued"} for i in range(first, self.total)
+            )
+        return first
+
+    def seal(self) -> None:
+        """No more events will be added"""
+        self.sealed = True
+        if self.done and self.finished_at is None:
+            self.finished_at = time.time()
+
+    @property
+    def done(self) -> bool:
+        return self.sealed and self.committed + self.failed >= self.total
+
+    @property
+    def status(self) -> str:
+        """queued / processing / completed / partial / failed"""
+        if not self.done:
+            return "processing" if self.committed or self.failed else "queued"
+        if self.failed == 0:
+            return "completed"
+        return "failed" if self.committed == 0 else "partial"
+
+    def mark(self, index: int, outcome: Dict[str, Any]) -> None:
+        """Record the outcome of one event (committed or failed)"""
+        if self._resolved[index]:
+            return
+        self._resolved[index] = 1
+        entry = {"index": index, **outcome}
+        if self.track_events:
+            self.outcomes[index] = entry
+        if outcome["status"] == "committed":
+            self.committed += 1
+        else:
+            self.failed += 1
+            if not self.track_events:
+                self.failures[index] = entry
+        if self.done and self.finished_at is None:
+            self.finished_at = time.time()
+
+    def to_dict(self, include_events: bool = True) -> Dict[str, Any]:
+        result = {
+            "batchHandle": self.handle,
+            "batchId": self.batch_id,
+            "sourceSystem": self.source_system,
+            "status": self.status,
+            "total": self.total,
+            "committed": self.committed,
+            "failed": self.failed,
+            "pending": self.total - self.committed - self.failed,
+        }
+        if include_events:
+            if self.track_events:
+                result["events"] = list(self.outcomes)
+            else:
+                result["events"] = [self.failures[i] for i in sorted(self.failures)]
+        return result
+
+
+class IngestQueue:
+    """
+    In-process ingest queue with a background batch-flushing worker
+
+    Args:
+        client_provider: Returns the AirtableClient to write with (looked up
+                         per chunk so reconfiguration is picked up)
+        table_id: Target table ID (Events)
+        fields_to_merge_on: Upsert natural key
+        chunk_size: Records per upsert request (≤10)
+        linger_seconds: Wait for more events before flushing a partial chunk
+        autostart: Start the worker thread on first submit
+        journal: Optional IngestJournal for crash recovery
+        recent_keys: Optional RecentKeyCache fed with committed events
+        on_committed: Optional callback(events) after each committed chunk
+        max_pending: Backpressure bound for streamed appends
+        retries: Retries of a chunk that failed transiently
+        retry_delay: First backoff between retries (seconds, doubling)
+    """
+
+    def __init__(
+        self,
+        client_provider: Callable[[], Any],
+        table_id: str,
+        fields_to_merge_on: List[str],
+        *,
+        chunk_size: int = CHUNK_SIZE,
+        linger_seconds: float = LINGER_SECONDS,
+        max_retained_batches: int = MAX_RETAINED_BATCHES,
+        autostart: bool = True,
+        journal: Optional[Any] = None,
+        recent_keys: Optional[Any] = None,
+        on_committed: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        max_pending: int = MAX_PENDING_EVENTS,
+        retries: int = CHUNK_RETRIES,
+        retry_delay: float = RETRY_DELAY_SECONDS,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.client_provider = client_provider
+        self.table_id = table_id
+        self.fields_to_merge_on = list(fields_to_merge_on)
+        self.chunk_size = min(chunk_size, CHUNK_SIZE)
+        self.linger_seconds = linger_seconds
+        self.max_retained_batches = max_retained_batches
+        self.autostart = autostart
+        self.journal = journal
+        self.recent_keys = recent_keys
+        self.on_committed = on_committed
+        self.max_pending = max_pending
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._sleep = sleep
+
+        # Queue items: (batch handle, event index, event fields)
+        self._items: Deque[Tuple[str, int, Dict[str, Any]]] = deque()
+        self._batches: "OrderedDict[str, IngestBatch]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._stopping = False
+
+    # ==================== Producer side ====================
+    def submit(
+        self, batch_id: str, source_system: str, events: List[Dict[str, Any]]
+    ) -> IngestBatch:
+        """
+        Enqueue a validated batch and return its handle immediately
+
+        Args:
+            batch_id: Client-supplied batch ID (not required to be unique)
+            source_system: Source system label
+            events: Validated Events field dicts
+
+        Returns:
+            IngestBatch (use .handle for status polling)
+        """
+        handle = uuid.uuid4().hex
+        batch = IngestBatch(handle, batch_id, source_system, len(events))
+
+        if self.journal is not None:
+            self.journal.append_batch(handle, batch_id, source_system, events)
+
+        with self._cond:
+            self._batches[handle] = batch
+            self._evict_finished()
+            for index, event in enumerate(events):
+                self._items.append((handle, index, event))
+            self._cond.notify()
+
+        if self.autostart:
+            self.start()
+        return batch
+
+    def write_through(
+        self, batch_id: str, source_system: str, events: List[Dict[str, Any]]
+    ) -> IngestBatch:
+        """
+        Journal a batch and write it synchronously, chunk by chunk
+
+        Used by the synchronous ingest mode when a journal is attached. On
+        the first failed chunk the remaining events are marked failed (the
+        caller reports the error) and the chunk's exception is re-raised.
+
+        Returns:
+            Completed IngestBatch
+        """
+        handle = uuid.uuid4().hex
+        batch = IngestBatch(handle, batch_id, source_system, len(events))
+        if self.journal is not None:
+            self.journal.append_batch(handle, batch_id, source_system, events)
+
+        with self._cond:
+            self._batches[handle] = batch
+            self._evict_finished()
+
+        items = [(handle, index, event) for index, event in enumerate(events)]
+        for start in range(0, len(items), self.chunk_size):
+            error = self._write_chunk(items[start:start + self.chunk_size])
+            if error is not None:
+                rest = items[start + self.chunk_size:]
+                self._record_outcomes(
+                    rest, [{"status": "failed", "error": "not attempted"} for _ in rest]
+                )
+                raise error
+        return batch
+
+    # ==================== Streamed batches ====================
+    def open_batch(self, batch_id: str, source_system: str) -> IngestBatch:
+        """
+        Open an empty batch that grows as a stream is parsed
+
+        Returns:
+            Unsealed IngestBatch keeping only failed outcomes
+        """
+        handle = uuid.uuid4().hex
+        batch = IngestBatch(
+            handle, batch_id, source_system, 0, sealed=False, track_events=False
+        )
+        if self.journal is not None:
+            self.journal.append_batch(handle, batch_id, source_system, [], sealed=False)
+
+        with self._cond:
+            self._batches[handle] = batch
+            self._evict_finished()
+        return batch
+
+    def append(
+        self, batch: IngestBatch, events: List[Dict[str, Any]], *, write: bool = False
+    ) -> Optional[Exception]:
+        """
+        Add events to an open batch
+
+        Args:
+            batch: Batch from open_batch()
+            events: Validated Events field dicts (at most a few chunks)
+            write: Upsert now on the caller's thread instead of enqueueing
+
+        Returns:
+            With write=True, the upsert exception if a chunk failed
+        """
+        if not events:
+            return None
+
+        with self._cond:
+            first = batch.grow(len(events))
+        if self.journal is not None:
+            self.journal.append_events(batch.handle, first, events)
+
+        items = [(batch.handle, first + i, event) for i, event in enumerate(events)]
+        if write:
+            for start in range(0, len(items), self.chunk_size):
+                error = self._write_chunk(items[start:start + self.chunk_size])
+                if error is not None:
+                    return error
+            return None
+
+        with self._cond:
+            # Backpressure: the upload waits for the worker instead of
+            # buffering the whole payload in memory
+            while len(self._items) >= self.max_pending and not self._stopping:
+                self._cond.wait(timeout=1.0)
+            self._items.extend(items)
+            self._cond.notify_all()
+
+        if self.autostart:
+            self.start()
+        return None
+
+    def seal(self, batch: IngestBatch) -> None:
+        """Mark a streamed batch complete"""
+        if self.journal is not None:
+            self.journal.append_seal(batch.handle)
+        with self._cond:
+            batch.seal()
+
+    def recover(self) -> int:
+        """
+        Re-enqueue journaled events that were never resolved
+
+        Only batches of journals that are no longer open are taken over
+        (claimed), so a process sharing the journal never resends another
+        live process's events. Recovered batches keep their handle, so
+        status polling continues across a restart.
+
+        Returns:
+            Number of events re-enqueued
+        """
+        if self.journal is None:
+            return 0
+
+        # Open streams of exited processes come back sealed
+        orphans = self.journal.claim_orphans()
+        requeued = 0
+        with self._cond:
+            for journaled in orphans:
+                pending = journaled.unresolved()
+                if not pending:
+                    continue
+                batch = IngestBatch(
+                    journaled.handle,
+                    journaled.batch_id,
+                    journaled.source_system,
+                    len(journaled.events),
+                )
+                for index, status in journaled.resolved.items():
+                    batch.mark(index, {"status": status, "recovered": True})
+                self._batches[batch.handle] = batch
+                for index, event in pending:
+                    self._items.append((batch.handle, index, event))
+                requeued += len(pending)
+            if requeued:
+                self._cond.notify()
+
+        if requeued and self.autostart:
+            self.start()
+        return requeued
+
+    def get_batch(self, handle: str) -> Optional[IngestBatch]:
+        with self._cond:
+            return self._batches.get(handle)
+
+    def pending(self) -> int:
+        """Events waiting to be written"""
+        with self._cond:
+            return len(self._items)
+
+    def _evict_finished(self) -> None:
+        """Drop the oldest finished batches beyond the retention limit"""
+        if len(self._batches) <= self.max_retained_batches:
+            return
+        for handle in list(self._batches.keys()):
+            if len(self._batches) <= self.max_retained_batches:
+                break
+            if self._batches[handle].done:
+                del self._batches[handle]
+
+    # ==================== Consumer side ====================
+    def _merge_key(self, event: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Upsert merge key (datetimes as epochs, so offsets of one instant match)"""
+        key = []
+        for field in self.fields_to_merge_on:
+            value = event.get(field)
+            epoch = parse_iso_epoch(value) if isinstance(value, str) else None
+            if epoch is not None:
+                value = epoch
+            elif isinstance(value, (list, dict)):
+                value = repr(value)
+            key.append(value)
+        return tuple(key)
+
+    def _take_chunk(self, wait: bool) -> List[Tuple[str, int, Dict[str, Any]]]:
+        """
+        Pop items for up to chunk_size records, lingering briefly to fill the chunk
+
+        Identical events with one merge key are taken together (one record);
+        from the first differing one on, events with that key stay queued
+        for a later chunk, in order.
+        """
+        with self._cond:
+            if wait:
+                while not self._items and not self._stopping:
+                    self._cond.wait(timeout=1.0)
+                if self._items and len(self._items) < self.chunk_size:
+                    deadline = time.monotonic() + self.linger_seconds
+                    while len(self._items) < self.chunk_size and not self._stopping:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(timeout=remaining)
+
+            chunk = []
+            taken: Dict[Tuple[Any, ...], bytes] = {}
+            deferred = []
+            blocked = set()
+            while self._items and len(taken) < self.chunk_size:
+                item = self._items.popleft()
+                key = self._merge_key(item[2])
+                if key in blocked:
+                    # Behind a deferred event with this key: keep queue order
+                    deferred.append(item)
+                    continue
+                if key in taken:
+                    if taken[key] == fingerprint(item[2]):
+                        # Identical resend from another batch: same record
+                        chunk.append(item)
+                    else:
+                        # Same merge key, different content: next chunk
+                        deferred.append(item)
+                        blocked.add(key)
+                    continue
+                taken[key] = fingerprint(item[2])
+                chunk.append(item)
+            self._items.extendleft(reversed(deferred))
+            if chunk:
+                self._cond.notify_all()
+            return chunk
+
+    def _write_chunk(
+        self, chunk: List[Tuple[str, int, Dict[str, Any]]]
+    ) -> Optional[Exception]:
+        """
+        Upsert one coalesced chunk and record per-event outcomes
+
+        Returns:
+            The upsert exception if the chunk failed, else None
+        """
+        outcomes: List[Dict[str, Any]]
+        error: Optional[Exception] = None
+        client = self.client_provider()
+
+        # One record per merge key; identical events share it
+        unique: List[Dict[str, Any]] = []
+        slot_of: Dict[Tuple[Any, ...], int] = {}
+        slots = []
+        for _, _, event in chunk:
+            key = self._merge_key(event)
+            if key not in slot_of:
+                slot_of[key] = len(unique)
+                unique.append(event)
+            slots.append(slot_of[key])
+
+        try:
+            if client is None:
+                raise RuntimeError("Airtable not configured")
+            results = self._upsert(client, unique)
+            response = results[0] if results else {}
+            records = response.get("records") or []
+            created = set(response.get("createdRecords") or [])
+            outcomes = []
+            for slot in slots:
+                record_id = records[slot].get("id") if slot < len(records) else None
+                outcome = {"status": "committed", "recordId": record_id}
+                if record_id and created:
+                    outcome["created"] = record_id in created
+                outcomes.append(outcome)
+            if self.recent_keys is not None:
+                self.recent_keys.remember(unique)
+        except Exception as e:
+            error = e
+            outcomes = [{"status": "failed", "error": str(e)} for _ in chunk]
+        else:
+            if self.on_committed is not None:
+                try:
+                    self.on_committed(unique)
+                except Exception as e:
+                    print(f"⚠️ on_committed callback failed: {e}")
+
+        self._record_outcomes(chunk, outcomes)
+        return error
+
+    def _upsert(self, client: Any, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Upsert one chunk, retrying transient failures with backoff"""
+        attempt = 0
+        while True:
+            try:
+                return client.upsert_records(
+                    self.table_id,
+                    records,
+                    fields_to_merge_on=self.fields_to_merge_on,
+                    typecast=True,
+                )
+            except Exception as e:
+                if attempt >= self.retries or not is_transient_error(e):
+                    raise
+                delay = self.retry_delay * 2 ** attempt
+                attempt += 1
+                print(
+                    f"⚠️ Ingest chunk failed ({e}), retry {attempt}/{self.retries}, "
+                    f"waiting {delay:.2f}s..."
+                )
+                self._sleep(delay)
+
+    def _record_outcomes(
+        self,
+        chunk: List[Tuple[str, int, Dict[str, Any]]],
+        outcomes: List[Dict[str, Any]],
+    ) -> None:
+        resolved: Dict[str, List[Tuple[int, str]]] = {}
+        with self._cond:
+            for (handle, index, _), outcome in zip(chunk, outcomes):
+                batch = self._batches.get(handle)
+                if batch is not None:
+                    batch.mark(index, outcome)
+                resolved.setdefault(handle, []).append((index, outcome["status"]))
+            idle = not self._items
+
+        # fsync outside the queue lock so producers are not blocked
+        if self.journal is not None and resolved:
+            self.journal.append_outcomes(resolved)
+            if idle:
+                self.journal.maybe_compact()
+
+    def drain(self, max_chunks: Optional[int] = None) -> int:
+        """
+        Process queued events synchronously (worker body; also used in tests)
+
+        Args:
+            max_chunks: Stop after this many upsert requests (None = until empty)
+
+        Returns:
+            Number of chunks written
+        """
+        written = 0
+        while max_chunks is None or written < max_chunks:
+            chunk = self._take_chunk(wait=False)
+            if not chunk:
+                break
+            self._write_chunk(chunk)
+            written += 1
+        return written
+
+    def _run(self) -> None:
+        while not self._stopping:
+            chunk = self._take_chunk(wait=True)
+            if chunk:
+                self._write_chunk(chunk)
+
+    def start(self) -> None:
+        """Start the background worker (idempotent)"""
+        with self._cond:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stopping = False
+            self._worker = threading.Thread(
+                target=self._run, name="ingest-queue-worker", daemon=True
+            )
+            self._worker.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the worker after its current chunk"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
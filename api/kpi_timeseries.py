@@ -0,0 +1,240 @@
+"""
+Append-only KPI time series (SQLite)
+
+Summary metrics (document completion rates, risk counts, approval deadline
+buckets, active bottlenecks) are sampled at a fixed interval and stored so
+trend questions are answered from precomputed points instead of replaying
+Events.
+
+Storage is delta-encoded:
+
+- samples(ts): one row per sampling slot (ts aligned to the interval)
+- points(metric, ts, value): written only when a metric's value differs from
+  its previous stored value, so flat metrics cost nothing per sample
+
+The value of a metric at a sample time is its last change point at or before
+that time. series() rebuilds those values for a range and downsamples them
+into fixed steps (last / min / max / avg per step). A metric that could not
+be measured is stored as a NULL change point, so the previous value is not
+carried forward as if it had been measured.
+
+Several processes may sample into one file: record() reads the previous
+values inside its write transaction (BEGIN IMMEDIATE), so the delta check
+always sees what other writers stored.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Sampling interval (seconds); sample times are aligned to multiples of it
+KPI_SAMPLE_SECONDS = int(os.getenv("KPI_SAMPLE_SECONDS", "300"))
+
+# Largest number of points returned by one series() call
+MAX_SERIES_POINTS = 2000
+
+AGGREGATES = ("last", "min", "max", "avg")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS samples (ts INTEGER PRIMARY KEY)",
+    "CREATE TABLE IF NOT EXISTS points ("
+    " metric TEXT NOT NULL, ts INTEGER NOT NULL, value REAL,"
+    " PRIMARY KEY (metric, ts)) WITHOUT ROWID",
+)
+
+
+class KpiTimeSeries:
+    """
+    Fixed-interval KPI store
+
+    Args:
+        path: SQLite file (":memory:" for tests)
+        interval_seconds: Sampling slot width
+    """
+
+    def __init__(self, path: str, *, interval_seconds: int = KPI_SAMPLE_SECONDS):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA busy_timeout=5000")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._sampler: Optional[threading.Thread] = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def slot(self, epoch: float) -> int:
+        """Sampling slot start for an epoch"""
+        return int(epoch) // self.interval_seconds * self.interval_seconds
+
+    # ==================== Writes ====================
+    def record(self, epoch: float, metrics: Dict[str, Optional[float]]) -> bool:
+        """
+        Store one sample (ignored if its slot is already sampled)
+
+        Args:
+            metrics: {metric: value}; None marks a metric that could not be
+                     measured in this sample
+
+        Returns:
+            True if the sample was stored
+        """
+        ts = self.slot(epoch)
+        with self._lock:
+            cur = self._db.cursor()
+            # Write lock first, so no other process stores points between
+            # the previous-value reads and the inserts
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                cur.execute("INSERT OR IGNORE INTO samples (ts) VALUES (?)", (ts,))
+                if cur.rowcount == 0:
+                    cur.execute("ROLLBACK")
+                    return False
+                changed = []
+                for metric, value in metrics.items():
+                    value = None if value is None else float(value)
+                    previous = cur.execute(
+                        "SELECT value FROM points WHERE metric = ? AND ts < ?"
+                        " ORDER BY ts DESC LIMIT 1",
+                        (metric, ts),
+                    ).fetchone()
+                    if previous is None:
+                        if value is not None:
+                            changed.append((metric, ts, value))
+                    elif previous[0] != value:
+                        changed.append((metric, ts, value))
+                cur.executemany(
+                    "INSERT OR REPLACE INTO points (metric, ts, value) VALUES (?, ?, ?)",
+                    changed,
+                )
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+            return True
+
+    def sample(self, collect: Callable[[], Dict[str, Optional[float]]], now: Optional[float] = None) -> bool:
+        """Collect and record a sample unless the current slot already has one"""
+        now = time.time() if now is None else now
+        ts = self.slot(now)
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM samples WHERE ts = ?", (ts,)).fetchone():
+                return False
+        return self.record(now, collect())
+
+    def start_sampler(self, collect: Callable[[], Dict[str, Optional[float]]]) -> None:
+        """Sample on a daemon thread once per interval"""
+        if self._sampler is not None:
+            return
+
+        def run() -> None:
+            while True:
+                try:
+                    self.sample(collect)
+                except Exception as e:
+                    print(f"⚠️ KPI sample failed: {e}")
+                time.sleep(self.interval_seconds - time.time() % self.interval_seconds)
+
+        self._sampler = threading.Thread(target=run, name="kpi-sampler", daemon=True)
+        self._sampler.start()
+
+    # ==================== Reads ====================
+    def step_for(self, step: int) -> int:
+        """Requested step rounded up to a multiple of the sample interval"""
+        return max(1, -(-int(step) // self.interval_seconds)) * self.interval_seconds
+
+    def metrics(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT DISTINCT metric FROM points ORDER BY metric")]
+
+    def _values(self, metric: str, start: int, end: int) -> Iterator[Tuple[int, Optional[float]]]:
+        """(sample ts, value) for samples in [start, end), rebuilt from change points"""
+        with self._lock:
+            before = self._db.execute(
+                "SELECT value FROM points WHERE metric = ? AND ts < ? ORDER BY ts DESC LIMIT 1",
+                (metric, start),
+            ).fetchone()
+            changes = self._db.execute(
+                "SELECT ts, value FROM points WHERE metric = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                (metric, start, end),
+            ).fetchall()
+            samples = [
+                row[0] for row in self._db.execute(
+                    "SELECT ts FROM samples WHERE ts >= ? AND ts < ? ORDER BY ts", (start, end)
+                )
+            ]
+
+        value = before[0] if before else None
+        known = before is not None
+        i = 0
+        for ts in samples:
+            while i < len(changes) and changes[i][0] <= ts:
+                value = changes[i][1]
+                known = True
+                i += 1
+            if known:
+                yield ts, value
+
+    def series(
+        self, metric: str, start: float, end: float, step: int, agg: str = "last"
+    ) -> List[Dict[str, Any]]:
+        """
+        Downsampled points of one metric
+
+        Args:
+            start, end: Epoch range [start, end)
+            step: Bucket width in seconds (rounded up to the sample interval)
+            agg: last | min | max | avg over the samples of a bucket
+
+        Returns:
+            [{"t": bucket start epoch, "v": value, "n": samples}, ...] for
+            buckets that contain samples
+        """
+        if agg not in AGGREGATES:
+            raise ValueError(f"agg must be one of {', '.join(AGGREGATES)}")
+        step = self.step_for(step)
+        first = int(start) // step * step
+        if (end - first) / step > MAX_SERIES_POINTS:
+            raise ValueError(f"range/step yields more than {MAX_SERIES_POINTS} points")
+
+        buckets: Dict[int, List[float]] = {}
+        for ts, value in self._values(metric, first, int(end)):
+            if value is not None:
+                buckets.setdefault(ts // step * step, []).append(value)
+
+        points = []
+        for bucket in sorted(buckets):
+            values = buckets[bucket]
+            if agg == "last":
+                v = values[-1]
+            elif agg == "min":
+                v = min(values)
+            elif agg == "max":
+                v = max(values)
+            else:
+                v = round(sum(values) / len(values), 4)
+            points.append({"t": bucket, "v": v, "n": len(values)})
+        return points
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            samples, first, last = self._db.execute(
+                "SELECT COUNT(*), MIN(ts), MAX(ts) FROM samples"
+            ).fetchone()
+            points = self._db.execute("SELECT COUNT(*) FROM points").fetchone()[0]
+        return {
+            "intervalSeconds": self.interval_seconds,
+            "samples": samples,
+            "changePoints": points,
+            "first": first,
+            "last": last,
+        }
@@ -0,0 +1,562 @@
+"""
+Columnar record store for cached Airtable tables
+
+Airtable returns records as nested dicts ({"id": ..., "fields": {...}}) which
+repeat every field-name string and box every value. This module keeps cached
+tables column-wise instead:
+
+- Field names are interned once per process
+- singleSelect fields (status, riskLevel, docType, ...) are int code arrays
+- dateTime fields (dueAt, bottleneckSince, timestamp, ...) are epoch
+  millisecond int arrays, read back as epoch seconds; date fields are
+  written back as YYYY-MM-DD
+- number / checkbox fields are typed arrays
+- everything else is a plain list (short strings interned)
+
+Rows are exposed through __slots__ views with dict-style access, and tables
+convert back to the Airtable wire format on demand.
+"""
+
+import math
+import sys
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from api.utils import parse_iso_epoch, parse_iso_epoch_batch
+
+# Sentinels for "field not present" in typed columns
+MISSING_CODE = -1
+MISSING_EPOCH = -(2**63)
+MISSING_FLAG = -1
+
+# Strings up to this length are interned in object columns (codes, sites, ...)
+INTERN_MAX_LEN = 64
+
+# Airtable field type -> column kind
+COLUMN_KINDS = {
+    "singleSelect": "enum",
+    "dateTime": "epoch",
+    "date": "date",
+    "createdTime": "epoch",
+    "lastModifiedTime": "epoch",
+    "number": "number",
+    "percent": "number",
+    "currency": "number",
+    "autoNumber": "number",
+    "checkbox": "flag",
+}
+
+
+def _intern_value(value: Any) -> Any:
+    """Intern short strings so repeated values share one object"""
+    if isinstance(value, str) and len(value) <= INTERN_MAX_LEN:
+        return sys.intern(value)
+    return value
+
+
+def _format_epoch_ms(ms: int) -> str:
+    """Format epoch milliseconds in Airtable wire format (UTC, millisecond Z)"""
+    dt = datetime.fromtimestamp(ms // 1000, timezone.utc)
+    return f"{dt:%Y-%m-%dT%H:%M:%S}.{ms % 1000:03d}Z"
+
+
+def _format_date_ms(ms: int) -> str:
+    """Format epoch milliseconds as an Airtable date field (UTC YYYY-MM-DD)"""
+    return datetime.fromtimestamp(ms // 1000, timezone.utc).strftime("%Y-%m-%d")
+
+
+# ==================== Columns ====================
+class _ObjectColumn:
+    """Fallback column: plain list, None = missing"""
+
+    __slots__ = ("values",)
+    kind = "object"
+
+    def __init__(self) -> None:
+        self.values: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def append(self, value: Any) -> bool:
+        self.values.append(_intern_value(value))
+        return True
+
+    def extend(self, values: List[Any]) -> bool:
+        self.values.extend([_intern_value(v) for v in values])
+        return True
+
+    def extend_missing(self, n: int) -> None:
+        self.values.extend([None] * n)
+
+    def get(self, i: int) -> Any:
+        return self.values[i]
+
+    def wire(self, i: int) -> Any:
+        return self.values[i]
+
+
+class _EnumColumn:
+    """singleSelect column: int codes into a label table"""
+
+    __slots__ = ("codes", "labels", "_index")
+    kind = "enum"
+
+    def __init__(self) -> None:
+        self.codes = array("i")
+        self.labels: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def append(self, value: Any) -> bool:
+        if value is None:
+            self.codes.append(MISSING_CODE)
+            return True
+        if not isinstance(value, str):
+            return False
+        code = self._index.get(value)
+        if code is None:
+            code = len(self.labels)
+            label = sys.intern(value)
+            self.labels.append(label)
+            self._index[label] = code
+        self.codes.append(code)
+        return True
+
+    def extend(self, values: List[Any]) -> bool:
+        if any(v is not None and not isinstance(v, str) for v in values):
+            return False
+        for value in values:
+            self.append(value)
+        return True
+
+    def extend_missing(self, n: int) -> None:
+        self.codes.extend([MISSING_CODE] * n)
+
+    def code_of(self, label: str) -> int:
+        """Return the int code for a label (MISSING_CODE if never seen)"""
+        return self._index.get(label, MISSING_CODE)
+
+    def get(self, i: int) -> Optional[str]:
+        code = self.codes[i]
+        return None if code == MISSING_CODE else self.labels[code]
+
+    wire = get
+
+
+class _EpochColumn:
+    """dateTime column: epoch milliseconds (int64), read as epoch seconds"""
+
+    __slots__ = ("epochs",)
+    kind = "epoch"
+    _format = staticmethod(_format_epoch_ms)
+
+    def __init__(self) -> None:
+        self.epochs = array("q")
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def append(self, value: Any) -> bool:
+        if value is None:
+            self.epochs.append(MISSING_EPOCH)
+            return True
+        epoch = parse_iso_epoch(value)
+        if epoch is None:
+            return False
+        self.epochs.append(round(epoch * 1000))
+        return True
+
+    def extend(self, values: List[Any]) -> bool:
+        # Whole column parsed at once (repeated timestamps parsed once)
+        parsed = parse_iso_epoch_batch(values)
+        encoded = []
+        for value, epoch in zip(values, parsed):
+            if value is None:
+                encoded.append(MISSING_EPOCH)
+            elif epoch is None:
+                return False
+            else:
+                encoded.append(round(epoch * 1000))
+        self.epochs.extend(encoded)
+        return True
+
+    def extend_missing(self, n: int) -> None:
+        self.epochs.extend([MISSING_EPOCH] * n)
+
+    def get(self, i: int) -> Optional[float]:
+        """Epoch seconds (an int when there are no milliseconds)"""
+        ms = self.epochs[i]
+        if ms == MISSING_EPOCH:
+            return None
+        return ms // 1000 if ms % 1000 == 0 else ms / 1000
+
+    def wire(self, i: int) -> Optional[str]:
+        ms = self.epochs[i]
+        return None if ms == MISSING_EPOCH else self._format(ms)
+
+
+class _DateColumn(_EpochColumn):
+    """date column: stored and read like dateTime, written back as YYYY-MM-DD"""
+
+    __slots__ = ()
+    _format = staticmethod(_format_date_ms)
+
+
+class _NumberColumn:
+    """number column: float64, NaN = missing"""
+
+    __slots__ = ("numbers", "integral")
+    kind = "number"
+
+    def __init__(self) -> None:
+        self.numbers = array("d")
+        self.integral = True
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def append(self, value: Any) -> bool:
+        if value is None:
+            self.numbers.append(math.nan)
+            return True
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return False
+        if isinstance(value, float):
+            if math.isnan(value):
+                return False
+            self.integral = False
+        self.numbers.append(float(value))
+        return True
+
+    def extend(self, values: List[Any]) -> bool:
+        for value in values:
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return False
+            if isinstance(value, float) and math.isnan(value):
+                return False
+        for value in values:
+            self.append(value)
+        return True
+
+    def extend_missing(self, n: int) -> None:
+        self.numbers.extend([math.nan] * n)
+
+    def get(self, i: int) -> Optional[float]:
+        number = self.numbers[i]
+        if math.isnan(number):
+            return None
+        return int(number) if self.integral else number
+
+    wire = get
+
+
+class _FlagColumn:
+    """checkbox column: int8 (1/0), -1 = missing"""
+
+    __slots__ = ("flags",)
+    kind = "flag"
+
+    def __init__(self) -> None:
+        self.flags = array("b")
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    def append(self, value: Any) -> bool:
+        if value is None:
+            self.flags.append(MISSING_FLAG)
+            return True
+        if not isinstance(value, bool):
+            return False
+        self.flags.append(1 if value else 0)
+        return True
+
+    def extend(self, values: List[Any]) -> bool:
+        if any(v is not None and not isinstance(v, bool) for v in values):
+            return False
+        self.flags.extend([MISSING_FLAG if v is None else int(v) for v in values])
+        return True
+
+    def extend_missing(self, n: int) -> None:
+        self.flags.extend([MISSING_FLAG] * n)
+
+    def get(self, i: int) -> Optional[bool]:
+        flag = self.flags[i]
+        return None if flag == MISSING_FLAG else bool(flag)
+
+    wire = get
+
+
+_COLUMN_CLASSES = {
+    "enum": _EnumColumn,
+    "epoch": _EpochColumn,
+    "date": _DateColumn,
+    "number": _NumberColumn,
+    "flag": _FlagColumn,
+    "object": _ObjectColumn,
+}
+
+
+def _demote(column: Any) -> _ObjectColumn:
+    """Convert a typed column to an object column (keeps wire values)"""
+    demoted = _ObjectColumn()
+    demoted.values = [_intern_value(column.wire(i)) for i in range(len(column))]
+    return demoted
+
+
+# ==================== Row View ====================
+class RowView:
+    """
+    Read-only dict-like view over one row of a ColumnarTable
+
+    Behaves like the Airtable "fields" dict (get / [] / in / keys / items);
+    datetime fields are returned as epoch seconds. Use to_record() for the
+    original wire format.
+    """
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "ColumnarTable", index: int) -> None:
+        self._table = table
+        self._index = index
+
+    @property
+    def id(self) -> str:
+        """Airtable record ID (rec...)"""
+        return self._table._ids[self._index]
+
+    def get(self, field: str, default: Any = None) -> Any:
+        column = self._table._columns.get(field)
+        if column is None:
+            return default
+        value = column.get(self._index)
+        return default if value is None else value
+
+    def __getitem__(self, field: str) -> Any:
+        column = self._table._columns.get(field)
+        value = None if column is None else column.get(self._index)
+        if value is None:
+            raise KeyError(field)
+        return value
+
+    def __contains__(self, field: object) -> bool:
+        column = self._table._columns.get(field)  # type: ignore[arg-type]
+        return column is not None and column.get(self._index) is not None
+
+    def keys(self) -> List[str]:
+        return [
+            name
+            for name, column in self._table._columns.items()
+            if column.get(self._index) is not None
+        ]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        result = []
+        for name, column in self._table._columns.items():
+            value = column.get(self._index)
+            if value is not None:
+                result.append((name, value))
+        return result
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def to_fields(self) -> Dict[str, Any]:
+        """Fields dict in Airtable wire format"""
+        fields = {}
+        for name, column in self._table._columns.items():
+            value = column.wire(self._index)
+            if value is not None:
+                fields[name] = value
+        return fields
+
+    def to_record(self) -> Dict[str, Any]:
+        """Full record in Airtable wire format"""
+        return {"id": self.id, "fields": self.to_fields()}
+
+    def __repr__(self) -> str:
+        return f"RowView({self.id!r}, {dict(self.items())!r})"
+
+
+# ==================== Columnar Table ====================
+class ColumnarTable:
+    """
+    Column-oriented copy of one Airtable table
+
+    Args:
+        name: Table name (e.g. "Shipments")
+        field_types: {field name: Airtable field type} from the schema lock.
+                     Unknown fields are stored as object columns.
+    """
+
+    def __init__(self, name: str, field_types: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.field_types = dict(field_types or {})
+        self._ids: List[str] = []
+        self._columns: Dict[str, Any] = {}
+        self._id_index: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_records(
+        cls,
+        name: str,
+        records: Iterable[Dict[str, Any]],
+        field_types: Optional[Dict[str, str]] = None,
+    ) -> "ColumnarTable":
+        """Build a table from Airtable wire-format records"""
+        table = cls(name, field_types)
+        table.extend(records)
+        return table
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[RowView]:
+        for i in range(len(self._ids)):
+            yield RowView(self, i)
+
+    @property
+    def field_names(self) -> List[str]:
+        return list(self._columns.keys())
+
+    def _new_column(self, field: str, rows: int) -> Any:
+        kind = COLUMN_KINDS.get(self.field_types.get(field, ""), "object")
+        column = _COLUMN_CLASSES[kind]()
+        column.extend_missing(rows)
+        self._columns[sys.intern(field)] = column
+        return column
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append one Airtable record ({"id": ..., "fields": {...}})"""
+        self.extend([record])
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> None:
+        """
+        Append many Airtable records
+
+        Values are gathered per field and encoded column-at-a-time, so each
+        datetime column goes through one batch parse.
+        """
+        records = list(records)
+        if not records:
+            return
+
+        start = len(self._ids)
+        count = len(records)
+
+        # Pivot rows into per-field value lists
+        pivot: Dict[str, List[Any]] = {}
+        for i, record in enumerate(records):
+            for field, value in (record.get("fields") or {}).items():
+                values = pivot.get(field)
+                if values is None:
+                    values = pivot[field] = [None] * count
+                values[i] = value
+
+        for field, values in pivot.items():
+            column = self._columns.get(field)
+            if column is None:
+                column = self._new_column(field, start)
+            if not column.extend(values):
+                column = _demote(column)
+                self._columns[field] = column
+                column.extend(values)
+
+        # Pad columns these records did not mention
+        for field, column in self._columns.items():
+            if field not in pivot:
+                column.extend_missing(count)
+
+        self._ids.extend(record.get("id") or "" for record in records)
+        self._id_index = None
+
+    def row(self, index: int) -> RowView:
+        """Row view by position"""
+        if index < 0:
+            index += len(self._ids)
+        if not 0 <= index < len(self._ids):
+            raise IndexError(index)
+        return RowView(self, index)
+
+    def get(self, record_id: str) -> Optional[RowView]:
+        """Row view by Airtable record ID"""
+        if self._id_index is None:
+            self._id_index = {rid: i for i, rid in enumerate(self._ids)}
+        index = self._id_index.get(record_id)
+        return None if index is None else RowView(self, index)
+
+    def column_kind(self, field: str) -> Optional[str]:
+        """Storage kind of a column (enum/epoch/number/flag/object)"""
+        column = self._columns.get(field)
+        return column.kind if column is not None else None
+
+    def column_values(self, field: str) -> List[Any]:
+        """Decoded values of one column (None where missing)"""
+        column = self._columns.get(field)
+        if column is None:
+            return [None] * len(self._ids)
+        return [column.get(i) for i in range(len(column))]
+
+    def raw_column(self, field: str) -> Any:
+        """
+        Underlying storage for vectorised use
+
+        Returns the int code array for enum columns, the epoch millisecond
+        array for date and datetime columns, the float array for numbers, the int8 array for
+        checkboxes, or the list for object columns. None if absent.
+        """
+        column = self._columns.get(field)
+        if column is None:
+            return None
+        if column.kind == "enum":
+            return column.codes
+        if column.kind == "epoch":
+            return column.epochs
+        if column.kind == "number":
+            return column.numbers
+        if column.kind == "flag":
+            return column.flags
+        return column.values
+
+    def enum_labels(self, field: str) -> List[str]:
+        """Label table of an enum column (index = code)"""
+        column = self._columns.get(field)
+        if column is None or column.kind != "enum":
+            return []
+        return list(column.labels)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Convert back to Airtable wire-format records"""
+        return [RowView(self, i).to_record() for i in range(len(self._ids))]
+
+
+# ==================== Schema Lock ====================
+def field_types_from_lock(lock: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+    """
+    Extract {table: {field: type}} from airtable_schema.lock.json contents
+
+    Args:
+        lock: Parsed schema lock (SchemaValidator.lock)
+
+    Returns:
+        Field type map per table (missing tables skipped)
+    """
+    result: Dict[str, Dict[str, str]] = {}
+    for table_name, table_info in lock.get("tables", {}).items():
+        if table_info.get("missing"):
+            continue
+        result[table_name] = {
+            name: info.get("type", "")
+            for name, info in table_info.get("fields", {}).items()
+        }
+    return result
+
@@ -0,0 +1,199 @@
+"""
+Cached reference tables
+
+Small, rarely edited tables (BottleneckCodes, Owners, Vendors, Sites) are
+loaded whole and joined in memory instead of being queried on every
+request. Each table is a SnapshotCache keyed by its natural key:
+
+- warm() loads every table up front (startup)
+- tables reload after a long TTL (REFERENCE_TTL_SECONDS) or on invalidate()
+- lookups are exact first, then case-insensitive
+- a failed load is logged and the last loaded rows (or none) are served, so
+  a reference outage degrades enrichment instead of failing the request
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from api.airtable_locked_config import FIELD_IDS, TABLES
+from api.snapshot_cache import SnapshotCache
+from api.utils import FieldExtractor
+
+# Reference tables are reloaded once older than this
+REFERENCE_TTL_SECONDS = float(os.getenv("REFERENCE_TTL_SECONDS", str(60 * 60)))
+
+# name -> (locked table name, key field, fields to load)
+REFERENCE_TABLES = {
+    "bottleneckCodes": (
+        "BottleneckCodes",
+        "code",
+        ["code", "category", "description", "riskDefault",
+         "nextActionTemplate", "slaHours", "stopTrigger"],
+    ),
+    "owners": ("Owners", "ownerName", ["ownerName", "team", "email", "chatHandle"]),
+    "vendors": ("Vendors", "vendorName", ["vendorName", "vendorType", "country", "contact"]),
+    "sites": ("Sites", "siteCode", ["siteCode", "siteName", "country", "timeZone"]),
+}
+
+# loader(client) -> {key: row}
+ReferenceLoader = Callable[[Any], Dict[str, Dict[str, Any]]]
+
+
+def airtable_table_loader(table: str, key_field: str, fields: List[str]) -> ReferenceLoader:
+    """Loader for a whole locked table, parsed by field ID, keyed by key_field"""
+    extractor = FieldExtractor(FIELD_IDS[table], fields)
+
+    def load(client: Any) -> Dict[str, Dict[str, Any]]:
+        records = client.list_records(
+            TABLES[table], fields=fields, return_fields_by_field_id=True
+        )
+        extract = extractor.bind(records)
+        rows: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            row = dict(zip(fields, extract(record.get("fields", {}))))
+            key = row.get(key_field)
+            if key:
+                rows[str(key).strip()] = row
+        return rows
+
+    return load
+
+
+def default_loaders() -> Dict[str, ReferenceLoader]:
+    """Loaders for every table in REFERENCE_TABLES"""
+    return {
+        name: airtable_table_loader(table, key_field, fields)
+        for name, (table, key_field, fields) in REFERENCE_TABLES.items()
+    }
+
+
+class ReferenceTable:
+    """Rows of one reference table by key"""
+
+    __slots__ = ("rows", "_folded")
+
+    def __init__(self, rows: Dict[str, Dict[str, Any]]):
+        self.rows = rows
+        self._folded = {key.casefold(): row for key, row in rows.items()}
+
+    def get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not key:
+            return None
+        key = str(key).strip()
+        row = self.rows.get(key)
+        return row if row is not None else self._folded.get(key.casefold())
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+_EMPTY = ReferenceTable({})
+
+
+class ReferenceData:
+    """
+    Whole-table caches for reference data
+
+    Args:
+        client_getter: Returns the current AirtableClient (or None)
+        loaders: {table name: loader(client) -> {key: row}}
+        ttl_seconds: Age after which a table is reloaded
+    """
+
+    def __init__(
+        self,
+        client_getter: Callable[[], Any],
+        loaders: Dict[str, ReferenceLoader],
+        *,
+        ttl_seconds: float = REFERENCE_TTL_SECONDS,
+        background_refresh: bool = True,
+        clock=time.time,
+    ):
+        self._tables: Dict[str, SnapshotCache[ReferenceTable]] = {
+            name: SnapshotCache(
+                client_getter,
+                lambda client, load=loader: ReferenceTable(load(client)),
+                ttl_seconds=ttl_seconds,
+                background_refresh=background_refresh,
+                name=f"Reference table {name}",
+                clock=clock,
+            )
+            for name, loader in loaders.items()
+        }
+        # Last successfully loaded table, served while reloads fail
+        self._last: Dict[str, ReferenceTable] = {}
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._tables)
+
+    def table(self, name: str) -> ReferenceTable:
+        """A whole table (empty without a client; last loaded rows if a load fails)"""
+        try:
+            table = self._tables[name].get()
+        except Exception as e:
+            print(f"⚠️ Reference table {name} load failed: {e}")
+            return self._last.get(name, _EMPTY)
+        if table is None:
+            return _EMPTY
+        self._last[name] = table
+        return table
+
+    def lookup(self, name: str, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """One row by key, or None"""
+        if not key:
+            return None
+        return self.table(name).get(key)
+
+    def warm(self, background: bool = False) -> None:
+        """
+        Load every table now
+
+        Failures are logged and retried on first use.
+        """
+        def load_all() -> None:
+            for name, cache in self._tables.items():
+                try:
+                    cache.refresh()
+                except Exception as e:
+                    print(f"⚠️ Reference table {name} warm-up failed: {e}")
+
+        if background:
+            threading.Thread(target=load_all, daemon=True).start()
+        else:
+            load_all()
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop one table (or all); the next lookup reloads it"""
+        for table_name, cache in self._tables.items():
+            if name is None or table_name == name:
+                cache.invalidate()
+
+    def info(self) -> Dict[str, Any]:
+        tables = {}
+        for name, cache in self._tables.items():
+            info = cache.info()
+            table = cache.peek()
+            info["rows"] = len(table) if table is not None else 0
+            tables[name] = info
+        return tables
+
+    # ==================== Typed lookups ====================
+    def bottleneck_code(self, code: Optional[str]) -> Optional[Dict[str, Any]]:
+        """BottleneckCodes row: category, description, riskDefault,
+        nextActionTemplate, slaHours, stopTrigger"""
+        return self.lookup("bottleneckCodes", code)
+
+    def owner(self, name: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Owners row: ownerName, team, email, chatHandle"""
+        return self.lookup("owners", name)
+
+    def vendor(self, name: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Vendors row: vendorName, vendorType, country, contact"""
+        return self.lookup("vendors", name)
+
+    def site(self, code: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Sites row: siteCode, siteName, country, timeZone"""
+        return self.lookup("sites", code)
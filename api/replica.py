@@ -0,0 +1,306 @@
+"""
+Local SQLite read replica of the locked Airtable base
+
+One SQLite table per locked table, generated from airtable_schema.lock.json:
+
+- columns are the lock field names (id TEXT PRIMARY KEY plus one column per
+  field; number as NUMERIC, checkbox/autoNumber as INTEGER, everything else TEXT,
+  lists/objects as JSON)
+- indexes on shptNo, status, dueAt and code wherever a table has them
+- WAL mode, so API readers never block the sync writer
+
+Sync is incremental: records modified since the previous sync (minus a
+clock-skew overlap) are fetched with LAST_MODIFIED_TIME() and upserted. A
+full sync additionally deletes rows Airtable no longer returns. The _sync
+table records per-table sync times, so readers can check freshness before
+trusting a table.
+
+Writer: scripts/sync_replica.py. Reader: records() with simple equality
+filters, returning Airtable-shaped {"id", "fields"} records keyed by name.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+# Tables older than this are not served by the API read path
+REPLICA_MAX_AGE_SECONDS = float(os.getenv("REPLICA_MAX_AGE_SECONDS", "120"))
+
+# Incremental syncs re-read this much before the previous sync started
+SYNC_OVERLAP_SECONDS = 60
+
+INDEXED_FIELDS = ("shptNo", "status", "dueAt", "code")
+
+_SQL_TYPES = {"number": "NUMERIC", "checkbox": "INTEGER", "autoNumber": "INTEGER"}
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _airtable_utc(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return value
+
+
+class _TableSchema:
+    """Replica layout of one locked table"""
+
+    def __init__(self, name: str, info: Dict[str, Any]):
+        self.name = name
+        self.table_id = info["id"]
+        self.fields: Dict[str, str] = {
+            field: spec.get("type", "") for field, spec in info.get("fields", {}).items()
+        }
+        self.name_by_id: Dict[str, str] = {
+            spec["id"]: field for field, spec in info.get("fields", {}).items() if spec.get("id")
+        }
+        self.columns: List[str] = list(self.fields)
+        self.json_columns: set = set()
+
+    def ddl(self) -> List[str]:
+        columns = ", ".join(
+            f"{_quote(field)} {_SQL_TYPES.get(kind, 'TEXT')}" for field, kind in self.fields.items()
+        )
+        statements = [
+            f"CREATE TABLE IF NOT EXISTS {_quote(self.name)} (id TEXT PRIMARY KEY"
+            + (f", {columns}" if columns else "")
+            + ")"
+        ]
+        for field in INDEXED_FIELDS:
+            if field in self.fields:
+                statements.append(
+                    f"CREATE INDEX IF NOT EXISTS {_quote(f'ix_{self.name}_{field}')}"
+                    f" ON {_quote(self.name)} ({_quote(field)})"
+                )
+        return statements
+
+    def row(self, record: Dict[str, Any]) -> List[Any]:
+        """Column values of an Airtable record (fields keyed by ID or name)"""
+        fields = record.get("fields", {})
+        by_name = {self.name_by_id.get(key, key): value for key, value in fields.items()}
+        values = [record["id"]]
+        for column in self.columns:
+            value = by_name.get(column)
+            if isinstance(value, (list, dict)):
+                self.json_columns.add(column)
+            values.append(_encode(value))
+        return values
+
+
+class AirtableReplica:
+    """
+    SQLite mirror of the locked tables
+
+    Args:
+        path: SQLite file (":memory:" for tests)
+        lock: Parsed airtable_schema.lock.json
+    """
+
+    def __init__(self, path: str, lock: Dict[str, Any], *, clock=time.time):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._clock = clock
+        self.tables: Dict[str, _TableSchema] = {
+            name: _TableSchema(name, info)
+            for name, info in lock.get("tables", {}).items()
+            if not info.get("missing") and info.get("id")
+        }
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    @classmethod
+    def from_lock_file(cls, path: str, lock_path: str, **kwargs: Any) -> "AirtableReplica":
+        with open(lock_path, "r", encoding="utf-8") as f:
+            return cls(path, json.load(f), **kwargs)
+
+    def _create_schema(self) -> None:
+        with self._lock:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS _sync ("
+                " table_name TEXT PRIMARY KEY, synced_at REAL, cursor REAL,"
+                " full_synced_at REAL, rows INTEGER, json_columns TEXT)"
+            )
+            for schema in self.tables.values():
+                for statement in schema.ddl():
+                    self._db.execute(statement)
+                # Fields added to the lock after the table was created
+                existing = {
+                    row["name"] for row in self._db.execute(f"PRAGMA table_info({_quote(schema.name)})")
+                }
+                for field, kind in schema.fields.items():
+                    if field not in existing:
+                        self._db.execute(
+                            f"ALTER TABLE {_quote(schema.name)} ADD COLUMN"
+                            f" {_quote(field)} {_SQL_TYPES.get(kind, 'TEXT')}"
+                        )
+            for row in self._db.execute("SELECT table_name, json_columns FROM _sync"):
+                schema = self.tables.get(row["table_name"])
+                if schema is not None and row["json_columns"]:
+                    schema.json_columns.update(json.loads(row["json_columns"]))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ==================== Sync (writer) ====================
+    def sync_table(self, client: Any, name: str, *, full: bool = False) -> Dict[str, Any]:
+        """
+        Mirror one table
+
+        Args:
+            client: AirtableClient
+            name: Locked table name
+            full: Re-read everything and delete rows missing upstream
+
+        Returns:
+            {"table", "fetched", "deleted", "full"}
+        """
+        schema = self.tables[name]
+        started = self._clock()
+        state = self._sync_state(name)
+        incremental = not full and state is not None and state["cursor"] is not None
+
+        formula = None
+        if incremental:
+            formula = f"IS_AFTER(LAST_MODIFIED_TIME(), '{_airtable_utc(state['cursor'])}')"
+        records = client.list_records(
+            schema.table_id,
+            filter_by_formula=formula,
+            return_fields_by_field_id=True,
+        )
+
+        placeholders = ", ".join("?" for _ in range(len(schema.columns) + 1))
+        columns = ", ".join(["id"] + [_quote(c) for c in schema.columns])
+        rows = [schema.row(record) for record in records]
+        deleted = 0
+
+        with self._lock:
+            cur = self._db.cursor()
+            cur.execute("BEGIN")
+            try:
+                cur.executemany(
+                    f"INSERT OR REPLACE INTO {_quote(name)} ({columns}) VALUES ({placeholders})",
+                    rows,
+                )
+                if not incremental:
+                    cur.execute("CREATE TEMP TABLE IF NOT EXISTS _seen (id TEXT PRIMARY KEY)")
+                    cur.execute("DELETE FROM _seen")
+                    cur.executemany("INSERT OR IGNORE INTO _seen (id) VALUES (?)", ((r[0],) for r in rows))
+                    cur.execute(f"DELETE FROM {_quote(name)} WHERE id NOT IN (SELECT id FROM _seen)")
+                    deleted = cur.rowcount
+                total = cur.execute(f"SELECT COUNT(*) FROM {_quote(name)}").fetchone()[0]
+                full_synced_at = started if not incremental else (state or {}).get("full_synced_at")
+                cur.execute(
+                    "INSERT OR REPLACE INTO _sync"
+                    " (table_name, synced_at, cursor, full_synced_at, rows, json_columns)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        name, started, started - SYNC_OVERLAP_SECONDS, full_synced_at, total,
+                        json.dumps(sorted(schema.json_columns)),
+                    ),
+                )
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+        return {"table": name, "fetched": len(rows), "deleted": deleted, "full": not incremental}
+
+    def sync(
+        self, client: Any, *, full: bool = False, tables: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Mirror every locked table (or the given ones)"""
+        return [self.sync_table(client, name, full=full) for name in (tables or self.tables)]
+
+    # ==================== Freshness ====================
+    def _sync_state(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM _sync WHERE table_name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+
+    def age(self, name: str) -> Optional[float]:
+        """Seconds since the table was last synced (None if never)"""
+        state = self._sync_state(name)
+        if not state or state["synced_at"] is None:
+            return None
+        return self._clock() - state["synced_at"]
+
+    def is_fresh(self, name: str, max_age: float = REPLICA_MAX_AGE_SECONDS) -> bool:
+        age = self.age(name)
+        return age is not None and age <= max_age
+
+    # ==================== Reads ====================
+    def records(
+        self,
+        name: str,
+        where: Optional[Dict[str, Any]] = None,
+        *,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Airtable-shaped records with fields keyed by name
+
+        Args:
+            name: Locked table name
+            where: {field: value} equality filters (ANDed)
+            limit: Maximum number of records
+        """
+        schema = self.tables[name]
+        sql = f"SELECT * FROM {_quote(name)}"
+        params: List[Any] = []
+        if where:
+            unknown = [field for field in where if field not in schema.fields]
+            if unknown:
+                raise KeyError(f"Unknown {name} field(s): {', '.join(unknown)}")
+            sql += " WHERE " + " AND ".join(f"{_quote(field)} = ?" for field in where)
+            params.extend(_encode(value) for value in where.values())
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        records = []
+        for row in rows:
+            fields = {}
+            for column in schema.columns:
+                value = row[column]
+                if value is None:
+                    continue  # Airtable omits empty fields
+                if column in schema.json_columns and isinstance(value, str):
+                    value = json.loads(value)
+                elif schema.fields[column] == "checkbox":
+                    value = bool(value)
+                fields[column] = value
+            records.append({"id": row["id"], "fields": fields})
+        return records
+
+    def info(self) -> Dict[str, Any]:
+        tables = {}
+        for name in self.tables:
+            state = self._sync_state(name)
+            age = self.age(name)
+            tables[name] = {
+                "rows": state["rows"] if state else 0,
+                "ageSeconds": round(age, 1) if age is not None else None,
+            }
+        return {"path": self.path, "tables": tables}
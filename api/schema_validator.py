@@ -3,17 +3,293 @@ Schema Validator for Airtable Integration
 
 Validates API requests against locked Airtable schema to prevent:
 - UNKNOWN_FIELD_NAME errors (422)
+- INVALID_VALUE_FOR_COLUMN errors (422) from mistyped values
 - Field name typos
 - Missing required fields
 
 Based on: HVDC_Airtable_LockAndMappingGenPack_2025-12-24
 """
 
+import hashlib
 import json
+import logging
 import os
-from typing import Dict, List, Optional, Set
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
 from pathlib import Path
 
+from api.utils import parse_iso_epoch
+
+logger = logging.getLogger(__name__)
+
+# How often maybe_reload() stats the lock file
+SCHEMA_LOCK_CHECK_SECONDS = 5.0
+
+# Field types Airtable computes; writes are rejected
+READ_ONLY_TYPES = frozenset({
+    "autoNumber", "formula", "rollup", "count", "lookup", "multipleLookupValues",
+    "createdTime", "lastModifiedTime", "createdBy", "lastModifiedBy", "button",
+})
+
+TEXT_TYPES = frozenset({
+    "singleLineText", "multilineText", "richText", "url", "email", "phoneNumber",
+})
+
+# ==================== Value Checkers ====================
+# Each checker returns None if the value is acceptable, else a reason.
+# typecast=True mirrors Airtable's typecast coercions (ingest uses it).
+
+
+def _check_text(typecast: bool) -> Callable[[Any], Optional[str]]:
+    accepted = (str, int, float) if typecast else (str,)
+
+    def check(value: Any) -> Optional[str]:
+        if isinstance(value, accepted) and not isinstance(value, bool):
+            return None
+        return "expected text"
+
+    return check
+
+
+def _check_number(typecast: bool) -> Callable[[Any], Optional[str]]:
+    def check(value: Any) -> Optional[str]:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return None
+        if typecast and isinstance(value, str):
+            try:
+                float(value.replace(",", ""))
+                return None
+            except ValueError:
+                pass
+        return "expected number"
+
+    return check
+
+
+def _check_checkbox(value: Any) -> Optional[str]:
+    return None if isinstance(value, bool) else "expected boolean"
+
+
+def _check_datetime(value: Any) -> Optional[str]:
+    if isinstance(value, str) and parse_iso_epoch(value) is not None:
+        return None
+    return "expected ISO 8601 date/time"
+
+
+def _check_select(
+    choices: Optional[FrozenSet[str]], typecast: bool
+) -> Callable[[Any], Optional[str]]:
+    def check(value: Any) -> Optional[str]:
+        if not isinstance(value, str):
+            return "expected option name"
+        # typecast creates unknown options instead of rejecting them
+        if choices and not typecast and value not in choices:
+            return "unknown option"
+        return None
+
+    return check
+
+
+def _check_read_only(value: Any) -> Optional[str]:
+    return "read-only field"
+
+
+def _compile_checker(
+    field_info: Dict, typecast: bool
+) -> Optional[Callable[[Any], Optional[str]]]:
+    """Value checker for a lock field entry (None = no check)"""
+    field_type = field_info.get("type")
+    if field_type in READ_ONLY_TYPES:
+        return _check_read_only
+    if field_type in TEXT_TYPES:
+        return _check_text(typecast)
+    if field_type == "number" or field_type in ("currency", "percent", "duration", "rating"):
+        return _check_number(typecast)
+    if field_type == "checkbox":
+        return _check_checkbox
+    if field_type in ("dateTime", "date"):
+        return _check_datetime
+    if field_type == "singleSelect":
+        options = (field_info.get("options") or {}).get("choices") or []
+        choices = frozenset(c.get("name") for c in options if c.get("name"))
+        return _check_select(choices or None, typecast)
+    return None
+
+
+class _CompiledTable:
+    """Precomputed name set and per-field value checkers for one table"""
+
+    __slots__ = ("names", "sorted_names", "checkers")
+
+    def __init__(self, fields: Dict[str, Dict], typecast: bool):
+        self.names: FrozenSet[str] = frozenset(fields)
+        self.sorted_names: Tuple[str, ...] = tuple(sorted(fields))
+        self.checkers: Dict[str, Callable[[Any], Optional[str]]] = {}
+        for name, info in fields.items():
+            checker = _compile_checker(info or {}, typecast)
+            if checker is not None:
+                self.checkers[name] = checker
+
+    def type_errors(self, record: Dict) -> Dict[str, str]:
+        """{field: reason} for values of known fields that fail their check"""
+        errors = {}
+        checkers = self.checkers
+        for name, value in record.items():
+            if value is None:
+                continue  # clearing a field is always allowed
+            checker = checkers.get(name)
+            if checker is not None:
+                reason = checker(value)
+                if reason is not None:
+                    errors[name] = reason
+        return errors
+
+
+_EMPTY_TABLE = _CompiledTable({}, True)
+
+
+# ==================== Field Name Suggestions ====================
+_SEPARATORS = re.compile(r"[\s_\-.]+")
+
+# Minimum similarity for a suggestion
+SUGGESTION_MIN_SCORE = 0.3
+
+# Cached suggestion lists per table (RPA payloads repeat the same bad keys)
+SUGGESTION_CACHE_SIZE = 1024
+
+
+def _normalize_name(name: str) -> str:
+    """Case-fold and drop separators (Shpt_No -> shptno)"""
+    return _SEPARATORS.sub("", name).casefold()
+
+
+def _trigrams(text: str) -> Counter:
+    padded = f"$${text}$"
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance (two-row DP)"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        previous = current
+    return previous[-1]
+
+
+class _FieldSuggester:
+    """
+    Trigram index over one table's field names
+
+    Candidates are fields sharing at least one trigram with the (normalized)
+    invalid name; they are ranked by the mean of trigram Dice similarity and
+    normalized edit-distance similarity, with a case-insensitive exact match
+    always first and a bonus for containment ("vend" -> "vendor").
+    """
+
+    def __init__(self, field_names: List[str]):
+        self.names = sorted(field_names)
+        self._normalized = [_normalize_name(n) for n in self.names]
+        self._grams = [_trigrams(n) for n in self._normalized]
+        self._gram_counts = [sum(g.values()) for g in self._grams]
+        self._exact: Dict[str, int] = {}
+        self._index: Dict[str, List[int]] = {}
+        for i, (normalized, grams) in enumerate(zip(self._normalized, self._grams)):
+            self._exact.setdefault(normalized, i)
+            for gram in grams:
+                self._index.setdefault(gram, []).append(i)
+        # Shared by request threads; ranking runs outside the lock
+        self._cache: "OrderedDict[Tuple[str, int], List[str]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _score(self, query: str, query_count: int, i: int, shared: int) -> float:
+        candidate = self._normalized[i]
+        dice = 2.0 * shared / (query_count + self._gram_counts[i])
+        longest = max(len(query), len(candidate)) or 1
+        edit = 1.0 - _edit_distance(query, candidate) / longest
+        score = (dice + edit) / 2
+        if query and (query in candidate or candidate in query):
+            score = max(score, 0.5) + 0.1
+        return score
+
+    def suggest(self, name: str, limit: int = 3) -> List[str]:
+        key = (name, limit)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return list(cached)
+
+        query = _normalize_name(name)
+        query_grams = _trigrams(query)
+        query_count = sum(query_grams.values())
+
+        shared: Counter = Counter()
+        for gram, count in query_grams.items():
+            for i in self._index.get(gram, ()):
+                shared[i] += min(count, self._grams[i][gram])
+
+        exact = self._exact.get(query)
+        ranked = sorted(
+            (
+                (self._score(query, query_count, i, n), self.names[i])
+                for i, n in shared.items()
+                if i != exact
+            ),
+            key=lambda item: (-item[0], item[1]),
+        )
+        result = [self.names[exact]] if exact is not None else []
+        result.extend(name for score, name in ranked if score >= SUGGESTION_MIN_SCORE)
+        result = result[:limit]
+
+        with self._cache_lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > SUGGESTION_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return list(result)
+
+
+class _SchemaSnapshot:
+    """Compiled view of one lock file version (swapped whole, never edited)"""
+
+    def __init__(self, lock: Dict, raw: bytes, stat: os.stat_result):
+        self.lock = lock
+        self.base_id = lock["base"]["id"]
+        self.lock_hash = hashlib.sha256(raw).hexdigest()
+        self.file_key = (stat.st_mtime_ns, stat.st_size)
+        self.loaded_at = time.time()
+        self.table_fields: Dict[str, Set[str]] = {}
+        self.table_ids: Dict[str, str] = {}
+        # Compiled per (table, typecast)
+        self.compiled: Dict[Tuple[str, bool], _CompiledTable] = {}
+        self.suggesters: Dict[str, _FieldSuggester] = {}
+
+        for table_name, table_info in lock["tables"].items():
+            if table_info.get("missing"):
+                continue
+
+            # Store table ID
+            self.table_ids[table_name] = table_info.get("id")
+
+            # Store field names
+            fields = table_info.get("fields", {})
+            self.table_fields[table_name] = set(fields.keys())
+            for typecast in (True, False):
+                self.compiled[(table_name, typecast)] = _CompiledTable(fields, typecast)
+            self.suggesters[table_name] = _FieldSuggester(list(fields))
+
 
 class SchemaValidator:
     """
@@ -21,9 +297,12 @@ class SchemaValidator:
 
     Features:
     - Field name validation
+    - Field type validation (compiled from lock field metadata)
+    - Batch validation in one pass
     - Table ID lookup
     - Fuzzy field name suggestions
     - Missing field detection
+    - Hot reload of the lock file (mtime/hash watch, copy-on-write swap)
     """
 
     def __init__(self, lock_path: Optional[str] = None):
@@ -37,6 +316,7 @@ class SchemaValidator:
         Raises:
             FileNotFoundError: If lock file not found
         """
+        candidates: List[Optional[str]] = [lock_path]
         if lock_path is None:
             # Try common locations
             candidates = [
@@ -62,27 +342,112 @@ class SchemaValidator:
                 "Searched locations: " + ", ".join([str(c) for c in candidates if c])
             )
 
-        with open(lock_path, encoding="utf-8") as f:
-            self.lock = json.load(f)
-
-        self.base_id = self.lock["base"]["id"]
-        self._build_lookup_tables()
+        self.lock_path = lock_path
+        self.check_interval = float(
+            os.getenv("SCHEMA_LOCK_CHECK_SECONDS", SCHEMA_LOCK_CHECK_SECONDS)
+        )
+        self.reload_count = 0
+        self._last_check = time.monotonic()
+        self._reload_lock = threading.Lock()
+        self._listeners: List[Callable[["SchemaValidator"], None]] = []
+
+        raw, stat = self._read_lock_file()
+        self._snapshot = _SchemaSnapshot(json.loads(raw), raw, stat)
+
+    # ==================== Snapshot (copy-on-write) ====================
+    # Readers take self._snapshot once per call; reload() builds a complete
+    # new snapshot and swaps the reference, so readers never lock or see a
+    # half-built table set.
+    @property
+    def lock(self) -> Dict:
+        return self._snapshot.lock
+
+    @property
+    def base_id(self) -> str:
+        return self._snapshot.base_id
+
+    @property
+    def lock_hash(self) -> str:
+        """SHA-256 of the active lock file contents"""
+        return self._snapshot.lock_hash
+
+    def _read_lock_file(self) -> Tuple[bytes, os.stat_result]:
+        with open(self.lock_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            return f.read(), stat
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Reload the lock file if it changed
 
-    def _build_lookup_tables(self):
-        """Build fast lookup tables for validation"""
-        self._table_fields: Dict[str, Set[str]] = {}
-        self._table_ids: Dict[str, str] = {}
+        mtime/size are checked first; the file is only parsed when its
+        content hash differs. A lock that fails to parse is ignored and the
+        active snapshot is kept.
 
-        for table_name, table_info in self.lock["tables"].items():
-            if table_info.get("missing"):
-                continue
+        Args:
+            force: Re-read and re-hash even if mtime/size are unchanged
 
-            # Store table ID
-            self._table_ids[table_name] = table_info.get("id")
+        Returns:
+            True if a new snapshot was swapped in
+        """
+        with self._reload_lock:
+            current = self._snapshot
+            try:
+                stat = os.stat(self.lock_path)
+            except OSError as e:
+                logger.warning(f"Schema lock not readable, keeping active lock: {e}")
+                return False
+            if not force and (stat.st_mtime_ns, stat.st_size) == current.file_key:
+                return False
+
+            try:
+                raw, stat = self._read_lock_file()
+                if hashlib.sha256(raw).hexdigest() == current.lock_hash:
+                    current.file_key = (stat.st_mtime_ns, stat.st_size)
+                    return False
+                snapshot = _SchemaSnapshot(json.loads(raw), raw, stat)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Schema lock reload failed, keeping active lock: {e}")
+                return False
+
+            self._snapshot = snapshot
+            self.reload_count += 1
+
+        logger.info(
+            f"Schema lock reloaded: {snapshot.lock.get('generatedAt')} ({snapshot.lock_hash[:12]})"
+        )
+        for listener in list(self._listeners):
+            try:
+                listener(self)
+            except Exception as e:
+                logger.error(f"Schema reload listener failed: {e}")
+        return True
+
+    def maybe_reload(self) -> bool:
+        """reload() at most once per check_interval (cheap per-request hook)"""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        return self.reload()
+
+    def on_reload(self, listener: Callable[["SchemaValidator"], None]) -> None:
+        """Call listener(validator) after each successful reload"""
+        self._listeners.append(listener)
+
+    def lock_info(self) -> Dict:
+        """Active lock metadata for /health"""
+        snapshot = self._snapshot
+        return {
+            "path": self.lock_path,
+            "hash": snapshot.lock_hash,
+            "version": snapshot.lock.get("generatedAt", "unknown"),
+            "loadedAt": snapshot.loaded_at,
+            "reloads": self.reload_count,
+        }
 
-            # Store field names
-            fields = table_info.get("fields", {})
-            self._table_fields[table_name] = set(fields.keys())
+    def _table(self, table_name: str, typecast: bool = True) -> _CompiledTable:
+        return self._snapshot.compiled.get((table_name, typecast), _EMPTY_TABLE)
 
     def get_table_id(self, table_name: str) -> Optional[str]:
         """
@@ -94,7 +459,7 @@ class SchemaValidator:
         Returns:
             Table ID (tbl...) or None if not found
         """
-        return self._table_ids.get(table_name)
+        return self._snapshot.table_ids.get(table_name)
 
     def get_valid_fields(self, table_name: str) -> List[str]:
         """
@@ -104,48 +469,111 @@ class SchemaValidator:
             table_name: Name of the table
 
         Returns:
-            List of valid field names (sorted)
+            List of valid field names (sorted, precomputed at load)
         """
-        return sorted(self._table_fields.get(table_name, []))
+        return list(self._table(table_name).sorted_names)
 
-    def validate_fields(self, table_name: str, record: Dict) -> Dict:
+    def validate_fields(
+        self, table_name: str, record: Dict, typecast: bool = True
+    ) -> Dict:
         """
         Validate record fields against schema
 
         Args:
             table_name: Name of the table
             record: Dict of field names to values
+            typecast: Accept values Airtable coerces with typecast=true
 
         Returns:
             {
                 "valid": bool,
                 "invalid_fields": List[str],
+                "type_errors": Dict[str, str],
                 "valid_fields": List[str],
                 "table_id": str or None,
                 "suggestions": Dict[str, str] or None
             }
         """
-        valid_fields = self._table_fields.get(table_name, set())
-        record_fields = set(record.keys())
+        table = self._table(table_name, typecast)
+        names = table.names
 
-        invalid = list(record_fields - valid_fields)
+        if record.keys() <= names:
+            invalid = []
+            valid = list(record)
+        else:
+            invalid = [name for name in record if name not in names]
+            valid = [name for name in record if name in names]
+
+        type_errors = table.type_errors(record)
 
         return {
-            "valid": len(invalid) == 0,
+            "valid": not invalid and not type_errors,
             "invalid_fields": invalid,
-            "valid_fields": list(record_fields & valid_fields),
+            "type_errors": type_errors,
+            "valid_fields": valid,
             "table_id": self.get_table_id(table_name),
             "suggestions": (
                 self._suggest_fields(table_name, invalid) if invalid else None
             ),
         }
 
+    def validate_batch(
+        self, table_name: str, records: List[Dict], typecast: bool = True
+    ) -> List[Dict]:
+        """
+        Validate many records in one pass
+
+        All-valid records cost one frozenset subset test plus the
+        per-field value checks; details are built only for failures.
+
+        Args:
+            table_name: Name of the table
+            records: Field dicts
+            typecast: Accept values Airtable coerces with typecast=true
+
+        Returns:
+            [{"index", "invalid_fields", "type_errors", "suggestions"}, ...]
+            for failing records only (empty list = batch is valid)
+        """
+        table = self._table(table_name, typecast)
+        names = table.names
+        type_errors_of = table.type_errors
+        errors = []
+
+        for index, record in enumerate(records):
+            if not isinstance(record, dict):
+                errors.append({
+                    "index": index,
+                    "invalid_fields": [],
+                    "type_errors": {},
+                    "suggestions": None,
+                    "error": "Event must be a JSON object",
+                })
+                continue
+
+            invalid = [] if record.keys() <= names else [n for n in record if n not in names]
+            type_errors = type_errors_of(record)
+            if invalid or type_errors:
+                errors.append({
+                    "index": index,
+                    "invalid_fields": invalid,
+                    "type_errors": type_errors,
+                    "suggestions": (
+                        self._suggest_fields(table_name, invalid) if invalid else None
+                    ),
+                })
+
+        return errors
+
     def _suggest_fields(
         self, table_name: str, invalid_fields: List[str]
     ) -> Dict[str, List[str]]:
         """
         Suggest correct field names for invalid fields (fuzzy match)
 
+        Uses the table's trigram index (built at load); suggestions are
+        ranked by similarity, closest first.
+
         Args:
             table_name: Name of the table
             invalid_fields: List of invalid field names
@@ -153,37 +581,21 @@ class SchemaValidator:
         Returns:
             Dict mapping invalid field name to list of suggestions
         """
-        valid = self._table_fields.get(table_name, set())
+        suggester = self._snapshot.suggesters.get(table_name)
         suggestions = {}
+        if suggester is None:
+            return suggestions
 
         for invalid in invalid_fields:
-            # Simple fuzzy match (case-insensitive, partial match)
-            invalid_lower = invalid.lower()
-            matches = []
-
-            for field in valid:
-                field_lower = field.lower()
-
-                # Exact match (case-insensitive)
-                if invalid_lower == field_lower:
-                    matches.insert(0, field)  # Priority
-                # Substring match
-                elif invalid_lower in field_lower or field_lower in invalid_lower:
-                    matches.append(field)
-                # Starts with match
-                elif field_lower.startswith(invalid_lower) or invalid_lower.startswith(
-                    field_lower
-                ):
-                    matches.append(field)
-
+            matches = suggester.suggest(invalid)
             if matches:
-                suggestions[invalid] = matches[:3]  # Top 3 matches
+                suggestions[invalid] = matches  # Top 3 matches
 
         return suggestions
 
     def get_schema_version(self) -> str:
         """Get schema lock timestamp"""
-        return self.lock.get("generatedAt", "unknown")
+        return self._snapshot.lock.get("generatedAt", "unknown")
 
     def get_missing_fields(self, table_name: str) -> List[str]:
         """
@@ -195,12 +607,12 @@ class SchemaValidator:
         Returns:
             List of missing field names
         """
-        table = self.lock["tables"].get(table_name, {})
+        table = self._snapshot.lock["tables"].get(table_name, {})
         return table.get("missingFields", [])
 
     def get_all_tables(self) -> List[str]:
         """Get list of all table names"""
-        return list(self._table_ids.keys())
+        return list(self._snapshot.table_ids.keys())
 
     def get_field_info(self, table_name: str, field_name: str) -> Optional[Dict]:
         """
@@ -214,7 +626,7 @@ class SchemaValidator:
             Field info dict with id, name, type, description
             or None if not found
         """
-        table = self.lock["tables"].get(table_name, {})
+        table = self._snapshot.lock["tables"].get(table_name, {})
         if table.get("missing"):
             return None
 
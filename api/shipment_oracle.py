@@ -0,0 +1,279 @@
+"""
+Shipment existence oracle for per-shipment endpoints
+
+GET /approval/status/{shptNo} and GET /document/events/{shptNo} return 404
+for unknown shipments. Rather than a Shipments round trip before every
+child-table query:
+
+- a cached set of every shptNo (a few KB) answers "exists" with no upstream
+  read; it is refreshed in the background once older than ttl_seconds
+- shptNo values confirmed missing are negatively cached for a short window
+- when neither cache can answer, the point lookup runs concurrently with the
+  child-table query (fetch_if_exists), so the request waits for one round
+  trip instead of two
+
+Caches belong to one client object; swapping the client (new token, tests)
+starts from empty.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from api.utils import formula_any_equal
+
+# Full shptNo set is refreshed once older than this
+SHIPMENT_SET_TTL_SECONDS = 300
+
+# Unknown shptNo values stay "not found" for this long
+NEGATIVE_TTL_SECONDS = 60
+
+# Negative cache capacity (oldest entries evicted first)
+NEGATIVE_MAX_ENTRIES = 10_000
+
+# shptNo values per OR formula in check_many (keeps the query URL short)
+CHECK_CHUNK_SIZE = 50
+
+
+class ShipmentExistenceOracle:
+    """
+    Cached answer to "does this shptNo exist?"
+
+    Args:
+        client_getter: Returns the current AirtableClient (or None)
+        table_id: Shipments table ID
+        ttl_seconds: Age after which the shptNo set is refreshed
+        negative_ttl_seconds: How long a confirmed miss is trusted
+        negative_max_entries: Negative cache capacity
+        background_refresh: Refresh a stale set on a worker thread from lookup()
+    """
+
+    def __init__(
+        self,
+        client_getter: Callable[[], Any],
+        table_id: str,
+        *,
+        ttl_seconds: float = SHIPMENT_SET_TTL_SECONDS,
+        negative_ttl_seconds: float = NEGATIVE_TTL_SECONDS,
+        negative_max_entries: int = NEGATIVE_MAX_ENTRIES,
+        background_refresh: bool = True,
+        clock=time.monotonic,
+    ):
+        self._client_getter = client_getter
+        self.table_id = table_id
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.negative_max_entries = negative_max_entries
+        self.background_refresh = background_refresh
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._owner: Any = None
+        self._known: Optional[Set[str]] = None
+        self._loaded_at = 0.0
+        self._negative: "OrderedDict[str, float]" = OrderedDict()
+        self._refreshing = False
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="shipment-oracle")
+        self.stats = {"hits": 0, "negativeHits": 0, "misses": 0, "refreshes": 0}
+
+    # ==================== Cache state ====================
+    def _current_client(self) -> Any:
+        """Current client; caches are dropped when it changes"""
+        client = self._client_getter()
+        with self._lock:
+            if client is not self._owner:
+                self._owner = client
+                self._known = None
+                self._loaded_at = 0.0
+                self._negative.clear()
+        return client
+
+    def _remember(self, client: Any, shpt_no: str, exists: bool) -> None:
+        with self._lock:
+            if client is not self._owner:
+                return
+            if exists:
+                self._negative.pop(shpt_no, None)
+                if self._known is not None:
+                    self._known.add(shpt_no)
+            else:
+                self._negative[shpt_no] = self._clock()
+                self._negative.move_to_end(shpt_no)
+                while len(self._negative) > self.negative_max_entries:
+                    self._negative.popitem(last=False)
+
+    def mark_exists(self, shpt_no: str) -> None:
+        """Record a shptNo known to exist (e.g. from a change notification)"""
+        self._remember(self._current_client(), shpt_no, True)
+
+    def invalidate(self) -> None:
+        """Drop both caches (next lookups fall back to point checks)"""
+        with self._lock:
+            self._known = None
+            self._loaded_at = 0.0
+            self._negative.clear()
+
+    # ==================== Upstream reads ====================
+    def refresh(self) -> int:
+        """
+        Reload the full shptNo set
+
+        Returns:
+            Number of shipments known
+        """
+        client = self._current_client()
+        if client is None:
+            return 0
+        records = client.list_records(self.table_id, fields=["shptNo"])
+        known = {
+            str(value).strip()
+            for value in (record.get("fields", {}).get("shptNo") for record in records)
+            if value
+        }
+        with self._lock:
+            if client is self._owner:
+                self._known = known
+                self._loaded_at = self._clock()
+                for shpt_no in known:
+                    self._negative.pop(shpt_no, None)
+                self.stats["refreshes"] += 1
+        return len(known)
+
+    def _refresh_quietly(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"⚠️ Shipment set refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _schedule_refresh(self) -> None:
+        """Single-flight background refresh (caller holds no lock)"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        self._executor.submit(self._refresh_quietly)
+
+    def check(self, shpt_no: str) -> bool:
+        """Point lookup in Shipments; the answer is cached either way"""
+        client = self._current_client()
+        if client is None:
+            return False
+        records = client.list_records(
+            self.table_id,
+            filter_by_formula=f"{{shptNo}}='{shpt_no}'",
+            fields=["shptNo"],
+            max_records=1,
+        )
+        exists = bool(records)
+        self._remember(client, shpt_no, exists)
+        return exists
+
+    def check_many(self, shpt_nos: Iterable[str]) -> Set[str]:
+        """
+        Existing shptNo values among shpt_nos
+
+        Cached answers are used first; the rest are checked with chunked
+        OR formulas (one read per CHECK_CHUNK_SIZE unknown values).
+        """
+        existing: Set[str] = set()
+        unknown: List[str] = []
+        for shpt_no in dict.fromkeys(shpt_nos):
+            known = self.lookup(shpt_no)
+            if known:
+                existing.add(shpt_no)
+            elif known is None:
+                unknown.append(shpt_no)
+
+        client = self._current_client() if unknown else None
+        if client is None:
+            return existing
+
+        for start in range(0, len(unknown), CHECK_CHUNK_SIZE):
+            chunk = unknown[start:start + CHECK_CHUNK_SIZE]
+            records = client.list_records(
+                self.table_id,
+                filter_by_formula=formula_any_equal("shptNo", chunk),
+                fields=["shptNo"],
+            )
+            found = {
+                str(record.get("fields", {}).get("shptNo") or "").strip() for record in records
+            }
+            for shpt_no in chunk:
+                exists = shpt_no in found
+                self._remember(client, shpt_no, exists)
+                if exists:
+                    existing.add(shpt_no)
+        return existing
+
+    # ==================== Lookups ====================
+    def lookup(self, shpt_no: str) -> Optional[bool]:
+        """
+        Answer from cache only
+
+        A stale set still answers "exists" (shipments are not deleted in
+        normal operation) while a refresh runs in the background.
+
+        Returns:
+            True / False when cached, None when a point lookup is needed
+        """
+        if self._current_client() is None:
+            return None
+
+        now = self._clock()
+        with self._lock:
+            stale = self._known is None or now - self._loaded_at >= self.ttl_seconds
+            if self._known is not None and shpt_no in self._known:
+                self.stats["hits"] += 1
+                result: Optional[bool] = True
+            else:
+                missed_at = self._negative.get(shpt_no)
+                if missed_at is not None and now - missed_at < self.negative_ttl_seconds:
+                    self.stats["negativeHits"] += 1
+                    result = False
+                else:
+                    self.stats["misses"] += 1
+                    result = None
+
+        if stale and self.background_refresh:
+            self._schedule_refresh()
+        return result
+
+    def fetch_if_exists(self, shpt_no: str, fetch: Callable[[], Any]) -> Tuple[bool, Any]:
+        """
+        Run a child-table query for a shipment, skipping it for known misses
+
+        On a cache miss the existence check and fetch() are issued
+        concurrently; the fetched value is discarded if the shipment
+        turns out not to exist.
+
+        Returns:
+            (exists, fetch() result or None)
+        """
+        known = self.lookup(shpt_no)
+        if known is False:
+            return False, None
+        if known is True:
+            return True, fetch()
+
+        pending = self._executor.submit(self.check, shpt_no)
+        value = fetch()
+        if not pending.result():
+            return False, None
+        return True, value
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "loaded": self._known is not None,
+                "shipments": len(self._known) if self._known is not None else 0,
+                "ageSeconds": (
+                    round(self._clock() - self._loaded_at, 1) if self._known is not None else None
+                ),
+                "negativeEntries": len(self._negative),
+                **self.stats,
+            }
@@ -0,0 +1,209 @@
+"""
+Indexed ad-hoc queries over a cached Shipments snapshot (GET /shipments/query)
+
+The snapshot is a ColumnarTable of every shipment plus, per load:
+
+- a bitmap per distinct value of each filterable column (site, riskLevel,
+  currentBottleneckCode, ...); bit i is set when row i has that value.
+  Values are matched case-insensitively; empty cells are indexed under None,
+  except checkboxes, which Airtable omits when unchecked: those are "false"
+- row numbers sorted by eta, so an eta range is two bisections
+
+A query ORs the bitmaps of each predicate's values, ANDs the predicates
+(smallest first, stopping once empty), ANDs the eta range and projects the
+requested fields of the first `limit` matching rows. No upstream call is
+made while the snapshot is fresh.
+"""
+
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from api.record_store import ColumnarTable
+from api.snapshot_cache import SnapshotCache
+from api.utils import iso_dubai_epoch, parse_iso_epoch
+
+# Snapshot is reloaded once older than this
+SHIPMENT_QUERY_TTL_SECONDS = 60
+
+# Columns with value bitmaps
+INDEXED_FIELDS = (
+    "site", "riskLevel", "currentBottleneckCode", "mode",
+    "vendor", "forwarder", "actionOwner", "stopFlag",
+)
+
+# Checkbox columns of the locked Shipments table (used when no types are given)
+CHECKBOX_FIELDS = ("stopFlag",)
+
+RANGE_FIELD = "eta"
+
+
+def _key(value: Any) -> Optional[str]:
+    """Index key of a cell value (case-insensitive; None for empty)"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value).strip().casefold()
+
+
+def _bitmap(rows: Sequence[int], size: int) -> int:
+    """Bitmap (int) with the given row bits set, built in O(size)"""
+    data = bytearray((size + 7) // 8)
+    for row in rows:
+        data[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(data, "little")
+
+
+def _iter_bits(bits: int) -> Iterator[int]:
+    """Set bit positions in ascending order"""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for offset, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield offset * 8 + low.bit_length() - 1
+            byte ^= low
+
+
+class _ShipmentSnapshot:
+    """Immutable shipment table and indexes for one load"""
+
+    def __init__(
+        self,
+        records: List[Dict[str, Any]],
+        field_types: Optional[Dict[str, str]],
+        loaded_at: float,
+    ):
+        self.loaded_at = loaded_at
+        self.table = ColumnarTable.from_records("Shipments", records, field_types)
+        size = len(self.table)
+        self.all_rows = (1 << size) - 1
+
+        self.bitmaps: Dict[str, Dict[Optional[str], int]] = {}
+        for field in INDEXED_FIELDS:
+            values = self.table.column_values(field)
+            missing = None
+            if self._is_checkbox(field, field_types):
+                missing = _key(False)
+            rows_by_key: Dict[Optional[str], List[int]] = {}
+            for row, value in enumerate(values):
+                key = _key(value)
+                rows_by_key.setdefault(missing if key is None else key, []).append(row)
+            self.bitmaps[field] = {
+                key: _bitmap(rows, size) for key, rows in rows_by_key.items()
+            }
+
+        # Epoch columns are already decoded; anything else is parsed here
+        eta_values = self.table.column_values(RANGE_FIELD)
+        if self.table.column_kind(RANGE_FIELD) != "epoch":
+            eta_values = [parse_iso_epoch(v) if isinstance(v, str) else None for v in eta_values]
+        dated = sorted(
+            (epoch, row) for row, epoch in enumerate(eta_values) if epoch is not None
+        )
+        self.eta_epochs = array("d", (epoch for epoch, _ in dated))
+        self.eta_rows = array("l", (row for _, row in dated))
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def _is_checkbox(self, field: str, field_types: Optional[Dict[str, str]]) -> bool:
+        if field_types and field in field_types:
+            return field_types[field] == "checkbox"
+        return field in CHECKBOX_FIELDS
+
+    def eta_bitmap(self, after: Optional[float], before: Optional[float]) -> int:
+        """Rows with after <= eta < before (bounds optional)"""
+        lo = bisect_left(self.eta_epochs, after) if after is not None else 0
+        hi = bisect_left(self.eta_epochs, before) if before is not None else len(self.eta_epochs)
+        return _bitmap(self.eta_rows[lo:hi], len(self.table)) if lo < hi else 0
+
+    def match(
+        self,
+        filters: Dict[str, Sequence[Optional[str]]],
+        eta_after: Optional[float] = None,
+        eta_before: Optional[float] = None,
+    ) -> int:
+        """
+        Bitmap of rows matching every predicate
+
+        Args:
+            filters: {indexed field: accepted values}; values of one field
+                     are ORed (None matches empty cells)
+            eta_after, eta_before: eta range [after, before) as epochs
+        """
+        predicates = []
+        for field, values in filters.items():
+            index = self.bitmaps[field]
+            union = 0
+            for value in values:
+                union |= index.get(_key(value), 0)
+            predicates.append(union)
+
+        bits = self.all_rows
+        for predicate in sorted(predicates, key=int.bit_count):
+            bits &= predicate
+            if not bits:
+                return 0
+        if eta_after is not None or eta_before is not None:
+            bits &= self.eta_bitmap(eta_after, eta_before)
+        return bits
+
+    def project(self, bits: int, fields: Sequence[str], limit: int) -> List[Dict[str, Any]]:
+        """Requested fields of the first `limit` matching rows (datetimes in Dubai time)"""
+        epoch_fields = {f for f in fields if self.table.column_kind(f) == "epoch"}
+        items = []
+        for row in _iter_bits(bits):
+            if len(items) >= limit:
+                break
+            view = self.table.row(row)
+            item = {}
+            for field in fields:
+                value = view.get(field)
+                item[field] = iso_dubai_epoch(value) if field in epoch_fields else value
+            items.append(item)
+        return items
+
+
+class ShipmentQueryIndex:
+    """
+    Periodically refreshed, indexed Shipments snapshot
+
+    Args:
+        client_getter: Returns the current AirtableClient (or None)
+        loader: loader(client) -> Shipments records with fields keyed by name
+        field_types: {field: Airtable type} from the schema lock (optional)
+        ttl_seconds: Age after which the snapshot is reloaded
+        background_refresh: Reload a stale snapshot on a worker thread
+    """
+
+    def __init__(
+        self,
+        client_getter: Callable[[], Any],
+        loader: Callable[[Any], List[Dict[str, Any]]],
+        *,
+        field_types: Optional[Dict[str, str]] = None,
+        ttl_seconds: float = SHIPMENT_QUERY_TTL_SECONDS,
+        background_refresh: bool = True,
+        clock=time.time,
+    ):
+        self._cache: SnapshotCache[_ShipmentSnapshot] = SnapshotCache(
+            client_getter,
+            lambda client: _ShipmentSnapshot(loader(client), field_types, clock()),
+            ttl_seconds=ttl_seconds,
+            background_refresh=background_refresh,
+            name="Shipment query index",
+            clock=clock,
+        )
+
+    def snapshot(self) -> Optional[_ShipmentSnapshot]:
+        """Current snapshot, loading it on first use (None without a client)"""
+        return self._cache.get()
+
+    def invalidate(self) -> None:
+        """Force a reload on next use"""
+        self._cache.invalidate()
+
+    def info(self) -> Dict[str, Any]:
+        snapshot = self._cache.peek()
+        return {**self._cache.info(), "rows": len(snapshot) if snapshot is not None else 0}
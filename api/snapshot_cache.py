@@ -0,0 +1,140 @@
+"""
+Periodically rebuilt in-memory snapshots of Airtable data
+
+Shared by the approval deadline index, the bottleneck engine and the
+reference-data cache:
+
+- the snapshot is built by build(client) and replaced atomically
+- a stale snapshot keeps serving while one background rebuild runs
+- a missing snapshot (first use, invalidate(), or a different client) is
+  built inline; concurrent callers wait for the same build
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SnapshotCache(Generic[T]):
+    """
+    Single-value cache of a snapshot built from the current client
+
+    Args:
+        client_getter: Returns the current AirtableClient (or None)
+        build: build(client) -> snapshot
+        ttl_seconds: Age after which the snapshot is rebuilt
+        background_refresh: Rebuild a stale snapshot on a worker thread
+        name: Used in log messages
+    """
+
+    def __init__(
+        self,
+        client_getter: Callable[[], Any],
+        build: Callable[[Any], T],
+        *,
+        ttl_seconds: float,
+        background_refresh: bool = True,
+        name: str = "snapshot",
+        clock=time.time,
+    ):
+        self._client_getter = client_getter
+        self._build = build
+        self.ttl_seconds = ttl_seconds
+        self.background_refresh = background_refresh
+        self.name = name
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._owner: Any = None
+        self._value: Optional[T] = None
+        self._loaded_at = 0.0
+        self._refreshing = False
+
+    @property
+    def loaded_at(self) -> Optional[float]:
+        """Build time of the current snapshot (clock seconds), None if empty"""
+        with self._lock:
+            return self._loaded_at if self._value is not None else None
+
+    def peek(self) -> Optional[T]:
+        """Current snapshot without building or refreshing it"""
+        with self._lock:
+            return self._value
+
+    def _fresh_value(self, client: Any) -> Optional[T]:
+        """Snapshot if it was built from client and is within the TTL (lock held)"""
+        if self._value is None or self._owner is not client:
+            return None
+        if self._clock() - self._loaded_at >= self.ttl_seconds:
+            return None
+        return self._value
+
+    def refresh(self, *, if_stale: bool = False) -> Optional[T]:
+        """
+        Rebuild now (single flight; concurrent callers wait)
+
+        Args:
+            if_stale: Return the snapshot without rebuilding if it is fresh,
+                      e.g. built by the caller this one waited for
+        """
+        with self._refresh_lock:
+            client = self._client_getter()
+            if client is None:
+                return None
+            if if_stale:
+                with self._lock:
+                    value = self._fresh_value(client)
+                if value is not None:
+                    return value
+            value = self._build(client)
+            with self._lock:
+                self._owner = client
+                self._value = value
+                self._loaded_at = self._clock()
+            return value
+
+    def invalidate(self) -> None:
+        """Drop the snapshot; the next get() rebuilds inline"""
+        with self._lock:
+            self._value = None
+
+    def _refresh_quietly(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"⚠️ {self.name} refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def get(self) -> Optional[T]:
+        """
+        Current snapshot, building it if missing
+
+        Returns:
+            Snapshot, or None when no client is configured
+        """
+        client = self._client_getter()
+        with self._lock:
+            value = self._value if client is self._owner else None
+            stale = value is not None and self._clock() - self._loaded_at >= self.ttl_seconds
+            schedule = stale and self.background_refresh and not self._refreshing
+            if schedule:
+                self._refreshing = True
+
+        if value is None or (stale and not self.background_refresh):
+            # Callers queued behind the same build reuse its result
+            return self.refresh(if_stale=True)
+        if schedule:
+            threading.Thread(target=self._refresh_quietly, daemon=True).start()
+        return value
+
+    def info(self) -> Dict[str, Any]:
+        loaded_at = self.loaded_at
+        return {
+            "loaded": loaded_at is not None,
+            "ageSeconds": round(self._clock() - loaded_at, 1) if loaded_at is not None else None,
+        }
@@ -4,12 +4,181 @@ Provides robust datetime parsing, timezone conversion, and field extraction
 """
 
 from __future__ import annotations
+import calendar
+import time
 from datetime import datetime, timezone
+from functools import lru_cache
+from operator import itemgetter
 from zoneinfo import ZoneInfo
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterable, List, Sequence, Tuple
 
 DUBAI_TZ = ZoneInfo("Asia/Dubai")
 
+# Memo size for parsed timestamps (Airtable re-sends the same values constantly)
+EPOCH_CACHE_SIZE = 16384
+
+
+def _days_from_civil(y: int, m: int, d: int) -> int:
+    """Days since 1970-01-01 for a proleptic Gregorian date"""
+    y -= m <= 2
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (m + (-3 if m > 2 else 9)) + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def _parse_airtable_utc(s: str) -> float | None:
+    """
+    Fast path for Airtable's fixed UTC format
+
+    Accepts "YYYY-MM-DDTHH:MM:SS.sssZ" and "YYYY-MM-DDTHH:MM:SSZ".
+    Returns None when the string does not match exactly (caller falls back).
+    """
+    n = len(s)
+    if n not in (20, 24) or s[-1] != "Z":
+        return None
+    if s[4] != "-" or s[7] != "-" or s[10] != "T" or s[13] != ":" or s[16] != ":":
+        return None
+    if n == 24 and s[19] != ".":
+        return None
+
+    try:
+        year = int(s[0:4])
+        month = int(s[5:7])
+        day = int(s[8:10])
+        hour = int(s[11:13])
+        minute = int(s[14:16])
+        second = int(s[17:19])
+        millis = int(s[20:23]) if n == 24 else 0
+    except ValueError:
+        return None
+
+    if not (1 <= month <= 12 and 1 <= day and hour < 24 and minute < 60 and second < 60):
+        return None
+    if day > 28 and day > calendar.monthrange(year, month)[1]:
+        return None
+
+    days = _days_from_civil(year, month, day)
+    return days * 86400 + hour * 3600 + minute * 60 + second + millis / 1000.0
+
+
+@lru_cache(maxsize=EPOCH_CACHE_SIZE)
+def _parse_epoch_cached(s: str) -> float | None:
+    """Parse one ISO string to epoch seconds (memoized)"""
+    fast = _parse_airtable_utc(s)
+    if fast is not None:
+        return fast
+
+    s = s.strip()
+    if not s:
+        return None
+
+    # Airtable may return Z (UTC)
+    if s.endswith("Z"):
+        s = s[:-1] + "+00:00"
+
+    try:
+        dt = datetime.fromisoformat(s)
+    except ValueError:
+        return None
+
+    # If naive (no timezone), assume UTC
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+
+    return dt.timestamp()
+
+
+def parse_iso_epoch(s: str | None) -> float | None:
+    """
+    Parse ISO datetime string to epoch seconds (UTC)
+
+    Airtable's "YYYY-MM-DDTHH:MM:SS.sssZ" format takes an arithmetic fast path;
+    other ISO forms fall back to datetime.fromisoformat. Results are memoized,
+    so repeated values (same dueAt across requests) cost one dict lookup.
+
+    Args:
+        s: ISO datetime string (Z, explicit offset, or naive = UTC)
+
+    Returns:
+        Epoch seconds (float), or None if empty/unparseable
+
+    Examples:
+        >>> parse_iso_epoch("2025-12-25T12:00:00.000Z")
+        1766664000.0
+        >>> parse_iso_epoch("2025-12-25T16:00:00+04:00")
+        1766664000.0
+    """
+    if not s or not isinstance(s, str):
+        return None
+    return _parse_epoch_cached(s)
+
+
+def parse_iso_epoch_batch(values: Iterable[Any]) -> List[float | None]:
+    """
+    Parse a whole column of ISO datetime values to epoch seconds
+
+    Repeated values within the column are parsed once.
+
+    Args:
+        values: Iterable of ISO strings (None/non-strings map to None)
+
+    Returns:
+        List of epoch seconds (None where missing or unparseable)
+    """
+    seen: Dict[str, float | None] = {}
+    result: List[float | None] = []
+    append = result.append
+
+    for value in values:
+        if not value or not isinstance(value, str):
+            append(None)
+            continue
+        epoch = seen.get(value, seen)
+        if epoch is seen:
+            epoch = _parse_epoch_cached(value)
+            seen[value] = epoch
+        append(epoch)
+
+    return result
+
+
+def now_epoch() -> float:
+    """Current time as epoch seconds"""
+    return time.time()
+
+
+def epoch_to_dubai(epoch: float | None) -> datetime | None:
+    """Convert epoch seconds to datetime in Asia/Dubai timezone"""
+    if epoch is None:
+        return None
+    return datetime.fromtimestamp(epoch, DUBAI_TZ)
+
+
+def iso_dubai_epoch(epoch: float | None) -> str | None:
+    """
+    Format epoch seconds as ISO string in Asia/Dubai timezone
+
+    Examples:
+        >>> iso_dubai_epoch(1766664000.0)
+        '2025-12-25T16:00:00+04:00'
+    """
+    if epoch is None:
+        return None
+    return datetime.fromtimestamp(epoch, DUBAI_TZ).isoformat(timespec="seconds")
+
+
+def days_until_epoch(due: float | None, now: float) -> float | None:
+    """
+    Days until due (2 decimals) from epoch seconds
+
+    Same result as days_until() without building datetime objects.
+    """
+    if due is None:
+        return None
+    return round((due - now) / 86400.0, 2)
+
 
 def parse_iso_any(s: str | None) -> datetime | None:
     """
@@ -31,27 +200,8 @@ def parse_iso_any(s: str | None) -> datetime | None:
         >>> parse_iso_any("2025-12-25T12:00:00")  # Naive (assumed UTC)
         datetime.datetime(2025, 12, 25, 16, 0, tzinfo=ZoneInfo('Asia/Dubai'))
     """
-    if not s:
-        return None
-
-    try:
-        s = s.strip()
-
-        # Airtable may return Z (UTC)
-        if s.endswith("Z"):
-            s = s[:-1] + "+00:00"
-
-        dt = datetime.fromisoformat(s)
-
-        # If naive (no timezone), assume UTC
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-
-        # Convert to Dubai timezone
-        return dt.astimezone(DUBAI_TZ)
-
-    except (ValueError, AttributeError):
-        return None
+    # Shares the epoch fast path and memo cache; convert to Dubai timezone
+    return epoch_to_dubai(parse_iso_epoch(s))
 
 
 def iso_dubai(dt: datetime | None) -> str | None:
@@ -158,6 +308,39 @@ def classify_priority(days: float | None) -> str:
     return "NORMAL"
 
 
+def formula_any_equal(field: str, values: Iterable[str]) -> str:
+    """
+    Airtable formula matching any of the values: OR({field}='a',{field}='b')
+
+    Single quotes in values are escaped.
+    """
+    parts = ",".join(
+        "{%s}='%s'" % (field, str(value).replace("'", "\\'")) for value in values
+    )
+    return f"OR({parts})"
+
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_duration_seconds(s: str | None) -> int | None:
+    """
+    Parse a duration such as "300", "15m", "1h", "1d" into seconds
+
+    Returns:
+        Positive seconds, or None if missing/invalid
+    """
+    if not s:
+        return None
+    s = s.strip().lower()
+    unit = _DURATION_UNITS.get(s[-1:])
+    number = s[:-1] if unit else s
+    if not number.isdigit():
+        return None
+    seconds = int(number) * (unit or 1)
+    return seconds or None
+
+
 def extract_field_by_id(
     fields: Dict[str, Any],
     field_id: str,
@@ -197,3 +380,94 @@ def extract_field_by_id(
 
     # Not found
     return None
+
+
+class FieldExtractor:
+    """
+    Precompiled, rename-safe field extraction for one table
+
+    Replaces repeated extract_field_by_id() calls: the response key mode
+    (field IDs via returnFieldsByFieldId, or field names) is resolved once
+    per response, then each record is read with a single operator.itemgetter
+    call. Records missing a field (Airtable omits empty fields) take a
+    per-field fallback that tries the field ID, then the field name.
+
+    Args:
+        field_ids: {field name: field ID} for the table (FIELD_IDS[table])
+        field_names: Fields to extract, in tuple order
+
+    Examples:
+        >>> extractor = FieldExtractor({"shptNo": "fldA", "status": "fldB"},
+        ...                            ["shptNo", "status"])
+        >>> records = [{"fields": {"fldA": "SCT-0143", "fldB": "PENDING"}}]
+        >>> extract = extractor.bind(records)
+        >>> extract(records[0]["fields"])
+        ('SCT-0143', 'PENDING')
+    """
+
+    def __init__(self, field_ids: Dict[str, str], field_names: Sequence[str]):
+        self.field_names: Tuple[str, ...] = tuple(field_names)
+        self.field_ids: Tuple[Optional[str], ...] = tuple(
+            field_ids.get(name) for name in self.field_names
+        )
+        self._id_set = frozenset(fid for fid in self.field_ids if fid)
+        self._by_name = self._compile(self.field_names, self.field_ids)
+        self._by_id = (
+            self._compile(self.field_ids, self.field_names)
+            if all(self.field_ids)
+            else self._by_name
+        )
+
+    @staticmethod
+    def _compile(
+        keys: Sequence[Optional[str]], alt_keys: Sequence[Optional[str]]
+    ) -> Callable[[Dict[str, Any]], Tuple[Any, ...]]:
+        """Build a tuple getter over keys, falling back to alt_keys per field"""
+        pairs = tuple(zip(keys, alt_keys))
+        if len(keys) == 1:
+            key = keys[0]
+
+            def fast(fields: Dict[str, Any]) -> Tuple[Any, ...]:
+                return (fields[key],)
+
+        else:
+            fast = itemgetter(*keys)
+
+        def extract(fields: Dict[str, Any]) -> Tuple[Any, ...]:
+            try:
+                return fast(fields)
+            except KeyError:
+                return tuple(
+                    fields[key] if key in fields else fields.get(alt)
+                    for key, alt in pairs
+                )
+
+        return extract
+
+    def is_keyed_by_id(self, fields: Dict[str, Any]) -> bool:
+        """True if a fields dict uses field IDs (returnFieldsByFieldId)"""
+        return any(key in self._id_set for key in fields)
+
+    def bind(
+        self, records: Iterable[Dict[str, Any]]
+    ) -> Callable[[Dict[str, Any]], Tuple[Any, ...]]:
+        """
+        Resolve the key mode for one response and return the tuple getter
+
+        Args:
+            records: Airtable records from one list_records call
+
+        Returns:
+            Callable taking a record's "fields" dict and returning a tuple
+            in field_names order (None for missing fields)
+        """
+        for record in records:
+            fields = record.get("fields")
+            if fields:
+                return self._by_id if self.is_keyed_by_id(fields) else self._by_name
+        return self._by_name
+
+    def __call__(self, fields: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Extract from a single fields dict (mode detected per call)"""
+        getter = self._by_id if self.is_keyed_by_id(fields) else self._by_name
+        return getter(fields)
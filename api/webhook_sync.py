@@ -0,0 +1,335 @@
+"""
+Airtable webhook receiver for cache invalidation
+
+Airtable notifications carry no data, only "webhook X has new payloads".
+The receiver:
+
+- verifies the X-Airtable-Content-MAC header (HMAC-SHA256 of the raw body
+  with the webhook's base64 MAC secret)
+- pages through the webhook payloads from the last cursor it saw
+- reduces them to {table ID: {record ID: cell values or None if destroyed}}
+- hands each table's changes to the listeners registered for that table
+
+Listeners patch or drop whatever the app caches for that table, so caches
+can keep long TTLs and still reflect edits within seconds.
+
+Airtable notifies one worker process. With a WebhookState (SQLite file
+shared by the workers), the payload cursor is shared and every applied
+change bumps the table's generation; each worker's registry checks the
+generations (throttled) and drops its caches for tables another worker
+saw change.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Change set for one table: record ID -> changed cell values by field ID,
+# or None when the record was destroyed
+TableChanges = Dict[str, Optional[Dict[str, Any]]]
+
+# Payload pages fetched per notification before giving up for this round
+MAX_PAYLOAD_PAGES = 20
+
+SIGNATURE_PREFIX = "hmac-sha256="
+
+# Snapshot TTL once webhooks invalidate every worker's caches (TTL is then
+# only a backstop for missed notifications)
+INVALIDATED_TTL_SECONDS = 15 * 60
+
+# How often a worker checks the shared generations
+STATE_CHECK_SECONDS = 1.0
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cursors (webhook_id TEXT PRIMARY KEY, cursor INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS generations (table_id TEXT PRIMARY KEY, generation INTEGER NOT NULL)",
+)
+
+
+def verify_signature(secret_base64: str, body: bytes, header: Optional[str]) -> bool:
+    """
+    Check an X-Airtable-Content-MAC header
+
+    Args:
+        secret_base64: macSecretBase64 returned when the webhook was created
+        body: Raw request body
+        header: Header value ("hmac-sha256=<hex>")
+    """
+    if not header or not header.startswith(SIGNATURE_PREFIX):
+        return False
+    try:
+        key = base64.b64decode(secret_base64)
+    except (ValueError, TypeError):
+        return False
+    expected = hmac.new(key, body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, header[len(SIGNATURE_PREFIX):].strip().lower())
+
+
+def collect_changes(payloads: List[Dict[str, Any]]) -> Dict[str, TableChanges]:
+    """
+    Merge webhook payloads into per-table record changes (later payloads win)
+
+    Returns:
+        {table ID: {record ID: {field ID: value} or None}}
+    """
+    changes: Dict[str, TableChanges] = {}
+    for payload in payloads:
+        for table_id, table in (payload.get("changedTablesById") or {}).items():
+            records = changes.setdefault(table_id, {})
+            for record_id, created in (table.get("createdRecordsById") or {}).items():
+                records[record_id] = dict(created.get("cellValuesByFieldId") or {})
+            for record_id, changed in (table.get("changedRecordsById") or {}).items():
+                current = (changed.get("current") or {}).get("cellValuesByFieldId") or {}
+                merged = records.get(record_id) or {}
+                merged.update(current)
+                records[record_id] = merged
+            for record_id in table.get("destroyedRecordIds") or []:
+                records[record_id] = None
+    return changes
+
+
+class WebhookState:
+    """
+    Webhook cursors and per-table change generations shared by the worker
+    processes of one deployment (SQLite, WAL)
+
+    Args:
+        path: Database file (local disk shared by the workers)
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA busy_timeout=5000")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def cursor(self, webhook_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT cursor FROM cursors WHERE webhook_id=?", (webhook_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def advance_cursor(self, webhook_id: str, cursor: int) -> None:
+        """Store cursor unless another worker already read further"""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO cursors (webhook_id, cursor) VALUES (?, ?) "
+                "ON CONFLICT(webhook_id) DO UPDATE SET cursor=max(cursor, excluded.cursor)",
+                (webhook_id, cursor),
+            )
+
+    def bump(self, table_ids: Iterable[str]) -> Dict[str, int]:
+        """
+        Record a change to each table
+
+        Returns:
+            {table ID: new generation}
+        """
+        table_ids = list(table_ids)
+        if not table_ids:
+            return {}
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for table_id in table_ids:
+                    self._db.execute(
+                        "INSERT INTO generations (table_id, generation) VALUES (?, 1) "
+                        "ON CONFLICT(table_id) DO UPDATE SET generation=generation+1",
+                        (table_id,),
+                    )
+                rows = self._db.execute(
+                    f"SELECT table_id, generation FROM generations "
+                    f"WHERE table_id IN ({','.join('?' * len(table_ids))})",
+                    table_ids,
+                ).fetchall()
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return dict(rows)
+
+    def generations(self) -> Dict[str, int]:
+        """{table ID: generation} for every table changed so far"""
+        with self._lock:
+            return dict(self._db.execute("SELECT table_id, generation FROM generations"))
+
+
+class InvalidationRegistry:
+    """
+    Cache listeners by table ID
+
+    Args:
+        state: Optional WebhookState shared with other worker processes
+        check_seconds: Minimum interval between generation checks (sync())
+    """
+
+    def __init__(
+        self,
+        state: Optional[WebhookState] = None,
+        *,
+        check_seconds: float = STATE_CHECK_SECONDS,
+        clock=time.monotonic,
+    ) -> None:
+        self._listeners: Dict[str, List[Callable[[TableChanges], None]]] = {}
+        self.state = state
+        self.check_seconds = check_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._checked_at: Optional[float] = None
+        # Generation of each table this process's caches reflect
+        self._seen: Dict[str, int] = state.generations() if state is not None else {}
+
+    def register(self, table_id: str, listener: Callable[[TableChanges], None]) -> None:
+        """Call listener(changes) whenever records of table_id change"""
+        self._listeners.setdefault(table_id, []).append(listener)
+
+    def _notify(self, table_id: str, records: TableChanges) -> None:
+        for listener in self._listeners.get(table_id, []):
+            try:
+                listener(records)
+            except Exception as e:
+                print(f"⚠️ Cache listener for {table_id} failed: {e}")
+
+    def apply(self, changes: Dict[str, TableChanges]) -> Dict[str, int]:
+        """
+        Notify listeners (and, with shared state, the other workers); a
+        failing listener is logged and skipped
+
+        Returns:
+            {table ID: changed record count} for tables with listeners
+        """
+        applied: Dict[str, int] = {}
+        for table_id, records in changes.items():
+            if not self._listeners.get(table_id) or not records:
+                continue
+            self._notify(table_id, records)
+            applied[table_id] = len(records)
+
+        if self.state is not None and applied:
+            try:
+                generations = self.state.bump(applied)
+            except Exception as e:
+                print(f"⚠️ Webhook state update failed: {e}")
+                return applied
+            with self._lock:
+                for table_id, generation in generations.items():
+                    # Caught up only if no other worker's change is unseen
+                    if self._seen.get(table_id, 0) == generation - 1:
+                        self._seen[table_id] = generation
+        return applied
+
+    def apply_all(self) -> None:
+        """Treat every registered table as changed (payloads unavailable)"""
+        self.apply({table_id: {"*": None} for table_id in self._listeners})
+
+    def sync(self, force: bool = False) -> List[str]:
+        """
+        Drop caches of tables another worker saw change (throttled)
+
+        Returns:
+            Table IDs invalidated by this call
+        """
+        if self.state is None:
+            return []
+        now = self._clock()
+        with self._lock:
+            if not force and self._checked_at is not None and now - self._checked_at < self.check_seconds:
+                return []
+            self._checked_at = now
+        try:
+            generations = self.state.generations()
+        except Exception as e:
+            print(f"⚠️ Webhook state check failed: {e}")
+            return []
+        with self._lock:
+            stale = [t for t, g in generations.items() if self._seen.get(t, 0) < g]
+            for table_id in stale:
+                self._seen[table_id] = generations[table_id]
+        for table_id in stale:
+            self._notify(table_id, {"*": None})
+        return stale
+
+
+class WebhookReceiver:
+    """
+    Cursor-tracking payload reader for Airtable webhooks
+
+    Args:
+        client_getter: Returns the current AirtableClient (or None)
+        registry: Listeners to notify
+        max_pages: Payload pages read per notification
+        state: Optional WebhookState holding cursors shared by the workers
+    """
+
+    def __init__(
+        self,
+        client_getter: Callable[[], Any],
+        registry: InvalidationRegistry,
+        *,
+        max_pages: int = MAX_PAYLOAD_PAGES,
+        state: Optional[WebhookState] = None,
+    ):
+        self._client_getter = client_getter
+        self.registry = registry
+        self.max_pages = max_pages
+        self.state = state
+        self._lock = threading.Lock()
+        self._cursors: Dict[str, int] = {}
+
+    def cursor(self, webhook_id: str) -> Optional[int]:
+        if self.state is not None:
+            return self.state.cursor(webhook_id)
+        return self._cursors.get(webhook_id)
+
+    def handle(self, webhook_id: str) -> Dict[str, Any]:
+        """
+        Read new payloads for webhook_id and apply them
+
+        Notifications are processed one at a time so cursors advance in order.
+        If payloads cannot be read, every registered cache is invalidated.
+
+        Returns:
+            {"payloads": n, "cursor": next cursor, "tables": {table ID: records}}
+        """
+        client = self._client_getter()
+        if client is None:
+            return {"payloads": 0, "cursor": None, "tables": {}}
+
+        with self._lock:
+            cursor = self.cursor(webhook_id)
+            payloads: List[Dict[str, Any]] = []
+            try:
+                for _ in range(self.max_pages):
+                    page = client.list_webhook_payloads(webhook_id, cursor=cursor)
+                    payloads.extend(page.get("payloads") or [])
+                    cursor = page.get("cursor", cursor)
+                    if not page.get("mightHaveMore"):
+                        break
+            except Exception as e:
+                print(f"⚠️ Webhook payloads for {webhook_id} unavailable: {e}")
+                self.registry.apply_all()
+                return {"payloads": 0, "cursor": cursor, "tables": {}, "fullInvalidation": True}
+
+            if cursor is not None:
+                self._cursors[webhook_id] = cursor
+                if self.state is not None:
+                    self.state.advance_cursor(webhook_id, cursor)
+
+        tables = self.registry.apply(collect_changes(payloads))
+        return {"payloads": len(payloads), "cursor": cursor, "tables": tables}
@@ -0,0 +1,108 @@
+"""
+Benchmark Actions record preparation with --workers N.
+
+Generates a synthetic TSV (default 1,000,000 rows) in the format of
+data/today_tomorrow_deliveries.tsv and times the streaming read +
+prepare_action_record pipeline for each worker count. Nothing is uploaded.
+
+Usage:
+    python scripts/benchmark_prepare.py --rows 1000000 --workers 1 2 4 8
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.upload_actions_to_airtable import prepare_action_record
+from scripts.upload_common import PREPARE_CHUNK_ROWS, iter_prepared, iter_records
+
+SITES = ["DAS", "MIR", "SHU", "AGI"]
+REMARKS = ["Scheduled", "On hold", "Delivered", "NA"]
+
+
+def write_synthetic_tsv(path: str, rows: int) -> None:
+    """Write a deterministic delivery TSV with `rows` data rows."""
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle, delimiter="\t")
+        writer.writerow(["shipment_no", "item_description", "site", "delivery_date", "remarks"])
+        for i in range(rows):
+            shpt_no = f"SCT-{i % 5000:05d}"
+            if i % 7 == 0:
+                shpt_no += f" // PO-{i % 997}"
+            writer.writerow([
+                shpt_no,
+                f"Item {i} {'x' * (i % 40)}",
+                SITES[i % len(SITES)],
+                f"2025-12-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00+04:00",
+                REMARKS[i % len(REMARKS)],
+            ])
+
+
+def run(path: str, workers: int, chunk_rows: int) -> dict:
+    """Prepare every row once; returns timing and an order-sensitive digest."""
+    digest = hashlib.blake2b(digest_size=8)
+    prepared = failed = 0
+    started = time.perf_counter()
+    for ok, record in iter_prepared(prepare_action_record, iter_records(path, "tsv"), workers, chunk_rows):
+        if ok:
+            prepared += 1
+            digest.update(record["actionKey"].encode("utf-8"))
+        else:
+            failed += 1
+    elapsed = time.perf_counter() - started
+    return {
+        "workers": workers,
+        "seconds": elapsed,
+        "rows_per_second": (prepared + failed) / elapsed if elapsed else 0.0,
+        "prepared": prepared,
+        "failed": failed,
+        "digest": digest.hexdigest(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark parallel record preparation")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic rows (default: 1M)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, os.cpu_count() or 1],
+        help="Worker counts to compare",
+    )
+    parser.add_argument("--chunk-rows", type=int, default=PREPARE_CHUNK_ROWS, help="Rows per IPC chunk")
+    parser.add_argument("--file", type=str, default=None, help="Reuse an existing TSV instead of generating one")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file
+        if path is None:
+            path = os.path.join(tmp, "synthetic.tsv")
+            started = time.perf_counter()
+            write_synthetic_tsv(path, args.rows)
+            print(f"Generated {args.rows} rows in {time.perf_counter() - started:.1f}s: {path}")
+
+        baseline = None
+        print(f"{'workers':>7} {'seconds':>9} {'rows/s':>11} {'speedup':>8}  digest")
+        for workers in sorted(set(args.workers)):
+            result = run(path, workers, args.chunk_rows)
+            baseline = baseline or result
+            speedup = baseline["seconds"] / result["seconds"] if result["seconds"] else 0.0
+            print(
+                f"{result['workers']:>7} {result['seconds']:>9.2f} "
+                f"{result['rows_per_second']:>11,.0f} {speedup:>7.2f}x  {result['digest']}"
+            )
+            if result["digest"] != baseline["digest"]:
+                print("Output order differs from the first run")
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
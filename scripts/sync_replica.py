@@ -0,0 +1,120 @@
+"""
+Mirror the locked Airtable tables into the local SQLite read replica.
+
+Usage:
+    python scripts/sync_replica.py --db /var/lib/gets/replica.sqlite --interval 60
+
+Each round syncs every locked table incrementally (records modified since
+the previous round); every --full-every rounds a full sync also removes
+records deleted in Airtable. Point the API at the same file with
+REPLICA_PATH; it serves reads from the replica while each table is younger
+than REPLICA_MAX_AGE_SECONDS, so --interval must stay well below that.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.airtable_client import AirtableClient
+from api.airtable_locked_config import BASE_ID
+from api.replica import AirtableReplica
+
+DEFAULT_LOCK_PATH = str(Path(__file__).parent.parent / "api" / "airtable_schema.lock.json")
+
+
+def run(
+    replica: AirtableReplica,
+    client: AirtableClient,
+    *,
+    interval: float,
+    full_every: int,
+    once: bool = False,
+    full: bool = False,
+) -> None:
+    """Sync rounds until interrupted (one round with once=True)"""
+    round_no = 0
+    while True:
+        started = time.time()
+        full_round = full or (full_every > 0 and round_no % full_every == 0)
+        for name in replica.tables:
+            try:
+                result = replica.sync_table(client, name, full=full_round)
+                print(json.dumps(result))
+            except Exception as e:
+                # Table keeps its last sync time and goes stale for the API
+                print(f"⚠️ Sync failed for {name}: {e}")
+        if once:
+            return
+        round_no += 1
+        time.sleep(max(0.0, interval - (time.time() - started)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sync the SQLite read replica")
+    parser.add_argument(
+        "--db",
+        type=str,
+        default=os.getenv("REPLICA_PATH"),
+        help="Replica SQLite path (defaults to REPLICA_PATH env var)",
+    )
+    parser.add_argument(
+        "--lock",
+        type=str,
+        default=os.getenv("AIRTABLE_SCHEMA_LOCK_PATH") or DEFAULT_LOCK_PATH,
+        help="airtable_schema.lock.json used to generate the replica schema",
+    )
+    parser.add_argument(
+        "--token",
+        type=str,
+        default=None,
+        help="Airtable PAT (defaults to AIRTABLE_API_TOKEN env var)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=60,
+        help="Seconds between sync rounds (default: 60)",
+    )
+    parser.add_argument(
+        "--full-every",
+        type=int,
+        default=60,
+        help="Full sync (with deletions) every N rounds (default: 60; 0 = only for a new replica)",
+    )
+    parser.add_argument("--once", action="store_true", help="Run a single round and exit")
+    parser.add_argument("--full", action="store_true", help="Force full syncs")
+
+    args = parser.parse_args()
+
+    api_token = args.token or os.getenv("AIRTABLE_API_TOKEN")
+    if not api_token:
+        print("AIRTABLE_API_TOKEN is required")
+        sys.exit(1)
+    if not args.db:
+        print("--db or REPLICA_PATH is required")
+        sys.exit(1)
+
+    replica = AirtableReplica.from_lock_file(args.db, args.lock)
+    client = AirtableClient(api_token.strip(), BASE_ID)
+    try:
+        run(
+            replica,
+            client,
+            interval=args.interval,
+            full_every=args.full_every,
+            once=args.once,
+            full=args.full,
+        )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        replica.close()
+
+
+if __name__ == "__main__":
+    main()
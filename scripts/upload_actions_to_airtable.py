@@ -5,23 +5,44 @@ Usage:
     python scripts/upload_actions_to_airtable.py \
         --file data/today_tomorrow_deliveries.tsv \
         --token pat_xxxxxxxxxxxxx
+
+Uploads are checkpointed per batch (.upload_checkpoints/actions.checkpoint.json);
+rerunning with the same input resumes after the last committed batch.
+Per-record results are written to .upload_checkpoints/actions.results.ndjson.
+
+The input (TSV/CSV, JSON array or NDJSON; see --format) is streamed row by
+row into batched upserts, so memory stays flat for large exports and the
+first batches are sent before the file is fully parsed.
 """
 
 import argparse
-import csv
 import hashlib
+import itertools
 import json
 import os
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from api.airtable_client import AirtableClient
 from api.airtable_locked_config import BASE_ID, TABLES
 from api.utils import DUBAI_TZ, iso_dubai, parse_iso_any
+from scripts.upload_common import (
+    checkpointed_upsert,
+    default_checkpoint_paths,
+    hash_file,
+    hash_records,
+    iter_prepared,
+    iter_records,
+)
+
+DEFAULT_CHECKPOINT_PATH, DEFAULT_RESULTS_PATH = default_checkpoint_paths("actions")
+
+# Row errors kept in the result (all are counted)
+MAX_REPORTED_ERRORS = 1000
 
 
 def normalize_cell(value: Any) -> Optional[str]:
@@ -133,82 +154,131 @@ def prepare_action_record(row: Dict[str, Any]) -> Dict[str, Any]:
     return record
 
 
-def load_rows(file_path: Path, delimiter: str) -> List[Dict[str, Any]]:
-    """Load rows from a delimited file with headers."""
-    with open(file_path, "r", encoding="utf-8", newline="") as handle:
-        reader = csv.DictReader(handle, delimiter=delimiter)
-        if not reader.fieldnames:
-            raise ValueError("Missing header row in input file")
-        return [row for row in reader]
+def iter_prepared_actions(
+    rows: Iterable[Dict[str, Any]],
+    merge_fields: List[str],
+    errors: List[str],
+    stats: Dict[str, int],
+    workers: int = 1,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Prepare rows in input order, skipping rows that fail to convert.
+
+    With workers > 1 rows are prepared in a process pool (see
+    iter_prepared). The first prepared record is checked for the merge
+    fields, so a bad --merge-on aborts before anything is uploaded.
+    """
+    outcomes = iter_prepared(prepare_action_record, rows, workers)
+    for index, (ok, record) in enumerate(outcomes, 1):
+        stats["total_rows"] = index
+        if not ok:
+            stats["row_errors"] += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"Row {index}: {record}")
+            continue
+        if not stats["prepared_records"]:
+            missing = [field for field in merge_fields if field not in record]
+            if missing:
+                raise ValueError(f"Missing merge fields in records: {missing}")
+        stats["prepared_records"] += 1
+        yield record
 
 
 def upload_actions(
-    rows: List[Dict[str, Any]],
+    rows: Iterable[Dict[str, Any]],
     api_token: Optional[str],
     dry_run: bool,
     merge_fields: List[str],
+    *,
+    checkpoint_path: str = DEFAULT_CHECKPOINT_PATH,
+    results_path: Optional[str] = DEFAULT_RESULTS_PATH,
+    resume: bool = True,
+    input_hash: Optional[str] = None,
+    workers: int = 1,
+    client: Optional[AirtableClient] = None,
 ) -> Dict[str, Any]:
-    """Prepare and upsert Actions records to Airtable."""
-    print(f"Preparing {len(rows)} rows...")
-    prepared_records: List[Dict[str, Any]] = []
+    """
+    Prepare and upsert Actions records to Airtable.
+
+    Rows may be a list or a generator (iter_records); they are prepared and
+    uploaded in a single pass. Batches are committed through
+    checkpointed_upsert, so an interrupted run resumes from the last
+    committed batch when rerun with the same input. input_hash identifies
+    that input (e.g. hash_file); without it the rows are materialized and
+    hashed. workers > 1 prepares rows in a process pool; output order (and
+    so batch layout) is unchanged.
+    """
     errors: List[str] = []
-
-    for index, row in enumerate(rows, 1):
-        try:
-            prepared_records.append(prepare_action_record(row))
-        except Exception as exc:
-            errors.append(f"Row {index}: {exc}")
-
-    print(f"Prepared {len(prepared_records)} records")
-    if errors:
-        print(f"Skipped {len(errors)} rows due to errors")
+    stats = {"total_rows": 0, "prepared_records": 0, "row_errors": 0}
+    prepared = iter_prepared_actions(rows, merge_fields, errors, stats, workers)
 
     if dry_run:
         print("Dry run: no records uploaded")
         print("Sample records:")
-        for sample in prepared_records[:3]:
-            print(json.dumps(sample, indent=2))
+        for record in prepared:
+            if stats["prepared_records"] <= 3:
+                print(json.dumps(record, indent=2))
+        print(f"Prepared {stats['prepared_records']} records")
+        if stats["row_errors"]:
+            print(f"Skipped {stats['row_errors']} rows due to errors")
         return {
             "status": "dry_run",
-            "total_rows": len(rows),
-            "prepared_records": len(prepared_records),
+            "total_rows": stats["total_rows"],
+            "prepared_records": stats["prepared_records"],
             "errors": errors,
-            "batches": (len(prepared_records) + 9) // 10,
+            "batches": (stats["prepared_records"] + 9) // 10,
         }
 
     if not api_token:
         raise ValueError("AIRTABLE_API_TOKEN is required for upload")
-    if not prepared_records:
+
+    # Prepare the first record before uploading, so a bad --merge-on or an
+    # input without usable rows fails as such rather than as an upload error
+    first = next(prepared, None)
+    if first is None:
         raise ValueError("No prepared records to upload")
+    prepared = itertools.chain([first], prepared)
 
-    if any(field not in prepared_records[0] for field in merge_fields):
-        missing = [field for field in merge_fields if field not in prepared_records[0]]
-        raise ValueError(f"Missing merge fields in records: {missing}")
+    if input_hash is None:
+        prepared = list(prepared)
+        input_hash = hash_records(prepared)
 
-    client = AirtableClient(api_token.strip(), BASE_ID)
+    if client is None:
+        client = AirtableClient(api_token.strip(), BASE_ID)
     table_id = TABLES["Actions"]
 
-    results = client.upsert_records(
+    outcome = checkpointed_upsert(
+        client,
         table_id,
-        prepared_records,
-        fields_to_merge_on=merge_fields,
-        typecast=True,
+        prepared,
+        merge_fields=merge_fields,
+        input_hash=input_hash,
+        checkpoint_path=checkpoint_path,
+        results_path=results_path,
+        resume=resume,
     )
 
-    uploaded = 0
+    print(f"Prepared {stats['prepared_records']} records")
+    if stats["row_errors"]:
+        print(f"Skipped {stats['row_errors']} rows due to errors")
+    if outcome["resumed_from"]:
+        print(f"Resumed from checkpoint at batch {outcome['resumed_from'] + 1}")
+
     upload_errors: List[str] = []
-    for batch_index, batch_result in enumerate(results, 1):
-        if "records" in batch_result:
-            uploaded += len(batch_result["records"])
-        elif "error" in batch_result:
-            upload_errors.append(f"Batch {batch_index}: {batch_result['error']}")
+    if outcome["status"] == "interrupted":
+        upload_errors.append(
+            f"Batch {outcome['failed_batch'] + 1}: {outcome['error']} "
+            "(rerun with the same input to resume)"
+        )
 
     return {
-        "status": "success" if not upload_errors else "partial",
-        "total_rows": len(rows),
-        "prepared_records": len(prepared_records),
-        "uploaded": uploaded,
-        "batches": len(results),
+        "status": outcome["status"],
+        "total_rows": stats["total_rows"],
+        "prepared_records": stats["prepared_records"],
+        "uploaded": outcome["uploaded"],
+        "batches": outcome["batches"],
+        "skipped_batches": outcome["skipped_batches"],
+        "results_file": results_path,
         "errors": errors + upload_errors,
         "schemaVersion": "2025-12-25T00:32:52+0400",
     }
@@ -220,7 +290,13 @@ def main() -> None:
         "--file",
         type=str,
         default="data/today_tomorrow_deliveries.tsv",
-        help="Input TSV/CSV file path",
+        help="Input TSV/CSV/JSON/NDJSON file path",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["tsv", "csv", "json", "ndjson"],
+        default=None,
+        help="Input format (default: detect from extension)",
     )
     parser.add_argument(
         "--token",
@@ -231,8 +307,8 @@ def main() -> None:
     parser.add_argument(
         "--delimiter",
         type=str,
-        default="\\t",
-        help="Field delimiter (default: tab)",
+        default=None,
+        help="Field delimiter (default: tab for TSV, comma for CSV)",
     )
     parser.add_argument(
         "--merge-on",
@@ -245,6 +321,29 @@ def main() -> None:
         action="store_true",
         help="Validate and print sample output without uploading",
     )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=DEFAULT_CHECKPOINT_PATH,
+        help="Batch checkpoint path",
+    )
+    parser.add_argument(
+        "--results",
+        type=str,
+        default=DEFAULT_RESULTS_PATH,
+        help="Per-record results NDJSON path (empty to disable)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to prepare rows (default: 1)",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Ignore an existing checkpoint and start from the first batch",
+    )
 
     args = parser.parse_args()
 
@@ -253,12 +352,29 @@ def main() -> None:
         print(f"File not found: {file_path}")
         sys.exit(1)
 
-    rows = load_rows(file_path, args.delimiter)
+    delimiter = None
+    if args.delimiter:
+        delimiter = args.delimiter.encode().decode("unicode_escape")
+    rows = iter_records(str(file_path), args.format, delimiter)
     api_token = args.token or os.getenv("AIRTABLE_API_TOKEN")
 
     try:
-        result = upload_actions(rows, api_token, args.dry_run, args.merge_on)
+        result = upload_actions(
+            rows,
+            api_token,
+            args.dry_run,
+            args.merge_on,
+            checkpoint_path=args.checkpoint,
+            results_path=args.results or None,
+            resume=not args.no_resume,
+            workers=args.workers,
+            input_hash=hash_file(
+                str(file_path), args.format or "", delimiter or "", *args.merge_on
+            ),
+        )
         print(json.dumps(result, indent=2))
+        if result["status"] == "interrupted":
+            sys.exit(1)
     except Exception as exc:
         print(f"Upload failed: {exc}")
         sys.exit(1)
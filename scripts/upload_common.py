@@ -0,0 +1,703 @@
+"""
+업로드 스크립트 공통 유틸리티
+
+- content_hash: 레코드 내용 해시 (날짜/시간은 epoch, 숫자/체크박스는 스키마 락 타입으로 정규화)
+- load_field_types: 스키마 락의 테이블별 {필드: 타입}
+- HashManifest: 마지막으로 동기화된 레코드 해시 (로컬 JSON 파일)
+- fetch_snapshot: 업로드 대상 필드만 조회한 현재 테이블 스냅샷
+- diff_records: 신규/변경/동일 레코드 분류
+- checkpointed_upsert: 배치별 체크포인트/재개 + 레코드별 결과 파일
+- iter_records: CSV/TSV, JSON 배열, NDJSON 스트리밍 리더 (generator)
+- iter_prepared: 레코드 변환 (--workers N 이면 프로세스 풀, 입력 순서 유지)
+"""
+
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 프로젝트 루트 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.record_store import field_types_from_lock
+from api.utils import parse_iso_epoch
+
+# 매니페스트 해시를 신뢰하는 기간 (이후에는 스냅샷 재조회)
+MANIFEST_MAX_AGE_HOURS = 24.0
+
+# 2: 숫자/체크박스 필드를 스키마 타입으로 정규화 (이전 해시는 재계산)
+MANIFEST_VERSION = 2
+
+# 스키마 락 기본 경로 (AIRTABLE_SCHEMA_LOCK_PATH 로 변경 가능)
+SCHEMA_LOCK_PATH = str(Path(__file__).parent.parent / "api" / "airtable_schema.lock.json")
+
+# 숫자로 비교하는 Airtable 필드 타입
+NUMBER_FIELD_TYPES = ("number", "currency", "percent", "rating", "duration", "autoNumber", "count")
+
+# 체크박스로 읽는 문자열 값 (그 외는 체크 해제)
+CHECKED_STRINGS = ("true", "1", "yes", "y", "checked")
+
+
+def load_field_types(table: str, lock_path: Optional[str] = None) -> Dict[str, str]:
+    """
+    스키마 락의 {필드: Airtable 타입}
+
+    Returns:
+        필드 타입 dict (락 파일이 없거나 읽을 수 없으면 빈 dict → 타입 없이 비교)
+    """
+    path = lock_path or os.getenv("AIRTABLE_SCHEMA_LOCK_PATH") or SCHEMA_LOCK_PATH
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lock = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return field_types_from_lock(lock).get(table, {})
+
+
+def _normalize_value(value: Any, field_type: Optional[str] = None) -> Any:
+    """
+    해시 비교용 값 정규화 (Airtable 응답과 준비된 레코드가 같은 값이면 같은 결과)
+
+    Args:
+        value: 필드 값
+        field_type: 스키마 락의 필드 타입 (있으면 숫자는 float, 체크박스는
+                    체크 해제 = 필드 없음으로 비교; Airtable은 해제된 체크박스를 생략)
+    """
+    if field_type == "checkbox":
+        if isinstance(value, str):
+            value = value.strip().lower() in CHECKED_STRINGS
+        return True if value else None
+    if field_type in NUMBER_FIELD_TYPES and isinstance(value, (int, str)) and not isinstance(value, bool):
+        try:
+            value = float(str(value).strip().replace(",", ""))
+        except ValueError:
+            pass
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return None
+        return int(value) if value.is_integer() else value
+    if isinstance(value, str):
+        text = value.strip()
+        if not text or text in ("NaT", "nan", "NaN"):
+            return None
+        # "2025-12-24T09:00:00+04:00" 와 "2025-12-24T05:00:00.000Z" 는 같은 값
+        if len(text) >= 10 and text[4:5] == "-" and text[7:8] == "-":
+            epoch = parse_iso_epoch(text)
+            if epoch is not None:
+                return {"$epoch": int(epoch)}
+        return text
+    if isinstance(value, list):
+        return [_normalize_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize_value(v) for k, v in sorted(value.items())}
+    return value
+
+
+def content_hash(
+    fields: Dict[str, Any],
+    keys: Optional[Iterable[str]] = None,
+    field_types: Optional[Dict[str, str]] = None,
+) -> str:
+    """
+    레코드 내용 해시
+
+    Args:
+        fields: 필드 dict
+        keys: 비교할 필드 (None이면 fields의 모든 키)
+        field_types: 스키마 락의 {필드: 타입} (load_field_types)
+
+    Returns:
+        hex 다이제스트 (빈 값/누락 필드는 동일하게 취급)
+    """
+    field_types = field_types or {}
+    names = sorted(fields.keys() if keys is None else keys)
+    canonical = {}
+    for name in names:
+        value = _normalize_value(fields.get(name), field_types.get(name))
+        if value is not None:
+            canonical[name] = value
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class HashManifest:
+    """
+    마지막으로 동기화된 레코드 해시 매니페스트
+
+    키(예: shptNo)별로 마지막으로 업로드했거나 Airtable과 동일함을 확인한
+    준비 레코드의 해시를 저장합니다. 신선한 매니페스트가 있으면 스냅샷
+    조회 없이 변경분만 업로드할 수 있습니다.
+    """
+
+    def __init__(self, path: str, *, base_id: str, table_id: str):
+        self.path = path
+        self.base_id = base_id
+        self.table_id = table_id
+        self.hashes: Dict[str, str] = {}
+        self.updated_at: Optional[float] = None
+
+    @classmethod
+    def load(cls, path: str, *, base_id: str, table_id: str) -> "HashManifest":
+        """매니페스트 로드 (없거나 다른 테이블용이면 빈 매니페스트)"""
+        manifest = cls(path, base_id=base_id, table_id=table_id)
+        if not os.path.exists(path):
+            return manifest
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+        if (
+            data.get("version") == MANIFEST_VERSION
+            and data.get("baseId") == base_id
+            and data.get("tableId") == table_id
+        ):
+            manifest.hashes = dict(data.get("records") or {})
+            manifest.updated_at = data.get("updatedAt")
+        return manifest
+
+    def is_fresh(self, max_age_hours: float = MANIFEST_MAX_AGE_HOURS) -> bool:
+        if self.updated_at is None:
+            return False
+        return time.time() - self.updated_at < max_age_hours * 3600
+
+    def update(self, hashes: Dict[str, str]) -> None:
+        self.hashes.update(hashes)
+
+    def save(self) -> None:
+        """원자적 저장 (임시 파일 후 rename)"""
+        self.updated_at = time.time()
+        data = {
+            "version": MANIFEST_VERSION,
+            "baseId": self.base_id,
+            "tableId": self.table_id,
+            "updatedAt": self.updated_at,
+            "records": self.hashes,
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+
+def fetch_snapshot(
+    client: Any, table_id: str, key_field: str, fields: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    현재 테이블 스냅샷 조회 (업로드 대상 필드만)
+
+    Returns:
+        {키 값: fields dict}
+    """
+    projected = sorted(set(fields) | {key_field})
+    snapshot: Dict[str, Dict[str, Any]] = {}
+    for record in client.list_records(table_id, fields=projected):
+        fields_dict = record.get("fields") or {}
+        key = fields_dict.get(key_field)
+        if key is not None:
+            snapshot[str(key).strip()] = fields_dict
+    return snapshot
+
+
+def iter_diff(
+    prepared: Iterable[Dict[str, Any]],
+    key_field: str,
+    *,
+    snapshot: Optional[Dict[str, Dict[str, Any]]] = None,
+    manifest_hashes: Optional[Dict[str, str]] = None,
+    field_types: Optional[Dict[str, str]] = None,
+) -> Iterator[Tuple[str, Dict[str, Any], str, List[str]]]:
+    """
+    준비된 레코드를 하나씩 신규/변경/동일로 분류 (스트리밍)
+
+    snapshot이 있으면 Airtable 현재 값과 (준비된 레코드의 필드만) 비교하고,
+    없으면 manifest_hashes(마지막 동기화 해시)와 비교합니다. field_types가
+    있으면 숫자("12" == 12.0)와 체크박스(false == 필드 없음)를 타입대로 비교합니다.
+
+    Yields:
+        (분류 "new"|"changed"|"unchanged", 레코드, 해시, 변경 필드 목록)
+    """
+    field_types = field_types or {}
+    for record in prepared:
+        key = str(record[key_field])
+        digest = content_hash(record, field_types=field_types)
+
+        if snapshot is not None:
+            current = snapshot.get(key)
+            if current is None:
+                yield "new", record, digest, []
+            elif content_hash(current, record.keys(), field_types) == digest:
+                yield "unchanged", record, digest, []
+            else:
+                yield "changed", record, digest, [
+                    name for name in sorted(record)
+                    if _normalize_value(record.get(name), field_types.get(name))
+                    != _normalize_value(current.get(name), field_types.get(name))
+                ]
+        else:
+            known = (manifest_hashes or {}).get(key)
+            if known is None:
+                yield "new", record, digest, []
+            elif known == digest:
+                yield "unchanged", record, digest, []
+            else:
+                yield "changed", record, digest, []
+
+
+def diff_records(
+    prepared: Iterable[Dict[str, Any]],
+    key_field: str,
+    *,
+    snapshot: Optional[Dict[str, Dict[str, Any]]] = None,
+    manifest_hashes: Optional[Dict[str, str]] = None,
+    field_types: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    준비된 레코드를 신규/변경/동일로 분류
+
+    Returns:
+        {"new": [...], "changed": [...], "unchanged": [...],
+         "hashes": {키: 해시}, "changes": {키: [변경 필드]}}
+    """
+    result: Dict[str, Any] = {
+        "new": [], "changed": [], "unchanged": [], "hashes": {}, "changes": {},
+    }
+    for kind, record, digest, fields in iter_diff(
+        prepared, key_field, snapshot=snapshot, manifest_hashes=manifest_hashes,
+        field_types=field_types,
+    ):
+        key = str(record[key_field])
+        result[kind].append(record)
+        result["hashes"][key] = digest
+        if fields:
+            result["changes"][key] = fields
+    return result
+
+
+def format_diff_report(diff: Dict[str, Any], key_field: str, limit: int = 10) -> str:
+    """드라이런용 diff 리포트 문자열 (unchanged는 목록 또는 개수)"""
+    unchanged = diff["unchanged"]
+    lines = [
+        f"   신규: {len(diff['new'])}개",
+        f"   변경: {len(diff['changed'])}개",
+        f"   동일(건너뜀): {unchanged if isinstance(unchanged, int) else len(unchanged)}개",
+    ]
+    for record in diff["new"][:limit]:
+        lines.append(f"   + {record[key_field]}")
+    for record in diff["changed"][:limit]:
+        key = str(record[key_field])
+        fields = diff["changes"].get(key)
+        suffix = f" ({', '.join(fields)})" if fields else ""
+        lines.append(f"   ~ {key}{suffix}")
+    return "\n".join(lines)
+
+
+# ==================== 체크포인트 업로드 ====================
+CHECKPOINT_VERSION = 1
+
+# 기본 체크포인트/결과 파일 디렉토리
+CHECKPOINT_DIR = ".upload_checkpoints"
+
+# Airtable 배치 한도 (≤10 records/req)
+BATCH_SIZE = 10
+
+
+def hash_records(records: Iterable[Dict[str, Any]]) -> str:
+    """입력 레코드 목록 해시 (순서 포함, 체크포인트 식별용)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for record in records:
+        digest.update(
+            json.dumps(record, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+        )
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def default_checkpoint_paths(name: str) -> Tuple[str, str]:
+    """(체크포인트 경로, 레코드별 결과 NDJSON 경로)"""
+    return (
+        os.path.join(CHECKPOINT_DIR, f"{name}.checkpoint.json"),
+        os.path.join(CHECKPOINT_DIR, f"{name}.results.ndjson"),
+    )
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str, table_id: str, input_hash: str) -> Optional[Dict[str, Any]]:
+    """같은 테이블/입력의 체크포인트만 반환 (다르면 None)"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (
+        data.get("version") != CHECKPOINT_VERSION
+        or data.get("tableId") != table_id
+        or data.get("inputHash") != input_hash
+        or data.get("batchSize") != BATCH_SIZE
+    ):
+        return None
+    return data
+
+
+def checkpointed_upsert(
+    client: Any,
+    table_id: str,
+    records: Iterable[Dict[str, Any]],
+    *,
+    merge_fields: List[str],
+    input_hash: str,
+    checkpoint_path: str,
+    results_path: Optional[str] = None,
+    resume: bool = True,
+    typecast: bool = True,
+    on_batch: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    배치 단위로 upsert 하면서 진행 상황을 체크포인트에 기록
+
+    - 배치가 커밋될 때마다 다음 배치 인덱스를 체크포인트에 저장
+    - 같은 입력(input_hash)으로 재실행하면 커밋된 배치를 건너뛰고 이어서 업로드
+    - 레코드별 결과를 NDJSON 파일에 기록 (재개 시 이어쓰기)
+    - 실패하면 체크포인트를 남기고 status="interrupted" 반환
+    - 모두 완료되면 체크포인트 삭제
+
+    Args:
+        client: AirtableClient
+        table_id: 대상 테이블 ID
+        records: 준비된 레코드 (리스트 또는 generator)
+        merge_fields: upsert 기준 필드
+        input_hash: 입력 식별 해시 (hash_records 등)
+        checkpoint_path: 체크포인트 JSON 경로
+        results_path: 레코드별 결과 NDJSON 경로 (None이면 기록 안 함)
+        resume: False면 기존 체크포인트 무시
+        typecast: Airtable typecast
+        on_batch: 커밋된 배치마다 호출 on_batch(batch_records, response)
+
+    Returns:
+        {"status", "batches", "uploaded", "skipped_batches", "resumed_from",
+         "failed_batch", "error"}
+    """
+    checkpoint = load_checkpoint(checkpoint_path, table_id, input_hash) if resume else None
+    start_batch = checkpoint["nextBatch"] if checkpoint else 0
+    uploaded = checkpoint.get("uploaded", 0) if checkpoint else 0
+
+    results_file = None
+    if results_path:
+        os.makedirs(os.path.dirname(os.path.abspath(results_path)), exist_ok=True)
+        results_file = open(results_path, "a" if checkpoint else "w", encoding="utf-8")
+
+    def save(next_batch: int) -> None:
+        _write_json_atomic(checkpoint_path, {
+            "version": CHECKPOINT_VERSION,
+            "tableId": table_id,
+            "inputHash": input_hash,
+            "batchSize": BATCH_SIZE,
+            "nextBatch": next_batch,
+            "uploaded": uploaded,
+            "updatedAt": time.time(),
+        })
+
+    def write_results(batch_index: int, batch: List[Dict[str, Any]], entries: List[Dict[str, Any]]) -> None:
+        if results_file is None:
+            return
+        for offset, (record, entry) in enumerate(zip(batch, entries)):
+            line = {
+                "batch": batch_index,
+                "index": batch_index * BATCH_SIZE + offset,
+                "key": {name: record.get(name) for name in merge_fields},
+                **entry,
+            }
+            results_file.write(json.dumps(line, ensure_ascii=False) + "\n")
+        results_file.flush()
+
+    batch_index = 0
+    batch: List[Dict[str, Any]] = []
+    status = "success"
+    error: Optional[str] = None
+
+    def flush_batch() -> None:
+        nonlocal uploaded
+        if batch_index < start_batch:
+            return  # 이전 실행에서 커밋됨
+        try:
+            responses = client.upsert_records(
+                table_id, batch, fields_to_merge_on=merge_fields, typecast=typecast
+            )
+        except Exception as exc:
+            write_results(batch_index, batch, [{"status": "failed", "error": str(exc)}] * len(batch))
+            save(batch_index)
+            raise
+        response = responses[0] if responses else {}
+        response_records = response.get("records") or []
+        if "error" in response and not response_records:
+            message = str(response.get("error"))
+            write_results(batch_index, batch, [{"status": "failed", "error": message}] * len(batch))
+            save(batch_index)
+            raise RuntimeError(message)
+        write_results(batch_index, batch, [
+            {
+                "status": "committed",
+                "recordId": (response_records[i].get("id") if i < len(response_records) else None),
+            }
+            for i in range(len(batch))
+        ])
+        uploaded += len(batch)
+        save(batch_index + 1)
+        if on_batch is not None:
+            on_batch(batch, response)
+
+    try:
+        for record in records:
+            batch.append(record)
+            if len(batch) >= BATCH_SIZE:
+                flush_batch()
+                batch_index += 1
+                batch = []
+        if batch:
+            flush_batch()
+            batch_index += 1
+            batch = []
+    except Exception as exc:
+        status = "interrupted"
+        error = str(exc)
+    finally:
+        if results_file is not None:
+            results_file.close()
+
+    if status == "success" and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    return {
+        "status": status,
+        "batches": batch_index,
+        "uploaded": uploaded,
+        "skipped_batches": min(start_batch, batch_index),
+        "resumed_from": start_batch if checkpoint else None,
+        "failed_batch": batch_index if status == "interrupted" else None,
+        "error": error,
+    }
+
+
+# ==================== 스트리밍 리더 ====================
+# 대용량 입력 파일을 한 레코드씩 읽어 메모리 사용량을 일정하게 유지합니다.
+READ_CHUNK_BYTES = 1 << 16
+
+
+def iter_delimited(path: str, delimiter: str = "\t") -> Iterator[Dict[str, Any]]:
+    """CSV/TSV 행을 dict로 하나씩 반환 (헤더 필수)"""
+    with open(path, "r", encoding="utf-8", newline="") as handle:
+        reader = csv.DictReader(handle, delimiter=delimiter)
+        if not reader.fieldnames:
+            raise ValueError("Missing header row in input file")
+        for row in reader:
+            yield row
+
+
+def iter_json_array(path: str, chunk_bytes: int = READ_CHUNK_BYTES) -> Iterator[Any]:
+    """
+    JSON 배열 원소를 하나씩 반환 (파일 전체를 로드하지 않음)
+
+    json.JSONDecoder.raw_decode로 버퍼에서 원소 단위로 디코딩하고,
+    원소가 청크 경계에 걸리면 다음 청크를 읽어 이어 붙입니다.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as handle:
+        buffer = ""
+        position = 0
+        eof = False
+
+        def fill() -> bool:
+            nonlocal buffer, position, eof
+            chunk = handle.read(chunk_bytes)
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[position:] + chunk
+            position = 0
+            return True
+
+        def skip_whitespace() -> None:
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in " \t\r\n":
+                    position += 1
+                if position < len(buffer) or not fill():
+                    return
+
+        skip_whitespace()
+        if position >= len(buffer) or buffer[position] != "[":
+            raise ValueError("Expected a JSON array")
+        position += 1
+
+        while True:
+            skip_whitespace()
+            if position >= len(buffer):
+                raise ValueError("Unterminated JSON array")
+            if buffer[position] == "]":
+                return
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                    # 숫자/리터럴이 청크 끝에서 잘렸을 수 있음
+                    if end >= len(buffer) and not eof:
+                        raise ValueError("value may continue")
+                    break
+                except ValueError:
+                    if not fill():
+                        value, end = decoder.raw_decode(buffer, position)
+                        break
+            position = end
+            yield value
+
+            skip_whitespace()
+            if position >= len(buffer):
+                raise ValueError("Unterminated JSON array")
+            if buffer[position] == ",":
+                position += 1
+            elif buffer[position] != "]":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {buffer[position]!r}")
+
+
+def iter_ndjson(path: str) -> Iterator[Any]:
+    """NDJSON(JSON Lines) 한 줄씩 반환 (빈 줄 무시)"""
+    with open(path, "r", encoding="utf-8") as handle:
+        for line_no, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                raise ValueError(f"Invalid JSON on line {line_no}: {exc}") from exc
+
+
+def detect_format(path: str) -> str:
+    """확장자(없으면 첫 문자)로 형식 판별: tsv / csv / json / ndjson"""
+    suffix = Path(path).suffix.lower()
+    if suffix in (".tsv", ".tab"):
+        return "tsv"
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".ndjson", ".jsonl"):
+        return "ndjson"
+    with open(path, "r", encoding="utf-8") as handle:
+        head = handle.read(READ_CHUNK_BYTES).lstrip()
+    if head.startswith("["):
+        return "json"
+    if head.startswith("{"):
+        return "ndjson"
+    return "tsv"
+
+
+def iter_records(
+    path: str, fmt: Optional[str] = None, delimiter: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    입력 파일 레코드를 하나씩 반환
+
+    Args:
+        path: 입력 파일
+        fmt: tsv / csv / json / ndjson (None이면 자동 판별)
+        delimiter: CSV/TSV 구분자 (기본: tsv는 탭, csv는 쉼표)
+    """
+    fmt = fmt or detect_format(path)
+    if fmt == "json":
+        return iter_json_array(path)
+    if fmt == "ndjson":
+        return iter_ndjson(path)
+    if fmt in ("tsv", "csv"):
+        return iter_delimited(path, delimiter or ("," if fmt == "csv" else "\t"))
+    raise ValueError(f"Unknown input format: {fmt}")
+
+
+def hash_file(path: str, *extra: str) -> str:
+    """입력 파일 해시 (스트리밍, 체크포인트 식별용); extra는 옵션 값 등"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(READ_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    for value in extra:
+        digest.update(b"\0" + value.encode("utf-8"))
+    return digest.hexdigest()
+
+
+# ==================== 병렬 변환 ====================
+# 프로세스 간 전송 단위 (행 수): 클수록 IPC 오버헤드가 작고 첫 결과가 늦어짐
+PREPARE_CHUNK_ROWS = 2000
+
+# 워커당 동시에 처리 중인 청크 수 (메모리 상한 = 워커 × 이 값 × 청크)
+PREPARE_CHUNKS_PER_WORKER = 2
+
+
+def _prepare_chunk(func: Any, rows: List[Any]) -> List[Tuple[bool, Any]]:
+    """청크 변환 (워커 프로세스에서 실행); 행별 (성공 여부, 레코드 또는 오류 메시지)"""
+    outcomes: List[Tuple[bool, Any]] = []
+    for row in rows:
+        try:
+            outcomes.append((True, func(row)))
+        except Exception as exc:
+            outcomes.append((False, str(exc)))
+    return outcomes
+
+
+def iter_prepared(
+    func: Any,
+    rows: Iterable[Any],
+    workers: int = 1,
+    chunk_rows: int = PREPARE_CHUNK_ROWS,
+) -> Iterator[Tuple[bool, Any]]:
+    """
+    행을 func로 변환해 입력 순서대로 (성공 여부, 레코드 또는 오류 메시지) 반환
+
+    workers > 1 이면 chunk_rows 단위로 프로세스 풀에 나눠 보내고, 결과는
+    제출 순서대로 꺼내므로 체크포인트 배치 구성이 단일 프로세스와 같습니다.
+    처리 중인 청크 수를 제한해 입력을 끝까지 미리 읽지 않습니다.
+
+    Args:
+        func: 모듈 최상위 함수 (pickle 가능해야 함)
+        rows: 입력 행 (generator 가능)
+        workers: 프로세스 수 (1이면 현재 프로세스에서 변환)
+        chunk_rows: 워커로 보내는 청크 크기
+    """
+    if workers <= 1:
+        for row in rows:
+            yield from _prepare_chunk(func, [row])
+        return
+
+    iterator = iter(rows)
+    max_in_flight = workers * PREPARE_CHUNKS_PER_WORKER
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending: deque = deque()
+    try:
+        while True:
+            while len(pending) < max_in_flight:
+                chunk = list(islice(iterator, chunk_rows))
+                if not chunk:
+                    break
+                pending.append(pool.submit(_prepare_chunk, func, chunk))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+    finally:
+        # 업로드가 중단되면 남은 청크는 버림
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -5,6 +5,23 @@ ChatGPT가 준비한 JSON 데이터를 Airtable Shipments 테이블에 업로드
     python scripts/upload_shipments_to_airtable.py \
         --file chatgpt_prepared_data_v14.json \
         --token pat_xxxxxxxxxxxxx
+
+변경분만 업로드:
+    기본적으로 현재 Shipments 스냅샷(업로드 필드만)과 내용 해시를 비교해
+    신규/변경 레코드만 upsert 합니다. 로컬 해시 매니페스트
+    (--manifest, 기본 .upload_manifests/shipments.json)가 신선하면
+    스냅샷 조회도 건너뜁니다. --full 은 전체 업로드, --refresh 는
+    매니페스트를 무시하고 스냅샷을 다시 조회합니다.
+
+재개 가능한 업로드:
+    배치마다 체크포인트(.upload_checkpoints/shipments.checkpoint.json)를
+    기록하고, 같은 입력으로 재실행하면 커밋된 배치를 건너뜁니다.
+    레코드별 결과는 .upload_checkpoints/shipments.results.ndjson 에 남습니다.
+
+스트리밍 입력:
+    JSON 배열 / NDJSON / TSV / CSV 파일을 레코드 단위로 읽습니다 (--format).
+    --full 은 파싱과 동시에 배치 업로드를 시작하고, 변경분 모드는
+    신규/변경 레코드만 메모리에 유지합니다.
 """
 
 import os
@@ -12,8 +29,9 @@ import sys
 import json
 import argparse
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from datetime import datetime
+from itertools import chain, islice
 
 # 프로젝트 루트 추가
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -21,6 +39,33 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from api.airtable_client import AirtableClient
 from api.airtable_locked_config import BASE_ID, TABLES, PROTECTED_FIELDS
 from api.utils import parse_iso_any, iso_dubai, DUBAI_TZ
+from scripts.upload_common import (
+    MANIFEST_MAX_AGE_HOURS,
+    HashManifest,
+    checkpointed_upsert,
+    content_hash,
+    default_checkpoint_paths,
+    fetch_snapshot,
+    format_diff_report,
+    hash_file,
+    hash_records,
+    iter_diff,
+    iter_prepared,
+    iter_records,
+    load_field_types,
+)
+
+# 기본 해시 매니페스트 경로
+DEFAULT_MANIFEST_PATH = os.path.join(".upload_manifests", "shipments.json")
+
+# 기본 체크포인트 / 레코드별 결과 경로
+DEFAULT_CHECKPOINT_PATH, DEFAULT_RESULTS_PATH = default_checkpoint_paths("shipments")
+
+# 스냅샷 조회 필드를 정하기 위해 미리 읽는 레코드 수
+SNAPSHOT_SAMPLE_RECORDS = 1000
+
+# 결과에 남기는 변환 오류 메시지 수 (개수는 모두 집계)
+MAX_REPORTED_ERRORS = 1000
 
 def normalize_datetime_field(value: Any) -> Optional[str]:
     """날짜/시간 필드를 Airtable 형식으로 정규화"""
@@ -98,18 +143,70 @@ def prepare_airtable_record(record: Dict[str, Any]) -> Dict[str, Any]:
 
     return airtable_record
 
+def iter_prepared_records(
+    records: Iterable[Dict[str, Any]],
+    errors: List[str],
+    stats: Dict[str, int],
+    workers: int = 1,
+) -> Iterator[Dict[str, Any]]:
+    """
+    레코드를 입력 순서대로 변환 (스트리밍, workers > 1 이면 프로세스 풀)
+
+    변환 실패는 건너뛰고 errors에 기록합니다 (MAX_REPORTED_ERRORS개까지,
+    개수는 stats["prepare_errors"]에 모두 집계).
+    """
+    outcomes = iter_prepared(prepare_airtable_record, records, workers)
+    for i, (ok, prepared) in enumerate(outcomes, 1):
+        stats["total_records"] = i
+        if not ok:
+            stats["prepare_errors"] += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                error_msg = f"레코드 {i} 변환 실패: {prepared}"
+                errors.append(error_msg)
+                print(f"⚠️ {error_msg}")
+            continue
+        stats["prepared_records"] += 1
+        yield prepared
+
+
 def upload_shipments(
-    records: List[Dict[str, Any]],
+    records: Iterable[Dict[str, Any]],
     api_token: str,
-    dry_run: bool = False
+    dry_run: bool = False,
+    *,
+    full: bool = False,
+    refresh: bool = False,
+    manifest_path: Optional[str] = DEFAULT_MANIFEST_PATH,
+    manifest_max_age_hours: float = MANIFEST_MAX_AGE_HOURS,
+    checkpoint_path: str = DEFAULT_CHECKPOINT_PATH,
+    results_path: Optional[str] = DEFAULT_RESULTS_PATH,
+    resume: bool = True,
+    input_hash: Optional[str] = None,
+    workers: int = 1,
+    client: Optional[AirtableClient] = None,
 ) -> Dict[str, Any]:
     """
-    Shipments 레코드를 Airtable에 Upsert
+    Shipments 레코드를 Airtable에 Upsert (변경분만)
+
+    records는 리스트 또는 generator(iter_records)입니다. 변환은 한 레코드씩
+    스트리밍으로 처리되며, 변경분 모드에서는 신규/변경 레코드만 메모리에
+    남습니다. --full 모드는 변환된 레코드를 그대로 배치 upsert로 흘려보내
+    파싱이 끝나기 전에 업로드를 시작합니다.
 
     Args:
-        records: ChatGPT가 준비한 JSON 레코드 리스트
+        records: ChatGPT가 준비한 JSON 레코드 (리스트 또는 iterable)
         api_token: Airtable Personal Access Token
-        dry_run: True면 실제 업로드 없이 검증만
+        dry_run: True면 실제 업로드 없이 검증 + diff 리포트만
+        full: True면 diff 없이 전체 업로드
+        refresh: True면 매니페스트를 무시하고 스냅샷 조회
+        manifest_path: 해시 매니페스트 경로 (None이면 사용 안 함)
+        manifest_max_age_hours: 매니페스트 신뢰 기간
+        checkpoint_path: 배치 체크포인트 경로
+        results_path: 레코드별 결과 NDJSON 경로 (None이면 기록 안 함)
+        resume: False면 기존 체크포인트 무시하고 처음부터
+        input_hash: --full 스트리밍 업로드의 입력 식별 해시 (보통 hash_file)
+        workers: 변환 프로세스 수 (1이면 현재 프로세스, 순서는 항상 유지)
+        client: AirtableClient (테스트용, 없으면 api_token으로 생성)
 
     Returns:
         업로드 결과 통계
@@ -118,76 +215,174 @@ def upload_shipments(
         raise ValueError("AIRTABLE_API_TOKEN이 필요합니다")
 
     # Airtable 클라이언트 초기화
-    client = AirtableClient(api_token.strip(), BASE_ID)
+    if client is None:
+        client = AirtableClient(api_token.strip(), BASE_ID)
     table_id = TABLES["Shipments"]
-
-    # 레코드 준비
-    print(f"📦 {len(records)}개 레코드 준비 중...")
-    prepared_records = []
-    errors = []
-
-    for i, record in enumerate(records, 1):
-        try:
-            prepared = prepare_airtable_record(record)
-            prepared_records.append(prepared)
-        except Exception as e:
-            error_msg = f"레코드 {i} 변환 실패: {e}"
-            errors.append(error_msg)
-            print(f"⚠️ {error_msg}")
-            continue
-
-    print(f"✅ {len(prepared_records)}개 레코드 준비 완료")
-    if errors:
-        print(f"⚠️ {len(errors)}개 레코드 변환 실패")
+    field_types = load_field_types("Shipments")
+
+    # 레코드 준비 (스트리밍)
+    print("📦 레코드 준비 중...")
+    errors: List[str] = []
+    stats = {"total_records": 0, "prepared_records": 0, "prepare_errors": 0}
+    prepared = iter_prepared_records(records, errors, stats, workers)
+
+    # 변경분 계산 (매니페스트 → 스냅샷 순)
+    manifest = None
+    if manifest_path:
+        manifest = HashManifest.load(manifest_path, base_id=BASE_ID, table_id=table_id)
+
+    diff_source = "full"
+    new_records: List[Dict[str, Any]] = []
+    changed_records: List[Dict[str, Any]] = []
+    unchanged_count = 0
+    changes: Dict[str, List[str]] = {}
+    hashes: Dict[str, str] = {}
+    synced_hashes: Dict[str, str] = {}
+
+    if full:
+        if input_hash is None:
+            # 입력 식별 해시가 없으면 변환 결과로 계산 (메모리에 적재)
+            prepared = list(prepared)
+            input_hash = hash_records(prepared)
+        to_upload: Iterable[Dict[str, Any]] = prepared
+    else:
+        if manifest is not None and not refresh and manifest.is_fresh(manifest_max_age_hours):
+            diff_source = "manifest"
+            diff_iter = iter_diff(
+                prepared, "shptNo", manifest_hashes=manifest.hashes, field_types=field_types
+            )
+        else:
+            diff_source = "snapshot"
+            # 앞부분 샘플로 조회 필드 결정 (이후 새 필드는 변경으로 간주되어 업로드)
+            sample = list(islice(prepared, SNAPSHOT_SAMPLE_RECORDS))
+            fields = sorted(
+                set(PROTECTED_FIELDS["Shipments"]) | {name for rec in sample for name in rec}
+            )
+            print(f"📥 현재 Shipments 스냅샷 조회 중 ({len(fields)}개 필드)...")
+            snapshot = fetch_snapshot(client, table_id, "shptNo", fields)
+            print(f"✅ {len(snapshot)}개 레코드 조회 완료")
+            diff_iter = iter_diff(
+                chain(sample, prepared), "shptNo", snapshot=snapshot, field_types=field_types
+            )
+
+        for kind, rec, digest, changed_fields in diff_iter:
+            key = str(rec["shptNo"])
+            if kind == "unchanged":
+                unchanged_count += 1
+                synced_hashes[key] = digest
+                continue
+            hashes[key] = digest
+            if kind == "new":
+                new_records.append(rec)
+            else:
+                changed_records.append(rec)
+                if changed_fields:
+                    changes[key] = changed_fields
+
+        to_upload = new_records + changed_records
+        input_hash = hash_records(to_upload)
+        print(f"\n🔀 변경분 ({diff_source} 기준):")
+        print(format_diff_report(
+            {"new": new_records, "changed": changed_records,
+             "unchanged": unchanged_count, "changes": changes},
+            "shptNo",
+        ))
+
+    diff_stats = {
+        "diff_source": diff_source,
+        "new": len(new_records) if not full else None,
+        "changed": len(changed_records) if not full else None,
+        "unchanged": unchanged_count if not full else None,
+    }
 
     if dry_run:
         print("\n🔍 DRY RUN 모드 - 실제 업로드하지 않습니다")
-        print(f"   준비된 레코드 샘플 (첫 3개):")
-        for i, rec in enumerate(prepared_records[:3], 1):
-            print(f"   {i}. {json.dumps(rec, indent=2, ensure_ascii=False)}")
+        print(f"   업로드 대상 샘플 (첫 3개):")
+        upload_count = 0
+        for rec in to_upload:
+            upload_count += 1
+            if upload_count <= 3:
+                print(f"   {upload_count}. {json.dumps(rec, indent=2, ensure_ascii=False)}")
+        print(f"✅ {stats['prepared_records']}개 레코드 준비 완료")
         return {
             "status": "dry_run",
-            "total_records": len(records),
-            "prepared_records": len(prepared_records),
-            "errors": len(errors),
-            "batches": (len(prepared_records) + 9) // 10,
+            "total_records": stats["total_records"],
+            "prepared_records": stats["prepared_records"],
+            "errors": stats["prepare_errors"],
+            "batches": (upload_count + 9) // 10,
+            **diff_stats,
+            "changes": changes,
         }
 
-    if not prepared_records:
+    if not full and not stats["prepared_records"]:
         raise ValueError("업로드할 레코드가 없습니다")
 
+    if not full and not to_upload:
+        print("\n✅ 변경된 레코드가 없습니다 - 업로드를 건너뜁니다")
+        if manifest is not None:
+            manifest.update(synced_hashes)
+            manifest.save()
+        return {
+            "status": "success",
+            "total_records": stats["total_records"],
+            "prepared_records": stats["prepared_records"],
+            "batches": 0,
+            "uploaded": 0,
+            **diff_stats,
+            "errors": errors,
+            "schemaVersion": "2025-12-25T00:32:52+0400",
+        }
+
     # Upsert 실행
     print(f"\n🚀 Airtable에 업로드 중...")
     print(f"   테이블: Shipments ({table_id})")
     print(f"   기준 필드: shptNo (Protected Field)")
     print(f"   배치 크기: 10 레코드/요청")
+    if not full:
+        print(f"   업로드 대상: {len(to_upload)}개 / 준비 {stats['prepared_records']}개")
     print()
 
-    results = client.upsert_records(
+    def record_synced(batch: List[Dict[str, Any]], response: Dict[str, Any]) -> None:
+        for rec in batch:
+            key = str(rec["shptNo"])
+            synced_hashes[key] = hashes.get(key) or content_hash(rec, field_types=field_types)
+
+    outcome = checkpointed_upsert(
+        client,
         table_id,
-        prepared_records,
-        fields_to_merge_on=["shptNo"],  # Protected Field
-        typecast=True,
+        to_upload,
+        merge_fields=["shptNo"],  # Protected Field
+        input_hash=input_hash,
+        checkpoint_path=checkpoint_path,
+        results_path=results_path,
+        resume=resume,
+        on_batch=record_synced,
     )
 
-    # 결과 집계
-    total_uploaded = 0
-    upload_errors = []
+    if outcome["resumed_from"]:
+        print(f"⏩ 체크포인트에서 재개: 배치 {outcome['resumed_from'] + 1}부터")
 
-    for batch_idx, batch_result in enumerate(results, 1):
-        if "records" in batch_result:
-            total_uploaded += len(batch_result["records"])
-        elif "error" in batch_result:
-            error_info = batch_result.get("error", {})
-            error_msg = error_info.get("message", str(batch_result))
-            upload_errors.append(f"배치 {batch_idx}: {error_msg}")
+    # 동기화된 해시 저장 (중단되어도 커밋된 배치까지는 저장)
+    if manifest is not None:
+        manifest.update(synced_hashes)
+        manifest.save()
+
+    upload_errors = []
+    if outcome["status"] == "interrupted":
+        upload_errors.append(
+            f"배치 {outcome['failed_batch'] + 1}: {outcome['error']} "
+            f"(같은 입력으로 재실행하면 이어서 업로드합니다)"
+        )
 
     return {
-        "status": "success" if not upload_errors else "partial",
-        "total_records": len(records),
-        "prepared_records": len(prepared_records),
-        "batches": len(results),
-        "uploaded": total_uploaded,
+        "status": "success" if not upload_errors else "interrupted",
+        "total_records": stats["total_records"],
+        "prepared_records": stats["prepared_records"],
+        "batches": outcome["batches"],
+        "uploaded": outcome["uploaded"],
+        "skipped_batches": outcome["skipped_batches"],
+        "results_file": results_path,
+        **diff_stats,
         "errors": errors + upload_errors,
         "schemaVersion": "2025-12-25T00:32:52+0400",
     }
@@ -200,7 +395,13 @@ def main():
         "--file",
         type=str,
         default="chatgpt_prepared_data_v14.json",
-        help="ChatGPT가 생성한 JSON 파일 경로",
+        help="ChatGPT가 생성한 JSON 파일 경로 (JSON 배열 / NDJSON / TSV / CSV)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", "ndjson", "tsv", "csv"],
+        default=None,
+        help="입력 형식 (기본: 확장자로 자동 판별)",
     )
     parser.add_argument(
         "--token",
@@ -211,23 +412,65 @@ def main():
     parser.add_argument(
         "--dry-run",
         action="store_true",
-        help="실제 업로드 없이 검증만 수행",
+        help="실제 업로드 없이 검증 + 변경분 리포트만 출력",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="변경분 비교 없이 전체 레코드 업로드",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="해시 매니페스트를 무시하고 현재 스냅샷과 비교",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        default=DEFAULT_MANIFEST_PATH,
+        help="해시 매니페스트 경로 (빈 문자열이면 사용 안 함)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=DEFAULT_CHECKPOINT_PATH,
+        help="배치 체크포인트 경로",
+    )
+    parser.add_argument(
+        "--results",
+        type=str,
+        default=DEFAULT_RESULTS_PATH,
+        help="레코드별 결과 NDJSON 경로 (빈 문자열이면 기록 안 함)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="레코드 변환 프로세스 수 (기본: 1)",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="체크포인트를 무시하고 처음부터 업로드",
+    )
+    parser.add_argument(
+        "--manifest-max-age",
+        type=float,
+        default=MANIFEST_MAX_AGE_HOURS,
+        help="매니페스트 신뢰 기간 (시간)",
     )
 
     args = parser.parse_args()
 
-    # JSON 파일 읽기
+    # 입력 파일 확인 (레코드는 업로드하면서 스트리밍으로 읽음)
     json_path = Path(args.file)
     if not json_path.exists():
         print(f"❌ 파일을 찾을 수 없습니다: {json_path}")
         print(f"   현재 디렉토리: {Path.cwd()}")
         sys.exit(1)
 
-    print(f"📖 JSON 파일 읽기: {json_path}")
-    with open(json_path, "r", encoding="utf-8") as f:
-        records = json.load(f)
-
-    print(f"✅ {len(records)}개 레코드 로드 완료\n")
+    print(f"📖 입력 파일 스트리밍: {json_path}")
+    records = iter_records(str(json_path), args.format)
 
     # API 토큰 확인
     api_token = args.token or os.getenv("AIRTABLE_API_TOKEN")
@@ -240,7 +483,20 @@ def main():
 
     # 업로드 실행
     try:
-        result = upload_shipments(records, api_token, dry_run=args.dry_run)
+        result = upload_shipments(
+            records,
+            api_token,
+            dry_run=args.dry_run,
+            full=args.full,
+            refresh=args.refresh,
+            manifest_path=args.manifest or None,
+            manifest_max_age_hours=args.manifest_max_age,
+            checkpoint_path=args.checkpoint,
+            results_path=args.results or None,
+            resume=not args.no_resume,
+            workers=args.workers,
+            input_hash=hash_file(str(json_path), args.format or "", "full"),
+        )
 
         print("\n" + "="*60)
         print("✅ 업로드 완료!")
@@ -253,6 +509,8 @@ def main():
             print(f"   준비된 레코드: {result['prepared_records']}개")
             print(f"   배치 수: {result['batches']}개")
             print(f"   업로드된 레코드: {result['uploaded']}개")
+            if result.get("unchanged") is not None:
+                print(f"   동일(건너뜀): {result['unchanged']}개")
 
             if result.get("errors"):
                 print(f"\n⚠️ 경고:")
@@ -264,6 +522,11 @@ def main():
             print(f"   curl https://gets-logistics-api.vercel.app/status/summary")
             print(f"   curl https://gets-logistics-api.vercel.app/document/status/{{shptNo}}")
 
+        elif result.get("status") == "interrupted":
+            print(f"\n⚠️ 업로드 중단: {result['errors'][-1]}")
+            print(f"   레코드별 결과: {result.get('results_file')}")
+            sys.exit(1)
+
     except Exception as e:
         print(f"\n❌ 업로드 실패: {e}")
         import traceback
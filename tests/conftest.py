@@ -11,6 +11,22 @@ from zoneinfo import ZoneInfo
 DUBAI_TZ = ZoneInfo("Asia/Dubai")
 
 
+class FakeClock:
+    """Manually advanced clock for clock= parameters (advance with .now += seconds)"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_clock():
+    """FakeClock starting at t=1000"""
+    return FakeClock()
+
+
 @pytest.fixture
 def app():
     """Flask app fixture"""
@@ -35,9 +51,11 @@ def mock_airtable_client(monkeypatch):
     class MockAirtableClient:
         def __init__(self):
             self.records = {}
+            self.calls = []
         
         def list_records(self, table_id, **kwargs):
-            """Return mock records"""
+            """Return mock records (and record the call)"""
+            self.calls.append((table_id, kwargs))
             return self.records.get(table_id, [])
         
         def upsert_records(self, table_id, records_fields, **kwargs):
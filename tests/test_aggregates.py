@@ -0,0 +1,185 @@
+"""
+Unit tests for api/aggregates.py and GET /status/summary.
+"""
+
+import threading
+
+import api.app
+from api.airtable_locked_config import TABLES
+from api.aggregates import IncrementalAggregates
+
+SHIPMENTS = [
+    ("SCT-1", "FANR_PENDING", "HIGH"),
+    ("SCT-2", None, None),
+]
+DOCUMENTS = [
+    ("SCT-1", "BOE", "SUBMITTED"),
+    ("SCT-1", "DO", "NOT_STARTED"),
+    ("SCT-2", "BOE", "SUBMITTED"),
+]
+APPROVALS = ["PENDING", "PENDING", "APPROVED"]
+
+
+def make_aggregates(rows=None):
+    rows = rows or (SHIPMENTS, DOCUMENTS, APPROVALS)
+    return IncrementalAggregates(lambda: "client", lambda client: rows)
+
+
+class TestIncrementalAggregates:
+    def test_reconcile_counts(self):
+        summary = make_aggregates().status_summary()
+
+        assert summary["totalShipments"] == 2
+        assert summary["boeRate"] == 0.0
+        assert summary["riskSummary"]["HIGH"] == 1
+        assert summary["riskSummary"]["LOW"] == 1
+        assert {"code": "FANR_PENDING", "count": 1} in summary["topBottlenecks"]
+        assert summary["approvalsByStatus"] == {"PENDING": 2, "APPROVED": 1}
+
+    def test_events_move_counters(self):
+        aggregates = make_aggregates()
+        aggregates.state()
+
+        applied = aggregates.apply([
+            {"shptNo": "SCT-1", "entityType": "DOCUMENT", "fromStatus": "SUBMITTED", "toStatus": "ISSUED"},
+            {"shptNo": "SCT-1", "entityType": "APPROVAL", "fromStatus": "PENDING", "toStatus": "APPROVED"},
+            {"shptNo": "SCT-2", "entityType": "SHIPMENT", "bottleneckCode": "CUSTOMS_HOLD"},
+            {"shptNo": "SCT-1", "entityType": "SHIPMENT", "bottleneckCode": "NONE"},
+        ])
+        summary = aggregates.status_summary()
+
+        assert applied == 4
+        assert summary["boeRate"] == 0.5
+        assert summary["approvalsByStatus"] == {"PENDING": 1, "APPROVED": 2}
+        bottlenecks = {item["code"]: item["count"] for item in summary["topBottlenecks"]}
+        assert bottlenecks == {"CUSTOMS_HOLD": 1, "NONE": 1}
+        assert aggregates.info()["unresolved"] == 0
+
+    def test_ambiguous_document_event_is_left_to_reconcile(self):
+        aggregates = make_aggregates(([("SCT-1", None, None)], [
+            ("SCT-1", "BOE", "SUBMITTED"), ("SCT-1", "DO", "SUBMITTED"),
+        ], []))
+        aggregates.state()
+
+        aggregates.apply([{"shptNo": "SCT-1", "entityType": "DOCUMENT",
+                           "fromStatus": "SUBMITTED", "toStatus": "ISSUED"}])
+
+        assert aggregates.status_summary()["boeRate"] == 0.0
+        assert aggregates.info()["unresolved"] == 1
+
+    def test_approval_event_without_source_status_moves_nothing(self):
+        aggregates = make_aggregates()
+        aggregates.state()
+
+        aggregates.apply([{"shptNo": "SCT-1", "entityType": "APPROVAL",
+                           "fromStatus": "REJECTED", "toStatus": "APPROVED"}])
+
+        assert aggregates.status_summary()["approvalsByStatus"] == {"PENDING": 2, "APPROVED": 1}
+        assert aggregates.info()["unresolved"] == 1
+
+    def test_bottlenecks_by_category(self):
+        categories = {"FANR_PENDING": "PERMIT", "CUSTOMS_HOLD": "CUSTOMS"}
+        aggregates = IncrementalAggregates(
+            lambda: "client",
+            lambda client: (SHIPMENTS, DOCUMENTS, APPROVALS),
+            category_of=categories.get,
+        )
+
+        assert aggregates.status_summary()["bottlenecksByCategory"] == {"PERMIT": 1}
+
+        aggregates.apply([
+            {"shptNo": "SCT-1", "entityType": "SHIPMENT", "bottleneckCode": "CUSTOMS_HOLD"},
+            {"shptNo": "SCT-2", "entityType": "SHIPMENT", "bottleneckCode": "NEW_CODE"},
+        ])
+
+        assert aggregates.status_summary()["bottlenecksByCategory"] == {
+            "CUSTOMS": 1, "UNKNOWN": 1,
+        }
+
+    def test_events_before_first_load_are_ignored(self):
+        aggregates = make_aggregates()
+
+        assert aggregates.apply([{"shptNo": "SCT-1", "entityType": "APPROVAL", "toStatus": "APPROVED"}]) == 0
+
+    def test_reconcile_replays_events_applied_while_loading(self):
+        loading, release = threading.Event(), threading.Event()
+        calls = []
+
+        def loader(client):
+            calls.append(client)
+            if len(calls) == 2:
+                loading.set()
+                release.wait(5)
+                # The load already saw the approval but not the document move
+                return SHIPMENTS, DOCUMENTS, ["APPROVED", "PENDING", "APPROVED"]
+            return SHIPMENTS, DOCUMENTS, APPROVALS
+
+        aggregates = IncrementalAggregates(lambda: "client", loader)
+        aggregates.state()
+        worker = threading.Thread(target=aggregates.reconcile)
+        worker.start()
+        loading.wait(5)
+        aggregates.apply([
+            {"shptNo": "SCT-1", "entityType": "APPROVAL", "fromStatus": "PENDING", "toStatus": "APPROVED"},
+            {"shptNo": "SCT-2", "entityType": "DOCUMENT", "fromStatus": "SUBMITTED", "toStatus": "ISSUED"},
+        ])
+        release.set()
+        worker.join(5)
+
+        summary = aggregates.status_summary()
+        assert summary["approvalsByStatus"] == {"PENDING": 1, "APPROVED": 2}
+        assert summary["boeRate"] == 0.5
+        assert aggregates.last_drift == 0
+
+    def test_category_lookup_runs_outside_the_lock(self):
+        held = []
+
+        def category_of(code):
+            held.append(aggregates._lock.locked())
+            return "CUSTOMS"
+
+        aggregates = IncrementalAggregates(
+            lambda: "client", lambda client: (SHIPMENTS, DOCUMENTS, APPROVALS),
+            category_of=category_of,
+        )
+        aggregates.state()
+        aggregates.apply([{"shptNo": "SCT-2", "entityType": "SHIPMENT", "bottleneckCode": "CUSTOMS_HOLD"}])
+
+        assert held and not any(held)
+        assert aggregates.status_summary()["bottlenecksByCategory"] == {"CUSTOMS": 2}
+
+    def test_reconcile_reports_drift(self):
+        rows = [SHIPMENTS, DOCUMENTS, APPROVALS]
+        aggregates = IncrementalAggregates(lambda: "client", lambda client: tuple(rows))
+        aggregates.state()
+
+        rows[2] = ["APPROVED", "APPROVED", "APPROVED"]
+        aggregates.reconcile()
+
+        assert aggregates.last_drift == 4
+
+
+def test_status_summary_reflects_ingested_events(client, mock_airtable_client, monkeypatch):
+    monkeypatch.setattr(api.app, "status_aggregates", IncrementalAggregates(
+        lambda: api.app.airtable_client, api.app.load_aggregate_rows
+    ))
+    mock_airtable_client.records[TABLES["Shipments"]] = [
+        {"id": "rec1", "fields": {"shptNo": "SCT-1", "riskLevel": "HIGH"}},
+    ]
+    mock_airtable_client.records[TABLES["Documents"]] = [
+        {"id": "recD", "fields": {"shptNo": "SCT-1", "docType": "BOE", "status": "SUBMITTED"}},
+    ]
+
+    before = client.get("/status/summary").get_json()
+    response = client.post("/ingest/events", json={"batchId": "B1", "events": [
+        {"timestamp": "2026-01-01T10:00:00+04:00", "shptNo": "SCT-1",
+         "entityType": "DOCUMENT", "fromStatus": "SUBMITTED", "toStatus": "RELEASED"},
+    ]})
+    after = client.get("/status/summary").get_json()
+
+    assert response.status_code == 200
+    assert before["boeRate"] == 0.0
+    assert after["boeRate"] == 1.0
+    assert after["totalShipments"] == 1
+    tables = [table for table, _ in mock_airtable_client.calls]
+    assert tables.count(TABLES["Documents"]) == 1
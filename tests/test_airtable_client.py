@@ -165,6 +165,60 @@ class TestAirtableClientListRecords:
         second_params = mock_request.call_args_list[1].kwargs["params"]
         assert second_params["offset"] == "next"
 
+    def test_list_records_return_fields_by_field_id(self, monkeypatch):
+        client = AirtableClient("patTEST", "appTEST")
+
+        mock_request = Mock(return_value={"records": []})
+        monkeypatch.setattr(client, "_request", mock_request)
+
+        client.list_records("tbl123")
+        assert "returnFieldsByFieldId" not in mock_request.call_args.kwargs["params"]
+
+        client.list_records("tbl123", return_fields_by_field_id=True)
+        params = mock_request.call_args.kwargs["params"]
+        assert params["returnFieldsByFieldId"] == "true"
+
+    def test_list_records_sort_and_max_records_stop_paging(self, monkeypatch):
+        client = AirtableClient("patTEST", "appTEST")
+
+        responses = [
+            {"records": [{"id": "rec1"}, {"id": "rec2"}], "offset": "next"},
+            {"records": [{"id": "rec3"}, {"id": "rec4"}], "offset": "more"},
+        ]
+        mock_request = Mock(side_effect=responses)
+        monkeypatch.setattr(client, "_request", mock_request)
+
+        records = client.list_records(
+            "tbl123",
+            sort=[{"field": "timestamp", "direction": "desc"}],
+            max_records=3,
+        )
+
+        assert [r["id"] for r in records] == ["rec1", "rec2", "rec3"]
+        assert mock_request.call_count == 2
+
+        params = mock_request.call_args_list[0].kwargs["params"]
+        assert params["sort[0][field]"] == "timestamp"
+        assert params["sort[0][direction]"] == "desc"
+        assert params["maxRecords"] == 3
+        assert params["pageSize"] == 3
+
+
+class TestAirtableClientWebhookPayloads:
+    """Test webhook payload reads."""
+
+    def test_list_webhook_payloads_passes_cursor(self, monkeypatch):
+        client = AirtableClient("patTEST", "appTEST")
+        mock_request = Mock(return_value={"payloads": [], "cursor": 8, "mightHaveMore": False})
+        monkeypatch.setattr(client, "_request", mock_request)
+
+        result = client.list_webhook_payloads("achTEST", cursor=7)
+
+        assert result["cursor"] == 8
+        args, kwargs = mock_request.call_args
+        assert args == ("GET", "https://api.airtable.com/v0/bases/appTEST/webhooks/achTEST/payloads")
+        assert kwargs["params"] == {"limit": 50, "cursor": 7}
+
 
 class TestAirtableClientWriteOperations:
     """Test create, update, and upsert operations."""
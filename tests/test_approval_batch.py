@@ -0,0 +1,96 @@
+"""
+Tests for POST /approval/status/batch.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import api.app
+from api.airtable_locked_config import TABLES
+from api.shipment_oracle import ShipmentExistenceOracle
+from api.utils import DUBAI_TZ
+
+
+def _approval(shpt_no, days, status="PENDING"):
+    due = (datetime.now(DUBAI_TZ) + timedelta(days=days)).isoformat()
+    return {
+        "id": f"rec{shpt_no}{days}",
+        "fields": {
+            "approvalKey": f"FANR-{shpt_no}-{days}",
+            "shptNo": shpt_no,
+            "approvalType": "FANR",
+            "status": status,
+            "dueAt": due,
+        },
+    }
+
+
+@pytest.fixture
+def batch_client(client, mock_airtable_client, monkeypatch):
+    mock_airtable_client.records[TABLES["Shipments"]] = [
+        {"id": f"recS{i}", "fields": {"shptNo": f"SCT-{i}"}} for i in range(3)
+    ]
+    mock_airtable_client.records[TABLES["Approvals"]] = [
+        _approval("SCT-0", -1.5),
+        _approval("SCT-0", 3.5),
+        _approval("SCT-2", 10.5, status="APPROVED"),
+    ]
+    oracle = ShipmentExistenceOracle(
+        lambda: mock_airtable_client, TABLES["Shipments"], background_refresh=False
+    )
+    monkeypatch.setattr(api.app, "shipment_oracle", oracle)
+    return client
+
+
+def test_batch_groups_approvals_and_reports_not_found(batch_client, mock_airtable_client):
+    response = batch_client.post(
+        "/approval/status/batch",
+        json={"shptNos": ["SCT-0", "SCT-1", "SCT-2", "SCT-9", "SCT-0"]},
+    )
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["requested"] == 4
+    assert data["notFound"] == ["SCT-9"]
+    assert [r["shptNo"] for r in data["results"]] == ["SCT-0", "SCT-1", "SCT-2"]
+    assert [a["priority"] for a in data["results"][0]["approvals"]] == ["OVERDUE", "CRITICAL"]
+    assert data["results"][1]["approvals"] == []
+    assert data["summary"]["total"] == 3
+    assert data["summary"]["pending"] == 2
+    assert data["summary"]["overdue"] == 1
+    assert data["summary"]["critical"] == 1
+
+    approval_calls = [kw for table, kw in mock_airtable_client.calls if table == TABLES["Approvals"]]
+    assert len(approval_calls) == 1
+    assert approval_calls[0]["filter_by_formula"] == (
+        "OR({shptNo}='SCT-0',{shptNo}='SCT-1',{shptNo}='SCT-2')"
+    )
+
+
+def test_batch_streams_ndjson(batch_client):
+    response = batch_client.post(
+        "/approval/status/batch?format=ndjson", json={"shptNos": ["SCT-0", "SCT-9"]}
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["type"] for line in lines] == ["shipment", "summary"]
+    assert lines[0]["summary"]["total"] == 2
+    assert lines[-1]["notFound"] == ["SCT-9"]
+
+
+@pytest.mark.parametrize("body", [{}, {"shptNos": "SCT-0"}, {"shptNos": []}])
+def test_batch_rejects_bad_body(batch_client, body):
+    response = batch_client.post("/approval/status/batch", json=body)
+    assert response.status_code == 400
+
+
+def test_batch_enforces_cap(batch_client, monkeypatch):
+    monkeypatch.setattr(api.app, "APPROVAL_BATCH_MAX_SHIPMENTS", 2)
+    response = batch_client.post(
+        "/approval/status/batch", json={"shptNos": ["A", "B", "C"]}
+    )
+    assert response.status_code == 400
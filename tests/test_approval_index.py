@@ -0,0 +1,146 @@
+"""
+Unit tests for api/approval_index.py, /approval/summary and /approval/urgent.
+"""
+
+from datetime import datetime, timedelta
+
+from api.airtable_locked_config import TABLES
+from api.approval_index import ApprovalDeadlineIndex
+from api.utils import DUBAI_TZ, classify_priority, days_until_epoch
+
+NOW = 1_767_000_000.0
+DAY = 86400.0
+
+
+def _row(key, days, status="PENDING", approval_type="FANR"):
+    return {
+        "approvalKey": key,
+        "shptNo": f"SCT-{key}",
+        "approvalType": approval_type,
+        "status": status,
+        "dueAt": None if days is None else NOW + days * DAY,
+        "owner": None,
+    }
+
+
+ROWS = [
+    _row("a", 20),
+    _row("b", -2),
+    _row("c", 4.9),
+    _row("d", 12, approval_type="MOIAT"),
+    _row("e", 1, status="APPROVED"),
+    _row("f", None),
+    _row("g", 0.5),
+]
+
+
+class CountingLoader:
+    def __init__(self, rows):
+        self.rows = rows
+        self.loads = 0
+
+    def __call__(self, client):
+        self.loads += 1
+        return list(self.rows)
+
+
+def _index(rows=ROWS, **kwargs):
+    loader = CountingLoader(rows)
+    client = object()
+    clock = kwargs.pop("clock", lambda: NOW)
+    return ApprovalDeadlineIndex(lambda: client, loader, clock=clock, **kwargs), loader
+
+
+class TestApprovalDeadlineIndex:
+    """Test bucket bisection, top-N and refresh."""
+
+    def test_buckets_match_classify_priority(self):
+        index, _ = _index()
+        expected = {"overdue": 0, "d5": 0, "d15": 0}
+        names = {"OVERDUE": "overdue", "CRITICAL": "d5", "HIGH": "d15"}
+        for row in ROWS:
+            if row["status"] == "PENDING" and row["dueAt"] is not None:
+                priority = classify_priority(days_until_epoch(row["dueAt"], NOW))
+                if priority in names:
+                    expected[names[priority]] += 1
+
+        assert index.buckets() == expected == {"overdue": 1, "d5": 2, "d15": 1}
+        assert index.buckets("MOIAT") == {"overdue": 0, "d5": 0, "d15": 1}
+        assert index.buckets("NONE") == {"overdue": 0, "d5": 0, "d15": 0}
+
+    def test_rounding_edges_match_days_until(self):
+        rows = [_row(str(i), offset / DAY) for i, offset in enumerate((-433, -431, 5 * DAY + 431))]
+        index, _ = _index(rows)
+        priorities = [classify_priority(days_until_epoch(r["dueAt"], NOW)) for r in rows]
+
+        assert priorities == ["OVERDUE", "CRITICAL", "CRITICAL"]
+        assert index.buckets() == {"overdue": 1, "d5": 2, "d15": 0}
+
+    def test_urgent_returns_earliest_due_first(self):
+        index, _ = _index()
+
+        assert [r["approvalKey"] for r in index.urgent(3)] == ["b", "g", "c"]
+        assert [r["approvalKey"] for r in index.urgent(5, "FANR")] == ["b", "g", "c", "a"]
+
+    def test_snapshot_reloads_when_stale(self):
+        now = {"t": NOW}
+        index, loader = _index(clock=lambda: now["t"], ttl_seconds=60, background_refresh=False)
+
+        index.urgent(1)
+        index.buckets()
+        assert loader.loads == 1
+
+        now["t"] += 61
+        index.urgent(1)
+        assert loader.loads == 2
+
+
+class TestApprovalEndpoints:
+    """Test /approval/summary and /approval/urgent served from the index."""
+
+    def _mock_approvals(self, mock_client):
+        now = datetime.now(DUBAI_TZ)
+        mock_client.records[TABLES["Approvals"]] = [
+            {
+                "id": f"rec{i}",
+                "fields": {
+                    "approvalKey": f"K{i}",
+                    "shptNo": f"SCT-{i}",
+                    "approvalType": approval_type,
+                    "status": status,
+                    "dueAt": (now + timedelta(days=days)).isoformat(),
+                },
+            }
+            for i, (approval_type, status, days) in enumerate([
+                ("FANR", "PENDING", 30.5),
+                ("FANR", "PENDING", -1.5),
+                ("MOIAT", "PENDING", 2.5),
+                ("MOIAT", "APPROVED", 1.5),
+            ])
+        ]
+
+    def test_summary_counts(self, client, mock_airtable_client):
+        self._mock_approvals(mock_airtable_client)
+
+        data = client.get("/approval/summary").get_json()
+
+        assert data["summary"] == {
+            "total": 4, "pending": 3, "approved": 1, "rejected": 0, "expired": 0,
+        }
+        assert data["byType"]["MOIAT"]["approved"] == 1
+        assert data["critical"] == {"overdue": 1, "d5": 1, "d15": 0}
+
+    def test_urgent_top_n_uses_one_load(self, client, mock_airtable_client):
+        self._mock_approvals(mock_airtable_client)
+
+        first = client.get("/approval/urgent?limit=2").get_json()
+        moiat = client.get("/approval/urgent?type=MOIAT").get_json()
+
+        assert [a["approvalKey"] for a in first["approvals"]] == ["K1", "K2"]
+        assert [a["priority"] for a in first["approvals"]] == ["OVERDUE", "CRITICAL"]
+        assert [a["approvalKey"] for a in moiat["approvals"]] == ["K2"]
+        approval_calls = [t for t, _ in mock_airtable_client.calls if t == TABLES["Approvals"]]
+        assert len(approval_calls) == 1
+
+    def test_urgent_rejects_bad_limit(self, client, mock_airtable_client):
+        assert client.get("/approval/urgent?limit=0").status_code == 400
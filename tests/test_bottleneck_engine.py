@@ -0,0 +1,216 @@
+"""
+Unit tests for api/bottleneck_engine.py, api/reference_data.py and
+GET /bottleneck/summary.
+"""
+
+import random
+
+from api.airtable_locked_config import TABLES
+from api.bottleneck_engine import _BottleneckSnapshot
+from api.reference_data import ReferenceData
+
+NOW = 1_767_000_000.0
+HOUR = 3600.0
+
+CODES = {
+    "FANR_PENDING": {"category": "APPROVAL", "description": "FANR", "riskDefault": "HIGH", "slaHours": 72},
+    "CUSTOMS_HOLD": {"category": "CUSTOMS", "description": "Hold", "riskDefault": "MEDIUM", "slaHours": 48},
+}
+
+
+def _brute_force(rows, now, code_map):
+    """Per-row algorithm the engine replaces."""
+    by_code, by_category = {}, {}
+    aging = {"under24h": 0, "under48h": 0, "under72h": 0, "over72h": 0}
+    for code, since in rows:
+        stats = by_code.setdefault(code, {"count": 0, "total": 0.0})
+        stats["count"] += 1
+        if since is not None:
+            hours = round((now - since) / HOUR, 2)
+            stats["total"] += hours
+            if hours < 24:
+                aging["under24h"] += 1
+            elif hours < 48:
+                aging["under48h"] += 1
+            elif hours < 72:
+                aging["under72h"] += 1
+            else:
+                aging["over72h"] += 1
+        category = code_map.get(code, {}).get("category", "UNKNOWN")
+        by_category[category] = by_category.get(category, 0) + 1
+    averages = {code: round(s["total"] / s["count"], 2) for code, s in by_code.items()}
+    return aging, by_category, averages
+
+
+class TestBottleneckSnapshot:
+    """Engine output matches the per-row computation."""
+
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        rows = [
+            (rng.choice(["FANR_PENDING", "CUSTOMS_HOLD", "OTHER"]),
+             None if rng.random() < 0.1 else NOW - rng.uniform(0, 120) * HOUR)
+            for _ in range(500)
+        ]
+        # Rows right at the rounded bucket edges
+        rows += [("FANR_PENDING", NOW - 24 * HOUR + 17), ("FANR_PENDING", NOW - 24 * HOUR + 19)]
+
+        summary = _BottleneckSnapshot(rows, NOW).summary(NOW, CODES.get)
+        aging, by_category, averages = _brute_force(rows, NOW, CODES)
+
+        assert summary["aging"] == aging
+        assert summary["byCategory"] == by_category
+        assert summary["totalActive"] == len(rows)
+        for code, average in averages.items():
+            assert abs(summary["byCode"][code]["avgAgingHours"] - average) <= 0.01
+        assert summary["byCode"]["OTHER"]["riskLevel"] == "MEDIUM"
+        assert summary["topBottlenecks"][0]["count"] == max(
+            stats["count"] for stats in summary["byCode"].values()
+        )
+
+    def test_aging_moves_with_now(self):
+        snapshot = _BottleneckSnapshot([("FANR_PENDING", NOW - 23 * HOUR)], NOW)
+
+        assert snapshot.aging(NOW)["under24h"] == 1
+        assert snapshot.aging(NOW + 2 * HOUR)["under48h"] == 1
+        assert snapshot.aging(NOW + 50 * HOUR)["over72h"] == 1
+
+
+class TestReferenceData:
+    def test_lookup_loads_table_once(self):
+        loads = []
+        client = object()
+
+        def load(c):
+            loads.append(c)
+            return dict(CODES)
+
+        data = ReferenceData(lambda: client, {"bottleneckCodes": load})
+
+        assert data.bottleneck_code("FANR_PENDING")["slaHours"] == 72
+        assert data.bottleneck_code("NOPE") is None
+        assert data.bottleneck_code(None) is None
+        assert loads == [client]
+
+    def test_warm_loads_every_table_and_invalidate_reloads(self):
+        loads = []
+        client = object()
+        owners = {"Jane Kim": {"ownerName": "Jane Kim", "team": "Customs"}}
+
+        def loader(name, rows):
+            def load(c):
+                loads.append(name)
+                return rows
+            return load
+
+        data = ReferenceData(
+            lambda: client,
+            {"bottleneckCodes": loader("codes", CODES), "owners": loader("owners", owners)},
+        )
+        data.warm()
+
+        assert sorted(loads) == ["codes", "owners"]
+        assert data.owner("jane kim")["team"] == "Customs"
+        assert data.info()["owners"]["rows"] == 1
+
+        data.invalidate("owners")
+        data.owner("Jane Kim")
+        data.bottleneck_code("FANR_PENDING")
+        assert sorted(loads) == ["codes", "owners", "owners"]
+
+    def test_no_client_returns_none(self):
+        data = ReferenceData(lambda: None, {"owners": lambda c: {"A": {}}})
+
+        data.warm()
+        assert data.owner("A") is None
+
+    def test_failed_load_serves_last_rows(self):
+        rows = {"Jane Kim": {"ownerName": "Jane Kim", "team": "Customs"}}
+
+        def load(c):
+            if rows is None:
+                raise RuntimeError("Airtable 503")
+            return rows
+
+        client = object()
+        data = ReferenceData(lambda: client, {"owners": load}, background_refresh=False)
+        assert data.owner("Jane Kim")["team"] == "Customs"
+
+        rows = None
+        data.invalidate()
+        assert data.owner("Jane Kim")["team"] == "Customs"
+
+    def test_failed_first_load_returns_none(self):
+        def load(c):
+            raise RuntimeError("Airtable 503")
+
+        data = ReferenceData(lambda: object(), {"owners": load})
+        assert data.owner("Jane Kim") is None
+
+
+def test_document_status_uses_cached_reference_tables(client, mock_airtable_client):
+    mock_airtable_client.records[TABLES["Shipments"]] = [
+        {"id": "rec1", "fields": {"shptNo": "SCT-1", "currentBottleneckCode": "FANR_PENDING",
+                                  "riskLevel": ""}},
+    ]
+    mock_airtable_client.records[TABLES["BottleneckCodes"]] = [
+        {"id": "recC", "fields": {"code": "FANR_PENDING", "nextActionTemplate": "Chase FANR",
+                                  **CODES["FANR_PENDING"]}},
+    ]
+    mock_airtable_client.records[TABLES["Owners"]] = [
+        {"id": "recO", "fields": {"ownerName": "PMT", "team": "Project", "email": "pmt@example.com"}},
+    ]
+
+    first = client.get("/document/status/SCT-1").get_json()
+    client.get("/document/status/SCT-1")
+
+    assert first["bottleneck"]["riskLevel"] == "HIGH"
+    assert first["action"]["nextAction"] == "Chase FANR"
+    assert first["action"]["ownerContact"]["team"] == "Project"
+    tables = [table for table, _ in mock_airtable_client.calls]
+    assert tables.count(TABLES["BottleneckCodes"]) == 1
+    assert tables.count(TABLES["Owners"]) == 1
+
+
+def test_document_status_survives_reference_outage(client, mock_airtable_client, monkeypatch):
+    mock_airtable_client.records[TABLES["Shipments"]] = [
+        {"id": "rec1", "fields": {"shptNo": "S1", "currentBottleneckCode": "FANR_PENDING",
+                                  "riskLevel": "LOW"}},
+    ]
+    list_records = mock_airtable_client.list_records
+
+    def failing_reference_tables(table_id, **kwargs):
+        if table_id in (TABLES["BottleneckCodes"], TABLES["Owners"]):
+            raise RuntimeError("Airtable 503")
+        return list_records(table_id, **kwargs)
+
+    monkeypatch.setattr(mock_airtable_client, "list_records", failing_reference_tables)
+
+    response = client.get("/document/status/S1")
+
+    assert response.status_code == 200
+    packet = response.get_json()
+    assert packet["shptNo"] == "S1"
+    assert packet["bottleneck"]["code"] == "FANR_PENDING"
+
+
+def test_bottleneck_summary_endpoint(client, mock_airtable_client):
+    mock_airtable_client.records[TABLES["Shipments"]] = [
+        {"id": "rec1", "fields": {"shptNo": "SCT-1", "currentBottleneckCode": "FANR_PENDING",
+                                  "bottleneckSince": "2020-01-01T00:00:00Z"}},
+        {"id": "rec2", "fields": {"shptNo": "SCT-2", "currentBottleneckCode": "FANR_PENDING"}},
+    ]
+    mock_airtable_client.records[TABLES["BottleneckCodes"]] = [
+        {"id": "recC", "fields": {"code": "FANR_PENDING", **CODES["FANR_PENDING"]}},
+    ]
+
+    first = client.get("/bottleneck/summary").get_json()
+    client.get("/bottleneck/summary")
+
+    assert first["totalActive"] == 2
+    assert first["aging"]["over72h"] == 1
+    assert first["byCategory"] == {"APPROVAL": 2}
+    assert first["byCode"]["FANR_PENDING"]["slaHours"] == 72
+    tables = [table for table, _ in mock_airtable_client.calls]
+    assert tables.count(TABLES["Shipments"]) == 1
+    assert tables.count(TABLES["BottleneckCodes"]) == 1
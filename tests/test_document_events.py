@@ -0,0 +1,117 @@
+"""
+Tests for /document/events/{shptNo} pagination.
+"""
+
+from api.airtable_locked_config import SCHEMA_VERSION, TABLES
+
+
+def _events(count):
+    """Events one hour apart, oldest first (Airtable order is ignored)."""
+    return [
+        {
+            "id": f"recEV{i}",
+            "fields": {
+                "eventId": i,
+                "timestamp": f"2025-12-25T{i:02d}:00:00.000Z",
+                "shptNo": "SCT-0143",
+                "entityType": "DOCUMENT",
+                "toStatus": "SUBMITTED",
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def _events_call(mock_client):
+    return [kw for table, kw in mock_client.calls if table == TABLES["Events"]][-1]
+
+
+def test_events_default_page_pushes_sort_and_limit(client, mock_airtable_client):
+    """Default request asks Airtable for timestamp desc and limit+1 records."""
+    mock_airtable_client.mock_shipments_exists("SCT-0143")
+    mock_airtable_client.records[TABLES["Events"]] = _events(3)
+
+    response = client.get("/document/events/SCT-0143")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["total"] == 3
+    assert data["hasMore"] is False
+    assert data["nextCursor"] is None
+    assert data["schemaVersion"] == SCHEMA_VERSION
+    assert [e["eventId"] for e in data["events"]] == [2, 1, 0]
+
+    call = _events_call(mock_airtable_client)
+    assert call["sort"] == [{"field": "timestamp", "direction": "desc"}]
+    assert call["max_records"] == 51
+    assert call["filter_by_formula"] == "{shptNo}='SCT-0143'"
+
+
+def test_events_limit_returns_cursor(client, mock_airtable_client):
+    """A full page returns hasMore and a cursor that bounds the next query."""
+    mock_airtable_client.mock_shipments_exists("SCT-0143")
+    mock_airtable_client.records[TABLES["Events"]] = _events(3)
+
+    response = client.get("/document/events/SCT-0143?limit=2")
+    data = response.get_json()
+    assert data["total"] == 2
+    assert data["hasMore"] is True
+    assert [e["eventId"] for e in data["events"]] == [2, 1]
+
+    response = client.get(
+        f"/document/events/SCT-0143?limit=2&cursor={data['nextCursor']}"
+    )
+    assert response.status_code == 200
+    call = _events_call(mock_airtable_client)
+    assert call["max_records"] == 3
+    assert call["filter_by_formula"] == (
+        "AND({shptNo}='SCT-0143', "
+        "IS_BEFORE({timestamp}, '2025-12-25T01:00:00.000Z'))"
+    )
+
+
+def test_events_page_ending_undated_has_no_more(client, mock_airtable_client):
+    """hasMore is never true without a cursor to continue from."""
+    mock_airtable_client.mock_shipments_exists("SCT-0143")
+    undated = _events(3)
+    for record in undated[:2]:
+        del record["fields"]["timestamp"]
+    mock_airtable_client.records[TABLES["Events"]] = undated
+
+    data = client.get("/document/events/SCT-0143?limit=2").get_json()
+
+    assert data["total"] == 2
+    assert data["events"][0]["eventId"] == 2
+    assert data["hasMore"] is False
+    assert data["nextCursor"] is None
+
+
+def test_events_since_filter(client, mock_airtable_client):
+    """since is converted to a UTC lower bound in the formula."""
+    mock_airtable_client.mock_shipments_exists("SCT-0143")
+
+    response = client.get(
+        "/document/events/SCT-0143?since=2025-12-25T08:00:00%2B04:00"
+    )
+    assert response.status_code == 200
+    call = _events_call(mock_airtable_client)
+    assert "NOT(IS_BEFORE({timestamp}, '2025-12-25T04:00:00.000Z'))" in (
+        call["filter_by_formula"]
+    )
+
+
+def test_events_invalid_params(client, mock_airtable_client):
+    """Bad limit, cursor, or since return 400."""
+    mock_airtable_client.mock_shipments_exists("SCT-0143")
+
+    for query in ["limit=0", "limit=101", "limit=abc", "cursor=@@@", "since=soon"]:
+        response = client.get(f"/document/events/SCT-0143?{query}")
+        assert response.status_code == 400, query
+        assert response.get_json()["status"] == "bad_request"
+
+
+def test_events_shipment_not_found(client, mock_airtable_client):
+    """Unknown shipment returns 404."""
+    mock_airtable_client.mock_shipments_empty()
+
+    response = client.get("/document/events/SCT-9999")
+    assert response.status_code == 404
@@ -0,0 +1,105 @@
+"""
+Unit tests for api/ingest_dedup.py and dedup in POST /ingest/events.
+"""
+
+import pytest
+
+import api.app
+from api.ingest_dedup import RecentKeyCache, collapse_batch, natural_key
+
+
+def _event(shpt_no="SCT-0143", ts="2025-12-24T09:00:00+04:00", **fields):
+    return {"timestamp": ts, "shptNo": shpt_no, **fields}
+
+
+class TestCollapseBatch:
+    """Test in-batch natural key merge."""
+
+    def test_offsets_of_same_instant_share_key(self):
+        assert natural_key(_event(ts="2025-12-24T09:00:00+04:00")) == natural_key(
+            _event(ts="2025-12-24T05:00:00.000Z")
+        )
+
+    def test_last_write_wins_with_field_merge(self):
+        events = [
+            _event(toStatus="SUBMITTED", remarks="first"),
+            _event("SCT-0144"),
+            _event(ts="2025-12-24T05:00:00Z", toStatus="APPROVED"),
+        ]
+
+        unique, collapsed = collapse_batch(events)
+
+        assert collapsed == 1
+        assert [e["shptNo"] for e in unique] == ["SCT-0143", "SCT-0144"]
+        assert unique[0]["toStatus"] == "APPROVED"
+        assert unique[0]["remarks"] == "first"
+        assert unique[0]["timestamp"] == "2025-12-24T05:00:00Z"
+
+
+class TestRecentKeyCache:
+    """Test cross-batch suppression window."""
+
+    def test_identical_committed_event_is_dropped(self, fake_clock):
+        cache = RecentKeyCache(clock=fake_clock)
+        cache.remember([_event(toStatus="SUBMITTED")])
+
+        kept, dropped = cache.filter(
+            [_event(toStatus="SUBMITTED"), _event(toStatus="APPROVED"), _event("SCT-9")]
+        )
+
+        assert dropped == 1
+        assert [e.get("toStatus") for e in kept] == ["APPROVED", None]
+
+    def test_entries_expire(self, fake_clock):
+        cache = RecentKeyCache(ttl_seconds=60, clock=fake_clock)
+        cache.remember([_event()])
+
+        fake_clock.now += 61
+        assert not cache.is_duplicate(_event())
+
+    def test_bloom_rotation_keeps_window(self, fake_clock):
+        cache = RecentKeyCache(ttl_seconds=60, clock=fake_clock)
+        cache.remember([_event("A")])
+        fake_clock.now += 59
+        cache.remember([_event("B")])
+        fake_clock.now += 2  # rotation happens on next remember
+        cache.remember([_event("C")])
+
+        assert cache.is_duplicate(_event("B"))
+        assert not cache.is_duplicate(_event("A"))
+
+    def test_memory_cap(self, fake_clock):
+        cache = RecentKeyCache(max_entries=2, clock=fake_clock)
+        cache.remember([_event("A"), _event("B"), _event("C")])
+
+        assert len(cache) == 2
+        assert not cache.is_duplicate(_event("A"))
+
+
+class TestIngestDedupEndpoint:
+    """Test deduplicated counts reported by POST /ingest/events."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self, monkeypatch):
+        monkeypatch.setattr(api.app, "recent_event_keys", RecentKeyCache())
+
+    def test_reports_in_batch_and_recent_counts(self, client, mock_airtable_client):
+        calls = []
+        original = mock_airtable_client.upsert_records
+
+        def recording_upsert(table_id, records_fields, **kwargs):
+            calls.append(list(records_fields))
+            return original(table_id, records_fields, **kwargs)
+
+        mock_airtable_client.upsert_records = recording_upsert
+
+        payload = {"events": [_event(), _event(), _event("SCT-0144")]}
+        first = client.post("/ingest/events", json=payload).get_json()
+        second = client.post("/ingest/events", json=payload).get_json()
+
+        assert first["deduplicated"] == 1
+        assert first["ingested"] == 2
+        assert second["deduplicated"] == 3
+        assert second["deduplication"] == {"inBatch": 1, "recent": 2}
+        assert second["ingested"] == 0
+        assert len(calls) == 1
@@ -0,0 +1,232 @@
+"""
+Unit tests for api/ingest_journal.py and journaled IngestQueue recovery.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from api.ingest_journal import IngestJournal
+from api.ingest_queue import IngestQueue
+from tests.test_ingest_queue import RecordingClient, _events
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "ingest.journal")
+
+
+def _queue(client, journal):
+    return IngestQueue(
+        lambda: client,
+        "tblEVENTS",
+        ["timestamp", "shptNo"],
+        autostart=False,
+        journal=journal,
+    )
+
+
+class TestIngestJournal:
+    """Test record framing, replay, and compaction."""
+
+    def test_replay_applies_outcomes(self, journal_path):
+        journal = IngestJournal(journal_path, fsync=False)
+        journal.append_batch("h1", "B1", "RPA", _events(3))
+        journal.append_outcomes({"h1": [(0, "committed"), (2, "failed")]})
+        journal.close()
+
+        batches = IngestJournal(journal_path, fsync=False).replay()
+
+        assert len(batches) == 1
+        assert batches[0].batch_id == "B1"
+        assert batches[0].resolved == {0: "committed", 2: "failed"}
+        assert [index for index, _ in batches[0].unresolved()] == [1]
+
+    def test_torn_tail_is_truncated(self, journal_path):
+        journal = IngestJournal(journal_path, fsync=False)
+        journal.append_batch("h1", "B1", "RPA", _events(2))
+        journal.close()
+        intact = os.path.getsize(journal_path)
+
+        with open(journal_path, "ab") as fh:
+            fh.write(b"\x00\x00\x01\x00garbage")
+
+        reopened = IngestJournal(journal_path, fsync=False)
+        assert os.path.getsize(journal_path) == intact
+        assert len(reopened.replay()) == 1
+
+    def test_corrupt_record_stops_replay(self, journal_path):
+        journal = IngestJournal(journal_path, fsync=False)
+        journal.append_batch("h1", "B1", "RPA", _events(1))
+        journal.append_batch("h2", "B2", "RPA", _events(1))
+        journal.close()
+
+        with open(journal_path, "r+b") as fh:
+            fh.seek(-2, os.SEEK_END)
+            fh.write(b"!!")
+
+        handles = [b.handle for b in IngestJournal(journal_path, fsync=False).replay()]
+        assert handles == ["h1"]
+
+    def test_sync_skips_covered_sequence(self, journal_path, monkeypatch):
+        journal = IngestJournal(journal_path)
+        calls = []
+        monkeypatch.setattr(os, "fsync", lambda fd: calls.append(fd))
+
+        first = journal.append({"t": "noop"})
+        second = journal.append({"t": "noop"})
+        journal.sync(second)
+        journal.sync(first)
+
+        assert len(calls) == 1
+
+    def test_compact_drops_resolved_batches(self, journal_path):
+        journal = IngestJournal(journal_path, fsync=False)
+        journal.append_batch("h1", "B1", "RPA", _events(2))
+        journal.append_batch("h2", "B2", "RPA", _events(2))
+        journal.append_outcomes({"h1": [(0, "committed"), (1, "committed")]})
+        journal.append_outcomes({"h2": [(0, "committed")]})
+
+        journal.compact()
+
+        batches = journal.replay()
+        assert [b.handle for b in batches] == ["h2"]
+        assert batches[0].resolved == {0: "committed"}
+
+    def test_compact_keeps_open_streamed_batch(self, journal_path):
+        journal = IngestJournal(journal_path, fsync=False)
+        journal.append_batch("h1", "B1", "RPA", [], sealed=False)
+        journal.append_events("h1", 0, _events(2))
+        journal.append_outcomes({"h1": [(0, "committed"), (1, "committed")]})
+
+        journal.compact()
+        journal.append_events("h1", 2, _events(1, "LATE"))
+
+        batches = journal.replay()
+        assert [b.handle for b in batches] == ["h1"]
+        assert batches[0].unresolved() == [(2, _events(1, "LATE")[0])]
+
+        journal.append_outcomes({"h1": [(2, "committed")]})
+        journal.append_seal("h1")
+        journal.compact()
+
+        assert journal.replay() == []
+
+
+    def test_concurrent_syncs_share_one_fsync(self, journal_path, monkeypatch):
+        journal = IngestJournal(journal_path)
+        release = threading.Event()
+        calls = []
+
+        def slow_fsync(fd):
+            calls.append(fd)
+            if len(calls) == 1:
+                release.wait(5)
+
+        monkeypatch.setattr(os, "fsync", slow_fsync)
+        leader = threading.Thread(target=journal.append_batch, args=("h0", "B0", "RPA", _events(1)))
+        leader.start()
+        while not calls:
+            time.sleep(0.001)
+        followers = [
+            threading.Thread(target=journal.append_batch, args=(f"h{i}", f"B{i}", "RPA", _events(1)))
+            for i in range(1, 5)
+        ]
+        for thread in followers:
+            thread.start()
+        while journal._written_seq < 5:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        # One fsync for the leader, one for everything appended during it
+        assert len(calls) == 2
+        assert len(journal.replay()) == 5
+
+    def test_writer_follows_compaction_by_another_process(self, journal_path):
+        first = IngestJournal(journal_path, fsync=False)
+        second = IngestJournal(journal_path, fsync=False)
+        first.append_batch("h1", "B1", "RPA", _events(1))
+        first.append_outcomes({"h1": [(0, "committed")]})
+
+        second.compact()
+        first.append_batch("h2", "B2", "RPA", _events(1))
+
+        assert [b.handle for b in second.replay()] == ["h2"]
+
+
+class TestJournaledQueue:
+    """Test crash recovery through IngestQueue."""
+
+    def test_recover_resends_only_unwritten_chunks(self, journal_path):
+        first_client = RecordingClient()
+        queue = _queue(first_client, IngestJournal(journal_path, fsync=False))
+        batch = queue.submit("A", "RPA", _events(25))
+        queue.drain(max_chunks=2)  # worker "dies" after two chunks
+        queue.journal.close()
+
+        second_client = RecordingClient()
+        restarted = _queue(second_client, IngestJournal(journal_path, fsync=False))
+
+        assert restarted.recover() == 5
+        restarted.drain()
+
+        assert [len(chunk) for chunk in second_client.chunks] == [5]
+        assert second_client.chunks[0][0]["shptNo"] == "SCT-20"
+        recovered = restarted.get_batch(batch.handle)
+        assert recovered.status == "completed"
+        assert recovered.outcomes[0]["recovered"] is True
+
+    def test_recover_streamed_batch_after_compaction(self, journal_path):
+        client = RecordingClient()
+        queue = _queue(client, IngestJournal(journal_path, fsync=False))
+        batch = queue.open_batch("S", "RPA")
+        queue.append(batch, _events(10, "A"))
+        queue.drain()
+        queue.journal.compact()
+        queue.append(batch, _events(3, "B"))  # process dies before the worker runs
+        queue.journal.close()
+
+        second_client = RecordingClient()
+        restarted = _queue(second_client, IngestJournal(journal_path, fsync=False))
+
+        assert restarted.recover() == 3
+        restarted.drain()
+        assert [e["shptNo"] for e in second_client.chunks[0]] == ["B-0", "B-1", "B-2"]
+        restarted.journal.compact()
+        assert restarted.journal.replay() == []
+
+    def test_recover_leaves_batches_of_live_processes(self, journal_path):
+        running = _queue(RecordingClient(), IngestJournal(journal_path, fsync=False))
+        running.submit("A", "RPA", _events(3))  # not written yet
+
+        starting = _queue(RecordingClient(), IngestJournal(journal_path, fsync=False))
+        assert starting.recover() == 0
+
+        running.journal.close()  # the process exits without writing
+        assert starting.recover() == 3
+        third = _queue(RecordingClient(), IngestJournal(journal_path, fsync=False))
+        assert third.recover() == 0
+
+    def test_write_through_marks_remaining_failed(self, journal_path):
+        client = RecordingClient(fail_on={2})
+        queue = _queue(client, IngestJournal(journal_path, fsync=False))
+
+        with pytest.raises(RuntimeError):
+            queue.write_through("A", "RPA", _events(25))
+
+        assert len(client.chunks) == 2
+        assert queue.recover() == 0
+
+    def test_compacts_when_idle(self, journal_path):
+        client = RecordingClient()
+        journal = IngestJournal(journal_path, fsync=False, compact_bytes=1)
+        queue = _queue(client, journal)
+
+        queue.submit("A", "RPA", _events(3))
+        queue.drain()
+
+        assert os.path.getsize(journal_path) == 0
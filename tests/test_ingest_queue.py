@@ -0,0 +1,335 @@
+"""
+Unit tests for api/ingest_queue.py and async POST /ingest/events.
+"""
+
+import time
+
+import pytest
+
+import api.app
+from api.airtable_client import AirtableAPIError
+from api.ingest_queue import IngestQueue
+
+
+class RecordingClient:
+    """Fake AirtableClient capturing upsert chunks."""
+
+    def __init__(self, fail_on=None):
+        self.chunks = []
+        self.fail_on = fail_on or set()
+
+    def upsert_records(self, table_id, records_fields, **kwargs):
+        self.chunks.append(list(records_fields))
+        if len(self.chunks) in self.fail_on:
+            raise RuntimeError("Airtable API error 422: INVALID_VALUE")
+        return [
+            {
+                "records": [
+                    {"id": f"rec{len(self.chunks)}_{i}", "fields": f}
+                    for i, f in enumerate(records_fields)
+                ],
+                "createdRecords": [f"rec{len(self.chunks)}_0"],
+            }
+        ]
+
+
+def _events(n, prefix="SCT"):
+    return [
+        {"timestamp": f"2025-12-25T10:{i:02d}:00+04:00", "shptNo": f"{prefix}-{i}"}
+        for i in range(n)
+    ]
+
+
+class MergeKeyCheckingClient(RecordingClient):
+    """Rejects a chunk with a repeated merge key, like Airtable"""
+
+    def upsert_records(self, table_id, records_fields, **kwargs):
+        keys = [tuple(f.get(k) for k in kwargs["fields_to_merge_on"]) for f in records_fields]
+        if len(set(keys)) != len(keys):
+            self.chunks.append(list(records_fields))
+            raise RuntimeError("Airtable API error 422: INVALID_RECORDS")
+        return super().upsert_records(table_id, records_fields, **kwargs)
+
+
+class FlakyClient(RecordingClient):
+    """Raises the given errors on the first calls, then succeeds"""
+
+    def __init__(self, errors):
+        super().__init__()
+        self.errors = list(errors)
+
+    def upsert_records(self, table_id, records_fields, **kwargs):
+        if self.errors:
+            self.chunks.append(list(records_fields))
+            raise self.errors.pop(0)
+        return super().upsert_records(table_id, records_fields, **kwargs)
+
+
+@pytest.fixture
+def fake_client():
+    return RecordingClient()
+
+
+@pytest.fixture
+def queue(fake_client):
+    return IngestQueue(
+        lambda: fake_client, "tblEVENTS", ["timestamp", "shptNo"], autostart=False
+    )
+
+
+class TestIngestQueue:
+    """Test coalescing, outcomes, and status reporting."""
+
+    def test_coalesces_batches_into_full_chunks(self, queue, fake_client):
+        first = queue.submit("A", "RPA", _events(7, "A"))
+        second = queue.submit("B", "RPA", _events(5, "B"))
+
+        assert queue.drain() == 2
+        assert [len(chunk) for chunk in fake_client.chunks] == [10, 2]
+        assert first.status == "completed"
+        assert second.status == "completed"
+        assert second.outcomes[0]["recordId"] == "rec1_7"
+
+    def test_chunk_never_repeats_a_merge_key(self):
+        client = MergeKeyCheckingClient()
+        queue = IngestQueue(
+            lambda: client, "tblEVENTS", ["timestamp", "shptNo"], autostart=False
+        )
+        shared = {"timestamp": "2025-12-25T10:00:00+04:00", "shptNo": "SCT-1"}
+        first = queue.submit("A", "RPA", [dict(shared, toStatus="SUBMITTED"), *_events(2, "A")])
+        second = queue.submit("B", "RPA", [dict(shared, toStatus="APPROVED"), *_events(2, "B")])
+
+        queue.drain()
+
+        assert first.status == "completed"
+        assert second.status == "completed"
+        assert [len(chunk) for chunk in client.chunks] == [5, 1]
+        # The later event is written after the earlier one, so it wins
+        assert client.chunks[1] == [dict(shared, toStatus="APPROVED")]
+
+    def test_resend_after_a_deferred_update_keeps_queue_order(self):
+        client = MergeKeyCheckingClient()
+        queue = IngestQueue(
+            lambda: client, "tblEVENTS", ["timestamp", "shptNo"], autostart=False
+        )
+        shared = {"timestamp": "2025-12-25T10:00:00+04:00", "shptNo": "SCT-1"}
+        a, b = dict(shared, toStatus="SUBMITTED"), dict(shared, toStatus="APPROVED")
+        queue.submit("A", "RPA", [a])
+        queue.submit("B", "RPA", [b])
+        queue.submit("C", "RPA", [dict(a)])
+
+        assert queue.drain() == 3
+
+        # A' is not folded into A's chunk ahead of B: it is written last
+        assert client.chunks == [[a], [b], [a]]
+
+    def test_identical_in_flight_events_share_one_record(self):
+        client = MergeKeyCheckingClient()
+        committed = []
+        queue = IngestQueue(
+            lambda: client, "tblEVENTS", ["timestamp", "shptNo"],
+            autostart=False, on_committed=committed.extend,
+        )
+        event = {"timestamp": "2025-12-25T10:00:00+04:00", "shptNo": "SCT-1", "toStatus": "SUBMITTED"}
+        resend = dict(event, timestamp="2025-12-25T06:00:00.000Z")
+        first = queue.submit("A", "RPA", [event, *_events(1, "A")])
+        second = queue.submit("B", "RPA", [resend])
+
+        assert queue.drain() == 1
+
+        assert client.chunks == [[event, *_events(1, "A")]]
+        assert first.status == "completed"
+        assert second.status == "completed"
+        assert second.outcomes[0]["recordId"] == first.outcomes[0]["recordId"]
+        assert committed == [event, *_events(1, "A")]
+
+    def test_status_before_processing(self, queue):
+        batch = queue.submit("A", "RPA", _events(3))
+
+        data = batch.to_dict()
+        assert data["status"] == "queued"
+        assert data["pending"] == 3
+        assert queue.pending() == 3
+
+    def test_failed_chunk_marks_events(self, fake_client):
+        fake_client.fail_on = {1}
+        queue = IngestQueue(
+            lambda: fake_client, "tblEVENTS", ["timestamp", "shptNo"], autostart=False
+        )
+        batch = queue.submit("A", "RPA", _events(12))
+
+        queue.drain()
+
+        assert batch.status == "partial"
+        assert batch.failed == 10
+        assert batch.committed == 2
+        assert "INVALID_VALUE" in batch.outcomes[0]["error"]
+
+    def test_transient_failure_is_retried(self):
+        client = FlakyClient([AirtableAPIError("Airtable API error 502: Bad Gateway", 502)])
+        delays = []
+        queue = IngestQueue(
+            lambda: client, "tblEVENTS", ["timestamp", "shptNo"],
+            autostart=False, sleep=delays.append,
+        )
+        batch = queue.submit("A", "RPA", _events(2))
+
+        queue.drain()
+
+        assert batch.status == "completed"
+        assert len(client.chunks) == 2
+        assert delays == [queue.retry_delay]
+
+    def test_retries_are_bounded_and_skip_permanent_errors(self):
+        gateway = AirtableAPIError("Airtable API error 503: Unavailable", 503)
+        client = FlakyClient([gateway] * 5)
+        delays = []
+        queue = IngestQueue(
+            lambda: client, "tblEVENTS", ["timestamp", "shptNo"],
+            autostart=False, retries=2, sleep=delays.append,
+        )
+        transient = queue.submit("A", "RPA", _events(1))
+        queue.drain()
+
+        client = FlakyClient([AirtableAPIError("Airtable API error 422: INVALID_VALUE", 422)])
+        queue.client_provider = lambda: client
+        permanent = queue.submit("B", "RPA", _events(1, "B"))
+        queue.drain()
+
+        assert transient.status == "failed"
+        assert delays == [queue.retry_delay, queue.retry_delay * 2]
+        assert permanent.status == "failed"
+        assert len(client.chunks) == 1
+
+    def test_on_committed_sees_only_committed_chunks(self, fake_client):
+        fake_client.fail_on = {1}
+        committed = []
+        queue = IngestQueue(
+            lambda: fake_client, "tblEVENTS", ["timestamp", "shptNo"],
+            autostart=False, on_committed=committed.append,
+        )
+        queue.submit("A", "RPA", _events(12))
+
+        queue.drain()
+
+        assert [len(events) for events in committed] == [2]
+
+    def test_missing_client_fails_events(self):
+        queue = IngestQueue(
+            lambda: None, "tblEVENTS", ["timestamp", "shptNo"], autostart=False
+        )
+        batch = queue.submit("A", "RPA", _events(2))
+
+        queue.drain()
+
+        assert batch.status == "failed"
+
+    def test_background_worker_drains(self, fake_client):
+        queue = IngestQueue(
+            lambda: fake_client,
+            "tblEVENTS",
+            ["timestamp", "shptNo"],
+            linger_seconds=0.01,
+        )
+        batch = queue.submit("A", "RPA", _events(3))
+        try:
+            deadline = time.time() + 5
+            while not batch.done and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            queue.stop()
+
+        assert batch.status == "completed"
+
+    def test_retention_evicts_finished_batches(self, fake_client):
+        queue = IngestQueue(
+            lambda: fake_client,
+            "tblEVENTS",
+            ["timestamp", "shptNo"],
+            max_retained_batches=1,
+            autostart=False,
+        )
+        first = queue.submit("A", "RPA", _events(1))
+        queue.drain()
+        second = queue.submit("B", "RPA", _events(1))
+
+        assert queue.get_batch(first.handle) is None
+        assert queue.get_batch(second.handle) is second
+
+
+class TestAsyncIngestEndpoint:
+    """Test 202 mode of POST /ingest/events and batch polling."""
+
+    def test_async_ingest_returns_202_and_polls(
+        self, client, mock_airtable_client, monkeypatch
+    ):
+        queue = IngestQueue(
+            lambda: api.app.airtable_client,
+            "tblEVENTS",
+            ["timestamp", "shptNo"],
+            autostart=False,
+        )
+        monkeypatch.setattr(api.app, "ingest_queue", queue)
+        monkeypatch.setattr(api.app, "INGEST_ASYNC_WORKER", True)
+
+        response = client.post(
+            "/ingest/events?mode=async",
+            json={"batchId": "B1", "sourceSystem": "RPA", "events": _events(3)},
+        )
+        assert response.status_code == 202
+        data = response.get_json()
+        assert data["status"] == "accepted"
+        assert data["queued"] == 3
+
+        status = client.get(data["statusUrl"]).get_json()
+        assert status["status"] == "queued"
+
+        queue.drain()
+        status = client.get(data["statusUrl"]).get_json()
+        assert status["status"] == "completed"
+        assert status["committed"] == 3
+        assert [e["status"] for e in status["events"]] == ["committed"] * 3
+
+    def test_prefer_header_selects_async(
+        self, client, mock_airtable_client, monkeypatch
+    ):
+        queue = IngestQueue(
+            lambda: api.app.airtable_client,
+            "tblEVENTS",
+            ["timestamp", "shptNo"],
+            autostart=False,
+        )
+        monkeypatch.setattr(api.app, "ingest_queue", queue)
+        monkeypatch.setattr(api.app, "INGEST_ASYNC_WORKER", True)
+
+        response = client.post(
+            "/ingest/events",
+            json={"events": _events(1)},
+            headers={"Prefer": "respond-async"},
+        )
+        assert response.status_code == 202
+
+    def test_async_without_worker_is_served_synchronously(
+        self, client, mock_airtable_client, monkeypatch
+    ):
+        queue = IngestQueue(
+            lambda: api.app.airtable_client,
+            "tblEVENTS",
+            ["timestamp", "shptNo"],
+            autostart=False,
+        )
+        monkeypatch.setattr(api.app, "ingest_queue", queue)
+        monkeypatch.setattr(api.app, "INGEST_ASYNC_WORKER", False)
+
+        response = client.post(
+            "/ingest/events?mode=async",
+            json={"batchId": "B1", "sourceSystem": "RPA", "events": _events(3)},
+        )
+
+        assert response.status_code == 200
+        assert response.get_json()["status"] == "success"
+        assert queue.pending() == 0
+
+    def test_unknown_batch_returns_404(self, client):
+        response = client.get("/ingest/batches/doesnotexist")
+        assert response.status_code == 404
@@ -0,0 +1,137 @@
+"""
+Unit tests for NDJSON streaming POST /ingest/events and streamed batches.
+"""
+
+import io
+import json
+
+import pytest
+
+import api.app
+from api.app import iter_ndjson_lines
+from api.ingest_dedup import RecentKeyCache
+from api.ingest_journal import IngestJournal
+from api.ingest_queue import IngestQueue
+from tests.test_ingest_queue import RecordingClient, _events
+
+
+def _ndjson(events, extra_lines=()):
+    lines = [json.dumps(e) for e in events] + list(extra_lines)
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+@pytest.fixture
+def recording(monkeypatch, mock_airtable_client):
+    recorder = RecordingClient()
+    monkeypatch.setattr(api.app, "airtable_client", recorder)
+    monkeypatch.setattr(api.app, "recent_event_keys", RecentKeyCache())
+    queue = IngestQueue(
+        lambda: api.app.airtable_client, "tblEVENTS", ["timestamp", "shptNo"],
+        autostart=False,
+    )
+    monkeypatch.setattr(api.app, "ingest_queue", queue)
+    monkeypatch.setattr(api.app, "INGEST_ASYNC_WORKER", True)
+    return recorder
+
+
+class TestIterNdjsonLines:
+    """Test bounded line reader."""
+
+    def test_overlong_line_is_skipped(self):
+        stream = io.BytesIO(b'{"a":1}\n' + b"x" * 50 + b"\n" + b'{"b":2}')
+
+        lines = list(iter_ndjson_lines(stream, max_line_bytes=20))
+
+        assert lines == [(1, b'{"a":1}\n'), (2, None), (3, b'{"b":2}')]
+
+
+class TestNdjsonIngest:
+    """Test streamed sync and async ingest."""
+
+    def test_sync_writes_per_chunk(self, client, recording):
+        response = client.post(
+            "/ingest/events?batchId=NIGHTLY",
+            data=_ndjson(_events(23)),
+            content_type="application/x-ndjson",
+        )
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["status"] == "success"
+        assert data["batchId"] == "NIGHTLY"
+        assert data["received"] == 23
+        assert data["ingested"] == 23
+        assert [len(chunk) for chunk in recording.chunks] == [10, 10, 3]
+
+    def test_bad_lines_are_reported_and_skipped(self, client, recording):
+        body = _ndjson(_events(2), extra_lines=["not json", "[1, 2]", json.dumps({"shptNo": "X", "bogusField": 1})])
+
+        data = client.post(
+            "/ingest/events", data=body, content_type="application/x-ndjson"
+        ).get_json()
+
+        assert data["ingested"] == 2
+        assert data["rejected"] == 3
+        assert [e["line"] for e in data["errors"]] == [3, 4, 5]
+        assert data["errors"][2]["invalid_fields"] == ["bogusField"]
+
+    def test_async_returns_202_with_streamed_batch(self, client, recording):
+        response = client.post(
+            "/ingest/events?mode=async",
+            data=_ndjson(_events(12)),
+            content_type="application/x-ndjson",
+            headers={"X-Source-System": "BACKFILL"},
+        )
+
+        assert response.status_code == 202
+        data = response.get_json()
+        assert data["queued"] == 12
+        assert data["sourceSystem"] == "BACKFILL"
+
+        api.app.ingest_queue.drain()
+        status = client.get(data["statusUrl"]).get_json()
+        assert status["status"] == "completed"
+        assert status["events"] == []  # streamed batches keep failures only
+
+    def test_upstream_failure_stops_stream(self, client, recording):
+        recording.fail_on = {2}
+
+        response = client.post(
+            "/ingest/events", data=_ndjson(_events(30)),
+            content_type="application/x-ndjson",
+        )
+
+        assert response.status_code == 500
+        assert response.get_json()["ingested"] == 10
+        assert len(recording.chunks) == 2
+
+
+class TestStreamedBatch:
+    """Test open/append/seal and journal replay of streamed batches."""
+
+    def test_batch_not_done_until_sealed(self):
+        client = RecordingClient()
+        queue = IngestQueue(lambda: client, "tblEVENTS", ["timestamp", "shptNo"], autostart=False)
+        batch = queue.open_batch("S", "RPA")
+
+        queue.append(batch, _events(3))
+        queue.drain()
+        assert batch.status == "processing"
+
+        queue.seal(batch)
+        assert batch.status == "completed"
+
+    def test_journal_replays_appended_events(self, tmp_path):
+        path = str(tmp_path / "ingest.journal")
+        queue = IngestQueue(
+            lambda: RecordingClient(), "tblEVENTS", ["timestamp", "shptNo"],
+            autostart=False, journal=IngestJournal(path, fsync=False),
+        )
+        batch = queue.open_batch("S", "RPA")
+        queue.append(batch, _events(4))
+        queue.append(batch, _events(3, "B"))
+
+        replayed = IngestJournal(path, fsync=False).replay()
+
+        assert len(replayed[0].events) == 7
+        assert replayed[0].events[4]["shptNo"] == "B-0"
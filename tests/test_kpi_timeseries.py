@@ -0,0 +1,142 @@
+"""
+Unit tests for api/kpi_timeseries.py and GET /kpi/timeseries.
+"""
+
+import api.app
+from api.kpi_timeseries import KpiTimeSeries
+
+DAY = 86400
+T0 = 1_767_225_600  # 2026-01-01T00:00:00Z
+
+
+def make_store(tmp_path=None):
+    path = str(tmp_path / "kpi.sqlite") if tmp_path else ":memory:"
+    return KpiTimeSeries(path, interval_seconds=3600)
+
+
+class TestKpiTimeSeries:
+    def test_only_changes_are_stored(self):
+        store = make_store()
+        for hour in range(24):
+            store.record(T0 + hour * 3600, {"boeRate": 0.5 if hour < 12 else 0.75, "flat": 3})
+
+        info = store.info()
+        assert info["samples"] == 24
+        assert info["changePoints"] == 3  # boeRate x2, flat x1
+
+    def test_one_sample_per_slot(self):
+        store = make_store()
+
+        assert store.record(T0 + 10, {"m": 1})
+        assert not store.record(T0 + 20, {"m": 2})
+        assert not store.sample(lambda: {"m": 3}, now=T0 + 30)
+        assert store.series("m", T0, T0 + 3600, 3600) == [{"t": T0, "v": 1.0, "n": 1}]
+
+    def test_downsampling_aggregates(self):
+        store = make_store()
+        for hour in range(48):
+            store.record(T0 + hour * 3600, {"m": hour % 24})
+
+        last = store.series("m", T0, T0 + 2 * DAY, DAY, "last")
+        avg = store.series("m", T0, T0 + 2 * DAY, DAY, "avg")
+        peak = store.series("m", T0, T0 + 2 * DAY, DAY, "max")
+
+        assert [p["v"] for p in last] == [23.0, 23.0]
+        assert [p["v"] for p in avg] == [11.5, 11.5]
+        assert [p["v"] for p in peak] == [23.0, 23.0]
+        assert [p["n"] for p in last] == [24, 24]
+
+    def test_value_before_range_carries_forward(self):
+        store = make_store()
+        store.record(T0, {"m": 7})
+        store.record(T0 + 3600, {"m": 7})
+        store.record(T0 + 7200, {"m": 7})
+
+        assert store.series("m", T0 + 3600, T0 + 10800, 3600) == [
+            {"t": T0 + 3600, "v": 7.0, "n": 1},
+            {"t": T0 + 7200, "v": 7.0, "n": 1},
+        ]
+
+    def test_reopen_keeps_delta_state(self, tmp_path):
+        store = make_store(tmp_path)
+        store.record(T0, {"m": 1})
+        store.close()
+
+        reopened = make_store(tmp_path)
+        reopened.record(T0 + 3600, {"m": 1})
+
+        assert reopened.info()["changePoints"] == 1
+        assert len(reopened.series("m", T0, T0 + 7200, 3600)) == 2
+
+    def test_delta_check_sees_other_writers(self, tmp_path):
+        worker_a = make_store(tmp_path)
+        worker_a.record(T0, {"m": 1})
+        worker_b = make_store(tmp_path)  # starts after m=1 was stored
+
+        worker_a.record(T0 + 3600, {"m": 2})
+        worker_b.record(T0 + 7200, {"m": 1})
+
+        assert [p["v"] for p in worker_a.series("m", T0, T0 + 3 * 3600, 3600)] == [1.0, 2.0, 1.0]
+
+    def test_unmeasured_metric_is_not_carried_forward(self):
+        store = make_store()
+        store.record(T0, {"m": 5})
+        store.record(T0 + 3600, {"m": None})
+        store.record(T0 + 7200, {"m": 5})
+
+        assert store.series("m", T0, T0 + 3 * 3600, 3600) == [
+            {"t": T0, "v": 5.0, "n": 1},
+            {"t": T0 + 7200, "v": 5.0, "n": 1},
+        ]
+        assert store.info()["changePoints"] == 3
+
+
+def test_kpi_timeseries_endpoint(client, monkeypatch):
+    store = make_store()
+    for day in range(3):
+        store.record(T0 + day * DAY, {"boeRate": 0.1 * (day + 1)})
+    monkeypatch.setattr(api.app, "kpi_timeseries", store)
+
+    response = client.get(
+        "/kpi/timeseries?metric=boeRate&from=2026-01-01T00:00:00Z&to=2026-01-04T00:00:00Z&step=1d"
+    )
+    invalid = client.get("/kpi/timeseries?metric=nope")
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [round(p["v"], 2) for p in body["points"]] == [0.1, 0.2, 0.3]
+    assert body["stepSeconds"] == DAY
+    assert invalid.status_code == 400
+
+
+def test_kpi_timeseries_not_configured(client, monkeypatch):
+    monkeypatch.setattr(api.app, "kpi_timeseries", None)
+
+    assert client.get("/kpi/timeseries?metric=boeRate").status_code == 503
+
+
+def test_collect_kpi_metrics(mock_airtable_client):
+    mock_airtable_client.records[api.app.TABLES["Shipments"]] = [
+        {"id": "rec1", "fields": {"shptNo": "SCT-1", "riskLevel": "HIGH"}},
+    ]
+    mock_airtable_client.records[api.app.TABLES["Documents"]] = [
+        {"id": "recD", "fields": {"docType": "BOE", "status": "ISSUED"}},
+    ]
+
+    metrics = api.app.collect_kpi_metrics()
+
+    assert metrics["totalShipments"] == 1
+    assert metrics["boeRate"] == 1.0
+    assert metrics["riskHigh"] == 1
+    assert metrics["approvalsTotal"] == 0
+    assert set(metrics) == set(api.app.KPI_METRICS)
+
+
+def test_collect_kpi_metrics_marks_unavailable_sources(mock_airtable_client, monkeypatch):
+    monkeypatch.setattr(api.app.status_aggregates, "status_summary", lambda: None)
+
+    metrics = api.app.collect_kpi_metrics()
+
+    assert metrics["boeRate"] is None
+    assert metrics["riskHigh"] is None
+    assert metrics["approvalsTotal"] == 0
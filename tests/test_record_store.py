@@ -0,0 +1,194 @@
+"""
+Unit tests for api/record_store.py
+Covers typed columns, row views, and wire-format round trips.
+"""
+
+import sys
+
+import pytest
+
+from api.record_store import (
+    ColumnarTable,
+    RowView,
+    field_types_from_lock,
+)
+
+FIELD_TYPES = {
+    "shptNo": "singleLineText",
+    "riskLevel": "singleSelect",
+    "bottleneckSince": "dateTime",
+    "ocrPrecision": "number",
+    "stopFlag": "checkbox",
+}
+
+
+@pytest.fixture
+def records():
+    return [
+        {
+            "id": "rec1",
+            "fields": {
+                "shptNo": "SCT-0143",
+                "riskLevel": "HIGH",
+                "bottleneckSince": "2025-12-24T05:00:00.000Z",
+                "ocrPrecision": 98,
+                "stopFlag": True,
+            },
+        },
+        {
+            "id": "rec2",
+            "fields": {
+                "shptNo": "SCT-0144",
+                "riskLevel": "LOW",
+            },
+        },
+        {
+            "id": "rec3",
+            "fields": {
+                "shptNo": "SCT-0145",
+                "riskLevel": "HIGH",
+                "bottleneckSince": "2025-12-24T09:00:00+04:00",
+                "remarks": "late docs",
+            },
+        },
+    ]
+
+
+class TestColumnarTable:
+    """Test column typing and row access."""
+
+    def test_column_kinds_follow_schema(self, records):
+        table = ColumnarTable.from_records("Shipments", records, FIELD_TYPES)
+
+        assert len(table) == 3
+        assert table.column_kind("riskLevel") == "enum"
+        assert table.column_kind("bottleneckSince") == "epoch"
+        assert table.column_kind("ocrPrecision") == "number"
+        assert table.column_kind("stopFlag") == "flag"
+        assert table.column_kind("remarks") == "object"
+
+    def test_enum_codes_are_shared(self, records):
+        table = ColumnarTable.from_records("Shipments", records, FIELD_TYPES)
+
+        assert list(table.raw_column("riskLevel")) == [0, 1, 0]
+        assert table.enum_labels("riskLevel") == ["HIGH", "LOW"]
+
+    def test_datetimes_stored_as_epoch(self, records):
+        table = ColumnarTable.from_records("Shipments", records, FIELD_TYPES)
+
+        # Z and +04:00 forms of the same instant share one epoch value
+        epochs = table.column_values("bottleneckSince")
+        assert epochs[0] == epochs[2] == 1766552400
+        assert epochs[1] is None
+
+    def test_row_view_dict_access(self, records):
+        table = ColumnarTable.from_records("Shipments", records, FIELD_TYPES)
+        row = table.row(1)
+
+        assert isinstance(row, RowView)
+        assert row.id == "rec2"
+        assert row["shptNo"] == "SCT-0144"
+        assert row.get("bottleneckSince") is None
+        assert row.get("stopFlag", False) is False
+        assert "bottleneckSince" not in row
+        assert set(row.keys()) == {"shptNo", "riskLevel"}
+        with pytest.raises(KeyError):
+            row["remarks"]
+
+    def test_row_view_has_no_dict(self, records):
+        table = ColumnarTable.from_records("Shipments", records, FIELD_TYPES)
+
+        assert not hasattr(table.row(0), "__dict__")
+
+    def test_get_by_record_id(self, records):
+        table = ColumnarTable.from_records("Shipments", records, FIELD_TYPES)
+
+        assert table.get("rec3")["remarks"] == "late docs"
+        assert table.get("recMISSING") is None
+
+    def test_field_names_interned(self, records):
+        table = ColumnarTable.from_records("Shipments", records, FIELD_TYPES)
+
+        for name in table.field_names:
+            assert sys.intern(name) is name
+
+    def test_wire_round_trip(self, records):
+        table = ColumnarTable.from_records("Shipments", records, FIELD_TYPES)
+        wire = table.to_records()
+
+        assert wire[0] == {
+            "id": "rec1",
+            "fields": {
+                "shptNo": "SCT-0143",
+                "riskLevel": "HIGH",
+                "bottleneckSince": "2025-12-24T05:00:00.000Z",
+                "ocrPrecision": 98,
+                "stopFlag": True,
+            },
+        }
+        assert wire[1] == {
+            "id": "rec2",
+            "fields": {"shptNo": "SCT-0144", "riskLevel": "LOW"},
+        }
+        assert wire[2]["fields"]["bottleneckSince"] == "2025-12-24T05:00:00.000Z"
+
+    def test_milliseconds_round_trip(self):
+        table = ColumnarTable.from_records(
+            "Shipments",
+            [{"id": "rec1", "fields": {"bottleneckSince": "2025-12-24T05:00:00.123Z"}}],
+            FIELD_TYPES,
+        )
+
+        assert table.column_values("bottleneckSince") == [1766552400.123]
+        assert table.to_records()[0]["fields"]["bottleneckSince"] == "2025-12-24T05:00:00.123Z"
+
+    def test_date_fields_round_trip_as_dates(self):
+        table = ColumnarTable.from_records(
+            "Approvals",
+            [{"id": "rec1", "fields": {"dueDate": "2025-12-24"}}],
+            {"dueDate": "date"},
+        )
+
+        assert table.column_kind("dueDate") == "epoch"
+        assert table.column_values("dueDate") == [1766534400]
+        assert table.to_records()[0]["fields"]["dueDate"] == "2025-12-24"
+
+    def test_unexpected_value_demotes_column(self):
+        table = ColumnarTable.from_records(
+            "Shipments",
+            [
+                {"id": "rec1", "fields": {"riskLevel": "HIGH"}},
+                {"id": "rec2", "fields": {"riskLevel": ["HIGH", "LOW"]}},
+            ],
+            FIELD_TYPES,
+        )
+
+        assert table.column_kind("riskLevel") == "object"
+        assert table.column_values("riskLevel") == ["HIGH", ["HIGH", "LOW"]]
+
+    def test_unparseable_datetime_kept_as_text(self):
+        table = ColumnarTable.from_records(
+            "Shipments",
+            [{"id": "rec1", "fields": {"bottleneckSince": "soon"}}],
+            FIELD_TYPES,
+        )
+
+        assert table.to_records()[0]["fields"]["bottleneckSince"] == "soon"
+
+
+class TestSchemaLock:
+    """Test field types read from the schema lock."""
+
+    def test_field_types_from_lock(self):
+        lock = {
+            "tables": {
+                "Shipments": {
+                    "fields": {"shptNo": {"type": "singleLineText"}},
+                },
+                "Gone": {"missing": True},
+            }
+        }
+
+        assert field_types_from_lock(lock) == {
+            "Shipments": {"shptNo": "singleLineText"}
+        }
@@ -0,0 +1,122 @@
+"""
+Unit tests for api/replica.py and the replica read path in api/app.py.
+"""
+
+import pytest
+
+import api.app
+from api.airtable_locked_config import FIELD_IDS, TABLES
+from api.replica import AirtableReplica
+
+LOCK_PATH = "api/airtable_schema.lock.json"
+SHPT_NO = FIELD_IDS["Shipments"]["shptNo"]
+SITE = FIELD_IDS["Shipments"]["site"]
+
+
+@pytest.fixture
+def fake_clock(fake_clock):
+    """FakeClock at 2026-01-01 00:00 Dubai (sync formulas are dated)"""
+    fake_clock.now = 1_767_225_600.0
+    return fake_clock
+
+
+class PagedClient:
+    """Returns queued responses per table and records formulas"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.formulas = []
+
+    def list_records(self, table_id, **kwargs):
+        self.formulas.append(kwargs.get("filter_by_formula"))
+        return self.responses[table_id].pop(0)
+
+
+def make_replica(clock, path=":memory:"):
+    return AirtableReplica.from_lock_file(path, LOCK_PATH, clock=clock)
+
+
+class TestAirtableReplica:
+    def test_schema_and_indexes_from_lock(self, fake_clock):
+        replica = make_replica(fake_clock)
+
+        assert set(replica.tables) == set(TABLES)
+        indexes = {
+            row[0] for row in replica._db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+        assert "ix_Shipments_shptNo" in indexes
+        assert "ix_Approvals_dueAt" in indexes
+        assert "ix_BottleneckCodes_code" in indexes
+
+    def test_full_then_incremental_sync(self, fake_clock):
+        replica = make_replica(fake_clock)
+        client = PagedClient({TABLES["Shipments"]: [
+            [{"id": "rec1", "fields": {SHPT_NO: "SCT-1", SITE: "DAS"}},
+             {"id": "rec2", "fields": {SHPT_NO: "SCT-2"}}],
+            [{"id": "rec2", "fields": {SHPT_NO: "SCT-2", SITE: "MIR"}}],
+            [{"id": "rec2", "fields": {SHPT_NO: "SCT-2", SITE: "MIR"}}],
+        ]})
+
+        first = replica.sync_table(client, "Shipments")
+        fake_clock.now += 30
+        second = replica.sync_table(client, "Shipments")
+        third = replica.sync_table(client, "Shipments", full=True)
+
+        assert first == {"table": "Shipments", "fetched": 2, "deleted": 0, "full": True}
+        assert second["full"] is False
+        assert client.formulas[0] is None
+        assert client.formulas[1].startswith("IS_AFTER(LAST_MODIFIED_TIME(), '2025-12-31T23:59:00")
+        assert third["deleted"] == 1
+        assert replica.records("Shipments") == [
+            {"id": "rec2", "fields": {"shptNo": "SCT-2", "site": "MIR"}}
+        ]
+
+    def test_equality_filters_and_json_values(self, fake_clock):
+        replica = make_replica(fake_clock)
+        client = PagedClient({TABLES["Shipments"]: [[
+            {"id": "rec1", "fields": {"shptNo": "SCT-1", "site": ["DAS", "MIR"]}},
+            {"id": "rec2", "fields": {"shptNo": "SCT-2", "site": "AGI"}},
+        ]]})
+        replica.sync_table(client, "Shipments")
+
+        assert replica.records("Shipments", {"shptNo": "SCT-1"})[0]["fields"]["site"] == ["DAS", "MIR"]
+        assert len(replica.records("Shipments", limit=1)) == 1
+
+    def test_freshness(self, fake_clock):
+        replica = make_replica(fake_clock)
+        assert not replica.is_fresh("Shipments", 120)
+
+        replica.sync_table(PagedClient({TABLES["Shipments"]: [[]]}), "Shipments")
+        assert replica.is_fresh("Shipments", 120)
+
+        fake_clock.now += 121
+        assert not replica.is_fresh("Shipments", 120)
+
+    def test_reopen_keeps_sync_state(self, tmp_path, fake_clock):
+        path = str(tmp_path / "replica.sqlite")
+        replica = make_replica(fake_clock, path)
+        replica.sync_table(PagedClient({TABLES["Sites"]: [[{"id": "recS", "fields": {"siteCode": "DAS"}}]]}), "Sites")
+        replica.close()
+
+        reopened = make_replica(fake_clock, path)
+
+        assert reopened.info()["tables"]["Sites"]["rows"] == 1
+        assert reopened.records("Sites", {"siteCode": "DAS"})[0]["id"] == "recS"
+
+
+def test_app_reads_from_fresh_replica(mock_airtable_client, monkeypatch, fake_clock):
+    replica = make_replica(fake_clock)
+    replica.sync_table(PagedClient({TABLES["Documents"]: [[
+        {"id": "recD", "fields": {"shptNo": "SCT-1", "docType": "BOE", "status": "SUBMITTED"}},
+    ]]}), "Documents")
+    monkeypatch.setattr(api.app, "replica", replica)
+
+    fresh = api.app.get_documents_by_shpt_no("SCT-1")
+    fake_clock.now += api.app.REPLICA_MAX_AGE_SECONDS + 1
+    stale = api.app.get_documents_by_shpt_no("SCT-1")
+
+    assert fresh == [{"id": "recD", "fields": {"shptNo": "SCT-1", "docType": "BOE", "status": "SUBMITTED"}}]
+    assert stale == []
+    assert [table for table, _ in mock_airtable_client.calls] == [TABLES["Documents"]]
@@ -4,6 +4,9 @@ Covers schema loading, validation, and field suggestions.
 """
 
 import json
+import os
+import threading
+from collections import OrderedDict
 
 import pytest
 
@@ -156,3 +159,237 @@ class TestSchemaValidatorValidation:
         assert result["invalid_fields"] == ["field"]
         assert result["table_id"] is None
         assert result["suggestions"] == {}
+
+
+@pytest.fixture
+def typed_schema_lock(tmp_path):
+    """Schema lock with typed Events fields and select options."""
+    schema = {
+        "base": {"id": "appTEST123"},
+        "tables": {
+            "Events": {
+                "id": "tblEVENTS",
+                "fields": {
+                    "eventId": {"id": "fld1", "type": "autoNumber"},
+                    "timestamp": {"id": "fld2", "type": "dateTime"},
+                    "shptNo": {"id": "fld3", "type": "singleLineText"},
+                    "entityType": {
+                        "id": "fld4",
+                        "type": "singleSelect",
+                        "options": {"choices": [{"name": "DOCUMENT"}, {"name": "APPROVAL"}]},
+                    },
+                    "delayHours": {"id": "fld5", "type": "number"},
+                    "critical": {"id": "fld6", "type": "checkbox"},
+                },
+            }
+        },
+    }
+    path = tmp_path / "typed.lock.json"
+    path.write_text(json.dumps(schema))
+    return str(path)
+
+
+class TestSchemaValidatorTypes:
+    """Test compiled type checks and batch validation."""
+
+    def test_type_mismatches_reported(self, typed_schema_lock):
+        validator = SchemaValidator(lock_path=typed_schema_lock)
+
+        result = validator.validate_fields(
+            "Events",
+            {
+                "timestamp": "yesterday",
+                "shptNo": ["SCT-0143"],
+                "delayHours": "12.5",
+                "critical": "yes",
+                "eventId": 7,
+            },
+        )
+
+        assert result["valid"] is False
+        assert result["invalid_fields"] == []
+        assert result["type_errors"] == {
+            "timestamp": "expected ISO 8601 date/time",
+            "shptNo": "expected text",
+            "critical": "expected boolean",
+            "eventId": "read-only field",
+        }
+
+    def test_strict_mode_without_typecast(self, typed_schema_lock):
+        validator = SchemaValidator(lock_path=typed_schema_lock)
+        record = {"delayHours": "12.5", "entityType": "SHIPMENT"}
+
+        assert validator.validate_fields("Events", record)["valid"] is True
+        strict = validator.validate_fields("Events", record, typecast=False)
+        assert strict["type_errors"] == {
+            "delayHours": "expected number",
+            "entityType": "unknown option",
+        }
+
+    def test_none_clears_field(self, typed_schema_lock):
+        validator = SchemaValidator(lock_path=typed_schema_lock)
+
+        assert validator.validate_fields("Events", {"timestamp": None})["valid"] is True
+
+    def test_validate_batch_reports_failures_only(self, typed_schema_lock):
+        validator = SchemaValidator(lock_path=typed_schema_lock)
+        records = [
+            {"timestamp": "2025-12-24T09:00:00+04:00", "shptNo": "SCT-0143"},
+            {"timestamp": "2025-12-24T09:00:00+04:00", "shptno": "SCT-0143"},
+            "not a record",
+            {"delayHours": True},
+        ]
+
+        errors = validator.validate_batch("Events", records)
+
+        assert [e["index"] for e in errors] == [1, 2, 3]
+        assert errors[0]["invalid_fields"] == ["shptno"]
+        assert "shptNo" in errors[0]["suggestions"]["shptno"]
+        assert errors[2]["type_errors"] == {"delayHours": "expected number"}
+
+    def test_valid_fields_cached_sorted(self, typed_schema_lock):
+        validator = SchemaValidator(lock_path=typed_schema_lock)
+
+        fields = validator.get_valid_fields("Events")
+        fields.append("mutated")
+
+        assert validator.get_valid_fields("Events") == [
+            "critical", "delayHours", "entityType", "eventId", "shptNo", "timestamp",
+        ]
+
+
+class TestFieldSuggestions:
+    """Test trigram-ranked field name suggestions."""
+
+    def test_closest_field_ranked_first(self, typed_schema_lock):
+        validator = SchemaValidator(lock_path=typed_schema_lock)
+
+        suggestions = validator._suggest_fields(
+            "Events", ["timestmp", "SHPT_NO", "entity_type", "delay"]
+        )
+
+        assert suggestions["timestmp"][0] == "timestamp"
+        assert suggestions["SHPT_NO"] == ["shptNo"]
+        assert suggestions["entity_type"][0] == "entityType"
+        assert suggestions["delay"][0] == "delayHours"
+
+    def test_unrelated_name_has_no_suggestions(self, typed_schema_lock):
+        validator = SchemaValidator(lock_path=typed_schema_lock)
+
+        assert validator._suggest_fields("Events", ["xyz"]) == {}
+        assert validator._suggest_fields("Unknown", ["shptNo"]) == {}
+
+    def test_suggestions_are_cached_copies(self, typed_schema_lock):
+        validator = SchemaValidator(lock_path=typed_schema_lock)
+
+        first = validator._suggest_fields("Events", ["timestmp"])["timestmp"]
+        first.clear()
+
+        assert validator._suggest_fields("Events", ["timestmp"])["timestmp"]
+
+    def test_cache_is_only_touched_under_its_lock(self, typed_schema_lock, monkeypatch):
+        monkeypatch.setattr(schema_validator, "SUGGESTION_CACHE_SIZE", 2)
+        validator = SchemaValidator(lock_path=typed_schema_lock)
+        suggester = validator._snapshot.suggesters["Events"]
+        unlocked = []
+
+        class CheckedCache(OrderedDict):
+            def __setitem__(self, key, value):
+                unlocked.append(not suggester._cache_lock.locked())
+                super().__setitem__(key, value)
+
+            def move_to_end(self, key, last=True):
+                unlocked.append(not suggester._cache_lock.locked())
+                super().move_to_end(key, last)
+
+        suggester._cache = CheckedCache()
+        threads = [
+            threading.Thread(target=lambda: [suggester.suggest(n) for n in ("timestmp", "delay", "shpt") * 20])
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert unlocked and not any(unlocked)
+        assert len(suggester._cache) <= 2
+
+    def test_cached_result_respects_limit(self, typed_schema_lock):
+        validator = SchemaValidator(lock_path=typed_schema_lock)
+        suggester = validator._snapshot.suggesters["Events"]
+
+        assert len(suggester.suggest("entity", limit=1)) == 1
+        assert len(suggester.suggest("entity", limit=3)) > 1
+
+
+class TestSchemaValidatorReload:
+    """Test mtime/hash watching and snapshot swap."""
+
+    def _rewrite(self, path, mutate):
+        data = json.loads(open(path).read())
+        mutate(data)
+        with open(path, "w") as f:
+            f.write(json.dumps(data))
+        # Force a distinct mtime even on coarse-grained filesystems
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_reload_picks_up_new_field(self, sample_schema_lock):
+        validator = SchemaValidator(lock_path=sample_schema_lock)
+        old_hash = validator.lock_hash
+        before = validator._snapshot
+
+        self._rewrite(
+            sample_schema_lock,
+            lambda d: d["tables"]["Shipments"]["fields"].update(
+                {"eta": {"id": "fld004", "type": "dateTime"}}
+            ),
+        )
+
+        assert validator.reload() is True
+        assert validator.lock_hash != old_hash
+        assert "eta" in validator.get_valid_fields("Shipments")
+        # The previous snapshot is untouched (readers holding it stay consistent)
+        assert "eta" not in before.table_fields["Shipments"]
+
+    def test_unchanged_content_does_not_swap(self, sample_schema_lock):
+        validator = SchemaValidator(lock_path=sample_schema_lock)
+        before = validator._snapshot
+
+        self._rewrite(sample_schema_lock, lambda d: None)
+
+        assert validator.reload() is False
+        assert validator._snapshot is before
+
+    def test_broken_lock_keeps_active_snapshot(self, sample_schema_lock):
+        validator = SchemaValidator(lock_path=sample_schema_lock)
+        with open(sample_schema_lock, "w") as f:
+            f.write("{not json")
+
+        assert validator.reload(force=True) is False
+        assert validator.get_valid_fields("Shipments") == ["shptNo", "status", "vendor"]
+
+    def test_listeners_and_lock_info(self, sample_schema_lock):
+        validator = SchemaValidator(lock_path=sample_schema_lock)
+        seen = []
+        validator.on_reload(lambda v: seen.append(v.get_schema_version()))
+
+        self._rewrite(sample_schema_lock, lambda d: d.update({"generatedAt": "2026-01-01"}))
+        validator.reload()
+
+        assert seen == ["2026-01-01"]
+        info = validator.lock_info()
+        assert info["version"] == "2026-01-01"
+        assert info["reloads"] == 1
+        assert info["hash"] == validator.lock_hash
+
+    def test_maybe_reload_is_throttled(self, sample_schema_lock):
+        validator = SchemaValidator(lock_path=sample_schema_lock)
+        validator.check_interval = 3600
+
+        self._rewrite(sample_schema_lock, lambda d: d.update({"generatedAt": "x"}))
+
+        assert validator.maybe_reload() is False
+        validator.check_interval = 0
+        assert validator.maybe_reload() is True
@@ -0,0 +1,110 @@
+"""
+Unit tests for api/shipment_oracle.py and its use in per-shipment endpoints.
+"""
+
+import api.app
+from api.airtable_locked_config import TABLES
+from api.shipment_oracle import ShipmentExistenceOracle
+
+
+class ShipmentsClient:
+    """Fake client: Shipments honours the shptNo point filter."""
+
+    def __init__(self, shpt_nos):
+        self.shpt_nos = list(shpt_nos)
+        self.calls = []
+
+    def list_records(self, table_id, **kwargs):
+        self.calls.append(kwargs.get("filter_by_formula"))
+        formula = kwargs.get("filter_by_formula")
+        rows = self.shpt_nos
+        if formula:
+            rows = [s for s in rows if formula == f"{{shptNo}}='{s}'"]
+        return [{"id": f"rec{i}", "fields": {"shptNo": s}} for i, s in enumerate(rows)]
+
+
+def _oracle(client, clock, **kwargs):
+    return ShipmentExistenceOracle(
+        lambda: client,
+        TABLES["Shipments"],
+        background_refresh=False,
+        clock=clock,
+        **kwargs,
+    )
+
+
+class TestShipmentExistenceOracle:
+    """Test positive set, negative cache and client scoping."""
+
+    def test_warm_set_answers_without_upstream_reads(self, fake_clock):
+        client = ShipmentsClient(["SCT-1", "SCT-2"])
+        oracle = _oracle(client, fake_clock)
+
+        assert oracle.lookup("SCT-1") is None
+        assert oracle.refresh() == 2
+        client.calls.clear()
+
+        assert oracle.lookup("SCT-1") is True
+        assert oracle.fetch_if_exists("SCT-2", lambda: "rows") == (True, "rows")
+        assert client.calls == []
+
+    def test_unknown_id_is_negatively_cached(self, fake_clock):
+        client = ShipmentsClient(["SCT-1"])
+        oracle = _oracle(client, fake_clock, negative_ttl_seconds=60)
+        fetched = []
+
+        assert oracle.fetch_if_exists("SCT-9", lambda: fetched.append(1)) == (False, None)
+        assert oracle.lookup("SCT-9") is False
+        assert oracle.fetch_if_exists("SCT-9", lambda: fetched.append(1)) == (False, None)
+        assert len(fetched) == 1
+        assert len(client.calls) == 1
+
+        fake_clock.now += 61
+        assert oracle.lookup("SCT-9") is None
+
+    def test_point_check_adds_new_shipment_to_set(self, fake_clock):
+        client = ShipmentsClient(["SCT-1"])
+        oracle = _oracle(client, fake_clock)
+        oracle.refresh()
+        client.shpt_nos.append("SCT-NEW")
+
+        assert oracle.fetch_if_exists("SCT-NEW", lambda: []) == (True, [])
+        assert oracle.lookup("SCT-NEW") is True
+
+    def test_client_change_resets_caches(self):
+        first = ShipmentsClient(["SCT-1"])
+        current = {"client": first}
+        oracle = ShipmentExistenceOracle(
+            lambda: current["client"], TABLES["Shipments"], background_refresh=False
+        )
+        oracle.refresh()
+        assert oracle.lookup("SCT-1") is True
+
+        current["client"] = ShipmentsClient([])
+        assert oracle.lookup("SCT-1") is None
+
+
+class TestEndpointsUseOracle:
+    """Per-shipment endpoints skip the Shipments round trip on a warm cache."""
+
+    def test_approval_status_warm_cache(self, client, mock_airtable_client, monkeypatch, fake_clock):
+        mock_airtable_client.mock_shipments_exists("SCT-0143")
+        mock_airtable_client.mock_approvals_empty()
+        oracle = _oracle(mock_airtable_client, fake_clock)
+        oracle.refresh()
+        mock_airtable_client.calls.clear()
+
+        monkeypatch.setattr(api.app, "shipment_oracle", oracle)
+
+        response = client.get("/approval/status/SCT-0143")
+
+        assert response.status_code == 200
+        assert [table for table, _ in mock_airtable_client.calls] == [TABLES["Approvals"]]
+
+    def test_events_unknown_shipment_404(self, client, mock_airtable_client):
+        mock_airtable_client.mock_shipments_empty()
+
+        response = client.get("/document/events/SCT-NOPE")
+
+        assert response.status_code == 404
+        assert response.get_json()["error"] == "Shipment not found"
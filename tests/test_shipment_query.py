@@ -0,0 +1,139 @@
+"""
+Unit tests for api/shipment_query.py and GET /shipments/query.
+"""
+
+import api.app
+from api.shipment_query import ShipmentQueryIndex, _ShipmentSnapshot, _bitmap, _iter_bits
+
+SHIPMENT_TYPES = {
+    "shptNo": "singleLineText",
+    "site": "singleLineText",
+    "eta": "dateTime",
+    "riskLevel": "singleSelect",
+    "currentBottleneckCode": "singleLineText",
+    "stopFlag": "checkbox",
+}
+
+RECORDS = [
+    {"id": "rec1", "fields": {"shptNo": "SCT-1", "site": "DAS", "riskLevel": "HIGH",
+                              "currentBottleneckCode": "FANR_PENDING", "eta": "2026-01-10T00:00:00.000Z"}},
+    {"id": "rec2", "fields": {"shptNo": "SCT-2", "site": "DAS", "riskLevel": "LOW",
+                              "currentBottleneckCode": "FANR_PENDING", "eta": "2026-01-05T00:00:00.000Z"}},
+    {"id": "rec3", "fields": {"shptNo": "SCT-3", "site": "MIR", "riskLevel": "HIGH",
+                              "eta": "2026-01-20T00:00:00.000Z", "stopFlag": True}},
+    {"id": "rec4", "fields": {"shptNo": "SCT-4", "site": "das", "riskLevel": "CRITICAL",
+                              "currentBottleneckCode": "FANR_PENDING"}},
+]
+
+JAN_15 = 1_768_435_200  # 2026-01-15T00:00:00Z
+
+
+def shpt_nos(snapshot, bits):
+    return [item["shptNo"] for item in snapshot.project(bits, ["shptNo"], 100)]
+
+
+class TestShipmentSnapshot:
+    def test_bitmap_roundtrip(self):
+        assert list(_iter_bits(_bitmap([0, 9, 3, 64], 70))) == [0, 3, 9, 64]
+        assert list(_iter_bits(0)) == []
+
+    def test_predicate_intersection(self):
+        snapshot = _ShipmentSnapshot(RECORDS, SHIPMENT_TYPES, 0.0)
+
+        bits = snapshot.match({"site": ["DAS"], "riskLevel": ["high", "CRITICAL"],
+                               "currentBottleneckCode": ["FANR_PENDING"]})
+
+        assert shpt_nos(snapshot, bits) == ["SCT-1", "SCT-4"]
+        assert snapshot.match({"site": ["AGI"], "riskLevel": ["HIGH"]}) == 0
+
+    def test_empty_values_and_flags(self):
+        snapshot = _ShipmentSnapshot(RECORDS, SHIPMENT_TYPES, 0.0)
+
+        assert shpt_nos(snapshot, snapshot.match({"currentBottleneckCode": [None]})) == ["SCT-3"]
+        assert shpt_nos(snapshot, snapshot.match({"stopFlag": ["true"]})) == ["SCT-3"]
+
+    def test_unchecked_checkbox_matches_false(self):
+        # Airtable omits unchecked checkboxes from the response
+        for field_types in (SHIPMENT_TYPES, None):
+            snapshot = _ShipmentSnapshot(RECORDS, field_types, 0.0)
+
+            unchecked = snapshot.match({"stopFlag": ["false"]})
+
+            assert shpt_nos(snapshot, unchecked) == ["SCT-1", "SCT-2", "SCT-4"]
+            assert snapshot.match({"stopFlag": [None]}) == 0
+
+    def test_eta_range_excludes_undated(self):
+        snapshot = _ShipmentSnapshot(RECORDS, SHIPMENT_TYPES, 0.0)
+
+        before = snapshot.match({}, eta_before=JAN_15)
+        after = snapshot.match({"site": ["DAS"]}, eta_after=JAN_15 - 5 * 86400)
+
+        assert shpt_nos(snapshot, before) == ["SCT-1", "SCT-2"]
+        assert shpt_nos(snapshot, after) == ["SCT-1"]
+
+    def test_eta_parsed_without_field_types(self):
+        snapshot = _ShipmentSnapshot(RECORDS, None, 0.0)
+
+        assert shpt_nos(snapshot, snapshot.match({}, eta_before=JAN_15)) == ["SCT-1", "SCT-2"]
+
+    def test_projection_and_limit(self):
+        snapshot = _ShipmentSnapshot(RECORDS, SHIPMENT_TYPES, 0.0)
+
+        items = snapshot.project(snapshot.all_rows, ["shptNo", "eta", "currentBottleneckCode"], 3)
+
+        assert len(items) == 3
+        assert items[0] == {
+            "shptNo": "SCT-1",
+            "eta": "2026-01-10T04:00:00+04:00",
+            "currentBottleneckCode": "FANR_PENDING",
+        }
+        assert items[2]["currentBottleneckCode"] is None
+
+
+def test_index_loads_once_until_invalidated():
+    loads = []
+
+    def loader(client):
+        loads.append(client)
+        return RECORDS
+
+    index = ShipmentQueryIndex(lambda: "client", loader, field_types=SHIPMENT_TYPES)
+    index.snapshot()
+    index.snapshot()
+    index.invalidate()
+    index.snapshot()
+
+    assert len(loads) == 2
+    assert index.info()["rows"] == 4
+
+
+def test_shipments_query_endpoint(client, mock_airtable_client):
+    mock_airtable_client.records[api.app.TABLES["Shipments"]] = RECORDS
+
+    response = client.get(
+        "/shipments/query?site=DAS&riskLevel=HIGH,CRITICAL&bottleneck=FANR_PENDING"
+        "&fields=shptNo,riskLevel&limit=1"
+    )
+    again = client.get("/shipments/query?bottleneck=NONE&etaBefore=2026-02-01T00:00:00%2B04:00")
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body["items"] == [{"shptNo": "SCT-1", "riskLevel": "HIGH"}]
+    assert body["meta"]["total"] == 2
+    assert [item["shptNo"] for item in again.get_json()["items"]] == ["SCT-3"]
+    assert client.get("/shipments/query?stopFlag=false").get_json()["meta"]["total"] == 3
+    assert len(mock_airtable_client.calls) == 1
+
+
+def test_shipments_query_bad_requests(client, mock_airtable_client):
+    assert client.get("/shipments/query?fields=shptNo,nope").status_code == 400
+    assert client.get("/shipments/query?etaBefore=soon").status_code == 400
+    assert client.get("/shipments/query?limit=0").status_code == 400
+    assert client.get("/shipments/query?site=").status_code == 400
+    assert mock_airtable_client.calls == []
+
+
+def test_shipments_query_without_client(client, monkeypatch):
+    monkeypatch.setattr(api.app, "airtable_client", None)
+
+    assert client.get("/shipments/query?site=DAS").status_code == 503
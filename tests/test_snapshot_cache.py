@@ -0,0 +1,69 @@
+"""
+Unit tests for api/snapshot_cache.py.
+"""
+
+import threading
+import time
+
+from api.snapshot_cache import SnapshotCache
+
+
+def test_concurrent_cold_gets_build_once():
+    builds = []
+
+    def build(client):
+        builds.append(client)
+        time.sleep(0.05)
+        return {"build": len(builds)}
+
+    cache = SnapshotCache(lambda: "client", build, ttl_seconds=60)
+    start = threading.Barrier(5)
+    results = []
+
+    def worker():
+        start.wait()
+        results.append(cache.get())
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert results == [{"build": 1}] * 5
+
+
+def test_stale_snapshot_rebuilt_inline_without_background_refresh(fake_clock):
+    builds = []
+    cache = SnapshotCache(
+        lambda: "client",
+        lambda client: builds.append(client) or len(builds),
+        ttl_seconds=60,
+        background_refresh=False,
+        clock=fake_clock,
+    )
+
+    assert cache.get() == 1
+    assert cache.get() == 1
+    fake_clock.now += 60
+    assert cache.get() == 2
+
+
+def test_explicit_refresh_always_rebuilds():
+    builds = []
+    cache = SnapshotCache(
+        lambda: "client", lambda client: builds.append(client) or len(builds), ttl_seconds=60
+    )
+
+    cache.get()
+    assert cache.refresh() == 2
+
+
+def test_new_client_rebuilds():
+    clients = ["a"]
+    cache = SnapshotCache(lambda: clients[0], lambda client: client, ttl_seconds=60)
+
+    assert cache.get() == "a"
+    clients[0] = "b"
+    assert cache.get() == "b"
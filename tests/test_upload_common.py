@@ -0,0 +1,387 @@
+"""
+Unit tests for scripts/upload_common.py and diff-based shipment upload.
+"""
+
+import json
+import os
+
+import pytest
+
+from scripts.upload_common import (
+    HashManifest,
+    checkpointed_upsert,
+    content_hash,
+    diff_records,
+    fetch_snapshot,
+    hash_file,
+    hash_records,
+    iter_json_array,
+    iter_prepared,
+    iter_records,
+    load_field_types,
+)
+from scripts.upload_actions_to_airtable import prepare_action_record, upload_actions
+from scripts.upload_shipments_to_airtable import upload_shipments
+
+
+class FakeShipmentsClient:
+    """Fake AirtableClient with a Shipments snapshot and upsert capture."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.list_calls = []
+        self.upserts = []
+
+    def list_records(self, table_id, **kwargs):
+        self.list_calls.append(kwargs)
+        return [{"id": f"rec{i}", "fields": dict(f)} for i, f in enumerate(self.rows)]
+
+    def upsert_records(self, table_id, records_fields, **kwargs):
+        self.upserts.append(list(records_fields))
+        return [
+            {"records": [{"fields": f} for f in records_fields[i:i + 10]]}
+            for i in range(0, len(records_fields), 10)
+        ]
+
+
+def _checkpoint_paths(tmp_path):
+    return {
+        "checkpoint_path": str(tmp_path / "cp.json"),
+        "results_path": str(tmp_path / "results.ndjson"),
+    }
+
+
+class TestContentHash:
+    """Test normalization used for diffing."""
+
+    def test_datetime_offsets_and_whitespace_are_equal(self):
+        prepared = {"shptNo": "SCT-1", "dueAt": "2025-12-24T09:00:00+04:00", "vendor": "ACME "}
+        airtable = {"shptNo": "SCT-1", "dueAt": "2025-12-24T05:00:00.000Z", "vendor": "ACME"}
+
+        assert content_hash(prepared) == content_hash(airtable, prepared.keys())
+
+    def test_empty_values_match_missing_fields(self):
+        assert content_hash({"a": "x", "b": None, "c": "nan"}) == content_hash({"a": "x"})
+        assert content_hash({"a": 1.0}) == content_hash({"a": 1})
+
+
+    def test_number_fields_compare_as_numbers(self):
+        types = {"ocrPrecision": "number", "shptNo": "singleLineText"}
+        prepared = {"shptNo": "SCT-1", "ocrPrecision": "12"}
+        airtable = {"shptNo": "SCT-1", "ocrPrecision": 12.0}
+
+        assert content_hash(prepared, field_types=types) == content_hash(airtable, field_types=types)
+        assert content_hash({"shptNo": "12"}, field_types=types) != content_hash({"shptNo": 12.0}, field_types=types)
+
+    def test_load_field_types_reads_schema_lock(self):
+        types = load_field_types("Shipments")
+
+        assert types["stopFlag"] == "checkbox"
+        assert types["ocrPrecision"] == "number"
+        assert load_field_types("Shipments", lock_path="missing.lock.json") == {}
+
+
+class TestDiffRecords:
+    """Test new/changed/unchanged classification."""
+
+    def test_snapshot_diff_lists_changed_fields(self):
+        prepared = [
+            {"shptNo": "SCT-1", "vendor": "ACME"},
+            {"shptNo": "SCT-2", "vendor": "NEW"},
+            {"shptNo": "SCT-3", "vendor": "X"},
+        ]
+        snapshot = {
+            "SCT-1": {"shptNo": "SCT-1", "vendor": "ACME", "remarks": "ignored"},
+            "SCT-2": {"shptNo": "SCT-2", "vendor": "OLD"},
+        }
+
+        diff = diff_records(prepared, "shptNo", snapshot=snapshot)
+
+        assert [r["shptNo"] for r in diff["unchanged"]] == ["SCT-1"]
+        assert [r["shptNo"] for r in diff["changed"]] == ["SCT-2"]
+        assert [r["shptNo"] for r in diff["new"]] == ["SCT-3"]
+        assert diff["changes"] == {"SCT-2": ["vendor"]}
+
+    def test_unchecked_checkbox_matches_missing_field(self):
+        types = {"stopFlag": "checkbox"}
+        prepared = [
+            {"shptNo": "SCT-1", "stopFlag": False},
+            {"shptNo": "SCT-2", "stopFlag": "true"},
+        ]
+        # Airtable omits unchecked checkboxes
+        snapshot = {"SCT-1": {"shptNo": "SCT-1"}, "SCT-2": {"shptNo": "SCT-2"}}
+
+        diff = diff_records(prepared, "shptNo", snapshot=snapshot, field_types=types)
+
+        assert [r["shptNo"] for r in diff["unchanged"]] == ["SCT-1"]
+        assert diff["changes"] == {"SCT-2": ["stopFlag"]}
+
+    def test_manifest_diff(self):
+        record = {"shptNo": "SCT-1", "vendor": "ACME"}
+
+        diff = diff_records(
+            [record], "shptNo", manifest_hashes={"SCT-1": content_hash(record)}
+        )
+
+        assert diff["unchanged"] == [record]
+
+    def test_fetch_snapshot_projects_fields(self):
+        client = FakeShipmentsClient([{"shptNo": "SCT-1 ", "vendor": "A"}])
+
+        snapshot = fetch_snapshot(client, "tblS", "shptNo", ["vendor"])
+
+        assert client.list_calls[0]["fields"] == ["shptNo", "vendor"]
+        assert "SCT-1" in snapshot
+
+
+class TestHashManifest:
+    """Test manifest persistence and scoping."""
+
+    def test_round_trip_and_table_scope(self, tmp_path):
+        path = str(tmp_path / "m.json")
+        manifest = HashManifest(path, base_id="app1", table_id="tbl1")
+        manifest.update({"SCT-1": "abc"})
+        manifest.save()
+
+        loaded = HashManifest.load(path, base_id="app1", table_id="tbl1")
+        other = HashManifest.load(path, base_id="app1", table_id="tbl2")
+
+        assert loaded.hashes == {"SCT-1": "abc"}
+        assert loaded.is_fresh()
+        assert other.hashes == {}
+        assert not other.is_fresh()
+
+
+class TestDiffUpload:
+    """Test upload_shipments sends only changed records."""
+
+    def test_uploads_changes_then_skips_snapshot(self, tmp_path):
+        client = FakeShipmentsClient([
+            {"shptNo": "SCT-1", "vendor": "ACME"},
+            {"shptNo": "SCT-2", "vendor": "OLD"},
+        ])
+        records = [
+            {"shptNo": "SCT-1", "vendor": "ACME"},
+            {"shptNo": "SCT-2", "vendor": "NEW"},
+            {"shptNo": "SCT-3", "vendor": "X"},
+        ]
+        manifest = str(tmp_path / "shipments.json")
+        paths = _checkpoint_paths(tmp_path)
+
+        first = upload_shipments(
+            records, "pat", client=client, manifest_path=manifest, **paths
+        )
+
+        assert first["diff_source"] == "snapshot"
+        assert (first["new"], first["changed"], first["unchanged"]) == (1, 1, 1)
+        assert [r["shptNo"] for r in client.upserts[0]] == ["SCT-3", "SCT-2"]
+
+        second = upload_shipments(
+            records, "pat", client=client, manifest_path=manifest, **paths
+        )
+
+        assert second["diff_source"] == "manifest"
+        assert second["uploaded"] == 0
+        assert len(client.list_calls) == 1
+        assert len(client.upserts) == 1
+
+    def test_dry_run_reports_without_writing(self, tmp_path):
+        client = FakeShipmentsClient([{"shptNo": "SCT-1", "vendor": "OLD"}])
+        manifest = tmp_path / "shipments.json"
+
+        result = upload_shipments(
+            [{"shptNo": "SCT-1", "vendor": "NEW"}], "pat",
+            dry_run=True, client=client, manifest_path=str(manifest),
+            **_checkpoint_paths(tmp_path),
+        )
+
+        assert result["status"] == "dry_run"
+        assert result["changes"] == {"SCT-1": ["vendor"]}
+        assert client.upserts == []
+        assert not manifest.exists()
+
+
+class FlakyClient:
+    """Fake client that fails on selected upsert calls."""
+
+    def __init__(self, fail_on=()):
+        self.calls = []
+        self.fail_on = set(fail_on)
+
+    def upsert_records(self, table_id, records_fields, **kwargs):
+        self.calls.append([r["actionKey"] for r in records_fields])
+        if len(self.calls) in self.fail_on:
+            raise RuntimeError("Airtable API error 503")
+        return [{"records": [{"id": f"rec-{r['actionKey']}"} for r in records_fields]}]
+
+
+def _actions(n):
+    return [{"actionKey": f"A{i}", "shptNo": f"SCT-{i}"} for i in range(n)]
+
+
+class TestCheckpointedUpsert:
+    """Test resumable batch uploads."""
+
+    def _run(self, client, records, tmp_path, **kwargs):
+        return checkpointed_upsert(
+            client,
+            "tblA",
+            records,
+            merge_fields=["actionKey"],
+            input_hash=hash_records(records),
+            **_checkpoint_paths(tmp_path),
+            **kwargs,
+        )
+
+    def test_interrupted_run_resumes_from_checkpoint(self, tmp_path):
+        records = _actions(35)
+        flaky = FlakyClient(fail_on={3})
+
+        first = self._run(flaky, records, tmp_path)
+
+        assert first["status"] == "interrupted"
+        assert first["failed_batch"] == 2
+        assert first["uploaded"] == 20
+
+        retry = FlakyClient()
+        second = self._run(retry, records, tmp_path)
+
+        assert second["status"] == "success"
+        assert second["resumed_from"] == 2
+        assert second["uploaded"] == 35
+        assert [batch[0] for batch in retry.calls] == ["A20", "A30"]
+        assert not (tmp_path / "cp.json").exists()
+
+        lines = [json.loads(l) for l in (tmp_path / "results.ndjson").read_text().splitlines()]
+        committed = [l for l in lines if l["status"] == "committed"]
+        assert len(committed) == 35
+        assert committed[-1] == {
+            "batch": 3, "index": 34, "key": {"actionKey": "A34"},
+            "status": "committed", "recordId": "rec-A34",
+        }
+        assert sum(1 for l in lines if l["status"] == "failed") == 10
+
+    def test_changed_input_starts_over(self, tmp_path):
+        self._run(FlakyClient(fail_on={2}), _actions(30), tmp_path)
+
+        client = FlakyClient()
+        result = self._run(client, _actions(31), tmp_path)
+
+        assert result["resumed_from"] is None
+        assert len(client.calls) == 4
+
+    def test_no_resume_ignores_checkpoint(self, tmp_path):
+        records = _actions(20)
+        self._run(FlakyClient(fail_on={2}), records, tmp_path)
+
+        client = FlakyClient()
+        self._run(client, records, tmp_path, resume=False)
+
+        assert len(client.calls) == 2
+
+
+class TestStreamingReaders:
+    """Test generator-based input readers."""
+
+    def test_json_array_across_chunk_boundaries(self, tmp_path):
+        items = [
+            {"shptNo": f"SCT-{i}", "qty": i * 1.5, "tags": ["a", "b,]"], "note": "x" * i}
+            for i in range(50)
+        ] + [12345, "s", None, True]
+        path = tmp_path / "data.json"
+        path.write_text(json.dumps(items, indent=1))
+
+        for chunk_bytes in (1, 7, 4096):
+            assert list(iter_json_array(str(path), chunk_bytes)) == items
+
+    def test_json_array_is_lazy(self, tmp_path):
+        path = tmp_path / "data.json"
+        path.write_text('[{"a": 1}, {"a": 2}, oops]')
+
+        reader = iter_json_array(str(path), chunk_bytes=4)
+        assert next(reader) == {"a": 1}
+        assert next(reader) == {"a": 2}
+
+    def test_formats_detected_by_extension(self, tmp_path):
+        (tmp_path / "rows.tsv").write_text("shipment_no\tsite\nSCT-1\tDAS\n")
+        (tmp_path / "rows.csv").write_text("shipment_no,site\nSCT-2,MIR\n")
+        (tmp_path / "rows.ndjson").write_text('{"shptNo": "SCT-3"}\n\n{"shptNo": "SCT-4"}\n')
+
+        assert list(iter_records(str(tmp_path / "rows.tsv"))) == [
+            {"shipment_no": "SCT-1", "site": "DAS"}
+        ]
+        assert list(iter_records(str(tmp_path / "rows.csv"))) == [
+            {"shipment_no": "SCT-2", "site": "MIR"}
+        ]
+        assert [r["shptNo"] for r in iter_records(str(tmp_path / "rows.ndjson"))] == [
+            "SCT-3", "SCT-4"
+        ]
+
+    def test_actions_upload_streams_into_batches(self, tmp_path):
+        path = tmp_path / "rows.ndjson"
+        path.write_text("".join(
+            json.dumps({"shipment_no": f"SCT-{i}", "actionKey": f"A{i}"}) + "\n"
+            for i in range(25)
+        ) + json.dumps({"site": "DAS"}) + "\n")
+        read = []
+
+        def rows():
+            for row in iter_records(str(path)):
+                read.append(row)
+                yield row
+
+        client = FlakyClient()
+        original = client.upsert_records
+
+        def upsert(table_id, records_fields, **kwargs):
+            # first batch is sent after 10 rows, not after the whole file
+            if not client.calls:
+                assert len(read) == 10
+            return original(table_id, records_fields, **kwargs)
+
+        client.upsert_records = upsert
+        result = upload_actions(
+            rows(),
+            "pat_test",
+            False,
+            ["actionKey"],
+            input_hash=hash_file(str(path)),
+            client=client,
+            **_checkpoint_paths(tmp_path),
+        )
+
+        assert result["status"] == "success"
+        assert result["total_rows"] == 26
+        assert result["uploaded"] == 25
+        assert [len(batch) for batch in client.calls] == [10, 10, 5]
+        assert result["errors"] == ["Row 26: Missing shptNo in row: {'site': 'DAS'}"]
+
+    def test_bad_merge_field_fails_before_upload(self, tmp_path):
+        client = FlakyClient()
+
+        with pytest.raises(ValueError, match="Missing merge fields"):
+            upload_actions(
+                iter([{"shipment_no": "SCT-1"}]),
+                "pat_test",
+                False,
+                ["actionKey", "bogus"],
+                input_hash="h",
+                client=client,
+                **_checkpoint_paths(tmp_path),
+            )
+
+        assert client.calls == []
+        assert not os.path.exists(_checkpoint_paths(tmp_path)["checkpoint_path"])
+
+    def test_parallel_prepare_preserves_order(self):
+        rows = [
+            {"shipment_no": f"SCT-{i}", "site": "DAS"} if i % 9 else {"site": "MIR"}
+            for i in range(95)
+        ]
+
+        serial = list(iter_prepared(prepare_action_record, rows))
+        parallel = list(iter_prepared(prepare_action_record, iter(rows), workers=2, chunk_rows=7))
+
+        assert parallel == serial
+        assert sum(1 for ok, _ in parallel if not ok) == 11
+        assert parallel[1][1]["shptNo"] == "SCT-1"
@@ -8,11 +8,18 @@ from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 from api.utils import (
     parse_iso_any,
+    parse_iso_epoch,
+    parse_iso_epoch_batch,
+    iso_dubai_epoch,
+    days_until_epoch,
     iso_dubai,
     now_dubai,
     days_until,
     classify_priority,
     extract_field_by_id,
+    formula_any_equal,
+    parse_duration_seconds,
+    FieldExtractor,
     DUBAI_TZ,
 )
 
@@ -62,6 +69,57 @@ class TestParseIsoAny:
         assert result is None
 
 
+class TestParseIsoEpoch:
+    """Test epoch parsing fast path, fallback, and batch API"""
+
+    def test_airtable_fast_path(self):
+        """Airtable millisecond Z format parses to epoch seconds"""
+        assert parse_iso_epoch("2025-12-25T12:00:00.000Z") == 1766664000.0
+        assert parse_iso_epoch("2025-12-25T12:00:00.250Z") == 1766664000.25
+        assert parse_iso_epoch("2025-12-25T12:00:00Z") == 1766664000.0
+
+    def test_fast_path_matches_fromisoformat(self):
+        """Fast path agrees with datetime parsing across dates"""
+        for text in [
+            "2000-02-29T23:59:59.999Z",
+            "1999-12-31T00:00:00.000Z",
+            "2024-03-01T04:05:06.007Z",
+        ]:
+            expected = datetime.fromisoformat(text[:-1] + "+00:00").timestamp()
+            assert parse_iso_epoch(text) == pytest.approx(expected)
+
+    def test_offset_and_naive_fallback(self):
+        """Non-Airtable forms use the fromisoformat fallback"""
+        assert parse_iso_epoch("2025-12-25T16:00:00+04:00") == 1766664000.0
+        assert parse_iso_epoch("2025-12-25T12:00:00") == 1766664000.0
+
+    def test_invalid_returns_none(self):
+        """Invalid input returns None"""
+        assert parse_iso_epoch(None) is None
+        assert parse_iso_epoch("") is None
+        assert parse_iso_epoch("not-a-date") is None
+        assert parse_iso_epoch("2025-02-30T00:00:00.000Z") is None
+
+    def test_batch_parses_column(self):
+        """Batch API keeps positions and maps missing values to None"""
+        result = parse_iso_epoch_batch(
+            ["2025-12-25T12:00:00.000Z", None, "2025-12-25T12:00:00.000Z", "bad"]
+        )
+        assert result == [1766664000.0, None, 1766664000.0, None]
+
+    def test_iso_dubai_epoch(self):
+        """Epoch formats as Dubai ISO string"""
+        assert iso_dubai_epoch(1766664000.0) == "2025-12-25T16:00:00+04:00"
+        assert iso_dubai_epoch(None) is None
+
+    def test_days_until_epoch_matches_days_until(self):
+        """Epoch arithmetic matches datetime-based days_until"""
+        now = datetime(2025, 12, 25, 10, 0, 0, tzinfo=DUBAI_TZ)
+        due = datetime(2025, 12, 28, 16, 0, 0, tzinfo=DUBAI_TZ)
+        assert days_until_epoch(due.timestamp(), now.timestamp()) == days_until(due, now)
+        assert days_until_epoch(None, now.timestamp()) is None
+
+
 class TestIsoDubai:
     """Test datetime to ISO string conversion"""
     
@@ -179,6 +237,27 @@ class TestClassifyPriority:
         assert result == "UNKNOWN"
 
 
+class TestFormulaAnyEqual:
+    """Test OR formula building"""
+
+    def test_escapes_quotes(self):
+        assert formula_any_equal("shptNo", ["A", "B'C"]) == (
+            "OR({shptNo}='A',{shptNo}='B\\'C')"
+        )
+
+
+class TestParseDurationSeconds:
+    """Test step/duration parsing"""
+
+    def test_units_and_invalid(self):
+        assert parse_duration_seconds("300") == 300
+        assert parse_duration_seconds("15m") == 900
+        assert parse_duration_seconds("1D") == 86400
+        assert parse_duration_seconds("0") is None
+        assert parse_duration_seconds("1.5h") is None
+        assert parse_duration_seconds(None) is None
+
+
 class TestExtractFieldById:
     """Test rename-safe field extraction"""
     
@@ -247,3 +326,64 @@ class TestIntegration:
         assert days == 3.0
         assert priority == "CRITICAL"
 
+
+
+class TestFieldExtractor:
+    """Test compiled tuple extraction (field ID and name keyed responses)"""
+
+    FIELD_IDS = {"shptNo": "fldA", "status": "fldB", "dueAt": "fldC"}
+
+    def test_extract_by_field_id(self):
+        extractor = FieldExtractor(self.FIELD_IDS, ["shptNo", "status"])
+        records = [{"fields": {"fldA": "SCT-0143", "fldB": "PENDING"}}]
+
+        extract = extractor.bind(records)
+
+        assert extract(records[0]["fields"]) == ("SCT-0143", "PENDING")
+
+    def test_extract_by_field_name(self):
+        extractor = FieldExtractor(self.FIELD_IDS, ["shptNo", "status"])
+        records = [{"fields": {"shptNo": "SCT-0143", "status": "APPROVED"}}]
+
+        extract = extractor.bind(records)
+
+        assert extract(records[0]["fields"]) == ("SCT-0143", "APPROVED")
+
+    def test_missing_fields_return_none(self):
+        extractor = FieldExtractor(self.FIELD_IDS, ["shptNo", "status", "dueAt"])
+        records = [{"fields": {"fldA": "SCT-0143"}}]
+
+        extract = extractor.bind(records)
+
+        assert extract(records[0]["fields"]) == ("SCT-0143", None, None)
+        assert extract({}) == (None, None, None)
+
+    def test_fallback_to_name_when_id_missing(self):
+        extractor = FieldExtractor(self.FIELD_IDS, ["shptNo", "status"])
+        extract = extractor.bind([{"fields": {"fldA": "SCT-0143"}}])
+
+        assert extract({"fldA": "SCT-0143", "status": "PENDING"}) == (
+            "SCT-0143",
+            "PENDING",
+        )
+
+    def test_single_field_returns_tuple(self):
+        extractor = FieldExtractor(self.FIELD_IDS, ["status"])
+
+        assert extractor({"fldB": "PENDING"}) == ("PENDING",)
+        assert extractor({"status": "PENDING"}) == ("PENDING",)
+
+    def test_matches_extract_field_by_id(self):
+        names = ["shptNo", "status", "dueAt"]
+        extractor = FieldExtractor(self.FIELD_IDS, names)
+        fields = {"fldA": "SCT-0143", "status": "PENDING"}
+
+        expected = tuple(
+            extract_field_by_id(fields, self.FIELD_IDS[n], n) for n in names
+        )
+        assert extractor(fields) == expected
+
+    def test_bind_empty_response(self):
+        extractor = FieldExtractor(self.FIELD_IDS, ["shptNo"])
+
+        assert extractor.bind([])({"shptNo": "X"}) == ("X",)
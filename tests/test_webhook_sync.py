@@ -0,0 +1,200 @@
+"""
+Unit tests for api/webhook_sync.py and POST /webhooks/airtable.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+
+import api.app
+from api.airtable_locked_config import FIELD_IDS, TABLES
+from api.webhook_sync import (
+    InvalidationRegistry,
+    WebhookReceiver,
+    WebhookState,
+    collect_changes,
+    verify_signature,
+)
+
+SECRET = base64.b64encode(b"webhook-secret").decode()
+SHIPMENTS = TABLES["Shipments"]
+SHPT_NO = FIELD_IDS["Shipments"]["shptNo"]
+BOTTLENECK = FIELD_IDS["Shipments"]["currentBottleneckCode"]
+
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    digest = hmac.new(base64.b64decode(secret), body, hashlib.sha256).hexdigest()
+    return f"hmac-sha256={digest}"
+
+
+def payload(table_id, created=None, changed=None, destroyed=None):
+    return {
+        "changedTablesById": {
+            table_id: {
+                "createdRecordsById": {
+                    rec: {"cellValuesByFieldId": values} for rec, values in (created or {}).items()
+                },
+                "changedRecordsById": {
+                    rec: {"current": {"cellValuesByFieldId": values}}
+                    for rec, values in (changed or {}).items()
+                },
+                "destroyedRecordIds": destroyed or [],
+            }
+        }
+    }
+
+
+class StandInPayloads:
+    """Local stand-in for the webhook payloads endpoint"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.cursors = []
+
+    def list_webhook_payloads(self, webhook_id, cursor=None):
+        self.cursors.append(cursor)
+        return self.pages.pop(0)
+
+
+class TestVerifySignature:
+    def test_valid_and_tampered(self):
+        body = b'{"webhook":{"id":"ach1"}}'
+
+        assert verify_signature(SECRET, body, sign(body))
+        assert not verify_signature(SECRET, body + b" ", sign(body))
+        assert not verify_signature(SECRET, body, None)
+        assert not verify_signature(SECRET, body, "sha1=abc")
+
+
+class TestCollectChanges:
+    def test_merges_created_changed_destroyed(self):
+        changes = collect_changes([
+            payload(SHIPMENTS, created={"rec1": {SHPT_NO: "SCT-1"}}),
+            payload(SHIPMENTS, changed={"rec1": {BOTTLENECK: "FANR_PENDING"}}),
+            payload(SHIPMENTS, destroyed=["rec2"]),
+        ])
+
+        assert changes[SHIPMENTS] == {
+            "rec1": {SHPT_NO: "SCT-1", BOTTLENECK: "FANR_PENDING"},
+            "rec2": None,
+        }
+
+
+class TestWebhookReceiver:
+    def test_pages_and_advances_cursor(self):
+        seen = []
+        registry = InvalidationRegistry()
+        registry.register(SHIPMENTS, seen.append)
+        client = StandInPayloads([
+            {"payloads": [payload(SHIPMENTS, destroyed=["rec1"])], "cursor": 2, "mightHaveMore": True},
+            {"payloads": [payload(SHIPMENTS, destroyed=["rec2"])], "cursor": 3, "mightHaveMore": False},
+            {"payloads": [], "cursor": 3, "mightHaveMore": False},
+        ])
+        receiver = WebhookReceiver(lambda: client, registry)
+
+        result = receiver.handle("ach1")
+        receiver.handle("ach1")
+
+        assert result == {"payloads": 2, "cursor": 3, "tables": {SHIPMENTS: 2}}
+        assert client.cursors == [None, 2, 3]
+        assert seen == [{"rec1": None, "rec2": None}]
+
+    def test_unreadable_payloads_invalidate_everything(self):
+        seen = []
+        registry = InvalidationRegistry()
+        registry.register("tblA", seen.append)
+
+        class Failing:
+            def list_webhook_payloads(self, webhook_id, cursor=None):
+                raise RuntimeError("boom")
+
+        result = WebhookReceiver(lambda: Failing(), registry).handle("ach1")
+
+        assert result["fullInvalidation"] is True
+        assert len(seen) == 1
+
+
+class TestSharedState:
+    def test_cursor_is_shared_between_workers(self, tmp_path):
+        path = str(tmp_path / "webhooks.sqlite")
+        client = StandInPayloads([
+            {"payloads": [payload(SHIPMENTS, destroyed=["rec1"])], "cursor": 4, "mightHaveMore": False},
+            {"payloads": [], "cursor": 4, "mightHaveMore": False},
+        ])
+        first = WebhookReceiver(lambda: client, InvalidationRegistry(), state=WebhookState(path))
+        second = WebhookReceiver(lambda: client, InvalidationRegistry(), state=WebhookState(path))
+
+        first.handle("ach1")
+        second.handle("ach1")
+
+        assert client.cursors == [None, 4]
+        assert second.cursor("ach1") == 4
+
+    def test_change_reaches_other_workers(self, tmp_path):
+        path = str(tmp_path / "webhooks.sqlite")
+        now = [0.0]
+        own, other = [], []
+        notified = InvalidationRegistry(WebhookState(path), clock=lambda: now[0])
+        notified.register(SHIPMENTS, own.append)
+        idle = InvalidationRegistry(WebhookState(path), clock=lambda: now[0])
+        idle.register(SHIPMENTS, other.append)
+        assert idle.sync() == []
+
+        notified.apply({SHIPMENTS: {"rec1": None}})
+
+        assert idle.sync() == []  # throttled
+        now[0] += 2
+        assert idle.sync() == [SHIPMENTS]
+        assert other == [{"*": None}]
+        assert notified.sync() == []
+        assert own == [{"rec1": None}]
+
+    def test_missed_change_is_not_hidden_by_own_bump(self, tmp_path):
+        path = str(tmp_path / "webhooks.sqlite")
+        seen = []
+        registry = InvalidationRegistry(WebhookState(path))
+        registry.register(SHIPMENTS, seen.append)
+
+        WebhookState(path).bump([SHIPMENTS])
+        registry.apply({SHIPMENTS: {"rec1": None}})
+
+        assert registry.sync(force=True) == [SHIPMENTS]
+        assert seen == [{"rec1": None}, {"*": None}]
+
+
+def test_webhook_endpoint_patches_caches(client, mock_airtable_client, monkeypatch):
+    monkeypatch.setattr(api.app, "AIRTABLE_WEBHOOK_SECRET", SECRET)
+    monkeypatch.setattr(api.app, "webhook_receiver", WebhookReceiver(
+        lambda: api.app.airtable_client, api.app.cache_registry
+    ))
+    stand_in = StandInPayloads([{
+        "payloads": [
+            payload(SHIPMENTS, created={"recNew": {SHPT_NO: "SCT-NEW"}}),
+            payload(TABLES["Owners"], changed={"recO": {}}),
+        ],
+        "cursor": 5,
+        "mightHaveMore": False,
+    }])
+    mock_airtable_client.list_webhook_payloads = stand_in.list_webhook_payloads
+    mock_airtable_client.records[SHIPMENTS] = [{"id": "rec1", "fields": {"shptNo": "SCT-1"}}]
+    api.app.shipment_oracle.refresh()
+    body = json.dumps({"base": {"id": "app1"}, "webhook": {"id": "ach1"}}).encode()
+
+    rejected = client.post("/webhooks/airtable", data=body,
+                           headers={"X-Airtable-Content-MAC": sign(b"other")})
+    response = client.post("/webhooks/airtable", data=body, content_type="application/json",
+                           headers={"X-Airtable-Content-MAC": sign(body)})
+
+    assert rejected.status_code == 401
+    assert response.status_code == 200
+    assert response.get_json()["tables"] == {SHIPMENTS: 1, TABLES["Owners"]: 1}
+    assert api.app.shipment_oracle.lookup("SCT-NEW") is True
+
+
+def test_webhook_endpoint_requires_secret(client, monkeypatch):
+    monkeypatch.setattr(api.app, "AIRTABLE_WEBHOOK_SECRET", None)
+
+    response = client.post("/webhooks/airtable", json={"webhook": {"id": "ach1"}})
+
+    assert response.status_code == 503